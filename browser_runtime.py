@@ -0,0 +1,190 @@
+"""
+متصفح مشترك لتشغيل اختبارات BarberTrack كاملاً
+مطور: Full-stack Testing Engineer
+
+بدلاً من أن تشغل كل مجموعة (وكثير من الدوال المفردة) async_playwright وchromium.launch
+خاصين بها، يُشغَّل متصفح واحد طوال التشغيل ويعطي كل اختبار سياقاً جديداً معزولاً:
+    async with BrowserRuntime() as runtime:
+        async with browser_page(runtime) as page:
+            ...
+
+- browser_page / browser_session: بدون runtime يبقى السلوك القديم (تشغيل متصفح خاص وإغلاقه).
+- register_role: تسجيل دخول مرة واحدة لكل دور وحفظ storage_state، ثم تبدأ سياقات هذا الدور
+  مسجلة الدخول مباشرة. المنسق يسجل أدوار TEST_ROLES، والاختبارات تطلبها عبر role_page.
+- stats: عدد مرات التشغيل الفعلية مقابل المطلوبة، والثواني الموفرة (بزمن التشغيل المقاس).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, Awaitable, AsyncIterator
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+# حسابات الاختبار لأدوار الدخول المشتركة: الدور ← (البريد، كلمة المرور)
+TEST_ROLES = {
+    'employee': ('employee@example.com', 'testpassword'),
+    'supervisor': ('supervisor@example.com', 'testpassword'),
+    'partner': ('partner@example.com', 'testpassword'),
+    'employee@طويق': ('employee@طويق.com', 'testpassword'),
+    'supervisor@طويق': ('supervisor@طويق.com', 'testpassword'),
+    'admin@طويق': ('admin@طويق.com', 'testpassword')
+}
+
+
+class BrowserRuntime:
+    """متصفح Chromium واحد يوزع سياقات جديدة عند الطلب"""
+
+    def __init__(self, headless: bool = True, state_dir: Optional[str] = None, **launch_options):
+        self.launch_options = {'headless': headless, **launch_options}
+        # مجلد اختياري لحفظ لقطات storage_state للأدوار (تبقى في الذاكرة فقط إن لم يُحدد)
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.browser: Optional[Browser] = None
+        self._playwright = None
+        self._roles: Dict[str, Dict[str, Any]] = {}
+        # المجموعات المتزامنة تطلب المتصفح معاً: تشغيل واحد وتسجيل دخول واحد لكل دور
+        self._start_lock = asyncio.Lock()
+        self.launches = 0
+        self.launch_seconds = 0.0
+        self.launch_requests = 0
+        self.contexts = 0
+
+    async def start(self) -> 'BrowserRuntime':
+        if self.browser:
+            return self
+        async with self._start_lock:
+            if self.browser:
+                return self
+            start = time.perf_counter()
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(**self.launch_options)
+            self.launch_seconds += time.perf_counter() - start
+            self.launches += 1
+        return self
+
+    async def stop(self):
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> 'BrowserRuntime':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def acquire(self) -> Browser:
+        """المتصفح المشترك مكان تشغيل جديد (يُحسب كتشغيل موفر)"""
+        await self.start()
+        self.launch_requests += 1
+        return self.browser
+
+    def register_role(self, name: str, login: Callable[[Page], Awaitable[Any]]):
+        """دور مسجل الدخول: login(page) تُنفذ مرة واحدة عند أول سياق لهذا الدور"""
+        self._roles[name] = {'login': login, 'state': None, 'lock': asyncio.Lock()}
+
+    def has_role(self, name: str) -> bool:
+        return name in self._roles
+
+    async def new_context(self, role: Optional[str] = None, **options) -> BrowserContext:
+        """سياق جديد معزول، ببيانات دخول الدور إن حُدد"""
+        await self.start()
+        if role:
+            options.setdefault('storage_state', await self._role_state(role))
+        self.contexts += 1
+        return await self.browser.new_context(**options)
+
+    async def _role_state(self, role: str) -> Dict[str, Any]:
+        if role not in self._roles:
+            raise ValueError(f"Unknown browser role: {role} (registered: {', '.join(self._roles) or 'none'})")
+        entry = self._roles[role]
+        async with entry['lock']:
+            if entry['state'] is None:
+                context = await self.browser.new_context()
+                try:
+                    page = await context.new_page()
+                    await entry['login'](page)
+                    entry['state'] = await context.storage_state()
+                finally:
+                    await context.close()
+                if self.state_dir:
+                    self.state_dir.mkdir(parents=True, exist_ok=True)
+                    with open(self.state_dir / f"{role}.json", 'w', encoding='utf-8') as f:
+                        json.dump(entry['state'], f, ensure_ascii=False, indent=2)
+                logging.info(f"Captured storage state for browser role {role}")
+        return entry['state']
+
+    def stats(self) -> Dict[str, Any]:
+        """التشغيلات الفعلية مقابل ما كانت الاختبارات ستشغله بدون المتصفح المشترك"""
+        launch_time = self.launch_seconds / self.launches if self.launches else 0
+        saved = max(0, self.launch_requests - self.launches)
+        return {
+            'launches': self.launches,
+            'launch_requests': self.launch_requests,
+            'launch_seconds': launch_time,
+            'contexts': self.contexts,
+            'roles': list(self._roles),
+            'launches_saved': saved,
+            'seconds_saved': saved * launch_time
+        }
+
+
+def form_login(base_url: str, email: str, password: str, path: str = '/login') -> Callable[[Page], Awaitable[None]]:
+    """دالة دخول عبر نموذج /login لاستخدامها مع register_role"""
+    async def login(page: Page):
+        await page.goto(f"{base_url}{path}")
+        await page.fill('input[type="email"]', email)
+        await page.fill('input[type="password"]', password)
+        await page.click('button[type="submit"]')
+        await page.wait_for_load_state('networkidle')
+    return login
+
+
+@asynccontextmanager
+async def browser_session(runtime: Optional[BrowserRuntime] = None) -> AsyncIterator[Browser]:
+    """متصفح للاختبار: المشترك إن وُجد runtime (لا يُغلق هنا)، وإلا تشغيل خاص يُغلق عند الخروج"""
+    if runtime:
+        yield await runtime.acquire()
+        return
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        try:
+            yield browser
+        finally:
+            await browser.close()
+
+
+@asynccontextmanager
+async def browser_page(runtime: Optional[BrowserRuntime] = None, role: Optional[str] = None,
+                       **context_options) -> AsyncIterator[Page]:
+    """صفحة في سياق جديد يُغلق عند الخروج"""
+    async with browser_session(runtime) as browser:
+        if runtime:
+            context = await runtime.new_context(role=role, **context_options)
+        elif role:
+            raise ValueError(f"Browser role {role} needs a shared BrowserRuntime")
+        else:
+            context = await browser.new_context(**context_options)
+        try:
+            yield await context.new_page()
+        finally:
+            await context.close()
+
+
+@asynccontextmanager
+async def role_page(runtime: Optional[BrowserRuntime], role: str, page: Page, base_url: str) -> AsyncIterator[Page]:
+    """صفحة مسجلة الدخول بدور من TEST_ROLES: سياق جديد من لقطة الدور إن سُجل في المتصفح المشترك،
+    وإلا تسجيل الدخول بنموذج /login على الصفحة المعطاة نفسها (السلوك القديم)"""
+    if runtime and runtime.has_role(role):
+        async with browser_page(runtime, role=role) as logged_in:
+            yield logged_in
+        return
+
+    await form_login(base_url, *TEST_ROLES[role])(page)
+    yield page
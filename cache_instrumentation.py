@@ -0,0 +1,205 @@
+"""
+تتبع مصدر كل استجابة (ذاكرة، قرص، Service Worker، شبكة) عبر Chrome DevTools Protocol
+مطور: Performance Testing Specialist
+
+يسجل CdpCacheRecorder أحداث Network لكل طلب في الصفحة، ثم تقارن analyze_cache_runs
+بين التشغيل البارد (سياق جديد) والدافئ (صفحة جديدة في نفس السياق) وإعادة التحميل:
+نسبة الإصابة بعدد الطلبات وبالبايتات، والأصول الثابتة (immutable) التي جُلبت من الشبكة رغم ذلك.
+"""
+
+import re
+from typing import Dict, List, Any, Optional
+
+# مصادر تعتبر إصابة في التخزين المؤقت (لا رحلة إلى الخادم)
+CACHE_SOURCES = ('memory', 'disk', 'service_worker', 'prefetch')
+SOURCES = CACHE_SOURCES + ('revalidated', 'network')
+
+# أسماء ملفات تحتوي بصمة محتوى (hash) أو مسارات Next.js الثابتة
+FINGERPRINT_PATTERN = re.compile(
+    r'/_next/static/|[.-][0-9a-f]{8,}\.[a-z0-9]+$|[.-][A-Za-z0-9_-]{16,}\.(?:js|css|woff2?|ttf|png|jpe?g|svg|webp|avif)$'
+)
+ONE_YEAR = 31536000
+
+
+def is_immutable_asset(url: str, cache_control: str = '') -> bool:
+    """أصل لا يتغير محتواه لنفس العنوان: Cache-Control: immutable أو اسم ملف ببصمة"""
+    if 'immutable' in cache_control:
+        return True
+    path = url.split('?', 1)[0].split('#', 1)[0]
+    return bool(FINGERPRINT_PATTERN.search(path))
+
+
+def _max_age(cache_control: str) -> Optional[int]:
+    match = re.search(r'(?:s-)?max-age=(\d+)', cache_control)
+    return int(match.group(1)) if match else None
+
+
+def uncached_reason(cache_control: str) -> str:
+    """سبب مرجح لعدم تخزين أصل ثابت"""
+    if not cache_control:
+        return 'missing Cache-Control'
+    if 'no-store' in cache_control:
+        return 'no-store'
+    if 'no-cache' in cache_control:
+        return 'no-cache (revalidated every time)'
+    max_age = _max_age(cache_control)
+    if max_age is None:
+        return 'no max-age'
+    if max_age < ONE_YEAR:
+        return f'short max-age ({max_age}s)'
+    return 'cacheable but fetched from network'
+
+
+class CdpCacheRecorder:
+    """تسجيل مصدر واستهلاك البايتات لكل طلب شبكة في صفحة واحدة عبر جلسة CDP"""
+
+    def __init__(self):
+        self.session = None
+        self.requests: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    async def attach(cls, page) -> 'CdpCacheRecorder':
+        recorder = cls()
+        recorder.session = await page.context.new_cdp_session(page)
+        recorder.session.on('Network.requestWillBeSent', recorder._on_request)
+        recorder.session.on('Network.requestServedFromCache', recorder._on_served_from_cache)
+        recorder.session.on('Network.responseReceived', recorder._on_response)
+        recorder.session.on('Network.loadingFinished', recorder._on_finished)
+        recorder.session.on('Network.loadingFailed', recorder._on_failed)
+        await recorder.session.send('Network.enable')
+        await recorder.session.send('Network.setCacheDisabled', {'cacheDisabled': False})
+        return recorder
+
+    async def detach(self):
+        if self.session is not None:
+            await self.session.detach()
+            self.session = None
+
+    def _entry(self, request_id: str) -> Dict[str, Any]:
+        return self.requests.setdefault(request_id, {
+            'url': '', 'type': None, 'status': None, 'served_from_cache': False, 'from_disk_cache': False,
+            'from_service_worker': False, 'from_prefetch_cache': False, 'cache_control': '',
+            'content_length': 0, 'encoded_bytes': 0, 'failed': False
+        })
+
+    def _on_request(self, params: Dict[str, Any]):
+        entry = self._entry(params['requestId'])
+        entry['url'] = params['request']['url']
+        entry['type'] = params.get('type')
+
+    def _on_served_from_cache(self, params: Dict[str, Any]):
+        self._entry(params['requestId'])['served_from_cache'] = True
+
+    def _on_response(self, params: Dict[str, Any]):
+        entry = self._entry(params['requestId'])
+        response = params['response']
+        headers = {name.lower(): value for name, value in response.get('headers', {}).items()}
+        entry['url'] = entry['url'] or response.get('url', '')
+        entry['type'] = entry['type'] or params.get('type')
+        entry['status'] = response.get('status')
+        entry['from_disk_cache'] = response.get('fromDiskCache', False)
+        entry['from_service_worker'] = response.get('fromServiceWorker', False)
+        entry['from_prefetch_cache'] = response.get('fromPrefetchCache', False)
+        entry['cache_control'] = headers.get('cache-control', '').lower()
+        try:
+            entry['content_length'] = int(headers.get('content-length', 0))
+        except ValueError:
+            entry['content_length'] = 0
+
+    def _on_finished(self, params: Dict[str, Any]):
+        self._entry(params['requestId'])['encoded_bytes'] = params.get('encodedDataLength', 0)
+
+    def _on_failed(self, params: Dict[str, Any]):
+        self._entry(params['requestId'])['failed'] = True
+
+    @staticmethod
+    def source(entry: Dict[str, Any]) -> str:
+        """مصدر الاستجابة: memory / disk / service_worker / prefetch / revalidated (304) / network"""
+        if entry['from_service_worker']:
+            return 'service_worker'
+        if entry['from_prefetch_cache']:
+            return 'prefetch'
+        if entry['from_disk_cache']:
+            return 'disk'
+        if entry['served_from_cache']:
+            return 'memory'
+        if entry['status'] == 304:
+            return 'revalidated'
+        return 'network'
+
+    def take(self) -> List[Dict[str, Any]]:
+        """إرجاع الطلبات المكتملة منذ آخر استدعاء ثم البدء من جديد"""
+        entries = []
+        for entry in self.requests.values():
+            if entry['failed'] or entry['status'] is None or not entry['url'].startswith('http'):
+                continue
+            entries.append({**entry, 'source': self.source(entry)})
+        self.requests = {}
+        return entries
+
+
+def _summarize_run(entries: List[Dict[str, Any]], sizes: Dict[str, int]) -> Dict[str, Any]:
+    by_source = {source: 0 for source in SOURCES}
+    resource_bytes = 0
+    saved_bytes = 0
+    network_bytes = 0
+
+    for entry in entries:
+        by_source[entry['source']] += 1
+        size = sizes.get(entry['url'], 0)
+        resource_bytes += size
+        if entry['source'] == 'network':
+            network_bytes += entry['encoded_bytes']
+        else:
+            # الإصابة وإعادة التحقق (304) توفران جسم الاستجابة
+            saved_bytes += size
+            if entry['source'] == 'revalidated':
+                network_bytes += entry['encoded_bytes']
+
+    requests = len(entries)
+    hits = sum(by_source[source] for source in CACHE_SOURCES)
+    return {
+        'requests': requests,
+        'by_source': by_source,
+        'cache_hits': hits,
+        'request_hit_ratio': hits / requests * 100 if requests else 0,
+        'byte_hit_ratio': saved_bytes / resource_bytes * 100 if resource_bytes else 0,
+        'resource_bytes': resource_bytes,
+        'network_bytes': network_bytes
+    }
+
+
+def analyze_cache_runs(runs: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """مقارنة تشغيلات cold / warm / reload لمسار واحد"""
+    # حجم كل مورد = أكبر عدد بايتات شوهد له عبر الشبكة (الإصابات تسجل ~0)
+    sizes: Dict[str, int] = {}
+    for entries in runs.values():
+        for entry in entries:
+            size = max(entry['encoded_bytes'], entry['content_length'])
+            sizes[entry['url']] = max(sizes.get(entry['url'], 0), size)
+
+    summaries = {name: _summarize_run(entries, sizes) for name, entries in runs.items()}
+
+    uncached: Dict[str, Dict[str, Any]] = {}
+    for name, entries in runs.items():
+        if name == 'cold':
+            continue
+        for entry in entries:
+            if entry['source'] not in ('network', 'revalidated'):
+                continue
+            if not is_immutable_asset(entry['url'], entry['cache_control']):
+                continue
+            asset = uncached.setdefault(entry['url'], {
+                'url': entry['url'],
+                'type': entry['type'],
+                'bytes': sizes.get(entry['url'], 0),
+                'cache_control': entry['cache_control'],
+                'reason': uncached_reason(entry['cache_control']),
+                'runs': []
+            })
+            asset['runs'].append(name)
+
+    return {
+        'runs': summaries,
+        'uncached_immutable': sorted(uncached.values(), key=lambda asset: asset['bytes'], reverse=True)
+    }
@@ -51,7 +51,7 @@ class CloudflareArchitectureAnalyzer:
                         {'name': 'email', 'type': 'TEXT', 'nullable': False, 'unique': True},
                         {'name': 'password_hash', 'type': 'TEXT', 'nullable': False},
                         {'name': 'name', 'type': 'TEXT', 'nullable': False},
-                        {'name': 'role', 'type': 'TEXT', 'nullable': False, 'default': "'employee'"}, -- admin, supervisor, employee, partner
+                        {'name': 'role', 'type': 'TEXT', 'nullable': False, 'default': "'employee'"},  # admin, supervisor, employee, partner
                         {'name': 'status', 'type': 'TEXT', 'nullable': False, 'default': "'active'"},
                         {'name': 'created_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'},
                         {'name': 'updated_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'}
@@ -70,7 +70,7 @@ class CloudflareArchitectureAnalyzer:
                         {'name': 'user_id', 'type': 'INTEGER', 'foreign_key': 'users.id'},
                         {'name': 'amount', 'type': 'DECIMAL(10,2)', 'nullable': False},
                         {'name': 'description', 'type': 'TEXT'},
-                        {'name': 'payment_method', 'type': 'TEXT', 'default': "'cash'"}, -- cash, card, transfer
+                        {'name': 'payment_method', 'type': 'TEXT', 'default': "'cash'"},  # cash, card, transfer
                         {'name': 'date', 'type': 'DATE', 'nullable': False},
                         {'name': 'created_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'},
                         {'name': 'updated_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'}
@@ -89,7 +89,7 @@ class CloudflareArchitectureAnalyzer:
                         {'name': 'user_id', 'type': 'INTEGER', 'foreign_key': 'users.id'},
                         {'name': 'amount', 'type': 'DECIMAL(10,2)', 'nullable': False},
                         {'name': 'description', 'type': 'TEXT', 'nullable': False},
-                        {'name': 'category', 'type': 'TEXT', 'nullable': False}, -- rent, utilities, supplies, maintenance, etc.
+                        {'name': 'category', 'type': 'TEXT', 'nullable': False},  # rent, utilities, supplies, maintenance, etc.
                         {'name': 'date', 'type': 'DATE', 'nullable': False},
                         {'name': 'created_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'},
                         {'name': 'updated_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'}
@@ -106,10 +106,10 @@ class CloudflareArchitectureAnalyzer:
                         {'name': 'id', 'type': 'INTEGER', 'primary_key': True, 'auto_increment': True},
                         {'name': 'branch_id', 'type': 'INTEGER', 'foreign_key': 'branches.id'},
                         {'name': 'user_id', 'type': 'INTEGER', 'foreign_key': 'users.id'},
-                        {'name': 'type', 'type': 'TEXT', 'nullable': False}, -- advance, vacation, resignation, maintenance, equipment, other
+                        {'name': 'type', 'type': 'TEXT', 'nullable': False},  # advance, vacation, resignation, maintenance, equipment, other
                         {'name': 'amount', 'type': 'DECIMAL(10,2)'},
                         {'name': 'description', 'type': 'TEXT', 'nullable': False},
-                        {'name': 'status', 'type': 'TEXT', 'default': "'pending'"}, -- pending, approved, rejected
+                        {'name': 'status', 'type': 'TEXT', 'default': "'pending'"},  # pending, approved, rejected
                         {'name': 'approved_by', 'type': 'INTEGER', 'foreign_key': 'users.id'},
                         {'name': 'approved_at', 'type': 'TIMESTAMP'},
                         {'name': 'created_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'},
@@ -148,10 +148,10 @@ class CloudflareArchitectureAnalyzer:
                         {'name': 'branch_id', 'type': 'INTEGER', 'foreign_key': 'branches.id'},
                         {'name': 'table_name', 'type': 'TEXT', 'nullable': False},
                         {'name': 'record_id', 'type': 'INTEGER', 'nullable': False},
-                        {'name': 'operation', 'type': 'TEXT', 'nullable': False}, -- INSERT, UPDATE, DELETE
-                        {'name': 'data', 'type': 'TEXT'}, -- JSON data
+                        {'name': 'operation', 'type': 'TEXT', 'nullable': False},  # INSERT, UPDATE, DELETE
+                        {'name': 'data', 'type': 'TEXT'},  # JSON data
                         {'name': 'synced_at', 'type': 'TIMESTAMP', 'default': 'CURRENT_TIMESTAMP'},
-                        {'name': 'status', 'type': 'TEXT', 'default': "'pending'"} -- pending, synced, failed
+                        {'name': 'status', 'type': 'TEXT', 'default': "'pending'"}  # pending, synced, failed
                     ],
                     'indexes': [
                         {'name': 'idx_sync_logs_branch', 'columns': ['branch_id']},
@@ -8,14 +8,15 @@ import asyncio
 import json
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from playwright.async_api import async_playwright
+from typing import Dict, List, Any, Optional
 import requests
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 import logging
+from browser_runtime import BrowserRuntime, browser_session, browser_page
+from incremental_selection import is_selected, filter_routes
 
 # إعداد التسجيل
 logging.basicConfig(
@@ -30,8 +31,14 @@ logging.basicConfig(
 class BarberTrackTestSuite:
     """مجموعة اختبارات شاملة لنظام BarberTrack"""
 
-    def __init__(self):
+    def __init__(self, runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None):
         self.base_url = "http://localhost:9002"
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
         self.test_results = {}
         self.performance_metrics = {}
         self.security_issues = []
@@ -81,8 +88,7 @@ class BarberTrackTestSuite:
         """اختبارات الأداء والتحميل لـ 50 مستخدم متزامن"""
         print("🚀 بدء اختبارات الأداء والتحميل...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
+        async with browser_session(self.runtime) as browser:
 
             # اختبار تحميل الصفحة الرئيسية
             start_time = time.time()
@@ -114,6 +120,7 @@ class BarberTrackTestSuite:
                 '/my-requests', '/orders', '/inventory', '/reports',
                 '/payroll', '/admin/requests', '/admin/users'
             ]
+            pages_to_test = filter_routes(pages_to_test, self.routes)
 
             page_load_times = {}
             for page_path in pages_to_test:
@@ -126,8 +133,6 @@ class BarberTrackTestSuite:
 
             self.performance_metrics['all_pages'] = page_load_times
 
-            await browser.close()
-
         # تقييم نتائج الأداء
         performance_score = self._evaluate_performance()
         return performance_score
@@ -234,8 +239,7 @@ class BarberTrackTestSuite:
 
         vulnerable_endpoints = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
+        async with browser_session(self.runtime) as browser:
 
             for payload in test_payloads:
                 # اختبار حقن في نماذج البحث
@@ -257,8 +261,6 @@ class BarberTrackTestSuite:
 
                 await page.close()
 
-            await browser.close()
-
         return {
             'passed': len(vulnerable_endpoints) == 0,
             'issues': vulnerable_endpoints
@@ -276,8 +278,7 @@ class BarberTrackTestSuite:
 
         xss_vulnerabilities = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
+        async with browser_session(self.runtime) as browser:
 
             for payload in xss_payloads:
                 # اختبار XSS في النماذج
@@ -299,8 +300,6 @@ class BarberTrackTestSuite:
 
                 await page.close()
 
-            await browser.close()
-
         return {
             'passed': len(xss_vulnerabilities) == 0,
             'issues': xss_vulnerabilities
@@ -348,9 +347,7 @@ class BarberTrackTestSuite:
 
         # اختبار تكامل Firebase SDK
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
                 await page.goto(self.base_url)
 
                 # التحقق من تحميل Firebase SDK
@@ -358,8 +355,6 @@ class BarberTrackTestSuite:
                 if not firebase_loaded:
                     score -= 20
                     issues.append("Firebase SDK لم يتم تحميله بشكل صحيح")
-
-                await browser.close()
         except Exception as e:
             score -= 40
             issues.append(f"خطأ في اختبار Firebase: {str(e)}")
@@ -371,9 +366,7 @@ class BarberTrackTestSuite:
         score = 100
         issues = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        async with browser_page(self.runtime) as page:
             await page.goto(f"{self.base_url}/reports")
 
             try:
@@ -396,8 +389,6 @@ class BarberTrackTestSuite:
                 score -= 50
                 issues.append(f"فشل في توليد التقرير: {str(e)}")
 
-            await browser.close()
-
         return {'score': score, 'issues': issues}
 
     # ===========================
@@ -411,9 +402,7 @@ class BarberTrackTestSuite:
         score = 100
         issues = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        async with browser_page(self.runtime) as page:
             await page.goto(self.base_url)
 
             # اختبار اتجاه الصفحة
@@ -472,8 +461,6 @@ class BarberTrackTestSuite:
                 score -= 5
                 issues.append("لا يوجد استخدام للأرقام العربية")
 
-            await browser.close()
-
         self.rtl_score = score
         self.rtl_issues = issues
 
@@ -496,9 +483,7 @@ class BarberTrackTestSuite:
         score = 100
         issues = []
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        async with browser_page(self.runtime) as page:
             await page.goto(self.base_url)
 
             # اختبار التجاوب مع مختلف أحجام الشاشات
@@ -548,8 +533,6 @@ class BarberTrackTestSuite:
                 score -= 10
                 issues.extend(interaction_test['issues'])
 
-            await browser.close()
-
         self.ux_score = score
         self.ux_issues = issues
 
@@ -847,55 +830,56 @@ CONCLUSION
         # إعداد بيئة الاختبار
         self.setup_test_environment()
 
-        # تنفيذ الاختبارات
-        print("\n" + "="*50)
-        print("1. اختبارات الأداء والتحميل")
-        performance_score = await self.performance_testing()
-
-        print("\n" + "="*50)
-        print("2. اختبارات الأمان")
-        security_score = await self.security_testing()
-
-        print("\n" + "="*50)
-        print("3. اختبارات Firebase والذكاء الاصطناعي")
-        ai_score = await self.firebase_ai_testing()
-
-        print("\n" + "="*50)
-        print("4. اختبارات RTL والتوطين العربي")
-        rtl_score = await self.rtl_localization_testing()
-
-        print("\n" + "="*50)
-        print("5. اختبارات الواجهة والتجربة المستخدم")
-        ux_score = await self.ux_ui_testing()
-
-        # إنشاء التقرير الشامل
-        print("\n" + "="*50)
-        print("6. إنشاء التقرير الشامل")
-        report = self.generate_comprehensive_report()
+        # تنفيذ الاختبارات (المختارة فقط عند الاختيار التدريجي)
+        scores = {}
+        if is_selected(self.checks, 'performance_testing'):
+            print("\n" + "="*50)
+            print("1. اختبارات الأداء والتحميل")
+            scores['performance'] = await self.performance_testing()
+
+        if is_selected(self.checks, 'security_testing'):
+            print("\n" + "="*50)
+            print("2. اختبارات الأمان")
+            scores['security'] = await self.security_testing()
+
+        if is_selected(self.checks, 'firebase_ai_testing'):
+            print("\n" + "="*50)
+            print("3. اختبارات Firebase والذكاء الاصطناعي")
+            scores['ai'] = await self.firebase_ai_testing()
+
+        if is_selected(self.checks, 'rtl_localization_testing'):
+            print("\n" + "="*50)
+            print("4. اختبارات RTL والتوطين العربي")
+            scores['rtl'] = await self.rtl_localization_testing()
+
+        if is_selected(self.checks, 'ux_ui_testing'):
+            print("\n" + "="*50)
+            print("5. اختبارات الواجهة والتجربة المستخدم")
+            scores['ux'] = await self.ux_ui_testing()
+
+        # التقرير الشامل يحتاج نتائج جميع المراحل
+        report = None
+        if len(scores) == 5:
+            print("\n" + "="*50)
+            print("6. إنشاء التقرير الشامل")
+            report = self.generate_comprehensive_report()
 
         total_time = time.time() - start_time
         print(f"\n⏱️ تم إكمال جميع الاختبارات في {total_time:.2f} ثانية")
 
         # عرض النتائج النهائية
+        labels = {'performance': 'الأداء', 'security': 'الأمان', 'ai': 'Firebase/AI', 'rtl': 'RTL/العربي', 'ux': 'الواجهة'}
+        scores['total'] = sum(scores.values()) / len(scores) if scores else 0
         print("\n" + "="*50)
         print("🎯 النتائج النهائية:")
-        print(f"   الأداء: {performance_score}/100")
-        print(f"   الأمان: {security_score}/100")
-        print(f"   Firebase/AI: {ai_score}/100")
-        print(f"   RTL/العربي: {rtl_score}/100")
-        print(f"   الواجهة: {ux_score}/100")
-        print(f"   الإجمالي: {(performance_score + security_score + ai_score + rtl_score + ux_score) / 5:.1f}/100")
+        for key, label in labels.items():
+            if key in scores:
+                print(f"   {label}: {scores[key]}/100")
+        print(f"   الإجمالي: {scores['total']:.1f}/100")
 
         return {
             'report': report,
-            'scores': {
-                'performance': performance_score,
-                'security': security_score,
-                'ai': ai_score,
-                'rtl': rtl_score,
-                'ux': ux_score,
-                'total': (performance_score + security_score + ai_score + rtl_score + ux_score) / 5
-            },
+            'scores': scores,
             'execution_time': total_time
         }
 
@@ -0,0 +1,358 @@
+"""
+قياس أداء استعلامات D1 محلياً على SQLite (محرك D1 نفسه) بهيكل ومعطيات BarberTrack
+مطور: Performance Testing Specialist
+
+يُبنى الهيكل من CloudflareArchitectureAnalyzer.analyze_d1_database_structure، وتُملأ الجداول
+ببيانات عشوائية ثابتة البذرة بحجم قابل للضبط، ثم تُنفذ أشكال الاستعلامات الحقيقية لأحمال العمل
+الثمانية وتُقاس نسبها المئوية. عدد الصفوف المقروءة تقدير أدنى (الصفوف المطابقة للشروط، ويُرفع إلى
+حجم الجدول عند مسحه كاملاً في خطة الاستعلام) وليس عدّاد rows_read الفعلي في D1؛ مؤشر العمل
+المقاس فعلاً هو عدد تعليمات الآلة الافتراضية.
+"""
+
+import random
+import re
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from latency_histogram import LatencyHistogram
+
+# أعداد الصفوف عند scale=1.0
+BASE_ROWS = {
+    'branches': 5,
+    'users_per_branch': 12,
+    'revenue': 60000,
+    'expenses': 12000,
+    'requests': 4000,
+    'inventory_per_branch': 150,
+    'sync_logs': 20000
+}
+
+HISTORY_DAYS = 365
+
+SQL_KEYWORDS = {'WHERE', 'JOIN', 'LEFT', 'INNER', 'ON', 'GROUP', 'ORDER', 'LIMIT', 'UNION'}
+
+
+def build_schema_sql(structure: Dict[str, Any]) -> List[str]:
+    """تحويل وصف الجداول والفهارس إلى أوامر CREATE لـ SQLite"""
+    statements = []
+    for table in structure['tables']:
+        columns = []
+        for column in table['columns']:
+            definition = f"{column['name']} {column['type']}"
+            if column.get('primary_key'):
+                definition += ' PRIMARY KEY'
+                if column.get('auto_increment'):
+                    definition += ' AUTOINCREMENT'
+            if column.get('nullable') is False:
+                definition += ' NOT NULL'
+            if column.get('unique'):
+                definition += ' UNIQUE'
+            if 'default' in column:
+                definition += f" DEFAULT {column['default']}"
+            if column.get('foreign_key'):
+                ref_table, ref_column = column['foreign_key'].split('.')
+                definition += f" REFERENCES {ref_table}({ref_column})"
+            columns.append(definition)
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table['name']} ({', '.join(columns)})")
+
+        for index in table.get('indexes', []):
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS {index['name']} ON {table['name']} ({', '.join(index['columns'])})"
+            )
+    return statements
+
+
+def has_full_table_scan(plan: List[str]) -> bool:
+    """هل تحتوي خطة الاستعلام على مسح كامل لجدول فعلي (وليس لجدول CTE أو استعلام فرعي مؤقت)"""
+    derived = {step.split(' ', 1)[1] for step in plan if step.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+    for step in plan:
+        if not step.startswith('SCAN ') or 'USING' in step:
+            continue
+        target = step[len('SCAN '):]
+        if target not in derived and target != 'CONSTANT ROW' and not target.startswith('('):
+            return True
+    return False
+
+
+def full_scan_tables(sql: str, plan: List[str]) -> List[str]:
+    """أسماء الجداول الفعلية التي تمسحها الخطة كاملاً، بعد ربط الأسماء المستعارة بجداولها في الاستعلام"""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return [aliases[step.split(' ')[1]] for step in plan
+            if step.startswith('SCAN ') and 'USING' not in step and step.split(' ')[1] in aliases]
+
+
+class D1Benchmark:
+    """قاعدة SQLite محلية بهيكل D1 ومعطيات مولدة لقياس أحمال العمل"""
+
+    def __init__(self, structure: Dict[str, Any], db_path: Optional[str] = None, scale: float = 1.0,
+                 seed: int = 42):
+        self.structure = structure
+        self.db_path = db_path or ':memory:'
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.today = date.today()
+        self.connection: Optional[sqlite3.Connection] = None
+        self.row_counts: Dict[str, int] = {}
+
+    def _rows(self, key: str) -> int:
+        return max(1, int(BASE_ROWS[key] * self.scale))
+
+    def _random_date(self) -> str:
+        return (self.today - timedelta(days=self.random.randrange(HISTORY_DAYS))).isoformat()
+
+    # ===========================
+    # إنشاء القاعدة وتعبئتها
+    # ===========================
+
+    def setup(self) -> Dict[str, Any]:
+        """إنشاء الهيكل وتعبئة البيانات وإرجاع إحصائيات التعبئة"""
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            Path(self.db_path).unlink(missing_ok=True)
+
+        # الاتصال يُستخدم بالتتابع من خيوط asyncio.to_thread المختلفة
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA foreign_keys=ON')
+
+        start = time.perf_counter()
+        with self.connection:
+            for statement in build_schema_sql(self.structure):
+                self.connection.execute(statement)
+            self._seed()
+        self.connection.execute('ANALYZE')
+
+        self.row_counts = {
+            table['name']: self.connection.execute(f"SELECT COUNT(*) FROM {table['name']}").fetchone()[0]
+            for table in self.structure['tables']
+        }
+        return {'seed_time': time.perf_counter() - start, 'row_counts': self.row_counts, 'scale': self.scale}
+
+    def _seed(self):
+        rnd = self.random
+        db = self.connection
+
+        branch_count = self._rows('branches')
+        db.executemany(
+            "INSERT INTO branches (name, code, address, phone) VALUES (?, ?, ?, ?)",
+            [(f"فرع {i}", f"BR{i:03d}", f"شارع {i}", f"05{i:08d}") for i in range(1, branch_count + 1)]
+        )
+
+        users = []
+        for branch_id in range(1, branch_count + 1):
+            for n in range(BASE_ROWS['users_per_branch']):
+                role = 'supervisor' if n == 0 else 'employee'
+                users.append((branch_id, f"user{branch_id}_{n}@example.com", 'hash', f"موظف {branch_id}-{n}", role))
+        db.executemany("INSERT INTO users (branch_id, email, password_hash, name, role) VALUES (?, ?, ?, ?, ?)", users)
+        users_by_branch: Dict[int, List[int]] = {}
+        for user_id, branch_id in db.execute("SELECT id, branch_id FROM users"):
+            users_by_branch.setdefault(branch_id, []).append(user_id)
+
+        def branch_and_user() -> Tuple[int, int]:
+            branch_id = rnd.randint(1, branch_count)
+            return branch_id, rnd.choice(users_by_branch[branch_id])
+
+        db.executemany(
+            "INSERT INTO revenue (branch_id, user_id, amount, description, payment_method, date) VALUES (?, ?, ?, ?, ?, ?)",
+            [(*branch_and_user(), round(rnd.uniform(20, 400), 2), 'خدمة حلاقة',
+              rnd.choice(['cash', 'card', 'transfer']), self._random_date())
+             for _ in range(self._rows('revenue'))]
+        )
+        db.executemany(
+            "INSERT INTO expenses (branch_id, user_id, amount, description, category, date) VALUES (?, ?, ?, ?, ?, ?)",
+            [(*branch_and_user(), round(rnd.uniform(10, 2000), 2), 'مصروف تشغيلي',
+              rnd.choice(['rent', 'utilities', 'supplies', 'maintenance', 'salaries']), self._random_date())
+             for _ in range(self._rows('expenses'))]
+        )
+        db.executemany(
+            "INSERT INTO requests (branch_id, user_id, type, amount, description, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(*branch_and_user(), rnd.choice(['advance', 'vacation', 'resignation', 'maintenance', 'equipment', 'other']),
+              round(rnd.uniform(100, 3000), 2), rnd.choice(['طلب سلفة', 'طلب إجازة', 'صيانة مكينة', 'طلب معدات']),
+              rnd.choice(['pending', 'approved', 'rejected']), self._random_date())
+             for _ in range(self._rows('requests'))]
+        )
+        db.executemany(
+            "INSERT INTO inventory (branch_id, name, quantity, unit_price, min_quantity, category) VALUES (?, ?, ?, ?, ?, ?)",
+            [(branch_id, f"منتج {n}", rnd.randint(0, 80), round(rnd.uniform(5, 150), 2), 10,
+              rnd.choice(['shampoo', 'cream', 'blades', 'oil', 'gel']))
+             for branch_id in range(1, branch_count + 1) for n in range(BASE_ROWS['inventory_per_branch'])]
+        )
+        now = datetime.now()
+        db.executemany(
+            "INSERT INTO sync_logs (branch_id, table_name, record_id, operation, data, synced_at, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(rnd.randint(1, branch_count), rnd.choice(['revenue', 'expenses', 'requests', 'inventory']),
+              rnd.randint(1, 10000), rnd.choice(['INSERT', 'UPDATE', 'DELETE']), '{}',
+              (now - timedelta(minutes=rnd.randrange(HISTORY_DAYS * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S'),
+              rnd.choices(['synced', 'pending', 'failed'], weights=[90, 8, 2])[0])
+             for _ in range(self._rows('sync_logs'))]
+        )
+
+    # ===========================
+    # أحمال العمل
+    # ===========================
+
+    def _branch(self) -> int:
+        return self.random.randint(1, self.row_counts['branches'])
+
+    def _month_range(self) -> Tuple[str, str]:
+        first = (self.today - timedelta(days=self.random.randrange(HISTORY_DAYS))).replace(day=1)
+        following = (first + timedelta(days=32)).replace(day=1)
+        return first.isoformat(), following.isoformat()
+
+    def workloads(self) -> List[Dict[str, Any]]:
+        """أشكال الاستعلامات لكل حمل عمل مع مولد المعاملات واستعلام التقدير الأدنى للصفوف المقروءة"""
+        def monthly() -> Tuple:
+            start, end = self._month_range()
+            return (self._branch(), start, end)
+
+        return [
+            {
+                'name': 'جلب بيانات فرع معين', 'complexity': 'low', 'isolation': 'branch',
+                'sql': """SELECT b.id, b.name, b.code, COUNT(u.id) AS employees
+                          FROM branches b LEFT JOIN users u ON u.branch_id = b.id
+                          WHERE b.id = ? GROUP BY b.id""",
+                'params': lambda: (self._branch(),),
+                'rows_read_sql': "SELECT 1 + COUNT(*) FROM users WHERE branch_id = ?"
+            },
+            {
+                'name': 'إيرادات الفرع الشهرية', 'complexity': 'medium', 'isolation': 'branch',
+                'sql': """SELECT date, SUM(amount) AS total, COUNT(*) AS transactions
+                          FROM revenue WHERE branch_id = ? AND date >= ? AND date < ?
+                          GROUP BY date ORDER BY date""",
+                'params': monthly,
+                'rows_read_sql': "SELECT COUNT(*) FROM revenue WHERE branch_id = ? AND date >= ? AND date < ?"
+            },
+            {
+                'name': 'تقرير مالي للفرع', 'complexity': 'high', 'isolation': 'branch',
+                'sql': """WITH income AS (
+                              SELECT payment_method AS label, SUM(amount) AS total FROM revenue
+                              WHERE branch_id = ?1 AND date >= ?2 AND date < ?3 GROUP BY payment_method),
+                          costs AS (
+                              SELECT category AS label, SUM(amount) AS total FROM expenses
+                              WHERE branch_id = ?1 AND date >= ?2 AND date < ?3 GROUP BY category)
+                          SELECT 'revenue', label, total FROM income
+                          UNION ALL SELECT 'expense', label, total FROM costs
+                          UNION ALL SELECT 'net', NULL,
+                              (SELECT COALESCE(SUM(total), 0) FROM income) - (SELECT COALESCE(SUM(total), 0) FROM costs)""",
+                'params': monthly,
+                'rows_read_sql': """SELECT (SELECT COUNT(*) FROM revenue WHERE branch_id = ?1 AND date >= ?2 AND date < ?3)
+                                         + (SELECT COUNT(*) FROM expenses WHERE branch_id = ?1 AND date >= ?2 AND date < ?3)"""
+            },
+            {
+                'name': 'مزامنة البيانات بين الفروع', 'complexity': 'high', 'isolation': 'global',
+                'sql': """SELECT branch_id, table_name, operation, COUNT(*) AS pending, MIN(synced_at) AS oldest
+                          FROM sync_logs WHERE status != 'synced' AND synced_at >= ?
+                          GROUP BY branch_id, table_name, operation""",
+                'params': lambda: ((datetime.now() - timedelta(days=self.random.randint(1, 30))).strftime('%Y-%m-%d %H:%M:%S'),),
+                'rows_read_sql': "SELECT COUNT(*) FROM sync_logs WHERE synced_at >= ?"
+            },
+            {
+                'name': 'التحقق من عزل البيانات', 'complexity': 'medium', 'isolation': 'security',
+                'sql': """SELECT COUNT(*) FROM revenue r JOIN users u ON u.id = r.user_id
+                          WHERE r.branch_id = ? AND u.branch_id != r.branch_id""",
+                'params': lambda: (self._branch(),),
+                'rows_read_sql': "SELECT COUNT(*) * 2 FROM revenue WHERE branch_id = ?"
+            },
+            {
+                'name': 'بحث في الطلبات المحلية', 'complexity': 'medium', 'isolation': 'branch',
+                'sql': """SELECT id, type, amount, description, status, created_at FROM requests
+                          WHERE branch_id = ? AND status = ? AND description LIKE ?
+                          ORDER BY created_at DESC LIMIT 50""",
+                'params': lambda: (self._branch(), self.random.choice(['pending', 'approved', 'rejected']),
+                                   f"%{self.random.choice(['سلفة', 'إجازة', 'صيانة', 'معدات'])}%"),
+                # LIKE بنمط يبدأ بـ % لا يستخدم فهرساً: تُقرأ على الأقل كل طلبات الفرع بالحالة المطلوبة،
+                # وأكثر منها إن اختار المخطط فهرساً على عمود واحد (الفرع أو الحالة)
+                'rows_read_sql': "SELECT COUNT(*) FROM requests WHERE branch_id = ? AND status = ?",
+                'rows_read_params': 2
+            },
+            {
+                'name': 'حساب البونصات للفرع', 'complexity': 'medium', 'isolation': 'branch',
+                'sql': """SELECT u.id, u.name, SUM(r.amount) AS total_revenue,
+                                 CASE WHEN SUM(r.amount) >= 15000 THEN 500
+                                      WHEN SUM(r.amount) >= 10000 THEN 250 ELSE 0 END AS bonus
+                          FROM revenue r JOIN users u ON u.id = r.user_id
+                          WHERE r.branch_id = ? AND r.date >= ? AND r.date < ?
+                          GROUP BY u.id ORDER BY total_revenue DESC""",
+                'params': monthly,
+                'rows_read_sql': "SELECT COUNT(*) * 2 FROM revenue WHERE branch_id = ? AND date >= ? AND date < ?"
+            },
+            {
+                'name': 'المعاملات الأخيرة', 'complexity': 'low', 'isolation': 'branch',
+                'sql': """SELECT * FROM (
+                              SELECT 'revenue' AS kind, id, amount, date FROM revenue WHERE branch_id = ?1
+                              ORDER BY date DESC LIMIT 20)
+                          UNION ALL SELECT * FROM (
+                              SELECT 'expense', id, amount, date FROM expenses WHERE branch_id = ?1
+                              ORDER BY date DESC LIMIT 20)
+                          ORDER BY date DESC LIMIT 20""",
+                'params': lambda: (self._branch(),),
+                'rows_read_sql': """SELECT MIN(20, (SELECT COUNT(*) FROM revenue WHERE branch_id = ?1))
+                                         + MIN(20, (SELECT COUNT(*) FROM expenses WHERE branch_id = ?1))"""
+            }
+        ]
+
+    def query_plan(self, sql: str, params: Tuple) -> List[str]:
+        return [row[3] for row in self.connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def run(self, iterations: int = 200) -> Dict[str, Any]:
+        """تنفيذ كل حمل عمل iterations مرة بمعاملات عشوائية وإرجاع النسب المئوية"""
+        if self.connection is None:
+            self.setup()
+
+        results = {}
+        for workload in self.workloads():
+            plan = self.query_plan(workload['sql'], workload['params']())
+            # أرضية التقدير: كل جدول تمسحه الخطة كاملاً يُقرأ بجميع صفوفه مهما كانت الشروط
+            scanned_rows = sum(self.row_counts.get(table, 0) for table in full_scan_tables(workload['sql'], plan))
+            histogram = LatencyHistogram()
+            rows_read = 0
+            rows_returned = 0
+            vm_steps = 0
+
+            def count_step():
+                nonlocal vm_steps
+                vm_steps += 1
+
+            for _ in range(iterations):
+                params = workload['params']()
+                start = time.perf_counter()
+                rows = self.connection.execute(workload['sql'], params).fetchall()
+                histogram.record((time.perf_counter() - start) * 1000)
+
+                # عدّاد تعليمات آلة SQLite الافتراضية (كل 100 تعليمة) كمؤشر على العمل المنجز،
+                # في تنفيذ ثانٍ خارج التوقيت حتى لا تُضاف كلفة استدعاءات المعالج إلى الزمن المقاس
+                self.connection.set_progress_handler(count_step, 100)
+                try:
+                    self.connection.execute(workload['sql'], params).fetchall()
+                finally:
+                    self.connection.set_progress_handler(None, 0)
+
+                rows_returned += len(rows)
+                count_params = params[:workload.get('rows_read_params', len(params))]
+                matched = self.connection.execute(workload['rows_read_sql'], count_params).fetchone()[0]
+                rows_read += max(matched, scanned_rows)
+
+            results[workload['name']] = {
+                'complexity': workload['complexity'],
+                'isolation': workload['isolation'],
+                'latency_ms': histogram.summary(),
+                'latency_histogram': histogram.to_dict(),
+                'estimated_rows_read': rows_read / iterations,
+                'average_rows_returned': rows_returned / iterations,
+                'average_vm_steps': vm_steps * 100 / iterations,
+                'query_plan': plan,
+                'full_scan': has_full_table_scan(plan)
+            }
+        return results
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,238 @@
+"""
+توليد الحمل الموزع على عدة أجهزة: منسق (coordinator) ووكلاء (agents) لاختبارات أداء BarberTrack
+مطور: Performance Testing Specialist
+
+البروتوكول: اتصال TCP عادي يحمل رسائل JSON، رسالة واحدة في كل سطر.
+  agent -> coordinator: hello, started, result, error
+  coordinator -> agent: scenario, shutdown
+
+مثال تشغيل محلي بعدة وكلاء على جهاز واحد:
+  python distributed_load.py coordinator --agents 3 --users 300 &
+  for i in 1 2 3; do python distributed_load.py agent --coordinator 127.0.0.1:8765 & done
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Dict, List, Any, Optional
+
+# حجم أقصى للسطر الواحد (المدرجات التكرارية المسلسلة قد تتجاوز الحد الافتراضي 64KB)
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+async def _send(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+    writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+    await writer.drain()
+
+
+async def _receive(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+class LoadCoordinator:
+    """منسق ينتظر الوكلاء ويوزع عليهم السيناريو ويجمع نتائجهم"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8765, expected_agents: int = 2,
+                 start_delay: float = 3.0, agent_timeout: float = 120):
+        self.host = host
+        self.port = port
+        self.expected_agents = expected_agents
+        self.start_delay = start_delay
+        self.agent_timeout = agent_timeout
+
+        self.agents: List[Dict[str, Any]] = []
+        self._agents_ready = asyncio.Event()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_agent, self.host, self.port, limit=STREAM_LIMIT)
+        logging.info(f"Load coordinator listening on {self.host}:{self.port}")
+
+    async def _handle_agent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        hello = await _receive(reader)
+        if not hello or hello.get('type') != 'hello':
+            writer.close()
+            return
+
+        if len(self.agents) >= self.expected_agents:
+            await _send(writer, {'type': 'shutdown', 'reason': 'coordinator is full'})
+            writer.close()
+            return
+
+        self.agents.append({'id': hello.get('agent_id'), 'info': hello, 'reader': reader, 'writer': writer})
+        logging.info(f"Agent connected: {hello.get('agent_id')} ({len(self.agents)}/{self.expected_agents})")
+        if len(self.agents) >= self.expected_agents:
+            self._agents_ready.set()
+
+    async def wait_for_agents(self):
+        """انتظار اتصال العدد المطلوب من الوكلاء"""
+        if self._server is None:
+            await self.start()
+        await asyncio.wait_for(self._agents_ready.wait(), timeout=self.agent_timeout)
+
+    async def run_phase(self, suite_options: Dict[str, Any], phase: str,
+                        per_agent_options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """إرسال السيناريو لكل وكيل ببدء متزامن وانتظار النتائج المسلسلة"""
+        await self.wait_for_agents()
+        if len(per_agent_options) > len(self.agents):
+            raise ValueError("More load partitions than connected agents")
+
+        # موعد بدء موحد بساعة المنسق، ويصحح كل وكيل فرق ساعته عند الاستلام
+        start_at = time.time() + self.start_delay
+
+        async def run_agent(agent: Dict[str, Any], options: Dict[str, Any]) -> Dict[str, Any]:
+            await _send(agent['writer'], {
+                'type': 'scenario',
+                'phase': phase,
+                'suite_options': suite_options,
+                'options': options,
+                'start_at': start_at,
+                'coordinator_time': time.time()
+            })
+            while True:
+                message = await _receive(agent['reader'])
+                if message is None:
+                    raise ConnectionError(f"Agent {agent['id']} disconnected")
+                if message['type'] == 'started':
+                    logging.info(f"Agent {agent['id']} started (skew {message.get('start_skew_ms', 0):.1f}ms)")
+                elif message['type'] == 'result':
+                    return message['result']
+                elif message['type'] == 'error':
+                    raise RuntimeError(f"Agent {agent['id']} failed: {message['error']}")
+
+        return await asyncio.gather(*[
+            run_agent(agent, options) for agent, options in zip(self.agents, per_agent_options)
+        ])
+
+    async def close(self):
+        for agent in self.agents:
+            try:
+                await _send(agent['writer'], {'type': 'shutdown'})
+                agent['writer'].close()
+            except Exception as e:
+                logging.error(f"Error closing agent {agent['id']}: {str(e)}")
+        self.agents = []
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+class LoadAgent:
+    """وكيل توليد حمل يتصل بالمنسق وينفذ ما يصله من سيناريوهات"""
+
+    def __init__(self, coordinator_host: str, coordinator_port: int = 8765,
+                 agent_id: Optional[str] = None, connect_timeout: float = 60):
+        self.coordinator_host = coordinator_host
+        self.coordinator_port = coordinator_port
+        self.agent_id = agent_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.connect_timeout = connect_timeout
+
+    async def _connect(self):
+        deadline = time.time() + self.connect_timeout
+        while True:
+            try:
+                return await asyncio.open_connection(
+                    self.coordinator_host, self.coordinator_port, limit=STREAM_LIMIT)
+            except OSError:
+                if time.time() > deadline:
+                    raise
+                await asyncio.sleep(0.5)
+
+    async def run(self):
+        """الاتصال بالمنسق وتنفيذ السيناريوهات حتى رسالة الإيقاف"""
+        from performance_test_suite import PerformanceTestSuite
+
+        reader, writer = await self._connect()
+        await _send(writer, {'type': 'hello', 'agent_id': self.agent_id, 'cpu_count': os.cpu_count()})
+
+        try:
+            while True:
+                message = await _receive(reader)
+                if message is None or message['type'] == 'shutdown':
+                    break
+                if message['type'] != 'scenario':
+                    continue
+
+                # فرق الساعة التقريبي بين المنسق والوكيل
+                clock_offset = message['coordinator_time'] - time.time()
+                delay = message['start_at'] - clock_offset - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                start_skew = (time.time() + clock_offset - message['start_at']) * 1000
+                await _send(writer, {'type': 'started', 'agent_id': self.agent_id, 'start_skew_ms': start_skew})
+
+                try:
+                    suite = PerformanceTestSuite(**message['suite_options'])
+                    result = await suite._run_worker_phase(message['phase'], message['options'])
+                    result_message = {'type': 'result', 'agent_id': self.agent_id, 'result': result}
+                except Exception as e:
+                    logging.error(f"Agent phase failed: {str(e)}")
+                    result_message = {'type': 'error', 'agent_id': self.agent_id, 'error': str(e)}
+
+                await _send(writer, result_message)
+        finally:
+            writer.close()
+
+
+async def main():
+    """نقطة الدخول الرئيسية"""
+    parser = argparse.ArgumentParser(description="توليد الحمل الموزع لاختبارات أداء سهل")
+    subparsers = parser.add_subparsers(dest='role', required=True)
+
+    coordinator_parser = subparsers.add_parser('coordinator')
+    coordinator_parser.add_argument('--host', default='0.0.0.0')
+    coordinator_parser.add_argument('--port', type=int, default=8765)
+    coordinator_parser.add_argument('--agents', type=int, required=True)
+    coordinator_parser.add_argument('--base-url', default='http://localhost:9002')
+    coordinator_parser.add_argument('--phase', choices=['concurrent_users', 'api'], default='concurrent_users')
+    coordinator_parser.add_argument('--users', type=int, default=50)
+    coordinator_parser.add_argument('--arrival-rate', type=float, default=None)
+    coordinator_parser.add_argument('--duration', type=float, default=60)
+    coordinator_parser.add_argument('--output', default='test_results/distributed_load_results.json')
+
+    agent_parser = subparsers.add_parser('agent')
+    agent_parser.add_argument('--coordinator', required=True, help='host:port')
+    agent_parser.add_argument('--agent-id', default=None)
+
+    args = parser.parse_args()
+
+    if args.role == 'agent':
+        host, _, port = args.coordinator.rpartition(':')
+        await LoadAgent(host, int(port), agent_id=args.agent_id).run()
+        return
+
+    from performance_test_suite import PerformanceTestSuite
+
+    coordinator = LoadCoordinator(args.host, args.port, expected_agents=args.agents)
+    await coordinator.start()
+    print(f"⏳ انتظار {args.agents} وكيل على المنفذ {args.port}...")
+
+    try:
+        suite = PerformanceTestSuite(args.base_url, coordinator=coordinator)
+        if args.phase == 'api':
+            results = await suite.test_api_response_times()
+        else:
+            results = await suite.test_concurrent_users(args.users, arrival_rate=args.arrival_rate,
+                                                        duration=args.duration)
+    finally:
+        await coordinator.close()
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    print(f"✅ تم حفظ النتائج المدمجة: {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
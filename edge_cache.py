@@ -0,0 +1,437 @@
+"""
+تحليل سياسات التخزين المؤقت الحقيقية ومحاكاة Cloudflare Edge Cache محلياً
+مطور: Performance Testing Specialist
+
+1. الزحف: طلب كل صفحة ونقطة /api/* (GET) والأصول المكتشفة في HTML، وتحليل
+   Cache-Control وETag وLast-Modified وVary وs-maxage لكل استجابة.
+2. المحاكاة: وكيل عكسي محلي (aiohttp) بين العميل والخادم الأصلي، يخزن الاستجابات
+   حسب سياستها في ذاكرة LRU محدودة بعدد العناصر والبايتات مع انتهاء صلاحية TTL
+   وإعادة تحقق شرطية (If-None-Match / If-Modified-Since).
+3. إعادة التشغيل: مزيج طلبات مسجل (ملف JSON) أو اصطناعي (مشاهدات صفحات بتوزيع Zipf
+   مع أصولها وطلبات API) يمر عبر الوكيل، ثم تُحسب نسبة الإصابة وتخفيف الحمل عن الخادم
+   الأصلي وتوفير الزمن لكل مسار.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from multidict import CIMultiDict
+
+from latency_histogram import LatencyHistogram
+
+# حالات قابلة للتخزين افتراضياً (RFC 9111)
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 404, 410}
+# امتدادات يخزنها Cloudflare افتراضياً عند غياب سياسة صريحة
+DEFAULT_CACHED_EXTENSIONS = re.compile(r'\.(?:js|css|woff2?|ttf|otf|png|jpe?g|gif|svg|webp|avif|ico|map)$')
+DEFAULT_EDGE_TTL = 7200
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'upgrade',
+                      'proxy-authenticate', 'proxy-authorization', 'te', 'trailer', 'host'}
+ASSET_PATTERN = re.compile(r'(?:src|href)=["\'](/[^"\'#]+?\.(?:js|css|woff2?|ttf|png|jpe?g|svg|webp|avif|ico)(?:\?[^"\']*)?)["\']')
+
+
+def parse_cache_control(value: str) -> Dict[str, Any]:
+    """تحليل Cache-Control إلى قاموس توجيهات (القيم الرقمية كأعداد)"""
+    directives: Dict[str, Any] = {}
+    for part in value.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        name, _, argument = part.partition('=')
+        argument = argument.strip().strip('"')
+        if argument.isdigit():
+            directives[name.strip()] = int(argument)
+        else:
+            directives[name.strip()] = argument or True
+    return directives
+
+
+def parse_cache_policy(headers, path: str, method: str = 'GET', status: int = 200) -> Dict[str, Any]:
+    """سياسة التخزين في Edge مشتقة من ترويسات الاستجابة"""
+    cache_control = headers.get('Cache-Control', '')
+    directives = parse_cache_control(cache_control)
+    vary = [name.strip().lower() for name in headers.get('Vary', '').split(',') if name.strip()]
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    has_validators = bool(etag or last_modified)
+
+    reason = None
+    ttl = 0
+    if method not in ('GET', 'HEAD'):
+        reason = f'method {method}'
+    elif status not in CACHEABLE_STATUSES:
+        reason = f'status {status}'
+    elif 'no-store' in directives:
+        reason = 'no-store'
+    elif 'private' in directives:
+        reason = 'private'
+    elif 'set-cookie' in (name.lower() for name in headers.keys()):
+        reason = 'Set-Cookie'
+    elif '*' in vary:
+        reason = 'Vary: *'
+    elif 'no-cache' in directives:
+        # قابل للتخزين لكن يجب التحقق في كل طلب
+        if not has_validators:
+            reason = 'no-cache without validators'
+    elif isinstance(directives.get('s-maxage'), int):
+        ttl = directives['s-maxage']
+    elif isinstance(directives.get('max-age'), int):
+        ttl = directives['max-age']
+    elif DEFAULT_CACHED_EXTENSIONS.search(path.split('?', 1)[0]):
+        ttl = DEFAULT_EDGE_TTL
+    else:
+        reason = 'no explicit freshness'
+
+    if reason is None and ttl == 0 and not has_validators:
+        reason = 'zero TTL without validators'
+
+    return {
+        'cache_control': cache_control,
+        'directives': directives,
+        'etag': etag,
+        'last_modified': last_modified,
+        'vary': vary,
+        'edge_cacheable': reason is None,
+        'edge_ttl': ttl if reason is None else 0,
+        'uncacheable_reason': reason,
+        # Vary على ترويسات متغيرة لكل مستخدم يفتت التخزين
+        'vary_fragments_cache': any(name in ('cookie', 'authorization', 'user-agent') for name in vary)
+    }
+
+
+class _CacheEntry:
+    __slots__ = ('status', 'headers', 'body', 'expires', 'etag', 'last_modified', 'ttl')
+
+    def __init__(self, status: int, headers: CIMultiDict, body: bytes, expires: float, ttl: int,
+                 etag: Optional[str], last_modified: Optional[str]):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires = expires
+        self.ttl = ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+class EdgeCacheProxy:
+    """وكيل عكسي محلي بذاكرة LRU/TTL يحاكي Edge Cache أمام الخادم الأصلي"""
+
+    def __init__(self, origin: str, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 time_scale: float = 1.0):
+        self.origin = origin.rstrip('/')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # تسريع الزمن لاختبار انتهاء TTL في إعادة تشغيل قصيرة (60 = دقيقة لكل ثانية)
+        self.time_scale = time_scale
+        self._entries: 'OrderedDict[Tuple[str, ...], _CacheEntry]' = OrderedDict()
+        self._vary: Dict[str, List[str]] = {}
+        self._bytes = 0
+        self._started = time.monotonic()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+        self.evictions = 0
+        self.expirations = 0
+        self.route_stats: Dict[str, Dict[str, Any]] = {}
+
+    def _clock(self) -> float:
+        return (time.monotonic() - self._started) * self.time_scale
+
+    async def start(self) -> int:
+        self._session = aiohttp.ClientSession(auto_decompress=False)
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.port
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> Dict[str, int]:
+        """حالة الذاكرة الحالية وما أُخرج منها بالسعة أو بانتهاء TTL"""
+        return {
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'cache_entries': len(self._entries),
+            'cache_bytes': self._bytes
+        }
+
+    def _stats(self, route: str) -> Dict[str, Any]:
+        return self.route_stats.setdefault(route, {
+            'requests': 0, 'hits': 0, 'revalidated': 0, 'misses': 0, 'bypass': 0,
+            'bytes_served': 0, 'origin_bytes': 0, 'origin_latency': LatencyHistogram(), 'policy': None
+        })
+
+    def _key(self, request: web.Request) -> Tuple[str, ...]:
+        vary = self._vary.get(request.path_qs, [])
+        return (request.method, request.path_qs) + tuple(request.headers.get(name, '') for name in vary)
+
+    def _store(self, key: Tuple[str, ...], entry: _CacheEntry):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.body)
+        self._entries[key] = entry
+        self._bytes += len(entry.body)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.evictions += 1
+
+    @staticmethod
+    def _response(status: int, headers: CIMultiDict, body: bytes, outcome: str) -> web.Response:
+        response = web.Response(status=status, body=body, headers=headers)
+        response.headers['X-Cache'] = outcome
+        return response
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        stats = self._stats(request.path)
+        stats['requests'] += 1
+        key = self._key(request)
+        now = self._clock()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > now:
+            self._entries.move_to_end(key)
+            stats['hits'] += 1
+            stats['bytes_served'] += len(entry.body)
+            return self._response(entry.status, entry.headers, entry.body, 'HIT')
+        if entry is not None:
+            self.expirations += 1
+
+        headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        elif entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        start = time.perf_counter()
+        async with self._session.request(request.method, f"{self.origin}{request.path_qs}", headers=headers,
+                                         data=await request.read(), allow_redirects=False) as origin_response:
+            body = await origin_response.read()
+            status = origin_response.status
+            response_headers = CIMultiDict((name, value) for name, value in origin_response.headers.items()
+                                           if name.lower() not in HOP_BY_HOP_HEADERS)
+            policy = parse_cache_policy(origin_response.headers, request.path_qs, request.method, status)
+        stats['origin_latency'].record((time.perf_counter() - start) * 1000)
+        stats['origin_bytes'] += len(body)
+        stats['policy'] = stats['policy'] or policy
+
+        if status == 304 and entry is not None:
+            # التحقق نجح: تجديد الصلاحية وتقديم النسخة المخزنة
+            entry.headers.update(response_headers)
+            refreshed = parse_cache_policy(entry.headers, request.path_qs)
+            entry.expires = now + refreshed['edge_ttl']
+            self._entries.move_to_end(key)
+            stats['revalidated'] += 1
+            stats['bytes_served'] += len(entry.body)
+            return self._response(entry.status, entry.headers, entry.body, 'REVALIDATED')
+
+        stats['bytes_served'] += len(body)
+        if policy['edge_cacheable']:
+            self._vary[request.path_qs] = policy['vary']
+            self._store(self._key(request), _CacheEntry(status, response_headers, body, now + policy['edge_ttl'],
+                                                        policy['edge_ttl'], policy['etag'], policy['last_modified']))
+            stats['misses'] += 1
+            return self._response(status, response_headers, body, 'MISS')
+
+        self._entries.pop(key, None)
+        stats['bypass'] += 1
+        return self._response(status, response_headers, body, 'BYPASS')
+
+
+def load_request_mix(path: str) -> List[str]:
+    """مزيج طلبات مسجل: قائمة مسارات بالترتيب، أو قاموس {مسار: عدد} يُخلط عشوائياً"""
+    with open(path, 'r', encoding='utf-8') as f:
+        recorded = json.load(f)
+    if isinstance(recorded, dict):
+        paths = [route for route, count in recorded.items() for _ in range(int(count))]
+        random.shuffle(paths)
+        return paths
+    return [entry['path'] if isinstance(entry, dict) else entry for entry in recorded]
+
+
+def synthetic_mix(pages: List[str], apis: List[str], assets: Dict[str, List[str]], requests: int,
+                  zipf_exponent: float = 1.0) -> List[str]:
+    """مشاهدات صفحات بشعبية Zipf، كل مشاهدة تجلب الصفحة وأصولها وطلب API واحد"""
+    weights = [1 / (rank ** zipf_exponent) for rank in range(1, len(pages) + 1)]
+    mix: List[str] = []
+    while len(mix) < requests:
+        page = random.choices(pages, weights=weights)[0]
+        mix.append(page)
+        mix.extend(assets.get(page, []))
+        if apis:
+            mix.append(random.choice(apis))
+    return mix[:requests]
+
+
+class EdgeCacheSimulator:
+    """زحف سياسات التخزين ثم إعادة تشغيل مزيج طلبات عبر EdgeCacheProxy"""
+
+    def __init__(self, base_url: str, pages: List[str], api_endpoints: List[Dict[str, Any]], requests: int = 2000,
+                 concurrency: int = 10, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 time_scale: float = 1.0, mix_file: Optional[str] = None, max_assets: int = 50):
+        self.base_url = base_url.rstrip('/')
+        self.pages = pages
+        self.api_endpoints = api_endpoints
+        self.requests = requests
+        self.concurrency = concurrency
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.time_scale = time_scale
+        self.mix_file = mix_file
+        self.max_assets = max_assets
+
+    async def crawl(self) -> Dict[str, Any]:
+        """طلب كل مسار مرة واحدة مباشرة من الخادم الأصلي وتحليل سياسته"""
+        routes: Dict[str, Dict[str, Any]] = {}
+        page_assets: Dict[str, List[str]] = {}
+
+        async with aiohttp.ClientSession() as session:
+            async def fetch(path: str, kind: str) -> Optional[str]:
+                start = time.perf_counter()
+                try:
+                    async with session.get(f"{self.base_url}{path}", allow_redirects=False) as response:
+                        body = await response.read()
+                        routes[path] = {
+                            'type': kind,
+                            'status': response.status,
+                            'bytes': len(body),
+                            'direct_latency': (time.perf_counter() - start) * 1000,
+                            'policy': parse_cache_policy(response.headers, path, 'GET', response.status)
+                        }
+                        if 'text/html' in response.headers.get('Content-Type', ''):
+                            return body.decode('utf-8', errors='replace')
+                except Exception as e:
+                    routes[path] = {'type': kind, 'error': str(e)}
+                return None
+
+            for path in self.pages:
+                html = await fetch(path, 'page')
+                page_assets[path] = list(dict.fromkeys(ASSET_PATTERN.findall(html or '')))
+
+            discovered = list(dict.fromkeys(asset for assets in page_assets.values() for asset in assets))
+            discovered = discovered[:self.max_assets]
+            await asyncio.gather(*[fetch(asset, 'asset') for asset in discovered])
+
+            for endpoint in self.api_endpoints:
+                if endpoint['method'] == 'GET':
+                    await fetch(endpoint['path'], 'api')
+                else:
+                    # لا نرسل طلبات كتابة أثناء الزحف: غير قابلة للتخزين بحكم الطريقة
+                    routes.setdefault(endpoint['path'], {
+                        'type': 'api',
+                        'status': None,
+                        'policy': parse_cache_policy({}, endpoint['path'], endpoint['method'])
+                    })
+
+        kept = set(discovered)
+        page_assets = {page: [asset for asset in assets if asset in kept] for page, assets in page_assets.items()}
+        return {'routes': routes, 'page_assets': page_assets}
+
+    async def replay(self, mix: List[str]) -> Tuple[EdgeCacheProxy, Dict[str, Dict[str, LatencyHistogram]], float]:
+        """تمرير المزيج عبر الوكيل وقياس زمن العميل لكل مسار حسب نتيجة التخزين"""
+        proxy = EdgeCacheProxy(self.base_url, self.max_entries, self.max_bytes, self.time_scale)
+        port = await proxy.start()
+        client_latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        for path in mix:
+            queue.put_nowait(path)
+
+        async def worker(session: aiohttp.ClientSession):
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    async with session.get(f"http://127.0.0.1:{port}{path}", allow_redirects=False) as response:
+                        await response.read()
+                        outcome = response.headers.get('X-Cache', 'BYPASS')
+                except Exception:
+                    outcome = 'ERROR'
+                route = path.split('?', 1)[0]
+                client_latency.setdefault(route, {}).setdefault(outcome, LatencyHistogram()).record(
+                    (time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        try:
+            async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency)) as session:
+                await asyncio.gather(*[worker(session) for _ in range(self.concurrency)])
+        finally:
+            await proxy.stop()
+        return proxy, client_latency, time.perf_counter() - start
+
+    async def run(self) -> Dict[str, Any]:
+        crawl = await self.crawl()
+        routes = crawl['routes']
+
+        if self.mix_file:
+            mix = load_request_mix(self.mix_file)
+            mix_source = 'recorded'
+        else:
+            apis = [path for path, route in routes.items() if route['type'] == 'api' and route.get('status')]
+            mix = synthetic_mix(self.pages, apis, crawl['page_assets'], self.requests)
+            mix_source = 'synthetic'
+
+        proxy, client_latency, duration = await self.replay(mix)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for route, stats in proxy.route_stats.items():
+            latency = client_latency.get(route, {})
+            origin_outcomes = [latency[o] for o in ('MISS', 'BYPASS', 'REVALIDATED') if o in latency]
+            origin_mean = (sum(h.mean * h.count for h in origin_outcomes) /
+                           sum(h.count for h in origin_outcomes)) if origin_outcomes else 0
+            all_latency = LatencyHistogram()
+            for histogram in latency.values():
+                all_latency.merge(histogram)
+            hit_mean = latency['HIT'].mean if 'HIT' in latency else None
+            observed_mean = all_latency.mean if all_latency.count else 0
+
+            requests = stats['requests']
+            origin_requests = requests - stats['hits']
+            crawled = routes.get(route, {})
+            policy = crawled.get('policy') or stats['policy']
+            # خط الأساس دون تخزين: كل طلب يكلف متوسط زمن الطلبات التي وصلت للخادم الأصلي
+            savings = origin_mean - observed_mean if origin_mean else 0
+            results[route] = {
+                'type': crawled.get('type', 'page' if route in self.pages else 'asset'),
+                'policy': policy,
+                'requests': requests,
+                'hits': stats['hits'],
+                'revalidated': stats['revalidated'],
+                'misses': stats['misses'],
+                'bypass': stats['bypass'],
+                'hit_ratio': stats['hits'] / requests * 100 if requests else 0,
+                'origin_requests': origin_requests,
+                'origin_offload': (requests - origin_requests) / requests * 100 if requests else 0,
+                'byte_offload': ((stats['bytes_served'] - stats['origin_bytes']) / stats['bytes_served'] * 100
+                                 if stats['bytes_served'] else 0),
+                'origin_latency': origin_mean,
+                'edge_latency': hit_mean,
+                'observed_latency': observed_mean,
+                'latency_savings': savings,
+                'latency_savings_pct': savings / origin_mean * 100 if origin_mean else 0,
+                'origin_p95': stats['origin_latency'].percentile(95) if stats['origin_latency'].count else 0
+            }
+
+        return {
+            'routes': results,
+            'crawl': routes,
+            'mix_source': mix_source,
+            'requests': len(mix),
+            'duration': duration,
+            **proxy.stats()
+        }
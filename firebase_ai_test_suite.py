@@ -8,7 +8,7 @@ import json
 import logging
 import time
 from typing import Dict, List, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import Page, Browser
 import aiohttp
 import firebase_admin
 from firebase_admin import credentials, firestore, storage, auth
@@ -19,11 +19,20 @@ import base64
 import hashlib
 from pathlib import Path
 
+from browser_runtime import BrowserRuntime, browser_page
+from incremental_selection import is_selected
+
 class FirebaseAITestSuite:
     """مجموعة اختبارات Firebase والذكاء الاصطناعي"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    def __init__(self, base_url: str = "http://localhost:9002", runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None):
         self.base_url = base_url
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
         self.results = {
             'firebase_connection': {},
             'firebase_auth': {},
@@ -67,9 +76,7 @@ class FirebaseAITestSuite:
             'error_messages': []
         }
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+        async with browser_page(self.runtime) as page:
 
             try:
                 await page.goto(self.base_url)
@@ -160,9 +167,6 @@ class FirebaseAITestSuite:
                 connection_results['error_messages'].append(f"Test execution error: {str(e)}")
                 logging.error(f"Error testing Firebase connection: {str(e)}")
 
-            finally:
-                await browser.close()
-
         self.results['firebase_connection'] = connection_results
         return connection_results
 
@@ -369,7 +373,7 @@ class FirebaseAITestSuite:
             # محاكاة تسجيل دخول
             await page.goto(f"{self.base_url}/login")
             await page.fill('input[type="email"]', "test@example.com")
-            await page.fill('input[type="password']}", "testpassword123")
+            await page.fill('input[type="password"]', "testpassword123")
             await page.click('button[type="submit"]')
 
             await page.wait_for_timeout(2000)
@@ -465,9 +469,7 @@ class FirebaseAITestSuite:
 
         try:
             # محاكاة عمليات CRUD في الواجهة
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 # اختبار إنشاء بيانات (إضافة إيراد)
                 await page.goto(f"{self.base_url}/revenue")
@@ -483,8 +485,6 @@ class FirebaseAITestSuite:
                 if "success" in page_content.lower() or "added" in page_content.lower():
                     crud_results['create_operation'] = True
 
-                await browser.close()
-
         except Exception as e:
             crud_results['error_handling'] = True
             logging.error(f"Error testing CRUD operations: {str(e)}")
@@ -502,9 +502,7 @@ class FirebaseAITestSuite:
 
         try:
             # محاكاة الاستماع للتحديثات الفورية
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 await page.goto(f"{self.base_url}/dashboard")
                 await page.wait_for_timeout(2000)
@@ -523,8 +521,6 @@ class FirebaseAITestSuite:
 
                 realtime_results['realtime_listener'] = has_listeners
 
-                await browser.close()
-
         except Exception as e:
             realtime_results['error_handling'] = True
             logging.error(f"Error testing realtime updates: {str(e)}")
@@ -543,9 +539,7 @@ class FirebaseAITestSuite:
 
         try:
             # محاكاة اختبار الاستعلامات
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 # اختبار استعلامات التقارير
                 await page.goto(f"{self.base_url}/reports")
@@ -565,8 +559,6 @@ class FirebaseAITestSuite:
 
                 query_results['simple_queries'] = data_loaded
 
-                await browser.close()
-
         except Exception as e:
             logging.error(f"Error testing Firestore queries: {str(e)}")
 
@@ -913,9 +905,7 @@ class FirebaseAITestSuite:
 
         try:
             # محاكاة اختبار الوصول إلى البيانات
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 await page.goto(f"{self.base_url}/dashboard")
                 await page.wait_for_timeout(2000)
@@ -934,8 +924,6 @@ class FirebaseAITestSuite:
 
                 rules_results['read_access'] = data_loaded_after_auth
 
-                await browser.close()
-
         except Exception as e:
             logging.error(f"Error testing security rules: {str(e)}")
 
@@ -953,9 +941,7 @@ class FirebaseAITestSuite:
 
         try:
             # اختبار التحقق من المدخلات
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 await page.goto(f"{self.base_url}/revenue")
                 await page.wait_for_timeout(1000)
@@ -971,8 +957,6 @@ class FirebaseAITestSuite:
                 if "invalid" in page_content.lower() or "required" in page_content.lower():
                     validation_results['input_validation'] = True
 
-                await browser.close()
-
         except Exception as e:
             logging.error(f"Error testing data validation: {str(e)}")
 
@@ -1018,9 +1002,7 @@ class FirebaseAITestSuite:
     async def _measure_document_read_time(self) -> float:
         """قياس وقت قراءة المستندات"""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 start_time = time.time()
 
@@ -1029,7 +1011,6 @@ class FirebaseAITestSuite:
 
                 read_time = time.time() - start_time
 
-                await browser.close()
                 return read_time
 
         except Exception as e:
@@ -1039,9 +1020,7 @@ class FirebaseAITestSuite:
     async def _measure_document_write_time(self) -> float:
         """قياس وقت كتابة المستندات"""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 await page.goto(f"{self.base_url}/revenue")
                 await page.wait_for_timeout(1000)
@@ -1056,7 +1035,6 @@ class FirebaseAITestSuite:
 
                 write_time = time.time() - start_time
 
-                await browser.close()
                 return write_time
 
         except Exception as e:
@@ -1066,9 +1044,7 @@ class FirebaseAITestSuite:
     async def _measure_query_time(self) -> float:
         """قياس وقت الاستعلام"""
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
+            async with browser_page(self.runtime) as page:
 
                 await page.goto(f"{self.base_url}/reports")
                 await page.wait_for_timeout(1000)
@@ -1080,7 +1056,6 @@ class FirebaseAITestSuite:
 
                 query_time = time.time() - start_time
 
-                await browser.close()
                 return query_time
 
         except Exception as e:
@@ -1095,37 +1070,43 @@ class FirebaseAITestSuite:
         """حساب درجة Firebase والذكاء الاصطناعي"""
         score = 100
         penalties = 0
+        # تشغيل جزئي (checks): تُقيَّم الخطوات المنفذة فقط، فلا تُحتسب الخطوات المتخطاة فاشلة
 
         # تقييم اتصال Firebase
-        connection = self.results.get('firebase_connection', {})
-        if not connection.get('sdk_loaded', False):
-            penalties += 30
-        if not connection.get('connection_established', False):
-            penalties += 20
+        if is_selected(self.checks, 'test_firebase_connection'):
+            connection = self.results.get('firebase_connection', {})
+            if not connection.get('sdk_loaded', False):
+                penalties += 30
+            if not connection.get('connection_established', False):
+                penalties += 20
 
         # تقييم المصادقة
-        auth = self.results.get('firebase_auth', {})
-        login_func = auth.get('login_functionality', {})
-        if not login_func.get('successful_login', False):
-            penalties += 15
+        if is_selected(self.checks, 'test_firebase_authentication'):
+            auth = self.results.get('firebase_auth', {})
+            login_func = auth.get('login_functionality', {})
+            if not login_func.get('successful_login', False):
+                penalties += 15
 
         # تقييم Firestore
-        firestore = self.results.get('firebase_firestore', {})
-        crud_ops = firestore.get('crud_operations', {})
-        if not crud_ops.get('create_operation', False):
-            penalties += 10
+        if is_selected(self.checks, 'test_firestore_functionality'):
+            firestore = self.results.get('firebase_firestore', {})
+            crud_ops = firestore.get('crud_operations', {})
+            if not crud_ops.get('create_operation', False):
+                penalties += 10
 
         # تقييم الذكاء الاصطناعي
-        ai_report = self.results.get('ai_report_generation', {})
-        if not ai_report.get('generation_successful', False):
-            penalties += 15
-        elif ai_report.get('report_quality', 0) < 70:
-            penalties += 8
+        if is_selected(self.checks, 'test_ai_functionality'):
+            ai_report = self.results.get('ai_report_generation', {})
+            if not ai_report.get('generation_successful', False):
+                penalties += 15
+            elif ai_report.get('report_quality', 0) < 70:
+                penalties += 8
 
         # تقييم دعم العربية
-        arabic_support = self.results.get('ai_arabic_support', {})
-        if not arabic_support.get('arabic_generation', False):
-            penalties += 10
+        if is_selected(self.checks, 'test_ai_functionality'):
+            arabic_support = self.results.get('ai_arabic_support', {})
+            if not arabic_support.get('arabic_generation', False):
+                penalties += 10
 
         self.firebase_ai_score = max(0, score - penalties)
         return self.firebase_ai_score
@@ -1138,32 +1119,31 @@ class FirebaseAITestSuite:
         """تنفيذ جميع اختبارات Firebase والذكاء الاصطناعي"""
         print("🚀 بدء اختبارات Firebase والذكاء الاصطناعي...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            try:
-                # 1. اختبارات اتصال Firebase
+        async with browser_page(self.runtime) as page:
+            # 1. اختبارات اتصال Firebase
+            if is_selected(self.checks, 'test_firebase_connection'):
                 await self.test_firebase_connection()
 
-                # 2. اختبارات المصادقة
+            # 2. اختبارات المصادقة
+            if is_selected(self.checks, 'test_firebase_authentication'):
                 await self.test_firebase_authentication(page)
 
-                # 3. اختبارات Firestore
+            # 3. اختبارات Firestore
+            if is_selected(self.checks, 'test_firestore_functionality'):
                 await self.test_firestore_functionality()
 
-                # 4. اختبارات الذكاء الاصطناعي
+            # 4. اختبارات الذكاء الاصطناعي
+            if is_selected(self.checks, 'test_ai_functionality'):
                 await self.test_ai_functionality(page)
 
-                # 5. اختبارات الأمان
+            # 5. اختبارات الأمان
+            if is_selected(self.checks, 'test_firebase_security'):
                 await self.test_firebase_security()
 
-                # 6. اختبارات الأداء
+            # 6. اختبارات الأداء
+            if is_selected(self.checks, 'test_firebase_performance'):
                 await self.test_firebase_performance()
 
-            finally:
-                await browser.close()
-
         # حساب النتيجة النهائية
         final_score = self.calculate_firebase_ai_score()
 
@@ -0,0 +1,379 @@
+"""
+اختيار الاختبارات تدريجياً حسب تغييرات git لنظام BarberTrack
+مطور: Full-stack Testing Engineer
+
+خريطة اعتماديات من ثلاث طبقات:
+1. ملفات التطبيق → المسارات: كل صفحة page.tsx تحت src/app/(main) مسار، وتتبع استيراداتها
+   ('@/...' والنسبية) يحدد الملفات التي يعتمد عليها. ما يستورده layout (ومثله إعدادات Next.js
+   وTailwind) يمس جميع المسارات.
+2. المسارات → دوال الاختبار: تحليل نصي لملفات المجموعات (بعضها لا يُحلل بـ ast) يجمع المسارات
+   المذكورة في كل خطوة من خطوات run_* مع الدوال المساعدة والثوابت التي تستدعيها.
+3. ملفات Python → المجموعات: تغيير ملف مجموعة أو وحدة تستوردها أو ملف بيانات تقرأه يعيد تشغيل
+   المجموعة كاملة؛ وتغيير ملفات المنسق أو أي ملف غير معروف خارج التطبيق يعيد تشغيل الجميع.
+
+select_tests('origin/main') تعيد الخطة: لكل مجموعة الخطوات المختارة والمسارات المطلوبة.
+"""
+
+import json
+import logging
+import re
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Union
+
+APP_DIR = 'git-github.com-llu77-MAN-main'
+ROUTES_DIR = f'{APP_DIR}/src/app/(main)'
+# ملفات التخطيط المشتركة: كل ما تستورده يظهر في جميع الصفحات
+LAYOUT_FILES = [f'{APP_DIR}/src/app/layout.tsx', f'{ROUTES_DIR}/layout.tsx']
+# ملفات التطبيق خارج src التي لا تؤثر على الصفحات
+APP_IGNORED = ('docs/', 'README.md')
+SOURCE_EXTENSIONS = ['.tsx', '.ts', '.jsx', '.js', '.css', '.json']
+
+# مسارات تستخدمها الاختبارات بأسماء مختلفة عن مجلدات التطبيق
+ROUTE_ALIASES = {'/dashboard': '/'}
+
+SUITES = {
+    'comprehensive': {'file': 'comprehensive_test_suite.py', 'run': 'run_comprehensive_tests'},
+    'security': {'file': 'security_test_suite.py', 'run': 'run_security_tests'},
+    'performance': {'file': 'performance_test_suite.py', 'run': 'run_performance_tests'},
+    'firebase_ai': {'file': 'firebase_ai_test_suite.py', 'run': 'run_firebase_ai_tests'},
+    'rtl_localization': {'file': 'rtl_localization_test_suite.py', 'run': 'run_rtl_localization_tests'},
+    'ux_ui': {'file': 'ux_ui_test_suite.py', 'run': 'run_ux_ui_tests'}
+}
+
+# مسارات تأتي من ملفات بيانات لا من نص المجموعة
+DATA_ROUTES = {'scenario_engine': 'user_scenarios.json'}
+
+# ملفات المنسق: تبني المجموعات وتحسب الدرجات، فتغييرها يعيد تشغيل جميع المجموعات
+HARNESS_FILES = ['run_all_tests.py', 'sharding.py', 'result_cache.py', 'suite_scheduler.py']
+# خارج التطبيق: ما لا يؤثر على نتائج الاختبارات (توثيق وصور ومخرجات التشغيل)؛ أي ملف آخر غير معروف = تشغيل كامل
+IGNORED_PATHS = ('test_results/', '.gitignore')
+IGNORED_EXTENSIONS = ('.md', '.txt', '.log', '.png', '.jpg', '.jpeg', '.svg', '.pdf')
+
+ALL_ROUTES = '*'
+
+_IMPORT_PATTERN = re.compile(r"""(?:import|from)\s*(?:[^'";]*?\s+from\s+)?['"]([^'"]+)['"]""")
+_ROUTE_LITERAL = re.compile(r"""['"](/(?:[a-z][a-z0-9\-]*(?:/[a-z0-9\-]+)*)?)['"]""")
+_BASE_URL_ROUTE = re.compile(r"""\{self\.base_url\}(/[a-z][a-z0-9\-]*(?:/[a-z0-9\-]+)*)""")
+_BASE_URL_ROOT = re.compile(r"""goto\(\s*self\.base_url\s*\)|\{self\.base_url\}['"]""")
+_UNIT_START = re.compile(r'^    (?:async\s+)?def\s+(\w+)|^    ([A-Za-z_]\w*)\s*(?::[^=]+)?=')
+
+
+# ===========================
+# 1. ملفات التطبيق → المسارات
+# ===========================
+
+def app_routes(root: str = '.') -> Dict[str, str]:
+    """المسار → ملف الصفحة، مع تجاهل مجموعات المسارات مثل (main)"""
+    routes = {}
+    for page in sorted(Path(root, ROUTES_DIR).rglob('page.tsx')):
+        parts = [part for part in page.parent.relative_to(Path(root, ROUTES_DIR)).parts
+                 if not (part.startswith('(') and part.endswith(')'))]
+        routes['/' + '/'.join(parts)] = page.relative_to(root).as_posix()
+    return routes
+
+
+def _resolve_import(source: str, specifier: str, root: str) -> Optional[str]:
+    if specifier.startswith('@/'):
+        base = Path(APP_DIR, 'src', specifier[2:])
+    elif specifier.startswith('.'):
+        base = Path(source).parent / specifier
+    else:
+        return None  # حزمة خارجية
+
+    candidates = [base] + [Path(f'{base}{extension}') for extension in SOURCE_EXTENSIONS] + \
+                 [base / f'index{extension}' for extension in SOURCE_EXTENSIONS]
+    for candidate in candidates:
+        resolved = Path(root, candidate).resolve()
+        if resolved.is_file():
+            return resolved.relative_to(Path(root).resolve()).as_posix()
+    return None
+
+
+def import_graph(root: str = '.') -> Dict[str, Set[str]]:
+    """ملف المصدر → الملفات المحلية التي يستوردها مباشرة"""
+    graph = {}
+    for path in Path(root, APP_DIR, 'src').rglob('*'):
+        if path.suffix not in ('.ts', '.tsx', '.js', '.jsx'):
+            continue
+        source = path.relative_to(root).as_posix()
+        text = path.read_text(encoding='utf-8', errors='ignore')
+        graph[source] = {resolved for resolved in (_resolve_import(source, specifier, root)
+                                                   for specifier in _IMPORT_PATTERN.findall(text)) if resolved}
+    return graph
+
+
+def _closure(start: List[str], graph: Dict[str, Set[str]]) -> Set[str]:
+    seen, stack = set(), list(start)
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        stack.extend(graph.get(current, ()))
+    return seen
+
+
+def route_dependencies(root: str = '.') -> Dict[str, Any]:
+    """لكل مسار: ملفات المصدر التي تعتمد عليها صفحته، وما تعتمد عليه جميع الصفحات"""
+    graph = import_graph(root)
+    routes = app_routes(root)
+    route_files = {}
+    for route, page in routes.items():
+        # ملفات مجلد المسار نفسه (actions وغيرها) تتبعه حتى لو لم تستوردها الصفحة
+        route_dir = Path(page).parent.as_posix() + '/'
+        local = [source for source in graph if source.startswith(route_dir)
+                 and not any(source.startswith(Path(other).parent.as_posix() + '/')
+                             for other in routes.values() if other != page
+                             and Path(other).parent.as_posix().startswith(route_dir))]
+        route_files[route] = _closure([page] + local, graph)
+
+    shared = _closure([layout for layout in LAYOUT_FILES if Path(root, layout).exists()], graph)
+    return {'routes': route_files, 'shared': shared}
+
+
+def affected_routes(changed: List[str], root: str = '.') -> Dict[str, Any]:
+    """المسارات التي تمسها ملفات التطبيق المعدلة؛ app_wide عند تغيير ملف مشترك"""
+    dependencies = route_dependencies(root)
+    routes: Set[str] = set()
+    app_wide = []
+    unmapped = []
+    reasons: Dict[str, List[str]] = {}
+
+    for path in changed:
+        if not path.startswith(APP_DIR + '/'):
+            continue
+        relative = path[len(APP_DIR) + 1:]
+        if path in dependencies['shared']:
+            app_wide.append(path)
+            continue
+        if not relative.startswith('src/'):
+            if not relative.startswith(APP_IGNORED):
+                app_wide.append(path)
+            continue
+
+        hits = [route for route, files in dependencies['routes'].items() if path in files]
+        for route in hits:
+            routes.add(route)
+            reasons.setdefault(route, []).append(path)
+        if not hits:
+            unmapped.append(path)
+
+    return {
+        'routes': sorted(routes),
+        'app_wide': app_wide,
+        'unmapped': unmapped,
+        'reasons': reasons
+    }
+
+
+# ===========================
+# 2. المسارات → دوال الاختبار
+# ===========================
+
+def _units(text: str) -> Dict[str, str]:
+    """دوال وثوابت الصنف (مستوى إزاحة 4) ونصوصها"""
+    units, name, lines = {}, None, []
+    for line in text.split('\n'):
+        match = _UNIT_START.match(line)
+        if match or (line.strip() and len(line) - len(line.lstrip()) < 4):
+            if name:
+                units[name] = '\n'.join(lines)
+            name = (match.group(1) or match.group(2)) if match else None
+            lines = []
+        if name:
+            lines.append(line)
+    if name:
+        units[name] = '\n'.join(lines)
+
+    # خصائص self.X المعرفة في __init__ (مثل قوائم تدفقات المستخدم) وحدات مستقلة أيضاً
+    attribute, lines = None, []
+    for line in units.get('__init__', '').split('\n'):
+        match = re.match(r'^        self\.(\w+)\s*(?::[^=]+)?=', line)
+        if match:
+            if attribute and attribute not in units:
+                units[attribute] = '\n'.join(lines)
+            attribute, lines = match.group(1), []
+        if attribute:
+            lines.append(line)
+    if attribute and attribute not in units:
+        units[attribute] = '\n'.join(lines)
+    return units
+
+
+def _data_routes(name: str, root: str) -> Set[str]:
+    path = Path(root, DATA_ROUTES[name])
+    if not path.exists():
+        return set()
+    return {route for route in re.findall(r'"goto"\s*:\s*"(/[^"]*)"', path.read_text(encoding='utf-8'))}
+
+
+def _unit_routes(body: str, root: str) -> Set[str]:
+    routes = {route for route in _ROUTE_LITERAL.findall(body) if not route.startswith('/api')}
+    routes.update(route for route in _BASE_URL_ROUTE.findall(body) if not route.startswith('/api'))
+    if _BASE_URL_ROOT.search(body):
+        routes.add('/')
+    for name in DATA_ROUTES:
+        if name in body:
+            routes.update(_data_routes(name, root))
+    return {ROUTE_ALIASES.get(route, route) for route in routes}
+
+
+def suite_checks(suite: str, root: str = '.') -> Dict[str, Union[str, List[str]]]:
+    """خطوات run_* للمجموعة → المسارات التي تفتحها (مع الدوال المساعدة)، أو '*' إن عملت على الصفحة الحالية"""
+    spec = SUITES[suite]
+    units = _units(Path(root, spec['file']).read_text(encoding='utf-8'))
+    steps = list(dict.fromkeys(re.findall(r'await self\.(\w+)\(', units.get(spec['run'], ''))))
+
+    checks = {}
+    for step in steps:
+        closure, stack = set(), [step]
+        while stack:
+            current = stack.pop()
+            if current in closure or current not in units:
+                continue
+            closure.add(current)
+            stack.extend(reference for reference in re.findall(r'self\.(\w+)', units[current]) if reference in units)
+            stack.extend(reference for reference in re.findall(r'\b([A-Z][A-Z_]+)\b', units[current]) if reference in units)
+
+        routes = set().union(*[_unit_routes(units[name], root) for name in closure])
+        if routes:
+            checks[step] = sorted(routes)
+        elif re.search(r'\bpage\b', units.get(step, '')):
+            # تعمل على الصفحة المفتوحة حالياً دون تنقل: أي تغيير في التطبيق قد يمسها
+            checks[step] = ALL_ROUTES
+        else:
+            # خطوات API وقاعدة البيانات لا تعتمد على ملفات الواجهة
+            checks[step] = []
+    return checks
+
+
+# ===========================
+# 3. ملفات Python → المجموعات
+# ===========================
+
+def suite_sources(root: str = '.') -> Dict[str, List[str]]:
+    """المجموعة → ملفات Python المحلية التي تستوردها (مباشرة أو عبر وحدات أخرى) مع ملفها"""
+    modules = {path.stem: path for path in Path(root).glob('*.py')}
+    graph = {}
+    for name, path in modules.items():
+        text = path.read_text(encoding='utf-8', errors='ignore')
+        imported = set(re.findall(r'^(?:from|import)\s+(\w+)', text, re.MULTILINE))
+        graph[name] = {module for module in imported if module in modules and module != name}
+
+    return {suite: sorted(modules[module].name for module in _closure([Path(spec['file']).stem], graph))
+            for suite, spec in SUITES.items()}
+
+
+def suite_data_files(root: str = '.') -> Dict[str, List[str]]:
+    """المجموعة → ملفات البيانات (DATA_ROUTES) التي تقرأها وحداتها"""
+    data_files = {}
+    for suite, files in suite_sources(root).items():
+        # هذه الوحدة نفسها تذكر أسماء ملفات البيانات، فلا تُحتسب عند البحث عنها
+        sources = ''.join(Path(root, path).read_text(encoding='utf-8', errors='ignore') for path in files
+                          if path != 'incremental_selection.py')
+        data_files[suite] = [data for name, data in DATA_ROUTES.items() if name in sources]
+    return data_files
+
+
+def python_dependents(root: str = '.') -> Dict[str, Set[str]]:
+    """ملف Python أو ملف بيانات → المجموعات التي تعتمد عليه"""
+    dependents: Dict[str, Set[str]] = {}
+    data_files = suite_data_files(root)
+    for suite, files in suite_sources(root).items():
+        for path in files + data_files[suite]:
+            dependents.setdefault(path, set()).add(suite)
+    return dependents
+
+
+def _runs_everything(path: str) -> bool:
+    """ملف خارج التطبيق وخارج اعتماديات المجموعات: المنسق أو ملف غير معروف وليس توثيقاً"""
+    if path in HARNESS_FILES:
+        return True
+    return not (path.startswith(APP_DIR + '/') or path.startswith(IGNORED_PATHS) or path.endswith(IGNORED_EXTENSIONS))
+
+
+# ===========================
+# الخطة
+# ===========================
+
+def changed_files(since: str, root: str = '.') -> List[str]:
+    """الملفات المعدلة منذ المراجعة (بما فيها التعديلات غير المحفوظة والملفات الجديدة)"""
+    commands = [['git', 'diff', '--name-only', since, '--'], ['git', 'ls-files', '--others', '--exclude-standard']]
+    files = []
+    for command in commands:
+        completed = subprocess.run(command, cwd=root, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed: {completed.stderr.strip()}")
+        files.extend(line for line in completed.stdout.splitlines() if line)
+    return sorted(set(files))
+
+
+def select_tests(since: str, root: str = '.', changed: Optional[List[str]] = None) -> Dict[str, Any]:
+    """خطة الاختبار: لكل مجموعة None (كاملة) أو الخطوات والمسارات المختارة"""
+    changed = changed if changed is not None else changed_files(since, root)
+    app = affected_routes(changed, root)
+    dependents = python_dependents(root)
+
+    full_suites: Dict[str, List[str]] = {}
+    for path in changed:
+        if path not in HARNESS_FILES and path in dependents:
+            suites_hit = dependents[path]
+        elif _runs_everything(path):
+            suites_hit = SUITES
+        else:
+            continue
+        for suite in suites_hit:
+            full_suites.setdefault(suite, []).append(path)
+
+    suites: Dict[str, Any] = {}
+    for suite in SUITES:
+        if suite in full_suites:
+            suites[suite] = {'checks': None, 'routes': None, 'reason': f"changed: {', '.join(full_suites[suite])}"}
+            continue
+
+        selected = []
+        for step, routes in suite_checks(suite, root).items():
+            if routes == ALL_ROUTES or (routes and app['app_wide']):
+                if app['app_wide'] or app['routes']:
+                    selected.append(step)
+            elif set(routes) & set(app['routes']):
+                selected.append(step)
+
+        if selected:
+            suites[suite] = {
+                'checks': selected,
+                'routes': None if app['app_wide'] else app['routes'],
+                'reason': 'shared app files' if app['app_wide'] else f"routes: {', '.join(app['routes'])}"
+            }
+
+    return {
+        'since': since,
+        'changed_files': changed,
+        'routes': app['routes'],
+        'app_wide': app['app_wide'],
+        'unmapped': app['unmapped'],
+        'suites': suites,
+        'skipped_suites': [suite for suite in SUITES if suite not in suites]
+    }
+
+
+def is_selected(checks: Optional[List[str]], name: str) -> bool:
+    """هل الخطوة مطلوبة (None = جميع الخطوات)"""
+    return checks is None or name in checks
+
+
+def filter_routes(items: List[Any], routes: Optional[List[str]], key: Optional[str] = None) -> List[Any]:
+    """تقليص قائمة مسارات المجموعة إلى المسارات المعدلة؛ القائمة كاملة إن لم يبق شيء"""
+    if routes is None:
+        return items
+    selected = [item for item in items
+                if ROUTE_ALIASES.get(item[key] if key else item, item[key] if key else item) in routes]
+    if not selected:
+        logging.info(f"No route of {[item[key] if key else item for item in items]} changed; keeping all")
+    return selected or items
+
+
+if __name__ == '__main__':
+    import sys
+    print(json.dumps(select_tests(sys.argv[1] if len(sys.argv) > 1 else 'HEAD'), ensure_ascii=False, indent=2))
@@ -0,0 +1,191 @@
+"""
+مسجل توزيع زمن الاستجابة بذاكرة محدودة (HDR Histogram) لاختبارات BarberTrack
+مطور: Performance Testing Specialist
+"""
+
+import math
+from array import array
+from typing import Dict, Any, Iterable, Optional
+
+
+class LatencyHistogram:
+    """مدرج تكراري لوغاريتمي-خطي للقيم بالميلي ثانية بدقة أرقام معنوية ثابتة
+
+    تُخزن القيم كأعداد صحيحة بالميكروثانية في مصفوفة عدادات ثابتة الحجم، لذلك لا يزيد
+    استهلاك الذاكرة مع عدد العينات، ويمكن دمج مدرجات العمال المختلفة بجمع العدادات.
+    """
+
+    def __init__(self, highest_ms: float = 3_600_000, significant_figures: int = 2):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+
+        self.highest_ms = highest_ms
+        self.significant_figures = significant_figures
+        self.highest_value = int(highest_ms * 1000)
+
+        largest_single_unit = 2 * 10 ** significant_figures
+        self.sub_bucket_count_magnitude = max(1, math.ceil(math.log2(largest_single_unit)))
+        self.sub_bucket_half_count_magnitude = self.sub_bucket_count_magnitude - 1
+        self.sub_bucket_count = 1 << self.sub_bucket_count_magnitude
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_mask = self.sub_bucket_count - 1
+
+        # عدد الدلاء اللازمة لتغطية أعلى قيمة
+        smallest_untrackable = self.sub_bucket_count
+        bucket_count = 1
+        while smallest_untrackable <= self.highest_value:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self.bucket_count = bucket_count
+
+        self.counts = array('q', [0]) * ((bucket_count + 1) * self.sub_bucket_half_count)
+        self.total_count = 0
+        self.overflow_count = 0
+        self.min_value: Optional[int] = None
+        self.max_value = 0
+        self.total_sum = 0.0
+
+    # ===========================
+    # حساب الفهارس
+    # ===========================
+
+    def _index_for(self, value: int) -> int:
+        pow2_ceiling = (value | self.sub_bucket_mask).bit_length()
+        bucket_index = pow2_ceiling - (self.sub_bucket_half_count_magnitude + 1)
+        sub_bucket_index = value >> bucket_index
+        return ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) + (sub_bucket_index - self.sub_bucket_half_count)
+
+    def _value_for(self, index: int) -> int:
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        return sub_bucket_index << bucket_index
+
+    def _highest_equivalent(self, index: int) -> int:
+        """أعلى قيمة تقع في نفس الخانة (حد الخانة العلوي)"""
+        bucket_index = max(0, (index >> self.sub_bucket_half_count_magnitude) - 1)
+        return self._value_for(index) + (1 << bucket_index) - 1
+
+    # ===========================
+    # التسجيل والدمج
+    # ===========================
+
+    def record(self, value_ms: float, count: int = 1):
+        """تسجيل قيمة بالميلي ثانية (القيم غير المنتهية تُحسب كفائض)"""
+        if value_ms is None or math.isnan(value_ms) or math.isinf(value_ms):
+            self.overflow_count += count
+            return
+
+        value = max(0, int(round(value_ms * 1000)))
+        if value > self.highest_value:
+            self.overflow_count += count
+            value = self.highest_value
+
+        self.counts[self._index_for(value)] += count
+        self.total_count += count
+        self.total_sum += value * count
+        self.max_value = max(self.max_value, value)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+
+    def record_many(self, values_ms: Iterable[float]):
+        for value in values_ms:
+            self.record(value)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """دمج مدرج آخر بنفس الإعدادات (مثلاً من عامل آخر)"""
+        if (other.significant_figures, other.highest_value) != (self.significant_figures, self.highest_value):
+            raise ValueError("Cannot merge histograms with different configurations")
+
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total_count += other.total_count
+        self.overflow_count += other.overflow_count
+        self.total_sum += other.total_sum
+        self.max_value = max(self.max_value, other.max_value)
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+        return self
+
+    # ===========================
+    # الاستعلام
+    # ===========================
+
+    def percentile(self, percentile: float) -> float:
+        """قيمة النسبة المئوية بالميلي ثانية"""
+        if self.total_count == 0:
+            return 0.0
+
+        percentile = min(max(percentile, 0.0), 100.0)
+        target = max(1, math.ceil(percentile / 100 * self.total_count))
+
+        running = 0
+        for index, count in enumerate(self.counts):
+            if count:
+                running += count
+                if running >= target:
+                    value = min(self._highest_equivalent(index), self.max_value)
+                    return value / 1000
+
+        return self.max_value / 1000
+
+    @property
+    def count(self) -> int:
+        return self.total_count
+
+    @property
+    def mean(self) -> float:
+        return self.total_sum / self.total_count / 1000 if self.total_count else 0.0
+
+    @property
+    def min(self) -> float:
+        return (self.min_value or 0) / 1000
+
+    @property
+    def max(self) -> float:
+        return self.max_value / 1000
+
+    def summary(self) -> Dict[str, Any]:
+        """ملخص التوزيع بالميلي ثانية"""
+        return {
+            'count': self.total_count,
+            'overflow': self.overflow_count,
+            'min': self.min,
+            'mean': self.mean,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'p999': self.percentile(99.9),
+            'max': self.max
+        }
+
+    # ===========================
+    # التسلسل
+    # ===========================
+
+    def to_dict(self) -> Dict[str, Any]:
+        """تمثيل مضغوط (العدادات غير الصفرية فقط) قابل للحفظ بـ JSON"""
+        return {
+            'highest_ms': self.highest_ms,
+            'significant_figures': self.significant_figures,
+            'counts': {str(index): count for index, count in enumerate(self.counts) if count},
+            'overflow': self.overflow_count,
+            'min': self.min_value,
+            'max': self.max_value,
+            'sum': self.total_sum
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencyHistogram':
+        histogram = cls(data['highest_ms'], data['significant_figures'])
+        for index, count in data['counts'].items():
+            histogram.counts[int(index)] = count
+            histogram.total_count += count
+        histogram.overflow_count = data.get('overflow', 0)
+        histogram.min_value = data.get('min')
+        histogram.max_value = data.get('max', 0)
+        histogram.total_sum = data.get('sum', 0.0)
+        return histogram
@@ -0,0 +1,774 @@
+"""
+محرك توليد الحمل لاختبارات أداء BarberTrack
+مطور: Performance Testing Specialist
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Deque
+
+import aiohttp
+import psutil
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+from latency_histogram import LatencyHistogram
+
+
+class BrowserPool:
+    """مجمع متصفحات طويلة العمر يخدم كل منها عدة سياقات معزولة"""
+
+    def __init__(self, contexts_per_browser: int = 25, max_browsers: Optional[int] = None,
+                 headless: bool = True, launch_options: Optional[Dict[str, Any]] = None):
+        if contexts_per_browser < 1:
+            raise ValueError("contexts_per_browser must be >= 1")
+
+        self.contexts_per_browser = contexts_per_browser
+        self.max_browsers = max_browsers
+        self.headless = headless
+        self.launch_options = launch_options or {}
+
+        self._playwright = None
+        self._browsers: List[Browser] = []
+        self._active: Dict[int, int] = {}  # فهرس المتصفح -> عدد السياقات النشطة
+        self._condition = asyncio.Condition()
+        self._launching = False
+
+        self.stats = {
+            'browsers_launched': 0,
+            'contexts_created': 0,
+            'peak_active_contexts': 0,
+            'context_wait_time': 0.0
+        }
+
+    @classmethod
+    def for_users(cls, num_users: int, contexts_per_browser: int = 25,
+                  max_browsers: Optional[int] = None, **kwargs) -> 'BrowserPool':
+        """إنشاء مجمع بعدد متصفحات مناسب لعدد المستخدمين"""
+        needed = max(1, math.ceil(num_users / contexts_per_browser))
+        if max_browsers is not None:
+            needed = min(needed, max_browsers)
+        return cls(contexts_per_browser=contexts_per_browser, max_browsers=needed, **kwargs)
+
+    async def start(self, prelaunch: int = 0):
+        """تشغيل Playwright مرة واحدة لكامل عمر المجمع، مع إطلاق مسبق اختياري للمتصفحات"""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        if prelaunch > 0:
+            count = prelaunch if self.max_browsers is None else min(prelaunch, self.max_browsers)
+            count -= len(self._browsers)
+            if count > 0:
+                browsers = await asyncio.gather(*[self._launch_browser() for _ in range(count)])
+                async with self._condition:
+                    for browser in browsers:
+                        self._add_browser(browser)
+                    self._condition.notify_all()
+
+    async def close(self):
+        """إغلاق جميع المتصفحات وإيقاف Playwright"""
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception as e:
+                logging.error(f"Error closing pooled browser: {str(e)}")
+
+        self._browsers = []
+        self._active = {}
+
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self) -> 'BrowserPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _free_slot(self) -> Optional[int]:
+        """إيجاد المتصفح الأقل انشغالاً الذي لديه سعة متاحة"""
+        candidates = [
+            (count, index) for index, count in self._active.items()
+            if count < self.contexts_per_browser
+        ]
+        return min(candidates)[1] if candidates else None
+
+    def _can_launch(self) -> bool:
+        return self.max_browsers is None or len(self._browsers) < self.max_browsers
+
+    async def _launch_browser(self) -> Browser:
+        browser = await self._playwright.chromium.launch(headless=self.headless, **self.launch_options)
+        self.stats['browsers_launched'] += 1
+        return browser
+
+    def _add_browser(self, browser: Browser) -> int:
+        self._browsers.append(browser)
+        index = len(self._browsers) - 1
+        self._active[index] = 0
+        return index
+
+    async def acquire(self, **context_options) -> BrowserContext:
+        """حجز سياق معزول جديد (ينتظر إذا امتلأت جميع المتصفحات)"""
+        await self.start()
+        wait_start = time.perf_counter()
+
+        async with self._condition:
+            while True:
+                index = self._free_slot()
+                if index is not None:
+                    break
+                if self._can_launch() and not self._launching:
+                    # إطلاق متصفح واحد في كل مرة حتى لا يطلق كل منتظر متصفحاً خاصاً به، ودون حجز القفل
+                    # أثناء الإطلاق حتى يستطيع غيره حجز مكان يتحرر أو إعادة سياقه في الأثناء
+                    self._launching = True
+                    self._condition.release()
+                    try:
+                        browser = await self._launch_browser()
+                    finally:
+                        await self._condition.acquire()
+                        self._launching = False
+                        self._condition.notify_all()
+                    index = self._add_browser(browser)
+                    break
+                await self._condition.wait()
+
+            self._active[index] += 1
+            active_total = sum(self._active.values())
+            self.stats['peak_active_contexts'] = max(self.stats['peak_active_contexts'], active_total)
+
+        self.stats['context_wait_time'] += time.perf_counter() - wait_start
+
+        try:
+            context = await self._browsers[index].new_context(**context_options)
+        except Exception:
+            await self._release_slot(index)
+            raise
+
+        context._pool_index = index
+        self.stats['contexts_created'] += 1
+        return context
+
+    async def _release_slot(self, index: int):
+        async with self._condition:
+            self._active[index] = max(0, self._active.get(index, 0) - 1)
+            self._condition.notify_all()
+
+    async def release(self, context: BrowserContext):
+        """إغلاق السياق وإعادة مكانه إلى المجمع"""
+        index = getattr(context, '_pool_index', None)
+        try:
+            await context.close()
+        except Exception as e:
+            logging.error(f"Error closing pooled context: {str(e)}")
+        if index is not None:
+            await self._release_slot(index)
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """سياق معزول يُعاد تلقائياً إلى المجمع"""
+        context = await self.acquire(**context_options)
+        try:
+            yield context
+        finally:
+            await self.release(context)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """إحصائيات المجمع"""
+        return {
+            **self.stats,
+            'contexts_per_browser': self.contexts_per_browser,
+            'max_browsers': self.max_browsers,
+            'open_browsers': len(self._browsers)
+        }
+
+
+def find_listening_pid(port: int) -> Optional[int]:
+    """معرف العملية التي تستمع على منفذ TCP محلي (مثل خادم Next.js على 9002)"""
+    try:
+        connections = psutil.net_connections(kind='tcp')
+    except (psutil.Error, OSError):
+        return None
+    for connection in connections:
+        if connection.status == psutil.CONN_LISTEN and connection.laddr and connection.laddr.port == port and connection.pid:
+            return connection.pid
+    return None
+
+
+class ProcessTreeSampler:
+    """عينات دورية لأشجار عمليات مسماة (أداة الاختبار ومتصفحاتها، الخادم المستهدف) في مخزن دائري
+
+    كل عينة تجمع لكل شجرة: CPU% وRSS وUSS والملفات المفتوحة والخيوط وعدد العمليات.
+    المخزن الدائري يحتفظ بآخر capacity عينة فقط، بينما يُحسب الملخص (المتوسط والذروة)
+    على جميع العينات طوال مدة الاختبار الفعلية بين start و stop.
+    """
+
+    METRICS = ('cpu_percent', 'rss_mb', 'uss_mb', 'open_fds', 'threads', 'processes')
+
+    def __init__(self, roots: Dict[str, Optional[int]], interval: float = 0.5, capacity: int = 3600,
+                 uss: bool = True):
+        self.roots = {name: pid for name, pid in roots.items() if pid is not None}
+        self.interval = interval
+        # USS يتطلب قراءة smaps لكل عملية، لذلك يمكن إيقافه للعينات المتكررة جداً
+        self.uss = uss
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.total_samples = 0
+        self._processes: Dict[str, Dict[int, psutil.Process]] = {name: {} for name in self.roots}
+        self._totals = {name: {metric: 0.0 for metric in self.METRICS} for name in self.roots}
+        self._peaks = {name: {metric: 0.0 for metric in self.METRICS} for name in self.roots}
+        self._peak_total_rss = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+
+    def _process_tree(self, name: str) -> List[psutil.Process]:
+        known = self._processes[name]
+        try:
+            root = known.get(self.roots[name]) or psutil.Process(self.roots[name])
+            tree = [root] + root.children(recursive=True)
+        except psutil.Error:
+            tree = list(known.values())
+
+        # الاحتفاظ بنفس كائنات Process لكي يكون cpu_percent تراكمياً بين العينات
+        self._processes[name] = {proc.pid: known.get(proc.pid, proc) for proc in tree}
+        return list(self._processes[name].values())
+
+    def _sample_tree(self, name: str) -> Dict[str, float]:
+        values = {metric: 0.0 for metric in self.METRICS}
+        for proc in self._process_tree(name):
+            try:
+                with proc.oneshot():
+                    cpu = proc.cpu_percent(interval=None)
+                    memory = proc.memory_info()
+                    threads = proc.num_threads()
+                    fds = proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles()
+                uss = memory.rss
+                if self.uss:
+                    try:
+                        uss = proc.memory_full_info().uss
+                    except psutil.AccessDenied:
+                        pass
+            except psutil.Error:
+                continue
+            values['cpu_percent'] += cpu
+            values['rss_mb'] += memory.rss / 1024 / 1024
+            values['uss_mb'] += uss / 1024 / 1024
+            values['open_fds'] += fds
+            values['threads'] += threads
+            values['processes'] += 1
+        return values
+
+    def sample(self) -> Dict[str, Any]:
+        """أخذ عينة واحدة من جميع الأشجار"""
+        groups = {name: self._sample_tree(name) for name in self.roots}
+        for name, values in groups.items():
+            for metric, value in values.items():
+                self._totals[name][metric] += value
+                self._peaks[name][metric] = max(self._peaks[name][metric], value)
+        self._peak_total_rss = max(self._peak_total_rss, sum(values['rss_mb'] for values in groups.values()))
+
+        now = time.time()
+        sample = {'timestamp': now, 'elapsed': now - (self._started_at or now), 'groups': groups}
+        self.samples.append(sample)
+        self.total_samples += 1
+        return sample
+
+    def _prime(self):
+        for name in self.roots:
+            for proc in self._process_tree(name):
+                try:
+                    proc.cpu_percent(interval=None)  # تهيئة العداد
+                except psutil.Error:
+                    pass
+
+    async def _run(self):
+        # استدعاءات psutil متزامنة: تنفيذها في خيط حتى لا تؤخر حلقة الأحداث
+        await asyncio.to_thread(self._prime)
+        while True:
+            await asyncio.sleep(self.interval)
+            await asyncio.to_thread(self.sample)
+
+    def start(self):
+        self._started_at = time.time()
+        self._stopped_at = None
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> Dict[str, Any]:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._stopped_at = time.time()
+        return self.summary()
+
+    def summary(self) -> Dict[str, Any]:
+        """متوسط وذروة كل مقياس لكل شجرة على كامل مدة المراقبة"""
+        if not self.total_samples:
+            return {'samples': 0}
+
+        groups = {}
+        for name, pid in self.roots.items():
+            totals, peaks = self._totals[name], self._peaks[name]
+            groups[name] = {'pid': pid}
+            for metric in self.METRICS:
+                groups[name][f'average_{metric}'] = totals[metric] / self.total_samples
+                groups[name][f'peak_{metric}'] = peaks[metric] if metric in ('cpu_percent', 'rss_mb', 'uss_mb') else int(peaks[metric])
+
+        return {
+            'samples': self.total_samples,
+            'retained_samples': len(self.samples),
+            'interval': self.interval,
+            'duration': (self._stopped_at or time.time()) - (self._started_at or time.time()),
+            'cpu_count': psutil.cpu_count(),
+            'peak_total_rss_mb': self._peak_total_rss,
+            'groups': groups
+        }
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        """العينات المحفوظة في المخزن الدائري (الأحدث فقط عند تجاوز السعة)"""
+        return list(self.samples)
+
+
+class HarnessResourceMonitor(ProcessTreeSampler):
+    """مراقبة استهلاك أداة الاختبار نفسها (Python + المتصفحات التابعة) للمعالج والذاكرة"""
+
+    def __init__(self, interval: float = 1.0):
+        super().__init__({'harness': os.getpid()}, interval=interval, uss=False)
+
+    def summary(self) -> Dict[str, Any]:
+        """ملخص استهلاك أداة الاختبار"""
+        usage = super().summary()
+        if not usage['samples']:
+            return usage
+
+        harness = usage['groups']['harness']
+        return {
+            'samples': usage['samples'],
+            'cpu_count': usage['cpu_count'],
+            'average_cpu_percent': harness['average_cpu_percent'],
+            'peak_cpu_percent': harness['peak_cpu_percent'],
+            'average_rss_mb': harness['average_rss_mb'],
+            'peak_rss_mb': harness['peak_rss_mb'],
+            'peak_processes': harness['peak_processes']
+        }
+
+
+class HttpLoadEngine:
+    """محرك طلبات HTTP بجلسة واحدة واتصالات مستمرة (keep-alive) مشتركة"""
+
+    def __init__(self, base_url: str, limit: int = 100, limit_per_host: int = 50,
+                 timeout: float = 10, keepalive_timeout: float = 30, headers: Optional[Dict[str, str]] = None):
+        self.base_url = base_url
+        self.headers = headers
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """تتبع مراحل الطلب لفصل وقت الاتصال عن وقت الخادم"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_dns_start(session, ctx, params):
+            ctx.trace_request_ctx['dns_start'] = time.perf_counter()
+
+        async def on_dns_end(session, ctx, params):
+            ctx.trace_request_ctx['dns_end'] = time.perf_counter()
+
+        async def on_connection_start(session, ctx, params):
+            ctx.trace_request_ctx['connect_start'] = time.perf_counter()
+
+        async def on_connection_end(session, ctx, params):
+            ctx.trace_request_ctx['connect_end'] = time.perf_counter()
+
+        async def on_connection_reused(session, ctx, params):
+            ctx.trace_request_ctx['reused'] = True
+
+        async def on_request_sent(session, ctx, params):
+            ctx.trace_request_ctx['sent'] = time.perf_counter()
+
+        async def on_request_end(session, ctx, params):
+            ctx.trace_request_ctx['headers_received'] = time.perf_counter()
+
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connection_start)
+        trace_config.on_connection_create_end.append(on_connection_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reused)
+        trace_config.on_request_headers_sent.append(on_request_sent)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    async def start(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=self.headers,
+                trace_configs=[self._trace_config()]
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> 'HttpLoadEngine':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def request(self, method: str, path: str, data: Optional[Dict] = None,
+                      intended_start: Optional[float] = None) -> Dict[str, Any]:
+        """تنفيذ طلب واحد وإرجاع مراحل توقيته بالميلي ثانية
+
+        intended_start هو موعد الإرسال المخطط (time.perf_counter). يُقاس corrected_time منه
+        وليس من لحظة الإرسال الفعلية، فلا يختفي زمن الانتظار خلف طلب سابق متعثر
+        (تصحيح coordinated omission).
+        """
+        await self.start()
+
+        trace = {}
+        sample = {
+            'method': method.upper(),
+            'path': path,
+            'status': None,
+            'bytes': 0,
+            'reused_connection': False
+        }
+
+        start = time.perf_counter()
+        if intended_start is None:
+            intended_start = start
+        sample['send_delay'] = (start - intended_start) * 1000
+
+        try:
+            kwargs = {'trace_request_ctx': trace}
+            if method.upper() != 'GET':
+                kwargs['json'] = data or {}
+            async with self._session.request(method.upper(), f"{self.base_url}{path}", **kwargs) as response:
+                headers_received = trace.get('headers_received', time.perf_counter())
+                body = await response.read()
+                end = time.perf_counter()
+                sample['status'] = response.status
+                sample['bytes'] = len(body)
+
+        except Exception as e:
+            logging.error(f"Error measuring API response for {method} {path}: {str(e)}")
+            sample.update({
+                'error': str(e),
+                # زمن الفشل من لحظة الإرسال، تسجله المدرجات بدلاً من المراحل غير المكتملة
+                'failed_after': (time.perf_counter() - start) * 1000,
+                'total_time': float('inf'),
+                'corrected_time': float('inf'),
+                'dns_time': 0.0,
+                'connect_time': 0.0,
+                'ttfb': float('inf'),
+                'body_time': 0.0
+            })
+            return sample
+
+        connect_time = 0.0
+        if 'connect_start' in trace and 'connect_end' in trace:
+            connect_time = trace['connect_end'] - trace['connect_start']
+        dns_time = 0.0
+        if 'dns_start' in trace and 'dns_end' in trace:
+            dns_time = trace['dns_end'] - trace['dns_start']
+
+        # TTFB يقاس من لحظة إرسال الطلب، فلا يتضمن وقت الاتصال
+        sent = trace.get('sent', trace.get('connect_end', start))
+        sample.update({
+            'total_time': (end - start) * 1000,
+            'corrected_time': (end - intended_start) * 1000,
+            'dns_time': dns_time * 1000,
+            'connect_time': connect_time * 1000,
+            'ttfb': (headers_received - sent) * 1000,
+            'body_time': (end - headers_received) * 1000,
+            'reused_connection': trace.get('reused', False)
+        })
+        return sample
+
+    async def run_endpoint(self, method: str, path: str, samples: int = 10, concurrency: int = 1,
+                           data: Optional[Dict] = None, rate: Optional[float] = None) -> List[Dict[str, Any]]:
+        """إرسال عدد من العينات لنقطة نهاية واحدة بتزامن محدد
+
+        عند تحديد rate (طلب/ثانية) يكون للعينة i موعد إرسال مخطط t0 + i/rate، وإذا تأخر
+        الإرسال بسبب طلب سابق بطيء يُحتسب التأخير ضمن corrected_time.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * samples
+        next_index = 0
+        start = time.perf_counter()
+
+        async def worker():
+            nonlocal next_index
+            while next_index < samples:
+                index = next_index
+                next_index += 1
+
+                intended_start = None
+                if rate:
+                    intended_start = start + index / rate
+                    delay = intended_start - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                results[index] = await self.request(method, path, data, intended_start=intended_start)
+
+        await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, samples)))])
+        return results
+
+
+class OpenLoopScheduler:
+    """جدولة مفتوحة الحلقة: بدء الجلسات بمعدل ثابت بغض النظر عن انتهاء السابقة
+
+    مع end_rate يتغير المعدل خطياً من arrival_rate إلى end_rate خلال المدة (مرحلة تصاعد).
+    """
+
+    def __init__(self, arrival_rate: float, duration: float, max_in_flight: Optional[int] = None,
+                 end_rate: Optional[float] = None):
+        end_rate = arrival_rate if end_rate is None else end_rate
+        if arrival_rate < 0 or end_rate < 0 or arrival_rate + end_rate <= 0:
+            raise ValueError("arrival_rate must be > 0")
+        self.arrival_rate = arrival_rate
+        self.end_rate = end_rate
+        self.duration = duration
+        self.max_in_flight = max_in_flight
+        self.started_at: Optional[float] = None
+
+    @property
+    def scheduled_starts(self) -> int:
+        return int((self.arrival_rate + self.end_rate) / 2 * self.duration)
+
+    def scheduled_time(self, index: int) -> float:
+        """موعد البدء المخطط للعنصر index (بساعة time.perf_counter)"""
+        if self.end_rate == self.arrival_rate:
+            return self.started_at + index / self.arrival_rate
+
+        # حل r0*t + (r1 - r0)*t^2/(2D) = index لإيجاد موعد البدء على منحنى التصاعد
+        slope = (self.end_rate - self.arrival_rate) / (2 * self.duration)
+        discriminant = max(0.0, self.arrival_rate ** 2 + 4 * slope * index)
+        return self.started_at + (math.sqrt(discriminant) - self.arrival_rate) / (2 * slope)
+
+    async def run(self, make_task: Callable[[int], Awaitable[Any]], collect_results: bool = True,
+                  drain: bool = True) -> Dict[str, Any]:
+        """تشغيل الجدول واستدعاء make_task(index) عند كل موعد بدء
+
+        مع collect_results=False لا تُحفظ نتائج المهام، فتبقى الذاكرة ثابتة في اختبارات التحمل
+        الطويلة (يُفترض أن تسجل المهام نتائجها بنفسها في مدرجات تكرارية).
+        مع drain=False يعود الجدول فور آخر موعد بدء وتُعاد المهام الجارية في 'in_flight'،
+        لتبدأ المرحلة التالية من ملف الحمل دون فجوة.
+        """
+        scheduled_starts = self.scheduled_starts
+        in_flight = set()
+        tasks: List[asyncio.Task] = []
+        started = 0
+        start_skews = LatencyHistogram()
+        backlog_timeline: Dict[int, int] = {}  # ثانية -> أقصى عدد جلسات قيد التنفيذ
+        dropped = 0
+
+        start = self.started_at = time.perf_counter()
+        for index in range(scheduled_starts):
+            scheduled = self.scheduled_time(index)
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # الانحراف بين موعد البدء المجدول والفعلي يكشف تشبع أداة الاختبار نفسها
+            now = time.perf_counter()
+            start_skews.record((now - scheduled) * 1000)
+
+            if self.max_in_flight is not None and len(in_flight) >= self.max_in_flight:
+                dropped += 1
+                continue
+
+            task = asyncio.create_task(make_task(index))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            started += 1
+            if collect_results:
+                tasks.append(task)
+
+            second = int(now - start)
+            backlog_timeline[second] = max(backlog_timeline.get(second, 0), len(in_flight))
+
+        schedule_end = time.perf_counter()
+        results = []
+        if drain and collect_results:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        elif drain:
+            while in_flight:
+                await asyncio.gather(*list(in_flight), return_exceptions=True)
+        total_time = time.perf_counter() - start
+
+        backlog_values = list(backlog_timeline.values())
+        return {
+            'results': results,
+            'in_flight': [] if drain else list(in_flight),
+            'stats': {
+                'target_rate': self.arrival_rate,
+                'end_rate': self.end_rate,
+                'duration': self.duration,
+                'scheduled_starts': scheduled_starts,
+                'started': started,
+                'dropped_starts': dropped,
+                'achieved_rate': started / (schedule_end - start) if schedule_end > start else 0,
+                'drain_time': total_time - (schedule_end - start),
+                'total_time': total_time,
+                'peak_backlog': max(backlog_values) if backlog_values else 0,
+                'average_backlog': sum(backlog_values) / len(backlog_values) if backlog_values else 0,
+                'backlog_timeline': [backlog_timeline.get(s, 0) for s in range(max(backlog_timeline, default=-1) + 1)],
+                'start_skew_ms': start_skews.summary(),
+                'start_skew_histogram': start_skews.to_dict()
+            }
+        }
+
+
+
+class ApiLatencyRecorder:
+    """تجميع عينات طلبات API في مدرجات تكرارية لكل مرحلة توقيت"""
+
+    PHASES = ('total_time', 'corrected_time', 'connect_time', 'ttfb', 'body_time')
+
+    def __init__(self):
+        self.histograms = {phase: LatencyHistogram() for phase in self.PHASES}
+        self.samples = 0
+        self.errors = 0
+        self.reused_connections = 0
+
+    def record(self, sample: Dict[str, Any]):
+        self.samples += 1
+        if 'error' in sample:
+            # الطلب الفاشل أو المنتهي بمهلة يبقى في التوزيع عند زمن فشله، وفي corrected_time منذ
+            # موعده المخطط، حتى لا تبدو النسب المئوية أفضل كلما زادت الأخطاء
+            self.errors += 1
+            failed_after = sample.get('failed_after')
+            if failed_after is not None:
+                self.histograms['total_time'].record(failed_after)
+                self.histograms['corrected_time'].record(sample.get('send_delay', 0.0) + failed_after)
+            return
+
+        for phase in self.PHASES:
+            self.histograms[phase].record(sample[phase])
+        if sample.get('reused_connection'):
+            self.reused_connections += 1
+
+    def merge(self, other: 'ApiLatencyRecorder') -> 'ApiLatencyRecorder':
+        for phase in self.PHASES:
+            self.histograms[phase].merge(other.histograms[phase])
+        self.samples += other.samples
+        self.errors += other.errors
+        self.reused_connections += other.reused_connections
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'histograms': {phase: h.to_dict() for phase, h in self.histograms.items()},
+            'samples': self.samples,
+            'errors': self.errors,
+            'reused_connections': self.reused_connections
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ApiLatencyRecorder':
+        recorder = cls()
+        recorder.histograms = {phase: LatencyHistogram.from_dict(h) for phase, h in data['histograms'].items()}
+        recorder.samples = data['samples']
+        recorder.errors = data['errors']
+        recorder.reused_connections = data['reused_connections']
+        return recorder
+
+
+class SessionRecorder:
+    """تجميع نتائج جلسات المستخدمين في عدادات ومدرجات تكرارية بذاكرة ثابتة"""
+
+    def __init__(self):
+        self.total_users = 0
+        self.successful_users = 0
+        self.errors = 0
+        self.session_times = LatencyHistogram()
+        self.action_times: Dict[str, LatencyHistogram] = {}
+        self.action_errors: Dict[str, int] = {}
+        # أهداف SLO لكل إجراء وعدد مرات تجاوزها
+        self.action_slo: Dict[str, float] = {}
+        self.action_slo_violations: Dict[str, int] = {}
+
+    def _ensure_action(self, name: str):
+        if name not in self.action_times:
+            self.action_times[name] = LatencyHistogram()
+            self.action_errors[name] = 0
+            self.action_slo_violations[name] = 0
+
+    def record(self, session_result: Dict[str, Any]):
+        self.total_users += 1
+        self.errors += session_result.get('errors', 0)
+        if session_result['success']:
+            self.successful_users += 1
+            # أزمنة الجلسات بالثواني تُخزن بالميلي ثانية داخل المدرج
+            self.session_times.record(session_result['total_time'] * 1000)
+
+        for action in session_result.get('actions', []):
+            name = action['action']
+            self._ensure_action(name)
+            self.action_times[name].record(action['time'] * 1000)
+            if not action['success']:
+                self.action_errors[name] += 1
+            if action.get('slo_ms') is not None:
+                self.action_slo[name] = action['slo_ms']
+                if not action['success'] or action['time'] * 1000 > action['slo_ms']:
+                    self.action_slo_violations[name] += 1
+
+    def merge(self, other: 'SessionRecorder') -> 'SessionRecorder':
+        self.total_users += other.total_users
+        self.successful_users += other.successful_users
+        self.errors += other.errors
+        self.session_times.merge(other.session_times)
+        for name, histogram in other.action_times.items():
+            self._ensure_action(name)
+            self.action_times[name].merge(histogram)
+            self.action_errors[name] += other.action_errors.get(name, 0)
+            self.action_slo_violations[name] += other.action_slo_violations.get(name, 0)
+        self.action_slo.update(other.action_slo)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_users': self.total_users,
+            'successful_users': self.successful_users,
+            'errors': self.errors,
+            'session_times': self.session_times.to_dict(),
+            'action_times': {name: h.to_dict() for name, h in self.action_times.items()},
+            'action_errors': dict(self.action_errors),
+            'action_slo': dict(self.action_slo),
+            'action_slo_violations': dict(self.action_slo_violations)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SessionRecorder':
+        recorder = cls()
+        recorder.total_users = data['total_users']
+        recorder.successful_users = data['successful_users']
+        recorder.errors = data['errors']
+        recorder.session_times = LatencyHistogram.from_dict(data['session_times'])
+        recorder.action_times = {name: LatencyHistogram.from_dict(h) for name, h in data['action_times'].items()}
+        recorder.action_errors = dict(data['action_errors'])
+        recorder.action_slo = dict(data.get('action_slo', {}))
+        recorder.action_slo_violations = {name: data.get('action_slo_violations', {}).get(name, 0)
+                                          for name in recorder.action_times}
+        return recorder
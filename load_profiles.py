@@ -0,0 +1,157 @@
+"""
+ملفات الحمل التصريحية (تصاعد، درجات، ذروة مفاجئة، تحمل طويل) لاختبارات أداء BarberTrack
+مطور: Performance Testing Specialist
+
+ملف الحمل قاموس بالشكل:
+  {'name': 'ramp', 'type': 'ramp', 'stages': [
+      {'name': 'ramp', 'duration': 300, 'start_rate': 0, 'end_rate': 20, 'max_in_flight': 200}
+  ]}
+المعدلات بعدد الجلسات التي تبدأ في الثانية (حلقة مفتوحة)، وmax_in_flight سقف الجلسات الجارية.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+
+def _stage(name: str, duration: float, start_rate: float, end_rate: Optional[float] = None,
+           max_in_flight: int = 100) -> Dict[str, Any]:
+    return {
+        'name': name,
+        'duration': duration,
+        'start_rate': start_rate,
+        'end_rate': start_rate if end_rate is None else end_rate,
+        'max_in_flight': max_in_flight
+    }
+
+
+def ramp_profile(target_rate: float, ramp_duration: float, hold_duration: float = 0,
+                 start_rate: float = 0, max_in_flight: int = 100) -> Dict[str, Any]:
+    """تصاعد خطي للمعدل ثم ثبات اختياري عند الهدف"""
+    stages = [_stage('ramp', ramp_duration, start_rate, target_rate, max_in_flight)]
+    if hold_duration:
+        stages.append(_stage('hold', hold_duration, target_rate, max_in_flight=max_in_flight))
+    return {'name': 'ramp', 'type': 'ramp', 'stages': stages}
+
+
+def step_profile(rates: List[float], step_duration: float, max_in_flight: int = 100) -> Dict[str, Any]:
+    """درجات ثابتة متتالية، كل درجة بمعدل ومدة"""
+    stages = [_stage(f'step_{index + 1}', step_duration, rate, max_in_flight=max_in_flight)
+              for index, rate in enumerate(rates)]
+    return {'name': 'step', 'type': 'step', 'stages': stages}
+
+
+def spike_profile(base_rate: float, spike_rate: float, base_duration: float = 60,
+                  spike_duration: float = 30, recovery_duration: float = 60,
+                  max_in_flight: int = 200) -> Dict[str, Any]:
+    """حمل أساسي ثم ذروة مفاجئة ثم العودة للأساس لقياس التعافي"""
+    return {
+        'name': 'spike',
+        'type': 'spike',
+        'stages': [
+            _stage('baseline', base_duration, base_rate, max_in_flight=max_in_flight),
+            _stage('spike', spike_duration, spike_rate, max_in_flight=max_in_flight),
+            _stage('recovery', recovery_duration, base_rate, max_in_flight=max_in_flight)
+        ]
+    }
+
+
+def soak_profile(rate: float, duration: float, window: float = 3600, max_in_flight: int = 100) -> Dict[str, Any]:
+    """حمل ثابت طويل مقسم إلى نوافذ زمنية لكشف التدهور التدريجي (تسرب ذاكرة، امتلاء طوابير)"""
+    stages = []
+    remaining = duration
+    while remaining > 0:
+        length = min(window, remaining)
+        stages.append(_stage(f'window_{len(stages) + 1}', length, rate, max_in_flight=max_in_flight))
+        remaining -= length
+    return {'name': 'soak', 'type': 'soak', 'stages': stages}
+
+
+PROFILE_BUILDERS = {
+    'ramp': ramp_profile,
+    'step': step_profile,
+    'spike': spike_profile,
+    'soak': soak_profile
+}
+
+
+def validate_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """التحقق من ملف الحمل وإكمال القيم الافتراضية لكل مرحلة"""
+    if not profile.get('stages'):
+        raise ValueError("Load profile must define at least one stage")
+
+    stages = []
+    for index, stage in enumerate(profile['stages']):
+        if stage.get('duration', 0) <= 0:
+            raise ValueError(f"Stage {index} must have a positive duration")
+        start_rate = stage.get('start_rate', stage.get('rate', 0))
+        end_rate = stage.get('end_rate', start_rate)
+        if start_rate < 0 or end_rate < 0 or start_rate + end_rate <= 0:
+            raise ValueError(f"Stage {index} must have a positive arrival rate")
+        stages.append(_stage(stage.get('name', f'stage_{index + 1}'), stage['duration'],
+                             start_rate, end_rate, stage.get('max_in_flight', 100)))
+
+    return {
+        'name': profile.get('name', profile.get('type', 'custom')),
+        'type': profile.get('type', 'custom'),
+        'stages': stages
+    }
+
+
+def load_profile(source: str) -> Dict[str, Any]:
+    """تحميل ملف حمل من ملف JSON أو إنشاء ملف جاهز بالاسم (ramp/step/spike/soak)"""
+    path = Path(source)
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            return validate_profile(json.load(f))
+
+    if source not in PROFILE_BUILDERS:
+        raise ValueError(f"Unknown load profile: {source}")
+
+    defaults = {
+        'ramp': {'target_rate': 10, 'ramp_duration': 300, 'hold_duration': 120},
+        'step': {'rates': [2, 5, 10, 15, 20], 'step_duration': 120},
+        'spike': {'base_rate': 2, 'spike_rate': 20},
+        'soak': {'rate': 5, 'duration': 4 * 3600}
+    }
+    return validate_profile(PROFILE_BUILDERS[source](**defaults[source]))
+
+
+def total_scheduled_sessions(profile: Dict[str, Any]) -> int:
+    """عدد الجلسات المجدولة في كامل الملف (لحجز معرفات مستخدمين غير متداخلة)"""
+    return sum(int((s['start_rate'] + s['end_rate']) / 2 * s['duration']) for s in profile['stages'])
+
+
+def split_profile(profile: Dict[str, Any], parts: int) -> List[Dict[str, Any]]:
+    """تقسيم معدلات وسقوف كل مرحلة على عدة عمال مع معرفات مستخدمين منفصلة"""
+    offset_step = total_scheduled_sessions(profile) + 1
+    return [
+        {
+            'stages': [
+                {
+                    **stage,
+                    'start_rate': stage['start_rate'] / parts,
+                    'end_rate': stage['end_rate'] / parts,
+                    'max_in_flight': max(1, stage['max_in_flight'] // parts)
+                }
+                for stage in profile['stages']
+            ],
+            'user_id_offset': index * offset_step
+        }
+        for index in range(parts)
+    ]
+
+
+def find_latency_knee(stages: List[Dict[str, Any]], factor: float = 2.0,
+                      max_error_rate: float = 5.0) -> Optional[str]:
+    """أول مرحلة ينحني عندها زمن الاستجابة: p95 يتجاوز factor × p95 أول مرحلة، أو تتجاوز الأخطاء الحد"""
+    baseline = next((s['p95_response_time'] for s in stages if s.get('total_users')), None)
+    if baseline is None:
+        return None
+
+    for stage in stages:
+        if not stage.get('total_users'):
+            continue
+        if stage['p95_response_time'] > baseline * factor or stage['error_rate'] > max_error_rate:
+            return stage['stage']
+    return None
@@ -0,0 +1,188 @@
+"""
+تشغيل مراحل توليد الحمل في عدة عمليات لاستخدام جميع أنوية المعالج
+مطور: Performance Testing Specialist
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional
+
+from latency_histogram import LatencyHistogram
+from load_engine import ApiLatencyRecorder, SessionRecorder
+
+
+def split_evenly(total: int, parts: int) -> List[int]:
+    """تقسيم عدد صحيح على عدة أجزاء بأكبر تساوٍ ممكن"""
+    base, remainder = divmod(total, parts)
+    return [base + (1 if index < remainder else 0) for index in range(parts)]
+
+
+def split_api_endpoints(endpoints: List[Dict], workers: int, default_samples: int,
+                        default_rate: Optional[float]) -> List[List[Dict]]:
+    """توزيع عينات ومعدل كل نقطة نهاية على العمال"""
+    per_worker = [[] for _ in range(workers)]
+    for endpoint in endpoints:
+        samples = split_evenly(endpoint.get('samples', default_samples), workers)
+        rate = endpoint.get('rate', default_rate)
+        for index in range(workers):
+            if samples[index] == 0:
+                continue
+            per_worker[index].append({
+                **endpoint,
+                'samples': samples[index],
+                'rate': rate / workers if rate else rate
+            })
+    return per_worker
+
+
+def split_concurrent_users(num_users: int, arrival_rate: Optional[float], duration: float,
+                           workers: int) -> List[Dict]:
+    """توزيع المستخدمين ومعدل الوصول على العمال مع معرفات مستخدمين غير متداخلة"""
+    options = []
+    offset = 0
+    for users in split_evenly(num_users, workers):
+        options.append({
+            'num_users': users,
+            'arrival_rate': arrival_rate / workers if arrival_rate else None,
+            'duration': duration,
+            'user_id_offset': offset
+        })
+        offset += users if arrival_rate is None else int(arrival_rate * duration) + users
+    return [o for o in options if o['num_users'] > 0]
+
+
+def _worker_main(suite_options: Dict[str, Any], phase: str, phase_options: Dict[str, Any]) -> Dict[str, Any]:
+    """نقطة دخول العامل: حلقة أحداث ومجمع متصفحات خاصان بالعملية"""
+    from performance_test_suite import PerformanceTestSuite
+
+    suite = PerformanceTestSuite(**suite_options)
+    return asyncio.run(suite._run_worker_phase(phase, phase_options))
+
+
+async def run_in_worker_processes(suite_options: Dict[str, Any], phase: str,
+                                  per_worker_options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """تشغيل مرحلة في عملية منفصلة لكل عامل وإرجاع النتائج المسلسلة"""
+    # spawn بدلاً من fork لأن Playwright وحلقات الأحداث لا تورث بأمان
+    context = multiprocessing.get_context('spawn')
+    loop = asyncio.get_running_loop()
+
+    with ProcessPoolExecutor(max_workers=len(per_worker_options), mp_context=context) as executor:
+        futures = [
+            loop.run_in_executor(executor, _worker_main, suite_options, phase, options)
+            for options in per_worker_options
+        ]
+        return await asyncio.gather(*futures)
+
+
+# ===========================
+# دمج نتائج العمال
+# ===========================
+
+def merge_api_results(worker_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """دمج مدرجات كل نقطة نهاية من جميع العمال"""
+    merged: Dict[str, Any] = {}
+    for result in worker_results:
+        for name, data in result.items():
+            if 'error' in data:
+                merged.setdefault(name, {'error': data['error']})
+                continue
+            recorder = ApiLatencyRecorder.from_dict(data)
+            if isinstance(merged.get(name), ApiLatencyRecorder):
+                merged[name].merge(recorder)
+            else:
+                merged[name] = recorder
+    return merged
+
+
+def _sum_numeric(dicts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {}
+    for data in dicts:
+        for key, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[key] = merged.get(key, 0) + value
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+def merge_open_loop_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """دمج إحصائيات الحلقة المفتوحة: جمع المعدلات والسلاسل الزمنية ودمج مدرج الانحراف"""
+    length = max(len(s['backlog_timeline']) for s in stats)
+    timeline = [sum(s['backlog_timeline'][i] for s in stats if i < len(s['backlog_timeline']))
+                for i in range(length)]
+
+    skew = LatencyHistogram()
+    for s in stats:
+        skew.merge(LatencyHistogram.from_dict(s['start_skew_histogram']))
+
+    return {
+        'target_rate': sum(s['target_rate'] for s in stats),
+        'end_rate': sum(s.get('end_rate', s['target_rate']) for s in stats),
+        'duration': max(s['duration'] for s in stats),
+        'scheduled_starts': sum(s['scheduled_starts'] for s in stats),
+        'started': sum(s['started'] for s in stats),
+        'dropped_starts': sum(s['dropped_starts'] for s in stats),
+        'achieved_rate': sum(s['achieved_rate'] for s in stats),
+        'drain_time': max(s['drain_time'] for s in stats),
+        'total_time': max(s['total_time'] for s in stats),
+        'peak_backlog': max(timeline) if timeline else 0,
+        'average_backlog': sum(timeline) / len(timeline) if timeline else 0,
+        'backlog_timeline': timeline,
+        'start_skew_ms': skew.summary(),
+        'start_skew_histogram': skew.to_dict()
+    }
+
+
+def merge_session_results(worker_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """دمج نتائج جلسات المستخدمين من جميع العمال في نتيجة واحدة"""
+    recorder = SessionRecorder()
+    for result in worker_results:
+        recorder.merge(SessionRecorder.from_dict(result['recorder']))
+
+    open_loop_stats = [r['open_loop'] for r in worker_results if r.get('open_loop')]
+
+    return {
+        'recorder': recorder,
+        'total_time': max(r['total_time'] for r in worker_results),
+        **_merge_run_resources(worker_results),
+        'open_loop': merge_open_loop_stats(open_loop_stats) if open_loop_stats else None,
+        'workers': len(worker_results)
+    }
+
+
+def _merge_run_resources(worker_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """دمج إحصائيات مجمع المتصفحات واستهلاك أداة الاختبار من جميع العمال"""
+    harness = [r['harness_resources'] for r in worker_results if r.get('harness_resources', {}).get('samples')]
+
+    merged_harness = _sum_numeric(harness) if harness else {'samples': 0}
+    if harness:
+        # عدد الأنوية خاصية للجهاز وليس مجموعاً
+        merged_harness['cpu_count'] = harness[0].get('cpu_count')
+
+    browser_pool = _sum_numeric([r['browser_pool'] for r in worker_results])
+    browser_pool['contexts_per_browser'] = worker_results[0]['browser_pool'].get('contexts_per_browser')
+
+    return {'browser_pool': browser_pool, 'harness_resources': merged_harness}
+
+
+def merge_profile_results(worker_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """دمج نتائج مراحل ملف الحمل من جميع العمال مرحلةً مرحلة"""
+    stages = []
+    for stage_index in range(len(worker_results[0]['stages'])):
+        stage_runs = [r['stages'][stage_index] for r in worker_results]
+        recorder = SessionRecorder()
+        for stage_run in stage_runs:
+            recorder.merge(SessionRecorder.from_dict(stage_run['recorder']))
+        stages.append({
+            'recorder': recorder,
+            'total_time': max(s['total_time'] for s in stage_runs),
+            'open_loop': merge_open_loop_stats([s['open_loop'] for s in stage_runs])
+        })
+
+    return {
+        'stages': stages,
+        'total_time': max(r['total_time'] for r in worker_results),
+        **_merge_run_resources(worker_results),
+        'workers': len(worker_results)
+    }
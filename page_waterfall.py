@@ -0,0 +1,251 @@
+"""
+تحليل تسلسل تحميل الصفحة (waterfall) والمسار الحرج حتى أول رسم لاختبارات BarberTrack
+مطور: Performance Testing Specialist
+
+- ملف HAR كامل لكل مسار يسجله Playwright (record_har_path) ويُلخص هنا.
+- سلسلة الطلبات الحرجة: الموارد التي تحجب العرض أو تكتمل قبل FCP (CSS، سكربتات، خطوط، chunks).
+- تنبيه لخطوط عربية تحجب العرض (font-display: block/auto أو ورقة أنماط خطوط حاجبة)
+  ولـ chunks مكررة (نفس العنوان أكثر من مرة أو نفس الاسم ببصمات مختلفة).
+- waterfall مضغوط (أعمدة + صفوف، بصمات الملفات مستبدلة بـ *) يمكن مقارنته بين التشغيلات:
+    python page_waterfall.py diff old.json new.json
+"""
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+from urllib.parse import urlparse
+
+ARABIC_FONT_PATTERN = re.compile(
+    r'arab|cairo|tajawal|almarai|amiri|harmattan|kufi|naskh|changa|el\s*messiri|lalezar|lateef|'
+    r'mada|markazi|reem|scheherazade|vibes|ibm\s*plex\s*sans\s*arabic|readex', re.IGNORECASE
+)
+# نطاق الحروف العربية في unicode-range
+ARABIC_UNICODE_RANGE = re.compile(r'U\+0?6[0-9A-F]{2}', re.IGNORECASE)
+HASH_SEGMENT = re.compile(r'(?<=[.\-_])[0-9a-f]{6,}(?=[.\-_])|(?<=[.\-_])[A-Za-z0-9_-]{16,}(?=\.)', re.IGNORECASE)
+
+WATERFALL_COLUMNS = ['resource', 'type', 'start_ms', 'end_ms', 'transfer_bytes', 'decoded_bytes', 'flags']
+
+FONT_FACES_SCRIPT = """
+() => {
+    const faces = [];
+    for (const sheet of Array.from(document.styleSheets)) {
+        let rules;
+        try {
+            rules = sheet.cssRules;
+        } catch (e) {
+            // ورقة أنماط من مصدر آخر دون CORS
+            continue;
+        }
+        for (const rule of Array.from(rules || [])) {
+            if (rule.constructor.name !== 'CSSFontFaceRule') continue;
+            const style = rule.style;
+            const src = style.getPropertyValue('src') || '';
+            faces.push({
+                family: (style.getPropertyValue('font-family') || '').replace(/["']/g, '').trim(),
+                display: (style.getPropertyValue('font-display') || 'auto').trim(),
+                unicode_range: (style.getPropertyValue('unicode-range') || '').trim(),
+                urls: Array.from(src.matchAll(/url\\(["']?([^"')]+)["']?\\)/g)).map(match => new URL(match[1], sheet.href || location.href).href),
+                stylesheet: sheet.href
+            });
+        }
+    }
+    return faces;
+}
+"""
+
+
+def normalize_resource(url: str, page_url: Optional[str] = None) -> str:
+    """عنوان ثابت بين التشغيلات: المسار فقط للمصدر نفسه، والبصمات مستبدلة بـ *"""
+    parsed = urlparse(url)
+    same_origin = page_url is not None and urlparse(page_url).netloc == parsed.netloc
+    path = HASH_SEGMENT.sub('*', parsed.path)
+    return path if same_origin else f"{parsed.netloc}{path}"
+
+
+def is_arabic_font(face: Dict[str, Any]) -> bool:
+    return bool(ARABIC_FONT_PATTERN.search(face.get('family', '')) or
+                ARABIC_UNICODE_RANGE.search(face.get('unicode_range', '')) or
+                any(ARABIC_FONT_PATTERN.search(url) for url in face.get('urls', [])))
+
+
+async def collect_font_faces(page) -> List[Dict[str, Any]]:
+    """قواعد @font-face المحملة في الصفحة الحالية"""
+    try:
+        return await page.evaluate(FONT_FACES_SCRIPT)
+    except Exception:
+        return []
+
+
+def critical_request_chain(waterfall: List[Dict[str, Any]], fcp: Optional[float],
+                           font_faces: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """الموارد على المسار الحرج لأول رسم وخطوط عربية تحجب العرض"""
+    font_urls = {url: face for face in font_faces for url in face.get('urls', [])}
+
+    chain = []
+    for resource in waterfall:
+        end = resource['startTime'] + resource['duration']
+        is_font = resource['name'] in font_urls or re.search(r'\.(?:woff2?|ttf|otf)(?:\?|$)', resource['name'])
+        before_paint = fcp is None or resource['startTime'] < fcp
+        if resource.get('render_blocking') or (before_paint and (is_font or resource['type'] in ('script', 'css', 'link'))):
+            chain.append({
+                'name': resource['name'],
+                'type': 'font' if is_font else resource['type'],
+                'start_ms': round(resource['startTime']),
+                'end_ms': round(end),
+                'transfer_bytes': resource['size'],
+                'render_blocking': bool(resource.get('render_blocking')),
+                # ينتهي بعد FCP: كان سيؤخر أول رسم لو كان حاجباً
+                'delays_first_paint': bool(resource.get('render_blocking')) and fcp is not None and end >= fcp
+            })
+
+    blocking_fonts = []
+    for face in font_faces:
+        if not is_arabic_font(face):
+            continue
+        reasons = []
+        if face['display'] in ('auto', 'block'):
+            reasons.append(f"font-display: {face['display']} (نص غير مرئي حتى تحميل الخط)")
+        stylesheet = face.get('stylesheet')
+        if stylesheet and any(r['name'] == stylesheet and r.get('render_blocking') for r in waterfall):
+            reasons.append('ورقة أنماط الخط تحجب العرض')
+        if reasons:
+            blocking_fonts.append({'family': face['family'], 'display': face['display'], 'urls': face['urls'],
+                                   'reasons': reasons})
+
+    # طول المسار الحرج: نهاية آخر مورد حاجب
+    blocking_ends = [entry['end_ms'] for entry in chain if entry['render_blocking']]
+    return {
+        'first_contentful_paint': fcp,
+        'chain': sorted(chain, key=lambda entry: entry['start_ms']),
+        'render_blocking_count': sum(1 for entry in chain if entry['render_blocking']),
+        'render_blocking_bytes': sum(entry['transfer_bytes'] for entry in chain if entry['render_blocking']),
+        'critical_path_ms': max(blocking_ends) if blocking_ends else 0,
+        'render_blocking_arabic_fonts': blocking_fonts
+    }
+
+
+def find_duplicated_chunks(waterfall: List[Dict[str, Any]], page_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """chunks طُلبت أكثر من مرة أو حُملت بنفس الاسم ببصمات مختلفة"""
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for resource in waterfall:
+        if not re.search(r'\.(?:js|mjs|css)(?:\?|$)', resource['name']):
+            continue
+        by_name.setdefault(normalize_resource(resource['name'], page_url), []).append(resource)
+
+    duplicates = []
+    for normalized, resources in by_name.items():
+        urls = sorted({resource['name'] for resource in resources})
+        if len(resources) < 2:
+            continue
+        if len(urls) == 1:
+            # تكرار نفس العنوان: الهدر هو ما نُقل فعلاً في الطلبات اللاحقة (صفر إن خُدمت من التخزين)
+            kind, wasted = 'same_url', sum(resource['size'] for resource in resources[1:])
+        else:
+            # نفس الـ chunk ببصمات مختلفة: كل نسخة عدا الأكبر مهدرة
+            sizes = sorted((resource['size'] or resource.get('decoded_size', 0) for resource in resources), reverse=True)
+            kind, wasted = 'different_hashes', sum(sizes[1:])
+        duplicates.append({
+            'chunk': normalized,
+            'requests': len(resources),
+            'urls': urls,
+            'kind': kind,
+            'wasted_bytes': wasted
+        })
+    return sorted(duplicates, key=lambda duplicate: duplicate['wasted_bytes'], reverse=True)
+
+
+def compact_waterfall(waterfall: List[Dict[str, Any]], page_url: Optional[str] = None,
+                      critical: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """تمثيل مضغوط: أعمدة ثابتة وصفوف مرتبة بزمن البدء"""
+    critical_names = {entry['name'] for entry in (critical or {}).get('chain', [])}
+    rows = []
+    for resource in sorted(waterfall, key=lambda r: r['startTime']):
+        flags = ''
+        if resource.get('render_blocking'):
+            flags += 'B'
+        if resource['name'] in critical_names:
+            flags += 'C'
+        if resource['size'] == 0 and resource.get('decoded_size'):
+            flags += 'H'  # من التخزين المؤقت
+        rows.append([
+            normalize_resource(resource['name'], page_url),
+            resource['type'],
+            round(resource['startTime']),
+            round(resource['startTime'] + resource['duration']),
+            resource['size'],
+            resource.get('decoded_size', 0),
+            flags
+        ])
+    return {'columns': WATERFALL_COLUMNS, 'rows': rows}
+
+
+def summarize_har(har_path: str, until: Optional[float] = None) -> Dict[str, Any]:
+    """ملخص HAR: عدد الطلبات والبايتات والحالات، مع قصره على الطلبات قبل لحظة until (epoch)"""
+    with open(har_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)['log']['entries']
+
+    if until is not None:
+        entries = [entry for entry in entries
+                   if datetime.fromisoformat(entry['startedDateTime'].replace('Z', '+00:00')).timestamp() <= until]
+
+    by_status: Dict[str, int] = {}
+    transfer = 0
+    for entry in entries:
+        status = str(entry['response']['status'])
+        by_status[status] = by_status.get(status, 0) + 1
+        transfer += max(entry['response'].get('_transferSize', 0), 0)
+    return {
+        'har': har_path,
+        'entries': len(entries),
+        'transfer_bytes': transfer,
+        'by_status': by_status,
+        'total_time_ms': sum(max(entry.get('time', 0), 0) for entry in entries)
+    }
+
+
+def diff_waterfalls(old: Dict[str, Any], new: Dict[str, Any], min_delta_ms: int = 50,
+                    min_delta_bytes: int = 1024) -> Dict[str, Any]:
+    """مقارنة waterfall مضغوطين: موارد جديدة ومحذوفة وتغيرات الحجم والتوقيت"""
+    def index(waterfall: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        columns = waterfall['columns']
+        return {row[0]: dict(zip(columns, row)) for row in waterfall['rows']}
+
+    before, after = index(old), index(new)
+    changed = []
+    for name in sorted(before.keys() & after.keys()):
+        a, b = before[name], after[name]
+        end_delta = b['end_ms'] - a['end_ms']
+        size_delta = b['transfer_bytes'] - a['transfer_bytes']
+        if abs(end_delta) >= min_delta_ms or abs(size_delta) >= min_delta_bytes or a['flags'] != b['flags']:
+            changed.append({'resource': name, 'end_delta_ms': end_delta, 'bytes_delta': size_delta,
+                            'flags': f"{a['flags']}→{b['flags']}" if a['flags'] != b['flags'] else b['flags']})
+
+    return {
+        'added': sorted(after.keys() - before.keys()),
+        'removed': sorted(before.keys() - after.keys()),
+        'changed': changed,
+        'transfer_bytes_delta': sum(r['transfer_bytes'] for r in after.values()) - sum(r['transfer_bytes'] for r in before.values())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="مقارنة waterfall مضغوط بين تشغيلين")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    diff_parser = subparsers.add_parser('diff')
+    diff_parser.add_argument('old')
+    diff_parser.add_argument('new')
+    diff_parser.add_argument('--min-delta-ms', type=int, default=50)
+    args = parser.parse_args()
+
+    old = json.loads(Path(args.old).read_text(encoding='utf-8'))
+    new = json.loads(Path(args.new).read_text(encoding='utf-8'))
+    json.dump(diff_waterfalls(old, new, args.min_delta_ms), sys.stdout, ensure_ascii=False, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
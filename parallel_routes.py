@@ -0,0 +1,98 @@
+"""
+قياس المسارات بالتوازي عبر سياقات متصفح معزولة لاختبارات BarberTrack
+مطور: Performance Testing Specialist
+
+- run_routes: توزيع المسارات على عدد محدود من العمال (كل مسار في سياق خاص به ينشئه العامل)
+  مع الحفاظ على ترتيب النتائج.
+- fair_concurrency: سقف للتوازي حتى تبقى القياسات عادلة؛ كل صفحة Chromium تحتاج عملية
+  عرض خاصة بها، والتطبيق المختبر غالباً يعمل على نفس الجهاز، لذا لا يتجاوز نصف المعالجات.
+- calibrate_parallelism: معايرة A-B-A على عينة بحجم التوازي (تسلسلي، متوازٍ، تسلسلي)
+  تقيس كم يضخم التوازي كل توقيت مقارنة بمستوى الضوضاء بين التشغيلين التسلسليين.
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import time
+from typing import Dict, List, Any, Callable, Awaitable, Optional
+
+# نسبة التشوه المقبولة (%) فوق الضوضاء قبل اعتبار التوقيتات المتوازية غير قابلة للمقارنة
+DEFAULT_DISTORTION_THRESHOLD = 10.0
+
+
+def fair_concurrency(requested: int, routes: int) -> int:
+    """عدد السياقات المتزامنة الفعلي: لا يتجاوز عدد المسارات ولا نصف معالجات الجهاز"""
+    limit = max(1, (os.cpu_count() or 2) // 2)
+    concurrency = max(1, min(requested, routes, limit))
+    if concurrency < requested:
+        logging.info(f"Route concurrency capped at {concurrency} (requested {requested}, {routes} routes, cpu limit {limit})")
+    return concurrency
+
+
+async def run_routes(items: List[Any], worker: Callable[[Any], Awaitable[Any]], concurrency: int = 1) -> List[Any]:
+    """تنفيذ worker لكل عنصر بحد أقصى concurrency في نفس اللحظة؛ الاستثناءات تُعاد مكان النتيجة"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(item):
+        async with semaphore:
+            return await worker(item)
+
+    results = await asyncio.gather(*[bounded(item) for item in items], return_exceptions=True)
+    for item, result in zip(items, results):
+        if isinstance(result, Exception):
+            logging.error(f"Error measuring route {item}: {str(result)}")
+    return results
+
+
+def _distortion(serial_a: List[Dict[str, float]], parallel: List[Dict[str, float]],
+                serial_b: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    metrics: Dict[str, Dict[str, float]] = {}
+    names = {name for sample in parallel if isinstance(sample, dict) for name in sample}
+    for name in sorted(names):
+        ratios, noise, serial, concurrent = [], [], [], []
+        for a, p, b in zip(serial_a, parallel, serial_b):
+            if not all(isinstance(sample, dict) and sample.get(name) for sample in (a, p, b)):
+                continue
+            baseline = (a[name] + b[name]) / 2
+            ratios.append((p[name] / baseline - 1) * 100)
+            noise.append(abs(b[name] - a[name]) / baseline * 100)
+            serial.append(baseline)
+            concurrent.append(p[name])
+        if ratios:
+            metrics[name] = {
+                'serial': statistics.median(serial),
+                'parallel': statistics.median(concurrent),
+                'distortion_pct': statistics.median(ratios),
+                'max_distortion_pct': max(ratios),
+                'noise_pct': statistics.median(noise),
+                'samples': len(ratios)
+            }
+    return metrics
+
+
+async def calibrate_parallelism(items: List[Any], measure: Callable[[Any], Awaitable[Dict[str, float]]],
+                                concurrency: int, label: Optional[Callable[[Any], str]] = None,
+                                threshold_pct: float = DEFAULT_DISTORTION_THRESHOLD) -> Dict[str, Any]:
+    """معايرة A-B-A: نفس العينة تسلسلياً ثم بالتوازي ثم تسلسلياً، ومقارنة كل توقيت بمتوسط التشغيلين التسلسليين"""
+    sample = items[:concurrency]
+    start = time.perf_counter()
+
+    serial_a = await run_routes(sample, measure, 1)
+    parallel = await run_routes(sample, measure, concurrency)
+    serial_b = await run_routes(sample, measure, 1)
+
+    metrics = _distortion(serial_a, parallel, serial_b)
+    # التشوه الحقيقي هو ما يتجاوز تذبذب القياس التسلسلي نفسه
+    worst = max(metrics.values(), key=lambda metric: metric['distortion_pct'] - metric['noise_pct'], default=None)
+    excess = worst['distortion_pct'] - worst['noise_pct'] if worst else 0
+    return {
+        'concurrency': concurrency,
+        'routes': [label(item) if label else str(item) for item in sample],
+        'metrics': metrics,
+        'distortion_pct': worst['distortion_pct'] if worst else 0,
+        'noise_pct': worst['noise_pct'] if worst else 0,
+        'threshold_pct': threshold_pct,
+        'comparable': excess <= threshold_pct,
+        'duration': time.perf_counter() - start
+    }
@@ -6,36 +6,163 @@
 import asyncio
 import json
 import logging
+import os
 import time
 import statistics
-from typing import Dict, List, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser, Request, Response
-import aiohttp
-import psutil
+from typing import Dict, List, Any, Optional, Union
+from playwright.async_api import Page, Browser, Request, Response
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-import threading
 import queue
+from urllib.parse import urlparse
+
+from latency_histogram import LatencyHistogram
+from load_engine import (
+    BrowserPool, HarnessResourceMonitor, HttpLoadEngine, OpenLoopScheduler,
+    ApiLatencyRecorder, SessionRecorder, ProcessTreeSampler, find_listening_pid
+)
+from load_workers import (
+    run_in_worker_processes, split_api_endpoints, split_concurrent_users,
+    merge_api_results, merge_session_results, merge_profile_results
+)
+from load_profiles import validate_profile, split_profile, find_latency_knee
+from scenario_engine import ScenarioEngine, CompiledScenario
+from d1_benchmark import D1Benchmark
+from cloudflare_d1_workers_analysis import CloudflareArchitectureAnalyzer
+from workers_harness import WorkersHarness
+from realtime_sync_harness import RealtimeSyncHarness
+from cache_instrumentation import CdpCacheRecorder, analyze_cache_runs
+from edge_cache import EdgeCacheSimulator
+from web_vitals import WEB_VITALS_INIT_SCRIPT, collect_web_vitals, diagnose_page_load, rate_web_vital
+from throttling import (
+    BROWSER_FETCH_SCRIPT, resolve_profiles, apply_throttling, throttled_context_options, describe_profile
+)
+from parallel_routes import fair_concurrency, run_routes, calibrate_parallelism
+from page_waterfall import (
+    collect_font_faces, critical_request_chain, find_duplicated_chunks, compact_waterfall, summarize_har
+)
+from browser_runtime import BrowserRuntime, browser_page
+from incremental_selection import is_selected, filter_routes
 
 class PerformanceTestSuite:
     """مجموعة اختبارات الأداء والتحميل لـ سهل Cloudflare Architecture"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    # أقصى خصم لأزمنة تحميل الصفحات وWeb Vitals مجتمعة (عند ضعف كل المقاييس في كل المسارات)
+    PAGE_PENALTY_CAP = 20
+
+    # صفحات التطبيق ونقاط نهاية API المشتركة بين الاختبارات
+    PAGES = [
+        {'name': 'الرئيسية', 'path': '/'},
+        {'name': 'الإيرادات', 'path': '/revenue'},
+        {'name': 'المصروفات', 'path': '/expenses'},
+        {'name': 'البونص', 'path': '/bonuses'},
+        {'name': 'الطلبات', 'path': '/requests'},
+        {'name': 'طلباتي', 'path': '/my-requests'},
+        {'name': 'الطلبات الخارجية', 'path': '/orders'},
+        {'name': 'المخزون', 'path': '/inventory'},
+        {'name': 'التقارير', 'path': '/reports'},
+        {'name': 'الرواتب', 'path': '/payroll'},
+        {'name': 'إدارة الطلبات', 'path': '/admin/requests'},
+        {'name': 'إدارة المستخدمين', 'path': '/admin/users'},
+        {'name': 'الإعدادات', 'path': '/admin/settings'}
+    ]
+
+    API_ENDPOINTS = [
+        {'name': 'تسجيل الدخول', 'method': 'POST', 'path': '/api/auth/login'},
+        {'name': 'جلب المستخدمين', 'method': 'GET', 'path': '/api/users'},
+        {'name': 'إضافة إيراد', 'method': 'POST', 'path': '/api/revenue'},
+        {'name': 'جلب الإيرادات', 'method': 'GET', 'path': '/api/revenue'},
+        {'name': 'إضافة مصروف', 'method': 'POST', 'path': '/api/expenses'},
+        {'name': 'جلب المصروفات', 'method': 'GET', 'path': '/api/expenses'},
+        {'name': 'جلب البونص', 'method': 'GET', 'path': '/api/bonuses'},
+        {'name': 'جلب الطلبات', 'method': 'GET', 'path': '/api/requests'},
+        {'name': 'جلب التقارير', 'method': 'GET', 'path': '/api/reports'},
+        {'name': 'جلب الرواتب', 'method': 'GET', 'path': '/api/payroll'}
+    ]
+
+    def __init__(self, base_url: str = "http://localhost:9002", contexts_per_browser: int = 25,
+                 max_browsers: Optional[int] = None, api_samples: int = 10, api_concurrency: int = 1,
+                 api_connections_per_host: int = 50, api_rate: Optional[float] = 10, workers: int = 1,
+                 coordinator=None, scenarios: Union[None, str, Dict[str, Any]] = None,
+                 d1_scale: float = 1.0, d1_iterations: int = 200, d1_database: Optional[str] = None,
+                 workers_cold_runs: int = 5, workers_warm_requests: int = 200, workers_concurrency: int = 10,
+                 sync_branches: Optional[List[int]] = None, sync_readers_per_branch: int = 2,
+                 sync_messages: int = 10, sync_rate: float = 2.0, edge_cache_requests: int = 2000,
+                 edge_cache_mix: Optional[str] = None, edge_cache_time_scale: float = 60.0,
+                 resource_interval: float = 0.5, server_pid: Optional[int] = None,
+                 waterfall_dir: Optional[str] = 'test_results/waterfalls', route_concurrency: int = 1,
+                 calibrate_routes: bool = True, throttling_profiles: Union[None, str, List[str]] = None,
+                 throttling_api_samples: int = 5, runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None):
         self.base_url = base_url
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
+        # إعدادات مجمع المتصفحات للمستخدمين المتزامنين
+        self.contexts_per_browser = contexts_per_browser
+        self.max_browsers = max_browsers
+        # إعدادات محرك طلبات API
+        self.api_samples = api_samples
+        self.api_concurrency = api_concurrency
+        self.api_connections_per_host = api_connections_per_host
+        # معدل الإرسال المخطط لكل نقطة نهاية (أساس تصحيح coordinated omission)
+        self.api_rate = api_rate
+        # عدد عمليات توليد الحمل (لكل عملية حلقة أحداث ومجمع متصفحات خاصان بها)
+        self.workers = max(1, workers)
+        # منسق الحمل الموزع (LoadCoordinator من distributed_load) بدلاً من العمليات المحلية
+        self.coordinator = coordinator
+        # سيناريوهات المستخدمين من ملف JSON/YAML (الافتراضي user_scenarios.json)
+        self.scenario_engine = ScenarioEngine.load(scenarios)
+        # قاعدة D1 المحلية (SQLite): حجم البيانات وعدد التكرارات لكل استعلام
+        self.d1_scale = d1_scale
+        self.d1_iterations = d1_iterations
+        self.d1_database = d1_database or 'test_results/d1_benchmark.sqlite'
+        # بديل Workers المحلي: عدد مرات البدء البارد وحجم سلسلة الطلبات الدافئة
+        self.workers_cold_runs = workers_cold_runs
+        self.workers_warm_requests = workers_warm_requests
+        self.workers_concurrency = workers_concurrency
+        self.workers_database = 'test_results/workers_d1.sqlite'
+        # مزامنة /ws/branch-sync: أعداد الفروع، والقراء لكل فرع، ورسائل كل كاتب ومعدلها في الثانية
+        self.sync_branches = sync_branches or [2, 5, 20, 50]
+        self.sync_readers_per_branch = sync_readers_per_branch
+        self.sync_messages = sync_messages
+        self.sync_rate = sync_rate
+        # محاكاة Edge Cache: حجم المزيج الاصطناعي أو ملف مزيج مسجل، وتسريع الزمن لانتهاء TTL
+        self.edge_cache_requests = edge_cache_requests
+        self.edge_cache_mix = edge_cache_mix
+        self.edge_cache_time_scale = edge_cache_time_scale
+        # مراقبة الموارد: فترة العينات، ومعرف عملية الخادم (يُكتشف من منفذ base_url إن لم يُحدد)
+        self.resource_interval = resource_interval
+        self.server_pid = server_pid
+        # ملفات HAR وwaterfall المضغوط لكل مسار (None لتعطيل الحفظ)
+        self.waterfall_dir = waterfall_dir
+        # قياس المسارات في عدة سياقات معزولة بالتوازي (1 = تسلسلي) مع معايرة التشوه قبلها
+        self.route_concurrency = route_concurrency
+        self.calibrate_routes = calibrate_routes
+        # ملفات محاكاة الشبكة والمعالج (fast-3g، 4g، cpu-4x، cpu-6x، midrange-phone أو all)
+        self.throttling_profiles = resolve_profiles(throttling_profiles)
+        self.throttling_api_samples = throttling_api_samples
         self.results = {
             'page_load_times': {},
             'api_response_times': {},
+            'api_open_loop': {},
             'concurrent_user_tests': {},
+            'load_profiles': {},
             'memory_usage': {},
             'resource_loading': {},
             'database_performance': {},
             'cache_effectiveness': {},
             'workers_performance': {},
             'realtime_sync_performance': {},
-            'cloudflare_cache_performance': {}
+            'cloudflare_cache_performance': {},
+            'edge_cache_simulation': {},
+            'route_parallelism': {},
+            'throttling': {}
         }
         self.performance_metrics = {
             'total_tests': 0,
@@ -63,44 +190,69 @@ class PerformanceTestSuite:
     # 1. اختبارات تحميل الصفحة
     # ===========================
 
-    async def test_page_load_performance(self, page: Page) -> Dict[str, Any]:
-        """اختبار أداء تحميل الصفحة"""
-        print("⚡ اختبار أداء تحميل الصفحة...")
-
-        pages_to_test = [
-            {'name': 'الرئيسية', 'path': '/'},
-            {'name': 'الإيرادات', 'path': '/revenue'},
-            {'name': 'المصروفات', 'path': '/expenses'},
-            {'name': 'البونص', 'path': '/bonuses'},
-            {'name': 'الطلبات', 'path': '/requests'},
-            {'name': 'طلباتي', 'path': '/my-requests'},
-            {'name': 'الطلبات الخارجية', 'path': '/orders'},
-            {'name': 'المخزون', 'path': '/inventory'},
-            {'name': 'التقارير', 'path': '/reports'},
-            {'name': 'الرواتب', 'path': '/payroll'},
-            {'name': 'إدارة الطلبات', 'path': '/admin/requests'},
-            {'name': 'إدارة المستخدمين', 'path': '/admin/users'},
-            {'name': 'الإعدادات', 'path': '/admin/settings'}
-        ]
+    async def test_page_load_performance(self, page: Page, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """اختبار أداء تحميل الصفحة بتنقل واحد لكل مسار في كل تمريرة (باردة ثم دافئة)
 
-        page_load_results = {}
+        التمريرة الباردة: سياق جديد لكل مسار بذاكرة تخزين فارغة (زيارة أولى).
+        التمريرة الدافئة: إعادة زيارة المسار في نفس سياقه بعد انتهاء التمريرة الباردة (زائر عائد).
+        كل تنقل يجمع زمن التحميل وتسلسل الموارد وCore Web Vitals معاً.
+        مع route_concurrency > 1 تُوزع المسارات على عدة سياقات متزامنة بعد معايرة تشوه التوقيتات.
+        مع profile تُطبق محاكاة الشبكة والمعالج على كل صفحة وتُعاد النتائج دون استبدال نتائج الأساس.
+        """
+        if profile is None:
+            print("⚡ اختبار أداء تحميل الصفحة...")
 
-        for page_info in pages_to_test:
+        pages_to_test = filter_routes(self.PAGES, self.routes, 'path')
+        page_load_results = {}
+        browser = page.context.browser
+        route_pages: Dict[str, Page] = {}
+        har_files: Dict[str, Dict[str, Any]] = {}
+        if self.waterfall_dir:
+            Path(self.waterfall_dir).mkdir(parents=True, exist_ok=True)
+
+        concurrency = fair_concurrency(self.route_concurrency, len(pages_to_test))
+        if concurrency > 1 and self.calibrate_routes and profile is None:
+            calibration = await calibrate_parallelism(
+                pages_to_test, lambda page_info: self._calibration_sample(browser, page_info['path']),
+                concurrency, label=lambda page_info: page_info['name']
+            )
+            self.results['route_parallelism'] = calibration
+            print(f"⚙️ معايرة التوازي ({concurrency} سياقات): تشوه {calibration['distortion_pct']:+.1f}% "
+                  f"(ضوضاء {calibration['noise_pct']:.1f}%)")
+            if not calibration['comparable']:
+                logging.warning(f"Parallel page timings distorted by {calibration['distortion_pct']:.1f}% "
+                                f"at concurrency {concurrency}")
+        elif concurrency > 1 and profile is None:
+            self.results['route_parallelism'] = {'concurrency': concurrency}
+
+        async def measure_cold(page_info: Dict[str, str]):
+            context = None
             try:
-                # قياس وقت تحميل الصفحة
-                load_time = await self._measure_page_load_time(page, page_info['path'])
-
+                context_options = throttled_context_options(profile)
+                if self.waterfall_dir:
+                    # HAR كامل للمسار؛ يُكتب عند إغلاق السياق
+                    har_path = str(Path(self.waterfall_dir) / f"{self._route_slug(page_info['path'], profile)}.har")
+                    context_options.update({'record_har_path': har_path, 'record_har_content': 'omit'})
+                context = await browser.new_context(**context_options)
+                # مراقبات PerformanceObserver تُحقن قبل كل تنقل في هذا السياق
+                await context.add_init_script(WEB_VITALS_INIT_SCRIPT)
+                route_pages[page_info['name']] = await context.new_page()
+                if profile:
+                    await apply_throttling(route_pages[page_info['name']], profile)
+
+                cold = await self._measure_page(route_pages[page_info['name']], page_info['path'], 'cold', profile)
                 page_load_results[page_info['name']] = {
-                    'load_time': load_time,
+                    **cold,
                     'path': page_info['path'],
-                    'status': 'good' if load_time < 2 else 'needs_improvement' if load_time < 5 else 'poor'
+                    'pass': 'cold',
+                    'concurrency': concurrency
                 }
+                if self.waterfall_dir:
+                    har_files[page_info['name']] = {'path': context_options['record_har_path'], 'cold_end': time.time()}
 
-                # تحليل موارد الصفحة
-                resource_analysis = await self._analyze_page_resources(page, page_info['path'])
-                page_load_results[page_info['name']]['resources'] = resource_analysis
-
-                logging.info(f"صفحة {page_info['name']}: {load_time:.2f}s")
+                vitals = cold.get('web_vitals', {})
+                logging.info(f"صفحة {page_info['name']} (باردة): {cold['load_time']:.2f}s, "
+                             f"LCP {vitals.get('lcp') or 0:.0f}ms, bottleneck {cold.get('bottleneck', 'unknown')}")
 
             except Exception as e:
                 logging.error(f"Error testing page {page_info['name']}: {str(e)}")
@@ -108,10 +260,107 @@ class PerformanceTestSuite:
                     'error': str(e),
                     'load_time': float('inf')
                 }
+                # السياق الذي لم تُسجل صفحته في route_pages لا يغلقه finally أدناه
+                if context is not None and page_info['name'] not in route_pages:
+                    try:
+                        await context.close()
+                    except Exception as close_error:
+                        logging.error(f"Error closing context for {page_info['name']}: {str(close_error)}")
+
+        async def measure_warm(page_info: Dict[str, str]):
+            try:
+                warm = await self._measure_page(route_pages[page_info['name']], page_info['path'], 'warm', profile)
+                page_load_results[page_info['name']]['warm'] = warm
+                logging.info(f"صفحة {page_info['name']} (دافئة): {warm['load_time']:.2f}s")
+
+            except Exception as e:
+                logging.error(f"Error testing warm page {page_info['name']}: {str(e)}")
+                page_load_results[page_info['name']]['warm'] = {'error': str(e)}
+
+        try:
+            # التمريرة الباردة
+            await run_routes(pages_to_test, measure_cold, concurrency)
+
+            # التمريرة الدافئة
+            await run_routes([page_info for page_info in pages_to_test
+                              if 'error' not in page_load_results[page_info['name']]], measure_warm, concurrency)
+
+        finally:
+            for route_page in route_pages.values():
+                await route_page.context.close()
+
+        # ترتيب النتائج كترتيب المسارات بغض النظر عن ترتيب انتهاء السياقات المتوازية
+        page_load_results = {page_info['name']: page_load_results[page_info['name']] for page_info in pages_to_test}
+
+        # ملخص HAR للتمريرة الباردة فقط (الملف يحتوي التمريرتين)
+        for page_name, har in har_files.items():
+            try:
+                page_load_results[page_name]['har'] = summarize_har(har['path'], until=har['cold_end'])
+            except Exception as e:
+                logging.error(f"Error reading HAR for {page_name}: {str(e)}")
 
-        self.results['page_load_times'] = page_load_results
+        if profile is None:
+            self.results['page_load_times'] = page_load_results
         return page_load_results
 
+    async def _calibration_sample(self, browser: Browser, path: str) -> Dict[str, float]:
+        """تحميل بارد واحد في سياق مؤقت لمعايرة التوازي: زمن سكون الشبكة وTTFB وLCP بالميلي ثانية"""
+        context = await browser.new_context()
+        try:
+            await context.add_init_script(WEB_VITALS_INIT_SCRIPT)
+            route_page = await context.new_page()
+            load_time = await self._measure_page_load_time(route_page, path)
+            if load_time == float('inf'):
+                return {}
+            vitals = await collect_web_vitals(route_page, interact=False)
+            return {'load_time': load_time * 1000, 'ttfb': vitals.get('ttfb'), 'lcp': vitals.get('lcp')}
+        finally:
+            await context.close()
+
+    @staticmethod
+    def _route_slug(path: str, profile: Optional[Dict[str, Any]] = None) -> str:
+        slug = path.strip('/').replace('/', '-') or 'root'
+        return f"{slug}.{profile['name']}" if profile else slug
+
+    async def _measure_page(self, page: Page, path: str, pass_name: str = 'cold',
+                            profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """تنقل واحد: زمن الوصول لسكون الشبكة، ثم تسلسل الموارد، ثم Core Web Vitals من نفس التحميل"""
+        load_time = await self._measure_page_load_time(page, path)
+        measurement = {
+            'load_time': load_time,
+            'status': 'good' if load_time < 2 else 'needs_improvement' if load_time < 5 else 'poor'
+        }
+        if load_time == float('inf'):
+            return measurement
+
+        # الموارد قبل نقرة قياس التفاعل حتى لا تختلط بطلبات ناتجة عنها
+        measurement['resources'] = await self._collect_page_resources(page)
+
+        # Core Web Vitals: ما يراه المستخدم فعلاً بدلاً من زمن انتظار سكون الشبكة
+        vitals = await collect_web_vitals(page)
+        diagnosis = diagnose_page_load(vitals, load_time * 1000)
+        measurement.update({
+            'web_vitals': vitals,
+            'bottleneck': diagnosis['bottleneck'],
+            'idle_gap_ms': diagnosis['idle_gap_ms']
+        })
+        if 'lcp' in vitals['ratings']:
+            measurement['status'] = vitals['ratings']['lcp']
+
+        # المسار الحرج لأول رسم والـ chunks المكررة، ثم استبدال القائمة الخام بتمثيل مضغوط
+        resources = measurement['resources']
+        if 'waterfall' in resources:
+            waterfall = resources['waterfall']
+            critical = critical_request_chain(waterfall, vitals.get('fcp'), await collect_font_faces(page))
+            resources['critical_chain'] = critical
+            resources['duplicated_chunks'] = find_duplicated_chunks(waterfall, page.url)
+            resources['waterfall'] = compact_waterfall(waterfall, page.url, critical)
+            if self.waterfall_dir:
+                waterfall_path = Path(self.waterfall_dir) / f"{self._route_slug(path, profile)}.{pass_name}.waterfall.json"
+                with open(waterfall_path, 'w', encoding='utf-8') as f:
+                    json.dump(resources['waterfall'], f, ensure_ascii=False, separators=(',', ':'))
+        return measurement
+
     async def _measure_page_load_time(self, page: Page, path: str) -> float:
         """قياس وقت تحميل صفحة معينة"""
         start_time = time.time()
@@ -127,12 +376,9 @@ class PerformanceTestSuite:
             logging.error(f"Error measuring load time for {path}: {str(e)}")
             return float('inf')
 
-    async def _analyze_page_resources(self, page: Page, path: str) -> Dict[str, Any]:
-        """تحليل موارد الصفحة"""
+    async def _collect_page_resources(self, page: Page) -> Dict[str, Any]:
+        """تحليل موارد الصفحة المحملة حالياً (دون تنقل جديد) كتسلسل زمني"""
         try:
-            await page.goto(f"{self.base_url}{path}")
-            await page.wait_for_load_state("networkidle")
-
             resources = await page.evaluate("""
                 () => {
                     const resources = performance.getEntriesByType('resource');
@@ -140,33 +386,37 @@ class PerformanceTestSuite:
                         name: resource.name,
                         type: resource.initiatorType,
                         size: resource.transferSize || 0,
+                        decoded_size: resource.decodedBodySize || 0,
                         duration: resource.duration,
-                        startTime: resource.startTime
+                        startTime: resource.startTime,
+                        render_blocking: resource.renderBlockingStatus === 'blocking'
                     }));
                 }
             """)
 
             # تحليل الموارد
+            durations = [r['duration'] for r in resources if r['duration'] > 0]
             analysis = {
                 'total_resources': len(resources),
                 'total_size': sum(r['size'] for r in resources),
-                'average_duration': statistics.mean([r['duration'] for r in resources if r['duration'] > 0]),
+                'average_duration': statistics.mean(durations) if durations else 0,
                 'slowest_resource': max(resources, key=lambda x: x['duration']) if resources else None,
                 'largest_resource': max(resources, key=lambda x: x['size']) if resources else None,
-                'resources_by_type': {}
+                'render_blocking': sum(1 for r in resources if r['render_blocking']),
+                'resources_by_type': {},
+                'waterfall': sorted(resources, key=lambda x: x['startTime'])
             }
 
             # تصنيف الموارد حسب النوع
             for resource in resources:
-                resource_type = resource['type']
-                if resource_type not in analysis['resources_by_type']:
-                    analysis['resources_by_type'][resource_type] = []
-                analysis['resources_by_type'][resource_type].append(resource)
+                by_type = analysis['resources_by_type'].setdefault(resource['type'], {'count': 0, 'size': 0})
+                by_type['count'] += 1
+                by_type['size'] += resource['size']
 
             return analysis
 
         except Exception as e:
-            logging.error(f"Error analyzing resources for {path}: {str(e)}")
+            logging.error(f"Error analyzing resources for {page.url}: {str(e)}")
             return {'error': str(e)}
 
     # ===========================
@@ -177,149 +427,427 @@ class PerformanceTestSuite:
         """اختبار أوقات استجابة API"""
         print("🔗 اختبار أوقات استجابة API...")
 
-        api_endpoints = [
-            {'name': 'تسجيل الدخول', 'method': 'POST', 'path': '/api/auth/login'},
-            {'name': 'جلب المستخدمين', 'method': 'GET', 'path': '/api/users'},
-            {'name': 'إضافة إيراد', 'method': 'POST', 'path': '/api/revenue'},
-            {'name': 'جلب الإيرادات', 'method': 'GET', 'path': '/api/revenue'},
-            {'name': 'إضافة مصروف', 'method': 'POST', 'path': '/api/expenses'},
-            {'name': 'جلب المصروفات', 'method': 'GET', 'path': '/api/expenses'},
-            {'name': 'جلب البونص', 'method': 'GET', 'path': '/api/bonuses'},
-            {'name': 'جلب الطلبات', 'method': 'GET', 'path': '/api/requests'},
-            {'name': 'جلب التقارير', 'method': 'GET', 'path': '/api/reports'},
-            {'name': 'جلب الرواتب', 'method': 'GET', 'path': '/api/payroll'}
-        ]
+        api_endpoints = self.API_ENDPOINTS
 
         api_results = {}
 
-        for endpoint in api_endpoints:
-            try:
-                response_times = []
-                for i in range(10):  # 10 طلبات لكل نقطة نهاية
-                    response_time = await self._measure_api_response(
-                        endpoint['method'],
-                        endpoint['path']
-                    )
-                    response_times.append(response_time)
-
-                api_results[endpoint['name']] = {
-                    'average_time': statistics.mean(response_times),
-                    'min_time': min(response_times),
-                    'max_time': max(response_times),
-                    'std_dev': statistics.stdev(response_times) if len(response_times) > 1 else 0,
-                    'method': endpoint['method'],
-                    'path': endpoint['path'],
-                    'status': 'good' if statistics.mean(response_times) < 200 else 'needs_improvement' if statistics.mean(response_times) < 500 else 'poor'
-                }
-
-                logging.info(f"API {endpoint['name']}: {statistics.mean(response_times):.2f}ms avg")
+        if self._load_partitions() > 1 or self.coordinator is not None:
+            per_worker = split_api_endpoints(api_endpoints, self._load_partitions(), self.api_samples, self.api_rate)
+            worker_results = await self._dispatch_load_phase('api', [{'endpoints': e} for e in per_worker])
+            recorders = merge_api_results(worker_results)
+        else:
+            recorders = await self._run_api_endpoints(api_endpoints)
 
-            except Exception as e:
-                logging.error(f"Error testing API {endpoint['name']}: {str(e)}")
+        for endpoint in api_endpoints:
+            recorder = recorders.get(endpoint['name'], {'error': 'no samples'})
+            if isinstance(recorder, dict):
                 api_results[endpoint['name']] = {
-                    'error': str(e),
+                    'error': recorder['error'],
                     'average_time': float('inf')
                 }
+                continue
+
+            summary = self._summarize_api_recorder(endpoint, recorder)
+            summary['workers'] = self._load_partitions()
+            api_results[endpoint['name']] = summary
+            logging.info(f"API {endpoint['name']}: p50 {summary['p50']:.2f}ms, p95 {summary['p95']:.2f}ms")
 
         self.results['api_response_times'] = api_results
         return api_results
 
-    async def _measure_api_response(self, method: str, path: str, data: Optional[Dict] = None) -> float:
-        """قياس وقت استجابة API"""
-        start_time = time.time()
+    async def _run_api_endpoints(self, api_endpoints: List[Dict]) -> Dict[str, Any]:
+        """تنفيذ عينات جميع نقاط النهاية وإرجاع مدرج لكل نقطة (أو رسالة الخطأ)"""
+        recorders = {}
 
-        try:
-            async with aiohttp.ClientSession() as session:
-                if method.upper() == 'GET':
-                    async with session.get(f"{self.base_url}{path}", timeout=10) as response:
-                        await response.read()
-                elif method.upper() == 'POST':
-                    async with session.post(
-                        f"{self.base_url}{path}",
-                        json=data or {},
-                        timeout=10
-                    ) as response:
-                        await response.read()
-
-                response_time = (time.time() - start_time) * 1000  # تحويل إلى ميلي ثانية
-                return response_time
+        # جلسة HTTP واحدة مع اتصالات مستمرة لكل نقاط النهاية
+        async with HttpLoadEngine(self.base_url, limit_per_host=self.api_connections_per_host) as engine:
+            for endpoint in api_endpoints:
+                try:
+                    samples = await engine.run_endpoint(
+                        endpoint['method'],
+                        endpoint['path'],
+                        samples=endpoint.get('samples', self.api_samples),
+                        concurrency=endpoint.get('concurrency', self.api_concurrency),
+                        rate=endpoint.get('rate', self.api_rate)
+                    )
+                    recorder = ApiLatencyRecorder()
+                    for sample in samples:
+                        recorder.record(sample)
+                    recorders[endpoint['name']] = recorder
+
+                except Exception as e:
+                    logging.error(f"Error testing API {endpoint['name']}: {str(e)}")
+                    recorders[endpoint['name']] = {'error': str(e)}
+
+        return recorders
+
+    def _summarize_api_recorder(self, endpoint: Dict, recorder: ApiLatencyRecorder) -> Dict[str, Any]:
+        """تحويل مدرجات نقطة نهاية إلى نسب مئوية (الحالة تُقيّم على p95 وليس المتوسط)"""
+        total = recorder.histograms['total_time']
+        corrected = recorder.histograms['corrected_time']
+        ttfb = recorder.histograms['ttfb']
+        no_data = float('inf') if total.count == 0 else None
+
+        p95 = no_data or total.percentile(95)
+        corrected_p95 = no_data or corrected.percentile(95)
+        return {
+            'average_time': no_data or total.mean,
+            'min_time': no_data or total.min,
+            'max_time': no_data or total.max,
+            'p50': no_data or total.percentile(50),
+            'p95': p95,
+            'p99': no_data or total.percentile(99),
+            'p999': no_data or total.percentile(99.9),
+            'average_connect_time': no_data or recorder.histograms['connect_time'].mean,
+            'average_ttfb': no_data or ttfb.mean,
+            'ttfb_p95': no_data or ttfb.percentile(95),
+            'average_body_time': no_data or recorder.histograms['body_time'].mean,
+            'reused_connections': recorder.reused_connections,
+            'samples': recorder.samples,
+            'errors': recorder.errors,
+            'concurrency': endpoint.get('concurrency', self.api_concurrency),
+            'method': endpoint['method'],
+            'path': endpoint['path'],
+            # التوزيع المصحح يُقاس من موعد الإرسال المخطط ويُستخدم في التقييم
+            'corrected': {
+                'mean': no_data or corrected.mean,
+                'p50': no_data or corrected.percentile(50),
+                'p95': corrected_p95,
+                'p99': no_data or corrected.percentile(99),
+                'p999': no_data or corrected.percentile(99.9),
+                'max': no_data or corrected.max
+            },
+            'rate': endpoint.get('rate', self.api_rate),
+            'latency_histogram': total.to_dict(),
+            'corrected_histogram': corrected.to_dict(),
+            'status': 'good' if corrected_p95 < 200 else 'needs_improvement' if corrected_p95 < 500 else 'poor'
+        }
 
-        except Exception as e:
-            logging.error(f"Error measuring API response for {method} {path}: {str(e)}")
-            return float('inf')
+    async def test_api_open_loop(self, method: str, path: str, arrival_rate: float = 20,
+                                 duration: float = 60, max_in_flight: Optional[int] = None) -> Dict[str, Any]:
+        """اختبار نقطة نهاية بمعدل وصول ثابت (حلقة مفتوحة)"""
+        print(f"🔗 اختبار {method} {path} بمعدل {arrival_rate} طلب/ثانية لمدة {duration}s...")
+
+        endpoint = {'method': method, 'path': path, 'concurrency': max_in_flight, 'rate': arrival_rate}
+        scheduler = OpenLoopScheduler(arrival_rate, duration, max_in_flight=max_in_flight)
+        recorder = ApiLatencyRecorder()
+
+        async with HttpLoadEngine(self.base_url, limit_per_host=self.api_connections_per_host) as engine:
+            async def send(index: int):
+                sample = await engine.request(method, path, intended_start=scheduler.scheduled_time(index))
+                recorder.record(sample)
+
+            # تسجيل كل عينة مباشرة في المدرجات حتى لا تنمو الذاكرة مع مدة الاختبار
+            open_loop = await scheduler.run(send, collect_results=False)
+
+        result = self._summarize_api_recorder(endpoint, recorder)
+        result['open_loop'] = open_loop['stats']
+
+        self.results['api_open_loop'][f"{method} {path}"] = result
+        return result
 
     # ===========================
     # 3. اختبارات المستخدمين المتزامنين
     # ===========================
 
-    async def test_concurrent_users(self, num_users: int = 50) -> Dict[str, Any]:
-        """اختبار أداء مع مستخدمين متزامنين"""
-        print(f"👥 اختبار {num_users} مستخدم متزامن...")
+    async def test_concurrent_users(self, num_users: int = 50, arrival_rate: Optional[float] = None,
+                                    duration: float = 60) -> Dict[str, Any]:
+        """اختبار أداء مع مستخدمين متزامنين
 
+        عند تحديد arrival_rate يعمل الاختبار بحلقة مفتوحة: تبدأ الجلسات بمعدل ثابت لمدة
+        duration ثانية، ويصبح num_users الحد الأقصى للجلسات قيد التنفيذ.
+        """
+        if arrival_rate is None:
+            print(f"👥 اختبار {num_users} مستخدم متزامن...")
+        else:
+            print(f"👥 اختبار حلقة مفتوحة: {arrival_rate} جلسة/ثانية لمدة {duration}s (حد {num_users} جلسة)...")
+
+        # مراقبة موارد أداة الاختبار (مع المتصفحات والعمال) والخادم طوال مدة الاختبار الفعلية
+        resource_sampler = self._create_resource_sampler()
+        resource_sampler.start()
+
+        if self._load_partitions() > 1 or self.coordinator is not None:
+            worker_results = await self._dispatch_load_phase(
+                'concurrent_users',
+                split_concurrent_users(num_users, arrival_rate, duration, self._load_partitions())
+            )
+            run = merge_session_results(worker_results)
+        else:
+            run = await self._run_concurrent_users(num_users, arrival_rate, duration)
+
+        self._store_resource_usage(await resource_sampler.stop(), resource_sampler)
+
+        # تحليل النتائج
+        concurrent_analysis = self._analyze_session_recorder(run['recorder'], run['total_time'])
+        concurrent_analysis['browser_pool'] = run['browser_pool']
+        concurrent_analysis['harness_resources'] = run['harness_resources']
+        concurrent_analysis['workers'] = run.get('workers', 1)
+        if self.coordinator is not None:
+            concurrent_analysis['distributed_agents'] = run.get('workers', 1)
+        concurrent_analysis['mode'] = 'closed_loop' if run['open_loop'] is None else 'open_loop'
+        if run['open_loop'] is not None:
+            concurrent_analysis['open_loop'] = run['open_loop']
+
+        self.results['concurrent_user_tests'] = concurrent_analysis
+        return concurrent_analysis
+
+    async def _run_concurrent_users(self, num_users: int, arrival_rate: Optional[float] = None,
+                                    duration: float = 60, user_id_offset: int = 0) -> Dict[str, Any]:
+        """تنفيذ جلسات المستخدمين في هذه العملية وإرجاع المدرجات والإحصائيات الخام"""
         # مهام المستخدمين
         user_tasks = []
         results_queue = queue.Queue()
 
-        # محاكاة سيناريوهات المستخدمين
-        user_scenarios = [
-            {'weight': 0.4, 'actions': ['view_dashboard', 'view_revenue']},
-            {'weight': 0.3, 'actions': ['view_dashboard', 'add_expense']},
-            {'weight': 0.2, 'actions': ['view_dashboard', 'view_reports']},
-            {'weight': 0.1, 'actions': ['view_dashboard', 'view_requests']}
-        ]
+        # مجمع متصفحات مشترك: عدة سياقات معزولة لكل متصفح بدلاً من متصفح لكل مستخدم
+        browser_pool = BrowserPool.for_users(
+            num_users,
+            contexts_per_browser=self.contexts_per_browser,
+            max_browsers=self.max_browsers
+        )
+        await browser_pool.start(prelaunch=browser_pool.max_browsers)
+
+        # مراقبة استهلاك أداة الاختبار نفسها بجانب مقاييس التطبيق
+        harness_monitor = HarnessResourceMonitor()
+        harness_monitor.start()
 
-        for user_id in range(num_users):
+        def start_session(index: int):
             # اختيار سيناريو عشوائي
-            scenario = self._select_scenario(user_scenarios)
-            task = asyncio.create_task(
-                self._simulate_user_session(user_id, scenario, results_queue)
+            scenario = self.scenario_engine.select()
+            return self._simulate_user_session(user_id_offset + index, scenario, results_queue, browser_pool)
+
+        if arrival_rate is None:
+            for index in range(num_users):
+                user_tasks.append(asyncio.create_task(start_session(index)))
+
+        # تجميع نتائج الجلسات أولاً بأول في مدرجات تكرارية بدلاً من قوائم خام
+        session_recorder = SessionRecorder()
+
+        def drain_results():
+            while not results_queue.empty():
+                session_recorder.record(results_queue.get())
+
+        async def drain_periodically():
+            while True:
+                await asyncio.sleep(1)
+                drain_results()
+
+        drain_task = asyncio.create_task(drain_periodically())
+
+        # تنفيذ جميع المهام
+        open_loop = None
+        start_time = time.time()
+        try:
+            if arrival_rate is None:
+                await asyncio.gather(*user_tasks)
+            else:
+                scheduler = OpenLoopScheduler(arrival_rate, duration, max_in_flight=num_users)
+                open_loop = await scheduler.run(start_session, collect_results=False)
+        finally:
+            total_time = time.time() - start_time
+            drain_task.cancel()
+            harness_usage = await harness_monitor.stop()
+            pool_stats = browser_pool.get_stats()
+            await browser_pool.close()
+
+        # جمع النتائج المتبقية
+        drain_results()
+
+        return {
+            'recorder': session_recorder,
+            'total_time': total_time,
+            'browser_pool': pool_stats,
+            'harness_resources': harness_usage,
+            'open_loop': open_loop['stats'] if open_loop else None
+        }
+
+    # ===========================
+    # ملفات الحمل (تصاعد، درجات، ذروة، تحمل)
+    # ===========================
+
+    async def test_load_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """تشغيل ملف حمل متعدد المراحل وإرجاع النتائج لكل مرحلة
+
+        تُنفذ المراحل متتالية دون فجوة على نفس مجمع المتصفحات؛ الجلسات التي تبدأ في مرحلة
+        تُسجل ضمن تلك المرحلة حتى لو انتهت بعدها.
+        """
+        profile = validate_profile(profile)
+        print(f"📈 ملف الحمل {profile['name']}: {len(profile['stages'])} مرحلة...")
+
+        resource_sampler = self._create_resource_sampler()
+        resource_sampler.start()
+
+        if self._load_partitions() > 1 or self.coordinator is not None:
+            worker_results = await self._dispatch_load_phase(
+                'load_profile', split_profile(profile, self._load_partitions())
             )
-            user_tasks.append(task)
+            run = merge_profile_results(worker_results)
+        else:
+            run = await self._run_load_profile(profile['stages'])
+
+        process_resources = await resource_sampler.stop()
+
+        stages = []
+        for stage, stage_run in zip(profile['stages'], run['stages']):
+            analysis = self._analyze_session_recorder(stage_run['recorder'], stage_run['total_time'])
+            analysis.update({
+                'stage': stage['name'],
+                'duration': stage['duration'],
+                'start_rate': stage['start_rate'],
+                'end_rate': stage['end_rate'],
+                'max_in_flight': stage['max_in_flight'],
+                'open_loop': stage_run['open_loop']
+            })
+            stages.append(analysis)
+            logging.info(f"Stage {stage['name']}: {analysis['total_users']} sessions, "
+                         f"p95 {analysis['p95_response_time']:.2f}s, errors {analysis['error_rate']:.1f}%")
+
+        profile_results = {
+            'type': profile['type'],
+            'stages': stages,
+            'latency_knee': find_latency_knee(stages),
+            'total_time': run['total_time'],
+            'browser_pool': run['browser_pool'],
+            'harness_resources': run['harness_resources'],
+            'process_resources': process_resources,
+            'workers': run.get('workers', 1)
+        }
+
+        self.results['load_profiles'][profile['name']] = profile_results
+        return profile_results
 
-        # مراقبة استخدام الذاكرة أثناء الاختبار
-        memory_monitor = threading.Thread(
-            target=self._monitor_memory_usage,
-            args=(10,)  # مراقبة لمدة 10 ثواني
+    async def _run_load_profile(self, stages: List[Dict[str, Any]], user_id_offset: int = 0) -> Dict[str, Any]:
+        """تنفيذ مراحل ملف الحمل في هذه العملية مع مسجل جلسات منفصل لكل مرحلة"""
+        browser_pool = BrowserPool.for_users(
+            max(stage['max_in_flight'] for stage in stages),
+            contexts_per_browser=self.contexts_per_browser,
+            max_browsers=self.max_browsers
         )
-        memory_monitor.start()
+        await browser_pool.start(prelaunch=browser_pool.max_browsers)
+
+        harness_monitor = HarnessResourceMonitor()
+        harness_monitor.start()
+
+        stage_queues = [queue.Queue() for _ in stages]
+        stage_recorders = [SessionRecorder() for _ in stages]
+
+        def drain_results():
+            for results_queue, recorder in zip(stage_queues, stage_recorders):
+                while not results_queue.empty():
+                    recorder.record(results_queue.get())
+
+        async def drain_periodically():
+            while True:
+                await asyncio.sleep(1)
+                drain_results()
+
+        drain_task = asyncio.create_task(drain_periodically())
+
+        stage_runs = []
+        finishers = []
+        next_user_id = user_id_offset
+
+        async def finish_stage(stage_run: Dict[str, Any], in_flight: List[asyncio.Task], stage_start: float):
+            # زمن المرحلة من بدايتها حتى انتهاء آخر جلسة بدأت فيها
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            stage_run['total_time'] = time.time() - stage_start
 
-        # تنفيذ جميع المهام
         start_time = time.time()
-        await asyncio.gather(*user_tasks)
-        total_time = time.time() - start_time
+        try:
+            for stage_index, stage in enumerate(stages):
+                def start_session(index: int, stage_index: int = stage_index, first_id: int = next_user_id):
+                    scenario = self.scenario_engine.select()
+                    return self._simulate_user_session(first_id + index, scenario,
+                                                       stage_queues[stage_index], browser_pool)
+
+                scheduler = OpenLoopScheduler(stage['start_rate'], stage['duration'],
+                                              max_in_flight=stage['max_in_flight'], end_rate=stage['end_rate'])
+                next_user_id += scheduler.scheduled_starts
+
+                stage_start = time.time()
+                open_loop = await scheduler.run(start_session, collect_results=False, drain=False)
+                stage_run = {'open_loop': open_loop['stats']}
+                stage_runs.append(stage_run)
+                finishers.append(asyncio.create_task(finish_stage(stage_run, open_loop['in_flight'], stage_start)))
+
+            await asyncio.gather(*finishers)
+        finally:
+            total_time = time.time() - start_time
+            drain_task.cancel()
+            harness_usage = await harness_monitor.stop()
+            pool_stats = browser_pool.get_stats()
+            await browser_pool.close()
+
+        drain_results()
+        for stage_run, recorder in zip(stage_runs, stage_recorders):
+            stage_run['recorder'] = recorder
 
-        memory_monitor.join()
+        return {
+            'stages': stage_runs,
+            'total_time': total_time,
+            'browser_pool': pool_stats,
+            'harness_resources': harness_usage
+        }
 
-        # جمع النتائج
-        user_results = []
-        while not results_queue.empty():
-            user_results.append(results_queue.get())
+    # ===========================
+    # عمال توليد الحمل المتعددون
+    # ===========================
 
-        # تحليل النتائج
-        concurrent_analysis = self._analyze_concurrent_results(user_results, total_time)
+    def _worker_suite_options(self) -> Dict[str, Any]:
+        """إعدادات إنشاء نسخة المجموعة داخل عملية العامل"""
+        return {
+            'base_url': self.base_url,
+            'contexts_per_browser': self.contexts_per_browser,
+            'max_browsers': self.max_browsers,
+            'api_samples': self.api_samples,
+            'api_concurrency': self.api_concurrency,
+            'api_connections_per_host': self.api_connections_per_host,
+            'api_rate': self.api_rate,
+            'workers': 1,
+            'scenarios': self.scenario_engine.spec
+        }
 
-        self.results['concurrent_user_tests'] = concurrent_analysis
-        return concurrent_analysis
+    def _load_partitions(self) -> int:
+        """عدد أجزاء الحمل: وكلاء المنسق الموزع أو عمليات العمال المحلية"""
+        if self.coordinator is not None:
+            return self.coordinator.expected_agents
+        return self.workers
+
+    async def _dispatch_load_phase(self, phase: str, per_worker_options: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """تشغيل مرحلة حمل على الوكلاء البعيدين أو على عمليات محلية"""
+        if self.coordinator is not None:
+            return await self.coordinator.run_phase(self._worker_suite_options(), phase, per_worker_options)
+        return await run_in_worker_processes(self._worker_suite_options(), phase, per_worker_options)
+
+    async def _run_worker_phase(self, phase: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """تنفيذ مرحلة حمل داخل عامل وإرجاع نتائج قابلة للتسلسل والدمج"""
+        if phase == 'api':
+            recorders = await self._run_api_endpoints(options['endpoints'])
+            return {
+                name: recorder if isinstance(recorder, dict) else recorder.to_dict()
+                for name, recorder in recorders.items()
+            }
 
-    def _select_scenario(self, scenarios: List[Dict]) -> Dict:
-        """اختيار سيناريو مستخدم عشوائي"""
-        import random
-        rand = random.random()
-        cumulative = 0
+        if phase == 'concurrent_users':
+            run = await self._run_concurrent_users(**options)
+            run['recorder'] = run['recorder'].to_dict()
+            return run
 
-        for scenario in scenarios:
-            cumulative += scenario['weight']
-            if rand <= cumulative:
-                return scenario
+        if phase == 'load_profile':
+            run = await self._run_load_profile(**options)
+            for stage_run in run['stages']:
+                stage_run['recorder'] = stage_run['recorder'].to_dict()
+            return run
 
-        return scenarios[0]
+        raise ValueError(f"Unknown load phase: {phase}")
 
-    async def _simulate_user_session(self, user_id: int, scenario: Dict, results_queue: queue.Queue):
+    async def _simulate_user_session(self, user_id: int, scenario: CompiledScenario, results_queue: queue.Queue,
+                                     browser_pool: BrowserPool):
         """محاكاة جلسة مستخدم واحدة"""
         session_results = {
             'user_id': user_id,
             'actions': [],
             'total_time': 0,
+            'think_time': 0,
             'errors': 0,
             'success': True
         }
@@ -327,107 +855,102 @@ class PerformanceTestSuite:
         start_time = time.time()
 
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch()
-                page = await browser.new_page()
-
-                # تسجيل الدخول (محاكاة)
-                await page.goto(f"{self.base_url}/login")
-                await page.fill('input[type="email"]', f"user{user_id}@example.com")
-                await page.fill('input[type="password"]', "password123")
-                await page.click('button[type="submit"]')
-                await page.wait_for_timeout(1000)
-
-                # تنفيذ الإجراءات
-                for action in scenario['actions']:
+            async with browser_pool.context() as context:
+                page = await context.new_page()
+
+                # إجراءات البداية (تسجيل الدخول) ثم إجراءات السيناريو من جدول الإرسال المجمع
+                setup_actions = len(self.scenario_engine.setup)
+                plan = self.scenario_engine.setup + scenario.plan()
+                for index, action_name in enumerate(plan):
+                    action = self.scenario_engine.actions[action_name]
                     action_start = time.time()
                     try:
-                        await self._execute_user_action(page, action)
-                        action_time = time.time() - action_start
+                        await action.run(page, self.base_url, user_id)
                         session_results['actions'].append({
-                            'action': action,
-                            'time': action_time,
-                            'success': True
+                            'action': action_name,
+                            'time': time.time() - action_start,
+                            'success': True,
+                            'slo_ms': action.slo_ms
                         })
                     except Exception as e:
-                        action_time = time.time() - action_start
                         session_results['actions'].append({
-                            'action': action,
-                            'time': action_time,
+                            'action': action_name,
+                            'time': time.time() - action_start,
                             'success': False,
+                            'slo_ms': action.slo_ms,
                             'error': str(e)
                         })
+                        # فشل تسجيل الدخول يُفشل الجلسة كلها
+                        if index < setup_actions:
+                            raise
                         session_results['errors'] += 1
 
-                await browser.close()
+                    # زمن التفكير خارج زمن الإجراء، ولا تفكير بعد آخر إجراء
+                    if index < len(plan) - 1:
+                        think_time = action.think_time()
+                        await asyncio.sleep(think_time)
+                        session_results['think_time'] += think_time
 
         except Exception as e:
             session_results['success'] = False
             session_results['error'] = str(e)
             session_results['errors'] += 1
 
-        session_results['total_time'] = time.time() - start_time
+        session_results['scenario'] = scenario.name
+        # زمن الجلسة المقيّم = زمن الإجراءات فقط (زمن التفكير محفوظ منفصلاً في think_time)
+        session_results['total_time'] = time.time() - start_time - session_results['think_time']
         results_queue.put(session_results)
 
-    async def _execute_user_action(self, page: Page, action: str):
-        """تنفيذ إجراء مستخدم معين"""
-        if action == 'view_dashboard':
-            await page.goto(f"{self.base_url}/")
-            await page.wait_for_selector('[data-testid="dashboard-content"]', timeout=10000)
-        elif action == 'view_revenue':
-            await page.goto(f"{self.base_url}/revenue")
-            await page.wait_for_selector('[data-testid="revenue-content"]', timeout=10000)
-        elif action == 'add_expense':
-            await page.goto(f"{self.base_url}/expenses")
-            await page.wait_for_selector('[data-testid="expense-form"]', timeout=10000)
-            await page.fill('[data-testid="expense-amount"]', "100")
-            await page.fill('[data-testid="expense-description"]', "Test expense")
-            await page.click('[data-testid="submit-expense"]')
-        elif action == 'view_reports':
-            await page.goto(f"{self.base_url}/reports")
-            await page.wait_for_selector('[data-testid="reports-content"]', timeout=10000)
-        elif action == 'view_requests':
-            await page.goto(f"{self.base_url}/requests")
-            await page.wait_for_selector('[data-testid="requests-content"]', timeout=10000)
-
-        await page.wait_for_timeout(500)  # انتظار قصير بين الإجراءات
-
-    def _monitor_memory_usage(self, duration: int):
-        """مراقبة استخدام الذاكرة"""
-        memory_samples = []
-        start_time = time.time()
-
-        while time.time() - start_time < duration:
-            memory = psutil.Process().memory_info().rss / 1024 / 1024  # MB
-            memory_samples.append(memory)
-            time.sleep(0.5)
-
-        self.results['memory_usage'] = {
-            'samples': memory_samples,
-            'average': statistics.mean(memory_samples),
-            'max': max(memory_samples),
-            'min': min(memory_samples)
-        }
-
-    def _analyze_concurrent_results(self, user_results: List[Dict], total_time: float) -> Dict[str, Any]:
-        """تحليل نتائج الاختبار المتزامن"""
-        successful_users = [r for r in user_results if r['success']]
-        failed_users = [r for r in user_results if not r['success']]
+    def _create_resource_sampler(self) -> ProcessTreeSampler:
+        """مراقب لشجرة عمليات أداة الاختبار وشجرة عمليات الخادم المستهدف"""
+        server_pid = self.server_pid or find_listening_pid(urlparse(self.base_url).port or 80)
+        if server_pid is None:
+            logging.warning(f"No local process is listening for {self.base_url}; sampling the harness only")
+        elif server_pid == os.getpid():
+            server_pid = None
+        return ProcessTreeSampler({'harness': os.getpid(), 'server': server_pid}, interval=self.resource_interval)
+
+    def _store_resource_usage(self, usage: Dict[str, Any], sampler: ProcessTreeSampler):
+        """حفظ ملخص الموارد مع العينات المحفوظة وتحديث ذروة الذاكرة في المقاييس العامة"""
+        self.results['memory_usage'] = {**usage, 'timeline': sampler.timeline()}
+        self.performance_metrics['peak_memory_usage'] = max(
+            self.performance_metrics.get('peak_memory_usage', 0), usage.get('peak_total_rss_mb', 0)
+        )
 
-        # تحليل أوقات الاستجابة
-        response_times = [r['total_time'] for r in successful_users]
+    def _analyze_session_recorder(self, recorder: SessionRecorder, total_time: float) -> Dict[str, Any]:
+        """تحليل مدرجات الجلسات إلى نسب مئوية لزمن الجلسة ولكل إجراء"""
+        total_users = recorder.total_users
+        failed_users = total_users - recorder.successful_users
+        session_times = recorder.session_times
 
+        # أزمنة الجلسات بالثواني كما في التقارير السابقة
         analysis = {
-            'total_users': len(user_results),
-            'successful_users': len(successful_users),
-            'failed_users': len(failed_users),
-            'success_rate': len(successful_users) / len(user_results) * 100,
+            'total_users': total_users,
+            'successful_users': recorder.successful_users,
+            'failed_users': failed_users,
+            'success_rate': recorder.successful_users / total_users * 100 if total_users else 0,
             'total_time': total_time,
-            'average_response_time': statistics.mean(response_times) if response_times else 0,
-            'min_response_time': min(response_times) if response_times else 0,
-            'max_response_time': max(response_times) if response_times else 0,
-            'throughput': len(successful_users) / total_time,  # مستخدمين في الثانية
-            'error_rate': len(failed_users) / len(user_results) * 100
+            'average_response_time': session_times.mean / 1000,
+            'min_response_time': session_times.min / 1000,
+            'max_response_time': session_times.max / 1000,
+            'p50_response_time': session_times.percentile(50) / 1000,
+            'p95_response_time': session_times.percentile(95) / 1000,
+            'p99_response_time': session_times.percentile(99) / 1000,
+            'p999_response_time': session_times.percentile(99.9) / 1000,
+            'throughput': recorder.successful_users / total_time if total_time else 0,  # مستخدمين في الثانية
+            'error_rate': failed_users / total_users * 100 if total_users else 0,
+            'actions': {
+                name: {
+                    **histogram.summary(),
+                    'errors': recorder.action_errors.get(name, 0),
+                    'slo_ms': recorder.action_slo.get(name),
+                    'slo_violations': recorder.action_slo_violations.get(name, 0),
+                    'slo_compliance': (1 - recorder.action_slo_violations.get(name, 0) / histogram.count) * 100
+                    if histogram.count else 100
+                }
+                for name, histogram in recorder.action_times.items()
+            },
+            'session_histogram': session_times.to_dict()
         }
 
         return analysis
@@ -437,25 +960,44 @@ class PerformanceTestSuite:
     # ===========================
 
     async def test_cache_effectiveness(self, page: Page) -> Dict[str, Any]:
-        """اختبار فعالية التخزين المؤقت"""
+        """اختبار فعالية التخزين المؤقت بتسجيل مصدر كل استجابة عبر CDP (سياق بارد، سياق دافئ، إعادة تحميل)"""
         print("💾 اختبار فعالية التخزين المؤقت...")
 
         cache_results = {}
+        browser = page.context.browser
 
         # اختبار التخزين المؤقت للصفحات
         pages_to_cache = ['/', '/revenue', '/expenses', '/reports']
 
         for page_path in pages_to_cache:
+            # سياق جديد لكل مسار حتى يبدأ التشغيل البارد بذاكرة تخزين فارغة
+            context = await browser.new_context()
             try:
-                # أول زيارة (دون cache)
-                first_load = await self._measure_page_load_time(page, page_path)
-
-                # ثاني زيارة (مع cache)
-                second_load = await self._measure_page_load_time(page, page_path)
-
-                # ثالث زيارة (مع cache)
-                third_load = await self._measure_page_load_time(page, page_path)
-
+                runs = {}
+
+                # أول زيارة: سياق جديد دون cache
+                cold_page = await context.new_page()
+                recorder = await CdpCacheRecorder.attach(cold_page)
+                first_load = await self._measure_page_load_time(cold_page, page_path)
+                runs['cold'] = recorder.take()
+                await recorder.detach()
+
+                # ثاني زيارة: صفحة جديدة في نفس السياق (زائر عائد)
+                warm_page = await context.new_page()
+                recorder = await CdpCacheRecorder.attach(warm_page)
+                second_load = await self._measure_page_load_time(warm_page, page_path)
+                runs['warm'] = recorder.take()
+
+                # ثالث زيارة: إعادة تحميل الصفحة الدافئة
+                start_time = time.time()
+                await warm_page.reload(wait_until="networkidle")
+                third_load = time.time() - start_time
+                runs['reload'] = recorder.take()
+                await recorder.detach()
+
+                analysis = analyze_cache_runs(runs)
+                warm = analysis['runs']['warm']
+                reload = analysis['runs']['reload']
                 cache_improvement = (first_load - second_load) / first_load * 100
 
                 cache_results[page_path] = {
@@ -463,12 +1005,22 @@ class PerformanceTestSuite:
                     'second_load': second_load,
                     'third_load': third_load,
                     'cache_improvement': cache_improvement,
-                    'cached': second_load < first_load
+                    'request_hit_ratio': warm['request_hit_ratio'],
+                    'byte_hit_ratio': warm['byte_hit_ratio'],
+                    'reload_request_hit_ratio': reload['request_hit_ratio'],
+                    'reload_byte_hit_ratio': reload['byte_hit_ratio'],
+                    'runs': analysis['runs'],
+                    'uncached_immutable': analysis['uncached_immutable'],
+                    'cached': warm['cache_hits'] > 0
                 }
+                logging.info(f"Cache {page_path}: warm hits {warm['request_hit_ratio']:.0f}% requests, "
+                             f"{warm['byte_hit_ratio']:.0f}% bytes, {len(analysis['uncached_immutable'])} uncached immutable assets")
 
             except Exception as e:
                 logging.error(f"Error testing cache for {page_path}: {str(e)}")
                 cache_results[page_path] = {'error': str(e)}
+            finally:
+                await context.close()
 
         self.results['cache_effectiveness'] = cache_results
         return cache_results
@@ -478,48 +1030,55 @@ class PerformanceTestSuite:
     # ===========================
 
     async def test_database_performance(self) -> Dict[str, Any]:
-        """اختبار أداء قاعدة بيانات D1 لـ Cloudflare"""
+        """اختبار أداء قاعدة بيانات D1 بتنفيذ استعلامات حقيقية على SQLite محلي بهيكل D1"""
         print("🗄️ اختبار أداء قاعدة بيانات D1...")
 
-        # استعلامات D1 محددة
-        d1_queries = [
-            {'name': 'جلب بيانات فرع معين', 'complexity': 'low', 'isolation': 'branch'},
-            {'name': 'إيرادات الفرع الشهرية', 'complexity': 'medium', 'isolation': 'branch'},
-            {'name': 'تقرير مالي للفرع', 'complexity': 'high', 'isolation': 'branch'},
-            {'name': 'مزامنة البيانات بين الفروع', 'complexity': 'high', 'isolation': 'global'},
-            {'name': 'التحقق من عزل البيانات', 'complexity': 'medium', 'isolation': 'security'},
-            {'name': 'بحث في الطلبات المحلية', 'complexity': 'medium', 'isolation': 'branch'},
-            {'name': 'حساب البونصات للفرع', 'complexity': 'medium', 'isolation': 'branch'},
-            {'name': 'المعاملات الأخيرة', 'complexity': 'low', 'isolation': 'branch'}
-        ]
-
         d1_results = {}
+        benchmark = D1Benchmark(
+            CloudflareArchitectureAnalyzer().analyze_d1_database_structure(),
+            db_path=self.d1_database,
+            scale=self.d1_scale
+        )
 
-        for query in d1_queries:
-            try:
-                # قياس وقت استعلام D1 (أسرع من قواعد البيانات التقليدية)
-                base_time = {
-                    'low': {'branch': 5, 'global': 15, 'security': 10},
-                    'medium': {'branch': 20, 'global': 40, 'security': 30},
-                    'high': {'branch': 50, 'global': 100, 'security': 80}
-                }[query['complexity']][query['isolation']]
-
-                # إضافة تباين عشوائي لمحاكاة شبكة Cloudflare
-                import random
-                network_latency = random.uniform(1, 10)  # Cloudflare منخفض التأخير
-                execution_time = base_time + network_latency
-
-                d1_results[query['name']] = {
+        try:
+            # SQLite متزامن: التنفيذ في خيط منفصل حتى لا تتوقف حلقة الأحداث
+            seed_stats = await asyncio.to_thread(benchmark.setup)
+            workloads = await asyncio.to_thread(benchmark.run, self.d1_iterations)
+            logging.info(f"D1 benchmark seeded in {seed_stats['seed_time']:.1f}s: {seed_stats['row_counts']}")
+
+            for name, workload in workloads.items():
+                latency = workload['latency_ms']
+                # زمن التنفيذ المعتمد في التقييم هو p95 المقاس
+                execution_time = latency['p95']
+                d1_results[name] = {
                     'execution_time': execution_time,
-                    'complexity': query['complexity'],
-                    'isolation': query['isolation'],
-                    'network_latency': network_latency,
+                    'average_time': latency['mean'],
+                    'p50': latency['p50'],
+                    'p95': latency['p95'],
+                    'p99': latency['p99'],
+                    'max_time': latency['max'],
+                    'iterations': latency['count'],
+                    'estimated_rows_read': workload['estimated_rows_read'],
+                    'rows_returned': workload['average_rows_returned'],
+                    'vm_steps': workload['average_vm_steps'],
+                    'query_plan': workload['query_plan'],
+                    'full_scan': workload['full_scan'],
+                    'complexity': workload['complexity'],
+                    'isolation': workload['isolation'],
+                    'scale': self.d1_scale,
+                    'row_counts': seed_stats['row_counts'],
+                    'latency_histogram': workload['latency_histogram'],
                     'status': 'excellent' if execution_time < 20 else 'good' if execution_time < 50 else 'needs_improvement'
                 }
+                logging.info(f"D1 {name}: p50 {latency['p50']:.2f}ms, p95 {latency['p95']:.2f}ms, "
+                             f"~{workload['estimated_rows_read']:.0f} rows read (lower bound), "
+                             f"{workload['average_vm_steps']:.0f} VM steps")
 
-            except Exception as e:
-                logging.error(f"Error testing D1 query {query['name']}: {str(e)}")
-                d1_results[query['name']] = {'error': str(e)}
+        except Exception as e:
+            logging.error(f"Error running D1 benchmark: {str(e)}")
+            d1_results = {'error': {'error': str(e)}}
+        finally:
+            benchmark.close()
 
         self.results['database_performance'] = d1_results
         return d1_results
@@ -529,46 +1088,54 @@ class PerformanceTestSuite:
     # ===========================
 
     async def test_cloudflare_workers_performance(self) -> Dict[str, Any]:
-        """اختبار أداء Cloudflare Workers"""
+        """اختبار أداء Cloudflare Workers بتشغيل كل Worker محلياً في عملية مستقلة (بمثابة isolate)"""
         print("☁️ اختبار أداء Cloudflare Workers...")
 
-        worker_endpoints = [
-            {'name': 'مصادقة المستخدم', 'type': 'auth', 'cold_start': True},
-            {'name': 'معالجة الإيرادات', 'type': 'business', 'cold_start': True},
-            {'name': 'مزامنة البيانات', 'type': 'sync', 'cold_start': True},
-            {'name': 'جلب التقارير', 'type': 'report', 'cold_start': False},
-            {'name': 'معالجة الطلبات', 'type': 'business', 'cold_start': False},
-            {'name': 'عزل البيانات', 'type': 'security', 'cold_start': True}
-        ]
-
         worker_results = {}
+        harness = WorkersHarness(
+            CloudflareArchitectureAnalyzer().analyze_workers_architecture(),
+            db_path=self.workers_database,
+            cold_runs=self.workers_cold_runs,
+            warm_requests=self.workers_warm_requests,
+            concurrency=self.workers_concurrency
+        )
+
+        try:
+            await asyncio.to_thread(harness.prepare_database)
+        except Exception as e:
+            logging.error(f"Error preparing Workers database: {str(e)}")
+            self.results['workers_performance'] = {'error': {'error': str(e)}}
+            return self.results['workers_performance']
 
-        for endpoint in worker_endpoints:
+        for worker in harness.architecture['workers']:
             try:
-                # محاكاة وقت استجابة Worker (سريع جدًا)
-                if endpoint['cold_start']:
-                    # Cold start (أبطأ قليلاً)
-                    base_time = {'auth': 50, 'business': 80, 'sync': 120, 'report': 100, 'security': 90}[endpoint['type']]
-                else:
-                    # Warm start (سريع جدًا)
-                    base_time = {'auth': 10, 'business': 20, 'sync': 40, 'report': 25, 'security': 30}[endpoint['type']]
-
-                # إضافة تباين شبكة Cloudflare
-                import random
-                edge_latency = random.uniform(1, 5)  # Edge computing منخفض التأخير
-                execution_time = base_time + edge_latency
-
-                worker_results[endpoint['name']] = {
+                cold = await harness.measure_cold(worker['name'])
+                warm = await harness.measure_warm(worker['name'])
+
+                # زمن التنفيذ المعتمد في التقييم هو p95 للطلبات الدافئة
+                execution_time = warm['latency_ms']['p95']
+                worker_results[worker['name']] = {
+                    'purpose': worker['purpose'],
                     'execution_time': execution_time,
-                    'type': endpoint['type'],
-                    'cold_start': endpoint['cold_start'],
-                    'edge_latency': edge_latency,
+                    'warm_p50': warm['latency_ms']['p50'],
+                    'warm_p95': warm['latency_ms']['p95'],
+                    'warm_p99': warm['latency_ms']['p99'],
+                    'throughput': warm['throughput'],
+                    'warm_errors': warm['errors'],
+                    'startup_time': cold['startup_ms']['mean'],
+                    'startup_p95': cold['startup_ms']['p95'],
+                    'first_request_time': cold['first_request_ms']['mean'],
+                    'cold_start_time': cold['cold_start_ms'],
+                    'cold_runs': cold['startup_ms']['count'],
+                    'cold_statuses': cold['statuses'],
                     'status': 'excellent' if execution_time < 30 else 'good' if execution_time < 60 else 'needs_improvement'
                 }
+                logging.info(f"Worker {worker['name']}: startup {cold['startup_ms']['mean']:.0f}ms, "
+                             f"warm p95 {execution_time:.2f}ms, {warm['throughput']:.0f} req/s")
 
             except Exception as e:
-                logging.error(f"Error testing Worker endpoint {endpoint['name']}: {str(e)}")
-                worker_results[endpoint['name']] = {'error': str(e)}
+                logging.error(f"Error testing Worker {worker['name']}: {str(e)}")
+                worker_results[worker['name']] = {'error': str(e)}
 
         self.results['workers_performance'] = worker_results
         return worker_results
@@ -578,38 +1145,57 @@ class PerformanceTestSuite:
     # ===========================
 
     async def test_realtime_sync_performance(self) -> Dict[str, Any]:
-        """اختبار أداء المزامنة الحقيقية عبر WebSocket"""
+        """اختبار زمن المزامنة عبر WebSocket من الكاتب إلى جميع القراء عبر خادم /ws/branch-sync محلي"""
         print("🔄 اختبار أداء المزامنة الحقيقية...")
 
-        sync_scenarios = [
-            {'name': 'مزامنة إيراد فوري', 'data_size': 'small', 'branches': 2},
-            {'name': 'مزامنة طلب بين الفروع', 'data_size': 'medium', 'branches': 2},
-            {'name': 'مزامنة تقرير شهري', 'data_size': 'large', 'branches': 2},
-            {'name': 'مزامنة متعددة الفروع', 'data_size': 'medium', 'branches': 5},
-            {'name': 'مزامنة حالات الطوارئ', 'data_size': 'small', 'branches': 2}
-        ]
-
         sync_results = {}
+        harness = RealtimeSyncHarness(
+            readers_per_branch=self.sync_readers_per_branch,
+            messages_per_writer=self.sync_messages,
+            send_rate=self.sync_rate
+        )
 
-        for scenario in sync_scenarios:
-            try:
-                # محاكاة وقت المزامنة عبر WebSocket
-                data_time = {'small': 10, 'medium': 30, 'large': 80}[scenario['data_size']]
-                branch_overhead = scenario['branches'] * 5  # overhead لكل فرع إضافي
-
-                total_sync_time = data_time + branch_overhead
-
-                sync_results[scenario['name']] = {
-                    'sync_time': total_sync_time,
-                    'data_size': scenario['data_size'],
-                    'branches': scenario['branches'],
-                    'real_time_score': total_sync_time < 100,  # أقل من 100ms يعتبر real-time
-                    'status': 'excellent' if total_sync_time < 50 else 'good' if total_sync_time < 100 else 'acceptable'
-                }
+        try:
+            await harness.start_server()
+        except Exception as e:
+            logging.error(f"Error starting sync server: {str(e)}")
+            self.results['realtime_sync_performance'] = {'error': {'error': str(e)}}
+            return self.results['realtime_sync_performance']
 
-            except Exception as e:
-                logging.error(f"Error testing sync scenario {scenario['name']}: {str(e)}")
-                sync_results[scenario['name']] = {'error': str(e)}
+        try:
+            for branches in self.sync_branches:
+                scenario_name = f"مزامنة {branches} فروع"
+                try:
+                    fanout = await harness.run_fanout(branches)
+
+                    # زمن المزامنة المعتمد هو p95 من لحظة إرسال الكاتب حتى استلام كل قارئ
+                    latency = fanout['end_to_end_ms']
+                    sync_time = latency['p95']
+                    sync_results[scenario_name] = {
+                        'sync_time': sync_time,
+                        'p50': latency['p50'],
+                        'p95': latency['p95'],
+                        'p99': latency['p99'],
+                        'max': latency['max'],
+                        'ingress_p95': fanout['ingress_ms']['p95'],
+                        'fanout_p95': fanout['fanout_ms']['p95'],
+                        'data_size': 'small',
+                        'branches': branches,
+                        'readers': fanout['readers'],
+                        'messages': fanout['messages_sent'],
+                        'deliveries': fanout['deliveries'],
+                        'delivery_rate': fanout['delivery_rate'],
+                        'real_time_score': sync_time < 100 and fanout['delivery_rate'] == 100,  # أقل من 100ms يعتبر real-time
+                        'status': 'excellent' if sync_time < 50 else 'good' if sync_time < 100 else 'acceptable'
+                    }
+                    logging.info(f"Sync {branches} branches: p50 {latency['p50']:.1f}ms, p95 {sync_time:.1f}ms, "
+                                 f"delivered {fanout['delivery_rate']:.1f}%")
+
+                except Exception as e:
+                    logging.error(f"Error testing sync scenario {scenario_name}: {str(e)}")
+                    sync_results[scenario_name] = {'error': str(e)}
+        finally:
+            await harness.stop_server()
 
         self.results['realtime_sync_performance'] = sync_results
         return sync_results
@@ -619,49 +1205,150 @@ class PerformanceTestSuite:
     # ===========================
 
     async def test_cloudflare_cache_performance(self) -> Dict[str, Any]:
-        """اختبار فعالية التخزين المؤقت لـ Cloudflare"""
+        """اختبار فعالية التخزين المؤقت لـ Cloudflare: تحليل السياسات الحقيقية ثم إعادة مزيج طلبات عبر وكيل Edge محلي"""
         print("🌐 اختبار فعالية التخزين المؤقت لـ Cloudflare...")
 
-        cache_scenarios = [
-            {'name': 'صفحة رئيسية', 'type': 'page', 'edge_cache': True},
-            {'name': 'بيانات الإيرادات', 'type': 'api', 'edge_cache': True},
-            {'name': 'تقرير مالي', 'type': 'api', 'edge_cache': False},
-            {'name': 'بيانات المستخدم', 'type': 'api', 'edge_cache': True},
-            {'name': 'إعدادات النظام', 'type': 'api', 'edge_cache': False}
-        ]
-
         cache_results = {}
+        simulator = EdgeCacheSimulator(
+            self.base_url,
+            [page_info['path'] for page_info in self.PAGES],
+            self.API_ENDPOINTS,
+            requests=self.edge_cache_requests,
+            concurrency=self.api_concurrency * 10,
+            time_scale=self.edge_cache_time_scale,
+            mix_file=self.edge_cache_mix
+        )
+
+        try:
+            simulation = await simulator.run()
+        except Exception as e:
+            logging.error(f"Error running edge cache simulation: {str(e)}")
+            self.results['cloudflare_cache_performance'] = {'error': {'error': str(e)}}
+            return self.results['cloudflare_cache_performance']
+
+        for route, route_data in simulation['routes'].items():
+            policy = route_data['policy']
+            improvement = route_data['latency_savings_pct']
+            cache_results[route] = {
+                **route_data,
+                'first_load': route_data['origin_latency'],
+                'cached_load': route_data['observed_latency'],
+                'cache_improvement': improvement,
+                'cache_hit_rate': route_data['hit_ratio'] / 100,
+                'edge_cached': policy['edge_cacheable'],
+                # private / no-store / طلبات الكتابة: عدم التخزين مقصود ولا يُحتسب ضعفاً
+                'intentionally_uncached': policy['uncacheable_reason'] in ('private', 'no-store') or
+                                          (policy['uncacheable_reason'] or '').startswith('method'),
+                'status': 'excellent' if improvement > 80 else 'good' if improvement > 50 else 'needs_improvement'
+            }
+
+        # مسارات حُللت سياستها دون أن تظهر في المزيج (مثل طلبات POST)
+        for route, crawled in simulation['crawl'].items():
+            if route not in cache_results:
+                cache_results[route] = {'type': crawled['type'], 'policy': crawled.get('policy'), 'requests': 0}
+                if 'error' in crawled:
+                    cache_results[route]['error'] = crawled['error']
+
+        self.results['edge_cache_simulation'] = {
+            key: simulation[key] for key in ('mix_source', 'requests', 'duration', 'evictions', 'expirations',
+                                             'cache_entries', 'cache_bytes')
+        }
+        self.results['cloudflare_cache_performance'] = cache_results
+        return cache_results
+
+    # ===========================
+    # 9. القياس تحت محاكاة الشبكة والمعالج
+    # ===========================
 
-        for scenario in cache_scenarios:
+    async def test_throttling_profiles(self, page: Page) -> Dict[str, Any]:
+        """إعادة قياس تحميل الصفحات وزمن API تحت كل ملف محاكاة (شبكة جوال ومعالج أبطأ)"""
+        print("📶 اختبار الأداء تحت محاكاة الشبكة والمعالج...")
+
+        throttling_results = {}
+        for profile in self.throttling_profiles:
+            print(f"   📶 {profile['label']}")
             try:
-                if scenario['edge_cache']:
-                    # مع edge cache (سريع جدًا)
-                    first_load = random.uniform(50, 150)  # ms
-                    cached_load = random.uniform(5, 15)   # ms
-                    cache_hit_rate = 0.95  # 95% hit rate
-                else:
-                    # بدون edge cache
-                    first_load = random.uniform(100, 300)  # ms
-                    cached_load = random.uniform(80, 200)  # ms
-                    cache_hit_rate = 0.60  # 60% hit rate
-
-                cache_improvement = (first_load - cached_load) / first_load * 100
-
-                cache_results[scenario['name']] = {
-                    'first_load': first_load,
-                    'cached_load': cached_load,
-                    'cache_improvement': cache_improvement,
-                    'cache_hit_rate': cache_hit_rate,
-                    'edge_cached': scenario['edge_cache'],
-                    'status': 'excellent' if cache_improvement > 80 else 'good' if cache_improvement > 50 else 'needs_improvement'
+                page_loads = await self.test_page_load_performance(page, profile)
+                api_results = await self._test_api_in_browser(page, profile)
+                throttling_results[profile['name']] = {
+                    'profile': describe_profile(profile),
+                    'summary': self._summarize_throttled_run(page_loads, api_results),
+                    'page_load_times': page_loads,
+                    'api_response_times': api_results
                 }
+                summary = throttling_results[profile['name']]['summary']
+                logging.info(f"Throttling {profile['name']}: median LCP {summary['median_lcp'] or 0:.0f}ms, "
+                             f"median API p95 {summary['median_api_p95'] or 0:.0f}ms")
 
             except Exception as e:
-                logging.error(f"Error testing cache scenario {scenario['name']}: {str(e)}")
-                cache_results[scenario['name']] = {'error': str(e)}
+                logging.error(f"Error testing throttling profile {profile['name']}: {str(e)}")
+                throttling_results[profile['name']] = {'error': str(e)}
 
-        self.results['cloudflare_cache_performance'] = cache_results
-        return cache_results
+        self.results['throttling'] = throttling_results
+        return throttling_results
+
+    async def _test_api_in_browser(self, page: Page, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """زمن API عبر fetch من صفحة محاكاة (طلبات aiohttp لا تمر بشروط الشبكة في المتصفح)"""
+        context = await page.context.browser.new_context(**throttled_context_options(profile))
+        api_results = {}
+        try:
+            api_page = await context.new_page()
+            await apply_throttling(api_page, profile)
+            # نفس المصدر حتى تُرسل الطلبات دون CORS
+            await api_page.goto(self.base_url, wait_until='domcontentloaded')
+
+            for endpoint in self.API_ENDPOINTS:
+                try:
+                    samples = await api_page.evaluate(BROWSER_FETCH_SCRIPT, {
+                        'method': endpoint['method'],
+                        'path': endpoint['path'],
+                        'samples': self.throttling_api_samples
+                    })
+                    histogram = LatencyHistogram()
+                    for sample in samples:
+                        if 'error' not in sample:
+                            histogram.record(sample['time'])
+                    if histogram.count == 0:
+                        api_results[endpoint['name']] = {'error': samples[0]['error'], 'average_time': float('inf')}
+                        continue
+
+                    p95 = histogram.percentile(95)
+                    api_results[endpoint['name']] = {
+                        'average_time': histogram.mean,
+                        'p50': histogram.percentile(50),
+                        'p95': p95,
+                        'max_time': histogram.max,
+                        'samples': len(samples),
+                        'errors': sum(1 for sample in samples if 'error' in sample),
+                        'method': endpoint['method'],
+                        'path': endpoint['path'],
+                        'status': 'good' if p95 < 200 else 'needs_improvement' if p95 < 500 else 'poor'
+                    }
+
+                except Exception as e:
+                    logging.error(f"Error testing API {endpoint['name']} under {profile['name']}: {str(e)}")
+                    api_results[endpoint['name']] = {'error': str(e), 'average_time': float('inf')}
+        finally:
+            await context.close()
+
+        return api_results
+
+    @staticmethod
+    def _summarize_throttled_run(page_loads: Dict[str, Any], api_results: Dict[str, Any]) -> Dict[str, Any]:
+        """وسيط LCP وأسوأ مسار وعدد الصفحات الضعيفة ووسيط p95 لـ API لملف واحد"""
+        lcps = {name: data['web_vitals']['lcp'] for name, data in page_loads.items()
+                if data.get('web_vitals', {}).get('lcp') is not None}
+        api_p95 = [data['p95'] for data in api_results.values() if 'p95' in data]
+        worst = max(lcps, key=lcps.get) if lcps else None
+        return {
+            'median_lcp': statistics.median(lcps.values()) if lcps else None,
+            'worst_route': worst,
+            'worst_lcp': lcps[worst] if worst else None,
+            'poor_routes': sum(1 for data in page_loads.values()
+                               if data.get('web_vitals', {}).get('ratings', {}).get('lcp') == 'poor'),
+            'routes': len(page_loads),
+            'median_api_p95': statistics.median(api_p95) if api_p95 else None
+        }
 
     # ===========================
     # 6. إنشاء الرسوم البيانية
@@ -704,27 +1391,33 @@ class PerformanceTestSuite:
             self._create_sync_performance_chart(charts_dir)
 
     def _create_page_load_chart(self, charts_dir: Path):
-        """إنشاء رسم بياني لأوقات تحميل الصفحة"""
+        """إنشاء رسم بياني لأوقات تحميل الصفحة (سكون الشبكة مقابل LCP)"""
         try:
             pages = []
             load_times = []
+            lcp_times = []
 
             for page_name, page_data in self.results['page_load_times'].items():
                 if 'load_time' in page_data and page_data['load_time'] != float('inf'):
                     pages.append(page_name)
                     load_times.append(page_data['load_time'])
+                    lcp = page_data.get('web_vitals', {}).get('lcp')
+                    lcp_times.append(lcp / 1000 if lcp is not None else 0)
 
             if pages and load_times:
                 plt.figure(figsize=(12, 6))
-                bars = plt.bar(pages, load_times, color='skyblue')
+                positions = range(len(pages))
+                plt.bar([p - 0.2 for p in positions], load_times, width=0.4, color='skyblue', label='سكون الشبكة')
+                plt.bar([p + 0.2 for p in positions], lcp_times, width=0.4, color='seagreen', label='LCP')
 
-                # إضافة خط الهدف (2 ثانية)
+                # إضافة خط الهدف (2 ثانية) وحد LCP الجيد (2.5 ثانية)
                 plt.axhline(y=2, color='red', linestyle='--', label='الهدف (2s)')
+                plt.axhline(y=2.5, color='green', linestyle=':', label='LCP جيد (2.5s)')
 
                 plt.title('أوقات تحميل الصفحة')
                 plt.xlabel('الصفحة')
                 plt.ylabel('الوقت (ثواني)')
-                plt.xticks(rotation=45, ha='right')
+                plt.xticks(list(positions), pages, rotation=45, ha='right')
                 plt.legend()
                 plt.tight_layout()
 
@@ -741,21 +1434,35 @@ class PerformanceTestSuite:
         """إنشاء رسم بياني لاستجابة API"""
         try:
             endpoints = []
-            response_times = []
+            percentiles = {'p50': [], 'p95': [], 'p99': []}
+            corrected_p99 = []
 
             for endpoint_name, endpoint_data in self.results['api_response_times'].items():
                 if 'average_time' in endpoint_data and endpoint_data['average_time'] != float('inf'):
                     endpoints.append(endpoint_name)
-                    response_times.append(endpoint_data['average_time'])
+                    for key in percentiles:
+                        percentiles[key].append(endpoint_data.get(key, endpoint_data['average_time']))
+                    corrected_p99.append(endpoint_data.get('corrected', {}).get('p99'))
 
-            if endpoints and response_times:
+            if endpoints:
                 plt.figure(figsize=(12, 6))
-                bars = plt.bar(endpoints, response_times, color='lightgreen')
+                width = 0.27
+                colors = {'p50': 'lightgreen', 'p95': 'orange', 'p99': 'crimson'}
+                for offset, (key, values) in enumerate(percentiles.items()):
+                    plt.bar([x + (offset - 1) * width for x in range(len(endpoints))], values,
+                            width, label=key, color=colors[key])
+
+                # p99 المصحح لـ coordinated omission
+                corrected_points = [(x, v) for x, v in enumerate(corrected_p99) if v is not None]
+                if corrected_points:
+                    plt.scatter([x for x, _ in corrected_points], [v for _, v in corrected_points],
+                                marker='D', color='black', zorder=3, label='p99 مصحح')
 
                 # إضافة خط الهدف (200ms)
                 plt.axhline(y=200, color='red', linestyle='--', label='الهدف (200ms)')
 
-                plt.title('متوسط أوقات استجابة API')
+                plt.xticks(range(len(endpoints)), endpoints)
+                plt.title('توزيع أوقات استجابة API (p50 / p95 / p99)')
                 plt.xlabel('نقطة النهاية')
                 plt.ylabel('الوقت (ميلي ثانية)')
                 plt.xticks(rotation=45, ha='right')
@@ -790,9 +1497,14 @@ class PerformanceTestSuite:
                 ax1.pie(success_data, labels=labels, colors=colors, autopct='%1.1f%%')
                 ax1.set_title('نسبة نجاح المستخدمين')
 
-                # متوسط وقت الاستجابة
-                ax2.bar(['متوسط الاستجابة'], [concurrent_data['average_response_time']], color='blue')
-                ax2.set_title('متوسط وقت الاستجابة')
+                # توزيع وقت الجلسة
+                ax2.bar(
+                    ['p50', 'p95', 'p99'],
+                    [concurrent_data.get(f'{p}_response_time', concurrent_data['average_response_time'])
+                     for p in ('p50', 'p95', 'p99')],
+                    color=['blue', 'orange', 'crimson']
+                )
+                ax2.set_title('توزيع وقت الجلسة')
                 ax2.set_ylabel('ثواني')
 
                 # Throughput
@@ -816,21 +1528,33 @@ class PerformanceTestSuite:
             logging.error(f"Error creating concurrent users chart: {str(e)}")
 
     def _create_memory_usage_chart(self, charts_dir: Path):
-        """إنشاء رسم بياني لاستخدام الذاكرة"""
+        """إنشاء رسم بياني لاستخدام الذاكرة والمعالج لأداة الاختبار والخادم"""
         try:
             memory_data = self.results['memory_usage']
 
-            if memory_data and 'samples' in memory_data:
-                plt.figure(figsize=(12, 6))
-                plt.plot(memory_data['samples'], color='red', linewidth=2)
-                plt.axhline(y=memory_data['average'], color='blue', linestyle='--', label='المتوسط')
-                plt.axhline(y=memory_data['max'], color='orange', linestyle='--', label='الحد الأقصى')
-
-                plt.title('استخدام الذاكرة أثناء الاختبار')
-                plt.xlabel('عينة')
-                plt.ylabel('الذاكرة (MB)')
-                plt.legend()
-                plt.grid(True, alpha=0.3)
+            if memory_data and memory_data.get('timeline'):
+                timeline = memory_data['timeline']
+                elapsed = [sample['elapsed'] for sample in timeline]
+
+                fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 9), sharex=True)
+                for group, color in zip(memory_data['groups'], ['tab:red', 'tab:blue', 'tab:green']):
+                    ax1.plot(elapsed, [sample['groups'][group]['rss_mb'] for sample in timeline],
+                             color=color, linewidth=2, label=f'{group} RSS')
+                    ax1.plot(elapsed, [sample['groups'][group]['uss_mb'] for sample in timeline],
+                             color=color, linestyle='--', linewidth=1, label=f'{group} USS')
+                    ax2.plot(elapsed, [sample['groups'][group]['cpu_percent'] for sample in timeline],
+                             color=color, linewidth=2, label=group)
+
+                ax1.set_title('استخدام الذاكرة أثناء الاختبار')
+                ax1.set_ylabel('الذاكرة (MB)')
+                ax1.legend()
+                ax1.grid(True, alpha=0.3)
+                ax2.set_title('استخدام المعالج أثناء الاختبار')
+                ax2.set_xlabel('الزمن (ثانية)')
+                ax2.set_ylabel('CPU %')
+                ax2.legend()
+                ax2.grid(True, alpha=0.3)
+                fig.tight_layout()
 
                 chart_path = charts_dir / 'memory_usage.png'
                 plt.savefig(chart_path, dpi=300, bbox_inches='tight')
@@ -868,7 +1592,7 @@ class PerformanceTestSuite:
                 # إضافة خط الهدف (50ms)
                 plt.axhline(y=50, color='blue', linestyle='--', label='الهدف (50ms)')
 
-                plt.title('أداء استعلامات D1')
+                plt.title('أداء استعلامات D1 (p95)')
                 plt.xlabel('الاستعلام')
                 plt.ylabel('الوقت (ميلي ثانية)')
                 plt.xticks(rotation=45, ha='right')
@@ -888,40 +1612,29 @@ class PerformanceTestSuite:
         """إنشاء رسم بياني لأداء Workers"""
         try:
             endpoints = []
-            execution_times = []
             cold_starts = []
             warm_starts = []
 
             for endpoint_name, endpoint_data in self.results['workers_performance'].items():
                 if 'execution_time' in endpoint_data:
                     endpoints.append(endpoint_name)
-                    execution_times.append(endpoint_data['execution_time'])
+                    cold_starts.append(endpoint_data.get('cold_start_time', 0))
+                    warm_starts.append(endpoint_data['execution_time'])
 
-                    if endpoint_data.get('cold_start'):
-                        cold_starts.append(execution_times[-1])
-                        warm_starts.append(None)
-                    else:
-                        cold_starts.append(None)
-                        warm_starts.append(execution_times[-1])
-
-            if endpoints and execution_times:
+            if endpoints:
                 plt.figure(figsize=(12, 6))
 
                 x_pos = range(len(endpoints))
                 width = 0.35
 
-                # رسم cold starts و warm starts
-                cold_data = [t for t in cold_starts if t is not None]
-                warm_data = [t for t in warm_starts if t is not None]
-
-                plt.bar([x_pos[i] for i in range(len(cold_starts)) if cold_starts[i] is not None],
-                       cold_data, width, label='Cold Start', color='orange', alpha=0.7)
-                plt.bar([x_pos[i] + width for i in range(len(warm_starts)) if warm_starts[i] is not None],
-                       warm_data, width, label='Warm Start', color='green', alpha=0.7)
+                # البدء البارد (عملية جديدة + أول طلب) مقابل p95 الطلبات الدافئة
+                plt.bar([x for x in x_pos], cold_starts, width, label='Cold Start', color='orange', alpha=0.7)
+                plt.bar([x + width for x in x_pos], warm_starts, width, label='Warm p95', color='green', alpha=0.7)
 
                 plt.title('أداء Cloudflare Workers')
-                plt.xlabel('نقطة النهاية')
+                plt.xlabel('Worker')
                 plt.ylabel('الوقت (ميلي ثانية)')
+                plt.yscale('log')
                 plt.xticks([x + width/2 for x in range(len(endpoints))], endpoints, rotation=45, ha='right')
                 plt.legend()
                 plt.tight_layout()
@@ -970,7 +1683,7 @@ class PerformanceTestSuite:
                 ax2.plot(scenarios, branch_counts, color=color, marker='o', linewidth=2)
                 ax2.tick_params(axis='y', labelcolor=color)
 
-                plt.title('أداء المزامنة الحقيقية')
+                plt.title('أداء المزامنة الحقيقية (p95)')
                 plt.xticks(rotation=45, ha='right')
                 fig.tight_layout()
 
@@ -995,26 +1708,43 @@ class PerformanceTestSuite:
         # تقييم أوقات تحميل الصفحة
         if self.results.get('page_load_times'):
             slow_pages = 0
+            page_shares = []
             for page_data in self.results['page_load_times'].values():
-                if 'load_time' in page_data:
+                ratings = page_data.get('web_vitals', {}).get('ratings')
+                if ratings:
+                    # كل مقياس بحدوده: ضعيف = 1، يحتاج تحسين = 0.5، كنسبة من مقاييس الصفحة
+                    points = sum({'poor': 1, 'needs_improvement': 0.5}.get(rating, 0) for rating in ratings.values())
+                    page_shares.append(points / len(ratings))
+                    if ratings.get('lcp') == 'poor':
+                        slow_pages += 1
+                elif 'load_time' in page_data:
                     if page_data['load_time'] > 5:
                         slow_pages += 1
-                        penalties += 5
+                        page_shares.append(1.0)
                     elif page_data['load_time'] > 2:
-                        penalties += 2
+                        page_shares.append(0.4)
+                    else:
+                        page_shares.append(0.0)
+
+            # متوسط النسب مهما كان عدد المسارات، فلا تطغى الصفحات على بقية المعايير
+            if page_shares:
+                penalties += self.PAGE_PENALTY_CAP * sum(page_shares) / len(page_shares)
 
             if slow_pages > len(self.results['page_load_times']) * 0.3:
                 penalties += 10
 
-        # تقييم استجابة API
+        # تقييم استجابة API (على p95 لأن الذيل هو ما يشعر به المستخدم)
         if self.results.get('api_response_times'):
             slow_apis = 0
             for api_data in self.results['api_response_times'].values():
                 if 'average_time' in api_data:
-                    if api_data['average_time'] > 500:
+                    p95 = api_data.get('corrected', api_data).get('p95', api_data['average_time'])
+                    if p95 > 500:
                         slow_apis += 1
                         penalties += 3
-                    elif api_data['average_time'] > 200:
+                    elif p95 > 200:
+                        penalties += 1
+                    if api_data.get('corrected', api_data).get('p99', 0) > 1000:
                         penalties += 1
 
             if slow_apis > len(self.results['api_response_times']) * 0.3:
@@ -1028,9 +1758,10 @@ class PerformanceTestSuite:
             elif concurrent_data.get('success_rate', 0) < 95:
                 penalties += 8
 
-            if concurrent_data.get('average_response_time', 0) > 5:
+            session_p95 = concurrent_data.get('p95_response_time', concurrent_data.get('average_response_time', 0))
+            if session_p95 > 5:
                 penalties += 10
-            elif concurrent_data.get('average_response_time', 0) > 3:
+            elif session_p95 > 3:
                 penalties += 5
 
         # تقييم أداء D1 (معايير أقسى بسبب سرعة Cloudflare)
@@ -1043,6 +1774,9 @@ class PerformanceTestSuite:
                         penalties += 2
                     elif query_data['execution_time'] > 50:
                         penalties += 1
+                    # المسح الكامل لجدول يكبر زمنه مع نمو البيانات
+                    if query_data.get('full_scan'):
+                        penalties += 1
 
             if slow_d1_queries > len(self.results['database_performance']) * 0.2:
                 penalties += 5
@@ -1076,13 +1810,16 @@ class PerformanceTestSuite:
         # تقييم التخزين المؤقت لـ Cloudflare
         if self.results.get('cloudflare_cache_performance'):
             poor_cache = 0
+            cacheable_routes = 0
             for cache_data in self.results['cloudflare_cache_performance'].values():
-                if 'cache_improvement' in cache_data:
+                if 'cache_improvement' in cache_data and not cache_data.get('intentionally_uncached'):
+                    cacheable_routes += 1
                     if cache_data['cache_improvement'] < 50:
                         poor_cache += 1
                         penalties += 1
 
-            if poor_cache > len(self.results['cloudflare_cache_performance']) * 0.4:
+            # النسبة من المسارات القابلة للتخزين فقط (private / no-store لا تخفف الخصم)
+            if poor_cache > cacheable_routes * 0.4:
                 penalties += 5
 
         self.performance_score = max(0, score - penalties)
@@ -1092,41 +1829,48 @@ class PerformanceTestSuite:
     # تنفيذ الاختبارات الكاملة
     # ===========================
 
-    async def run_performance_tests(self) -> Dict[str, Any]:
-        """تنفيذ جميع اختبارات الأداء"""
+    async def run_performance_tests(self, load_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """تنفيذ جميع اختبارات الأداء (مع ملف حمل اختياري بعد اختبار المستخدمين المتزامنين)"""
         print("🚀 بدء اختبارات الأداء الشاملة...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            try:
-                # 1. اختبارات تحميل الصفحة
+        async with browser_page(self.runtime) as page:
+            # 1. اختبارات تحميل الصفحة
+            if is_selected(self.checks, 'test_page_load_performance'):
                 await self.test_page_load_performance(page)
 
-                # 2. اختبارات استجابة API
+            # 2. اختبارات استجابة API
+            if is_selected(self.checks, 'test_api_response_times'):
                 await self.test_api_response_times()
 
-                # 3. اختبارات المستخدمين المتزامنين
+            # 3. اختبارات المستخدمين المتزامنين
+            if is_selected(self.checks, 'test_concurrent_users'):
                 await self.test_concurrent_users(50)
+            if load_profile is not None and is_selected(self.checks, 'test_load_profile'):
+                await self.test_load_profile(load_profile)
 
-                # 4. اختبارات فعالية التخزين المؤقت
+            # 4. اختبارات فعالية التخزين المؤقت
+            if is_selected(self.checks, 'test_cache_effectiveness'):
                 await self.test_cache_effectiveness(page)
 
-                # 5. اختبارات أداء قاعدة البيانات D1
+            # 5. اختبارات أداء قاعدة البيانات D1
+            if is_selected(self.checks, 'test_database_performance'):
                 await self.test_database_performance()
 
-                # 6. اختبارات أداء Cloudflare Workers
+            # 6. اختبارات أداء Cloudflare Workers
+            if is_selected(self.checks, 'test_cloudflare_workers_performance'):
                 await self.test_cloudflare_workers_performance()
 
-                # 7. اختبارات المزامنة الحقيقية
+            # 7. اختبارات المزامنة الحقيقية
+            if is_selected(self.checks, 'test_realtime_sync_performance'):
                 await self.test_realtime_sync_performance()
 
-                # 8. اختبارات التخزين المؤقت لـ Cloudflare
+            # 8. اختبارات التخزين المؤقت لـ Cloudflare
+            if is_selected(self.checks, 'test_cloudflare_cache_performance'):
                 await self.test_cloudflare_cache_performance()
 
-            finally:
-                await browser.close()
+            # 9. القياس تحت محاكاة الشبكة والمعالج
+            if self.throttling_profiles and is_selected(self.checks, 'test_throttling_profiles'):
+                await self.test_throttling_profiles(page)
 
         # حساب النتيجة النهائية
         final_score = self.calculate_performance_score()
@@ -1166,9 +1910,40 @@ PAGE LOAD PERFORMANCE
 ─────────────────────────────────────────────────────────────────────────────
 """
 
+        parallelism = self.results.get('route_parallelism', {})
+        if 'metrics' in parallelism:
+            report += (f"{'⚙️' if parallelism['comparable'] else '⚠️'} قياس متوازي في {parallelism['concurrency']} سياقات: "
+                       f"تشوه التوقيت {parallelism['distortion_pct']:+.1f}% (ضوضاء القياس {parallelism['noise_pct']:.1f}%)"
+                       f"{'' if parallelism['comparable'] else ' - غير قابل للمقارنة مع التشغيل التسلسلي'}\n")
+        elif parallelism:
+            report += f"⚙️ قياس متوازي في {parallelism['concurrency']} سياقات (دون معايرة)\n"
+
         if self.results.get('page_load_times'):
             for page_name, page_data in self.results['page_load_times'].items():
-                if 'load_time' in page_data:
+                if 'web_vitals' in page_data:
+                    vitals = page_data['web_vitals']
+                    status_icon = {'good': '✅', 'needs_improvement': '⚠️'}.get(vitals['ratings'].get('lcp'), '❌')
+                    inp = f"{vitals['inp']:.0f}ms" if vitals['inp'] is not None else '-'
+                    report += (f"{status_icon} {page_name}: LCP {(vitals['lcp'] or 0) / 1000:.2f}s | "
+                               f"FCP {(vitals['fcp'] or 0) / 1000:.2f}s | TTFB {vitals['ttfb'] or 0:.0f}ms | "
+                               f"CLS {vitals['cls']:.3f} | TBT {vitals['tbt']:.0f}ms | "
+                               f"INP {inp} | "
+                               f"سكون الشبكة {page_data['load_time']:.2f}s ({page_data['bottleneck']})")
+                    warm = page_data.get('warm', {})
+                    if 'web_vitals' in warm:
+                        report += (f" | دافئة: LCP {(warm['web_vitals']['lcp'] or 0) / 1000:.2f}s، "
+                                   f"{warm['resources'].get('total_size', 0) / 1024:.0f}KB منقولة")
+                    report += "\n"
+                    critical = page_data.get('resources', {}).get('critical_chain')
+                    if critical:
+                        report += (f"   ↳ المسار الحرج: {critical['render_blocking_count']} موارد حاجبة "
+                                   f"({critical['render_blocking_bytes'] / 1024:.0f}KB) حتى {critical['critical_path_ms']}ms\n")
+                        for font in critical['render_blocking_arabic_fonts']:
+                            report += f"   ↳ خط عربي يحجب العرض: {font['family']} - {'، '.join(font['reasons'])}\n"
+                    for duplicate in page_data.get('resources', {}).get('duplicated_chunks', [])[:3]:
+                        report += (f"   ↳ chunk مكرر: {duplicate['chunk']} × {duplicate['requests']} "
+                                   f"({duplicate['kind']}، {duplicate['wasted_bytes'] / 1024:.0f}KB مهدرة)\n")
+                elif 'load_time' in page_data:
                     status_icon = '✅' if page_data['load_time'] < 2 else '⚠️' if page_data['load_time'] < 5 else '❌'
                     report += f"{status_icon} {page_name}: {page_data['load_time']:.2f}s\n"
 
@@ -1181,8 +1956,18 @@ API RESPONSE PERFORMANCE
         if self.results.get('api_response_times'):
             for api_name, api_data in self.results['api_response_times'].items():
                 if 'average_time' in api_data:
-                    status_icon = '✅' if api_data['average_time'] < 200 else '⚠️' if api_data['average_time'] < 500 else '❌'
-                    report += f"{status_icon} {api_name}: {api_data['average_time']:.0f}ms\n"
+                    corrected = api_data.get('corrected', {})
+                    p95 = corrected.get('p95', api_data.get('p95', api_data['average_time']))
+                    status_icon = '✅' if p95 < 200 else '⚠️' if p95 < 500 else '❌'
+                    if 'p50' in api_data:
+                        report += f"{status_icon} {api_name}: p50 {api_data['p50']:.0f}ms | p95 {api_data['p95']:.0f}ms | p99 {api_data['p99']:.0f}ms | p99.9 {api_data['p999']:.0f}ms"
+                        if corrected:
+                            report += f" | مصحح p95 {corrected['p95']:.0f}ms, p99 {corrected['p99']:.0f}ms"
+                    else:
+                        report += f"{status_icon} {api_name}: {api_data['average_time']:.0f}ms"
+                    if 'average_ttfb' in api_data:
+                        report += f" (TTFB {api_data['average_ttfb']:.0f}ms, اتصال {api_data['average_connect_time']:.0f}ms)"
+                    report += "\n"
 
         report += f"""
 
@@ -1194,10 +1979,41 @@ CONCURRENT USER TESTING (50 users)
             data = self.results['concurrent_user_tests']
             report += f"""
 معدل النجاح: {data.get('success_rate', 0):.1f}%
-متوسط وقت الاستجابة: {data.get('average_response_time', 0):.2f}s
+زمن الجلسة: p50 {data.get('p50_response_time', 0):.2f}s | p95 {data.get('p95_response_time', 0):.2f}s | p99 {data.get('p99_response_time', 0):.2f}s | p99.9 {data.get('p999_response_time', 0):.2f}s
 معدل المعالجة: {data.get('throughput', 0):.1f} users/sec
 نسبة الخطأ: {data.get('error_rate', 0):.1f}%
 """
+            if data.get('open_loop'):
+                open_loop = data['open_loop']
+                report += f"""حلقة مفتوحة: {open_loop['target_rate']} جلسة/ثانية مستهدفة، {open_loop['achieved_rate']:.1f} فعلية
+جلسات مجدولة/بدأت/مسقطة: {open_loop['scheduled_starts']}/{open_loop['started']}/{open_loop['dropped_starts']}
+أقصى تراكم: {open_loop['peak_backlog']} جلسة | انحراف البدء p99: {open_loop['start_skew_ms'].get('p99', 0):.0f}ms
+"""
+            slo_misses = [(name, action) for name, action in data.get('actions', {}).items()
+                          if action.get('slo_ms') is not None and action.get('slo_compliance', 100) < 95]
+            for name, action in slo_misses:
+                report += f"⚠️ SLO {name}: {action['slo_compliance']:.1f}% ضمن {action['slo_ms']}ms (p95 {action['p95']:.0f}ms)\n"
+            harness = data.get('harness_resources', {})
+            pool = data.get('browser_pool', {})
+            if harness.get('samples'):
+                report += f"""متصفحات المجمع: {pool.get('browsers_launched', 0)} (حتى {pool.get('contexts_per_browser', 0)} سياق لكل متصفح)
+استهلاك أداة الاختبار: CPU {harness.get('average_cpu_percent', 0):.0f}% (ذروة {harness.get('peak_cpu_percent', 0):.0f}%) | RAM {harness.get('peak_rss_mb', 0):.0f}MB ذروة
+"""
+            for group, usage in self.results.get('memory_usage', {}).get('groups', {}).items():
+                report += (f"موارد {group} (PID {usage['pid']}): CPU {usage['average_cpu_percent']:.0f}% "
+                           f"(ذروة {usage['peak_cpu_percent']:.0f}%) | RSS {usage['peak_rss_mb']:.0f}MB / "
+                           f"USS {usage['peak_uss_mb']:.0f}MB ذروة | FDs {usage['peak_open_fds']} | "
+                           f"خيوط {usage['peak_threads']} | عمليات {usage['peak_processes']}\n")
+
+        for profile_name, profile_data in self.results.get('load_profiles', {}).items():
+            report += f"""
+ملف الحمل {profile_name} ({profile_data['type']}) - نقطة انحناء زمن الاستجابة: {profile_data.get('latency_knee') or 'لم تُرصد'}
+"""
+            for stage in profile_data['stages']:
+                report += (f"   {stage['stage']}: {stage['start_rate']:g}→{stage['end_rate']:g} جلسة/ثانية، "
+                           f"{stage['total_users']} جلسة | p50 {stage['p50_response_time']:.2f}s | "
+                           f"p95 {stage['p95_response_time']:.2f}s | p99 {stage['p99_response_time']:.2f}s | "
+                           f"خطأ {stage['error_rate']:.1f}%\n")
 
         report += f"""
 
@@ -1209,7 +2025,10 @@ CLOUDFLARE D1 DATABASE PERFORMANCE
             for query_name, query_data in self.results['database_performance'].items():
                 if 'execution_time' in query_data:
                     status_icon = '✅' if query_data.get('status') == 'excellent' else '⚠️' if query_data.get('status') == 'good' else '❌'
-                    report += f"{status_icon} {query_name}: {query_data['execution_time']:.1f}ms ({query_data.get('isolation', 'N/A')})\n"
+                    report += (f"{status_icon} {query_name}: p50 {query_data.get('p50', 0):.2f}ms | "
+                               f"p95 {query_data['execution_time']:.2f}ms | p99 {query_data.get('p99', 0):.2f}ms | "
+                               f"≥{query_data.get('estimated_rows_read', 0):.0f} صف مقروء (تقدير أدنى)"
+                               f"{' | مسح كامل' if query_data.get('full_scan') else ''} ({query_data.get('isolation', 'N/A')})\n")
 
         report += f"""
 
@@ -1221,8 +2040,10 @@ CLOUDFLARE WORKERS PERFORMANCE
             for endpoint_name, endpoint_data in self.results['workers_performance'].items():
                 if 'execution_time' in endpoint_data:
                     status_icon = '✅' if endpoint_data.get('status') == 'excellent' else '⚠️' if endpoint_data.get('status') == 'good' else '❌'
-                    start_type = 'Cold' if endpoint_data.get('cold_start') else 'Warm'
-                    report += f"{status_icon} {endpoint_name}: {endpoint_data['execution_time']:.1f}ms ({start_type})\n"
+                    report += (f"{status_icon} {endpoint_name}: warm p95 {endpoint_data['execution_time']:.1f}ms | "
+                               f"{endpoint_data.get('throughput', 0):.0f} req/s | cold start "
+                               f"{endpoint_data.get('cold_start_time', 0):.0f}ms (بدء {endpoint_data.get('startup_time', 0):.0f}ms + "
+                               f"أول طلب {endpoint_data.get('first_request_time', 0):.1f}ms)\n")
 
         report += f"""
 
@@ -1234,7 +2055,25 @@ REAL-TIME SYNC PERFORMANCE
             for scenario_name, scenario_data in self.results['realtime_sync_performance'].items():
                 if 'sync_time' in scenario_data:
                     real_time_icon = '🟢' if scenario_data.get('real_time_score', False) else '🟡'
-                    report += f"{real_time_icon} {scenario_name}: {scenario_data['sync_time']:.1f}ms ({scenario_data.get('branches', 2)} branches)\n"
+                    report += (f"{real_time_icon} {scenario_name}: p50 {scenario_data['p50']:.1f}ms / "
+                               f"p95 {scenario_data['p95']:.1f}ms / p99 {scenario_data['p99']:.1f}ms "
+                               f"({scenario_data['readers']} readers, {scenario_data['delivery_rate']:.1f}% delivered)\n")
+
+        report += f"""
+
+BROWSER CACHE EFFECTIVENESS
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+        if self.results.get('cache_effectiveness'):
+            for page_path, cache_data in self.results['cache_effectiveness'].items():
+                if 'request_hit_ratio' in cache_data:
+                    status_icon = '✅' if cache_data['byte_hit_ratio'] > 80 else '⚠️' if cache_data['byte_hit_ratio'] > 50 else '❌'
+                    report += (f"{status_icon} {page_path}: دافئ {cache_data['request_hit_ratio']:.0f}% طلبات / "
+                               f"{cache_data['byte_hit_ratio']:.0f}% بايتات | إعادة تحميل "
+                               f"{cache_data['reload_request_hit_ratio']:.0f}% / {cache_data['reload_byte_hit_ratio']:.0f}%\n")
+                    for asset in cache_data['uncached_immutable'][:5]:
+                        report += f"   ↳ غير مخزن: {asset['url']} ({asset['bytes'] / 1024:.1f}KB, {asset['reason']})\n"
 
         report += f"""
 
@@ -1247,8 +2086,37 @@ CLOUDFLARE CACHE PERFORMANCE
                 if 'cache_improvement' in scenario_data:
                     improvement = scenario_data['cache_improvement']
                     status_icon = '✅' if improvement > 80 else '⚠️' if improvement > 50 else '❌'
-                    cache_type = 'Edge' if scenario_data.get('edge_cached') else 'Standard'
-                    report += f"{status_icon} {scenario_name}: {improvement:.1f}% improvement ({cache_type})\n"
+                    policy = scenario_data['policy']
+                    cache_type = f"Edge TTL {policy['edge_ttl']}s" if scenario_data.get('edge_cached') else f"Bypass: {policy['uncacheable_reason']}"
+                    report += (f"{status_icon} {scenario_name}: إصابة {scenario_data['hit_ratio']:.1f}% | "
+                               f"تخفيف الأصل {scenario_data['origin_offload']:.1f}% طلبات / {scenario_data['byte_offload']:.1f}% بايتات | "
+                               f"توفير {scenario_data['latency_savings']:.1f}ms ({improvement:.1f}%) ({cache_type})\n")
+
+        if self.results.get('throttling'):
+            report += f"""
+
+THROTTLING PROFILES
+─────────────────────────────────────────────────────────────────────────────
+"""
+            baseline = self._summarize_throttled_run(self.results.get('page_load_times', {}),
+                                                     self.results.get('api_response_times', {}))
+            runs = [('بدون محاكاة', baseline)] + [
+                (profile_data['profile']['label'], profile_data['summary'])
+                for profile_data in self.results['throttling'].values() if 'summary' in profile_data
+            ]
+            for label, summary in runs:
+                status_icon = {'good': '✅', 'needs_improvement': '⚠️'}.get(rate_web_vital('lcp', summary['median_lcp']), '❌')
+                slowdown = ''
+                if baseline['median_lcp'] and summary['median_lcp'] and summary is not baseline:
+                    slowdown = f" (×{summary['median_lcp'] / baseline['median_lcp']:.1f})"
+                worst = f"{summary['worst_route']} {summary['worst_lcp'] / 1000:.2f}s" if summary['worst_route'] else '-'
+                api_p95 = f"{summary['median_api_p95']:.0f}ms" if summary['median_api_p95'] is not None else '-'
+                report += (f"{status_icon} {label}: وسيط LCP {(summary['median_lcp'] or 0) / 1000:.2f}s{slowdown} | "
+                           f"الأسوأ {worst} | صفحات ضعيفة {summary['poor_routes']}/{summary['routes']} | "
+                           f"وسيط API p95 {api_p95}\n")
+            for profile_name, profile_data in self.results['throttling'].items():
+                if 'error' in profile_data:
+                    report += f"❌ {profile_name}: {profile_data['error']}\n"
 
         report += f"""
 
@@ -1267,6 +2135,25 @@ PERFORMANCE RECOMMENDATIONS
             high_priority.append("تحسين استعلامات D1 البطيئة")
         if any(sync_data.get('sync_time', 0) > 100 for sync_data in self.results.get('realtime_sync_performance', {}).values()):
             high_priority.append("تحسين أداء المزامنة الحقيقية")
+        render_bound = [name for name, page_data in self.results.get('page_load_times', {}).items()
+                        if page_data.get('bottleneck') in ('render', 'server')]
+        idle_bound = [name for name, page_data in self.results.get('page_load_times', {}).items()
+                      if page_data.get('bottleneck') == 'idle']
+        if render_bound:
+            high_priority.append(f"تسريع عرض المحتوى الأكبر (LCP) في: {', '.join(render_bound)}")
+        if idle_bound:
+            high_priority.append(f"تقليل الطلبات المتأخرة بعد العرض في: {', '.join(idle_bound)}")
+        if any(cache_data.get('uncached_immutable') for cache_data in self.results.get('cache_effectiveness', {}).values()):
+            high_priority.append("إضافة Cache-Control: public, max-age=31536000, immutable للأصول ذات البصمة")
+        page_resources = [page_data.get('resources', {}) for page_data in self.results.get('page_load_times', {}).values()]
+        if any(resources.get('critical_chain', {}).get('render_blocking_arabic_fonts') for resources in page_resources):
+            high_priority.append("استخدام font-display: swap وpreload للخطوط العربية بدلاً من حجب العرض")
+        if any(resources.get('duplicated_chunks') for resources in page_resources):
+            high_priority.append("إزالة الـ chunks المكررة من حزم JavaScript")
+        slow_profiles = [profile_data['profile']['label'] for profile_data in self.results.get('throttling', {}).values()
+                         if profile_data.get('summary', {}).get('poor_routes')]
+        if slow_profiles:
+            high_priority.append(f"تقليل حجم JavaScript وزمن العرض على الأجهزة المحمولة (LCP ضعيف تحت: {', '.join(slow_profiles)})")
 
         for rec in high_priority:
             report += f"   • {rec}\n"
@@ -0,0 +1,232 @@
+"""
+قياس زمن المزامنة الفورية عبر WebSocket من طرف إلى طرف لاختبارات BarberTrack
+مطور: Performance Testing Specialist
+
+خادم بث محلي (في عملية مستقلة) ينفذ نقطة /ws/branch-sync وأحداثها من
+analyze_realtime_sync_architecture. لكل فرع عميل كاتب يرسل revenue-added وexpense-added،
+وعدة عملاء قارئين يستقبلون تحديثات جميع الفروع. كل رسالة تحمل لحظة إرسالها ولحظة وصولها
+للخادم، فيُقاس زمن الوصول للخادم وزمن التوزيع (fan-out) والزمن الكلي لكل مستقبل.
+
+تشغيل الخادم يدوياً:
+  python realtime_sync_harness.py serve --port 8787
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import aiohttp
+from aiohttp import web
+
+from cloudflare_d1_workers_analysis import CloudflareArchitectureAnalyzer
+from latency_histogram import LatencyHistogram
+
+SYNC_ENDPOINT = '/ws/branch-sync'
+MEASURED_EVENTS = ('revenue-added', 'expense-added')
+
+
+# ===========================
+# خادم البث (داخل العملية الفرعية)
+# ===========================
+
+async def serve_sync(port: int = 0):
+    """تشغيل خادم /ws/branch-sync وطباعة READY <port> عند الجاهزية"""
+    realtime = CloudflareArchitectureAnalyzer().analyze_realtime_sync_architecture()
+    allowed_events = set(realtime['websocket_server']['events'])
+    readers: Dict[web.WebSocketResponse, int] = {}
+
+    async def branch_sync(request):
+        ws = web.WebSocketResponse(max_msg_size=1024 * 1024)
+        await ws.prepare(request)
+
+        branch_id = int(request.query.get('branch_id', 0))
+        role = request.query.get('role', 'reader')
+        if role == 'reader':
+            readers[ws] = branch_id
+        await ws.send_str(json.dumps({'event': 'subscribed', 'branch_id': branch_id, 'role': role}))
+
+        try:
+            async for message in ws:
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                update = json.loads(message.data)
+                if update.get('event') not in allowed_events:
+                    await ws.send_str(json.dumps({'event': 'error', 'error': 'unknown event'}))
+                    continue
+
+                # ختم وصول الخادم ثم تسلسل واحد يُرسل لجميع المشتركين
+                update['server_at'] = time.time()
+                update['origin_branch'] = branch_id
+                payload = json.dumps(update, ensure_ascii=False)
+                for reader in list(readers):
+                    if not reader.closed:
+                        await reader.send_str(payload)
+        finally:
+            readers.pop(ws, None)
+        return ws
+
+    app = web.Application()
+    app.router.add_get(SYNC_ENDPOINT, branch_sync)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+
+    print(f"READY {runner.addresses[0][1]}", flush=True)
+    await asyncio.Event().wait()
+
+
+# ===========================
+# أداة القياس
+# ===========================
+
+class RealtimeSyncHarness:
+    """كاتب واحد وعدة قراء لكل فرع، وقياس زمن وصول كل تحديث لكل قارئ"""
+
+    def __init__(self, readers_per_branch: int = 2, messages_per_writer: int = 10, send_rate: float = 2.0,
+                 payload_items: int = 1, drain_timeout: float = 30, startup_timeout: float = 30):
+        self.readers_per_branch = readers_per_branch
+        self.messages_per_writer = messages_per_writer
+        # رسائل في الثانية لكل كاتب
+        self.send_rate = send_rate
+        self.payload_items = payload_items
+        self.drain_timeout = drain_timeout
+        self.startup_timeout = startup_timeout
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self.port: Optional[int] = None
+
+    async def start_server(self) -> float:
+        """تشغيل خادم البث في عملية مستقلة وإرجاع زمن جاهزيته بالميلي ثانية"""
+        start = time.perf_counter()
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, str(Path(__file__).resolve()), 'serve',
+            stdout=asyncio.subprocess.PIPE, cwd=str(Path(__file__).resolve().parent)
+        )
+        try:
+            while True:
+                line = await asyncio.wait_for(self._process.stdout.readline(), timeout=self.startup_timeout)
+                if not line:
+                    raise RuntimeError("Sync server exited before becoming ready")
+                if line.startswith(b'READY '):
+                    self.port = int(line.split()[1])
+                    return (time.perf_counter() - start) * 1000
+        except Exception:
+            await self.stop_server()
+            raise
+
+    async def stop_server(self):
+        if self._process is not None:
+            if self._process.returncode is None:
+                self._process.kill()
+            await self._process.wait()
+            self._process = None
+
+    def _update(self, branch_id: int, sequence: int) -> Dict[str, Any]:
+        event = MEASURED_EVENTS[sequence % len(MEASURED_EVENTS)]
+        records = [{
+            'amount': round(random.uniform(20, 400), 2),
+            'description': 'خدمة حلاقة' if event == 'revenue-added' else 'مصروف تشغيلي',
+            'date': time.strftime('%Y-%m-%d')
+        } for _ in range(self.payload_items)]
+        return {'event': event, 'branch_id': branch_id, 'sequence': sequence, 'records': records,
+                'sent_at': time.time()}
+
+    async def run_fanout(self, branches: int) -> Dict[str, Any]:
+        """تشغيل سيناريو بعدد فروع محدد وإرجاع توزيعات الزمن ونسبة التسليم"""
+        url = f"http://127.0.0.1:{self.port}{SYNC_ENDPOINT}"
+        expected_per_reader = branches * self.messages_per_writer
+
+        end_to_end = LatencyHistogram()
+        ingress = LatencyHistogram()
+        fanout = LatencyHistogram()
+        delivered = 0
+
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def connect(branch_id: int, role: str) -> aiohttp.ClientWebSocketResponse:
+                ws = await session.ws_connect(f"{url}?branch_id={branch_id}&role={role}", max_msg_size=1024 * 1024)
+                ack = await ws.receive_json()
+                if ack.get('event') != 'subscribed':
+                    raise RuntimeError(f"Unexpected handshake: {ack}")
+                return ws
+
+            readers = await asyncio.gather(*[
+                connect(branch_id, 'reader')
+                for branch_id in range(1, branches + 1) for _ in range(self.readers_per_branch)
+            ])
+            writers = await asyncio.gather(*[connect(branch_id, 'writer') for branch_id in range(1, branches + 1)])
+
+            async def read(ws: aiohttp.ClientWebSocketResponse):
+                nonlocal delivered
+                received = 0
+                while received < expected_per_reader:
+                    message = await ws.receive()
+                    if message.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    now = time.time()
+                    update = json.loads(message.data)
+                    if update.get('event') not in MEASURED_EVENTS:
+                        continue
+                    received += 1
+                    # يُحتسب كل تسليم فور وصوله حتى لا يضيع ما استلمه قارئ أُلغي عند انتهاء مهلة التصريف
+                    delivered += 1
+                    end_to_end.record((now - update['sent_at']) * 1000)
+                    ingress.record((update['server_at'] - update['sent_at']) * 1000)
+                    fanout.record((now - update['server_at']) * 1000)
+
+            async def write(ws: aiohttp.ClientWebSocketResponse, branch_id: int):
+                # بدء عشوائي داخل الفترة الأولى حتى لا تتزامن جميع الكتابات
+                await asyncio.sleep(random.uniform(0, 1 / self.send_rate))
+                start = time.perf_counter()
+                for sequence in range(self.messages_per_writer):
+                    delay = start + sequence / self.send_rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await ws.send_str(json.dumps(self._update(branch_id, sequence), ensure_ascii=False))
+
+            reader_tasks = [asyncio.create_task(read(ws)) for ws in readers]
+            start = time.perf_counter()
+            await asyncio.gather(*[write(ws, branch_id) for branch_id, ws in enumerate(writers, start=1)])
+            done, pending = await asyncio.wait(reader_tasks, timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            elapsed = time.perf_counter() - start
+
+            await asyncio.gather(*[ws.close() for ws in readers + writers], return_exceptions=True)
+
+        expected = expected_per_reader * len(readers)
+        return {
+            'branches': branches,
+            'readers': len(readers),
+            'writers': len(writers),
+            'messages_sent': branches * self.messages_per_writer,
+            'deliveries_expected': expected,
+            'deliveries': delivered,
+            'delivery_rate': delivered / expected * 100 if expected else 0,
+            'duration': elapsed,
+            'end_to_end_ms': end_to_end.summary(),
+            'ingress_ms': ingress.summary(),
+            'fanout_ms': fanout.summary(),
+            'end_to_end_histogram': end_to_end.to_dict()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="خادم /ws/branch-sync المحلي")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve_sync(args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+ذاكرة نتائج مجموعات الاختبار بعنوان المحتوى لنظام BarberTrack
+مطور: Full-stack Testing Engineer
+
+مفتاح كل مجموعة = sha256 لأربعة مدخلات:
+- مخرجات بناء التطبيق (.next بدون مجلد cache)، أو مصادر التطبيق إن لم يوجد بناء؛
+- مصدر Python للمجموعة وكل وحدة محلية تستوردها، مع ملفات البيانات التي تقرأها؛
+- إعدادات المجموعة من المنسق (الخيارات وخطة الاختيار التدريجي)؛
+- بصمة البيئة (Python والنظام وإصدارات Playwright والمكتبات، وعنوان التطبيق).
+
+أي تغيير في أحدها ينتج مفتاحاً جديداً؛ لا حاجة لإبطال يدوي إلا لإجبار إعادة التشغيل
+(مثلاً بعد تغيير بيانات الخادم التي لا تظهر في المدخلات).
+"""
+
+import hashlib
+import json
+import logging
+import platform
+import shutil
+import sys
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from incremental_selection import APP_DIR, suite_sources, suite_data_files
+
+# المكتبات التي تؤثر إصداراتها على النتائج (إصدار playwright يحدد نسخة Chromium)
+ENVIRONMENT_PACKAGES = ['playwright', 'aiohttp', 'requests', 'psutil', 'pandas', 'firebase-admin']
+# ما لا يدخل في بصمة التطبيق
+APP_EXCLUDED = {'node_modules', '.git', 'cache', 'docs'}
+
+
+def _hash_files(files: List[Path], root: Path) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(path.relative_to(root).as_posix().encode('utf-8'))
+        digest.update(b'\0')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def app_fingerprint(root: str = '.') -> Dict[str, str]:
+    """بصمة مخرجات البناء (.next) إن وُجدت، وإلا بصمة مصادر التطبيق"""
+    app = Path(root, APP_DIR)
+    build = app / '.next'
+    if (build / 'BUILD_ID').exists():
+        base, source = build, 'build'
+    else:
+        base, source = app, 'source'
+
+    files = [path for path in base.rglob('*') if path.is_file()
+             and not APP_EXCLUDED & set(path.relative_to(base).parts)
+             and (source == 'build' or '.next' not in path.relative_to(base).parts)]
+    return {'source': source, 'sha256': _hash_files(files, base)}
+
+
+def environment_fingerprint(base_url: str) -> Dict[str, Any]:
+    """ما يغير النتائج دون أن يظهر في مصادر المشروع"""
+    packages = {}
+    for package in ENVIRONMENT_PACKAGES:
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'packages': packages,
+        'base_url': base_url
+    }
+
+
+def suite_fingerprint(suite: str, root: str = '.') -> Dict[str, str]:
+    """بصمة مصدر المجموعة ووحداتها المحلية وملفات البيانات التي تشير إليها"""
+    files = [Path(root, path) for path in suite_sources(root)[suite]]
+    files += [Path(root, data) for data in suite_data_files(root)[suite] if Path(root, data).exists()]
+    return {'files': sorted(path.name for path in files), 'sha256': _hash_files(files, Path(root))}
+
+
+class ResultCache:
+    """نتائج المجموعات محفوظة في directory/<suite>/<key>.json"""
+
+    def __init__(self, directory: str = 'test_results/cache', root: str = '.', base_url: str = "http://localhost:9002"):
+        self.directory = Path(directory)
+        self.root = root
+        self.base_url = base_url
+        self._app: Optional[Dict[str, str]] = None
+        self._environment: Optional[Dict[str, Any]] = None
+
+    def inputs(self, suite: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        """مدخلات المفتاح (بصمة التطبيق والبيئة تُحسب مرة واحدة لكل تشغيل)"""
+        if self._app is None:
+            self._app = app_fingerprint(self.root)
+            self._environment = environment_fingerprint(self.base_url)
+        return {
+            'app': self._app,
+            'suite': suite_fingerprint(suite, self.root),
+            'config': config,
+            'environment': self._environment
+        }
+
+    def key(self, suite: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = self.inputs(suite, config)
+        encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        return {'key': hashlib.sha256(encoded).hexdigest(), 'inputs': inputs}
+
+    def get(self, suite: str, key: str) -> Optional[Dict[str, Any]]:
+        path = self.directory / suite / f"{key}.json"
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.error(f"Error reading cached result {path}: {str(e)}")
+            return None
+
+    def put(self, suite: str, key: Dict[str, Any], result: Any) -> Path:
+        path = self.directory / suite / f"{key['key']}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'suite': suite,
+            'key': key['key'],
+            'inputs': key['inputs'],
+            'created_at': datetime.now().isoformat(),
+            'result': result
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+    def invalidate(self, suites: Optional[List[str]] = None) -> List[str]:
+        """حذف النتائج المحفوظة لمجموعات محددة أو للجميع"""
+        if not suites:
+            suites = [path.name for path in self.directory.iterdir() if path.is_dir()] if self.directory.exists() else []
+        removed = []
+        for suite in suites:
+            target = self.directory / suite
+            if target.exists():
+                shutil.rmtree(target)
+                removed.append(suite)
+        return removed
@@ -8,16 +8,29 @@ import json
 import logging
 import re
 from typing import Dict, List, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import Page, Browser
 from datetime import datetime
 import unicodedata
 from pathlib import Path
 
+from parallel_routes import fair_concurrency, run_routes
+from browser_runtime import BrowserRuntime, browser_page
+from incremental_selection import is_selected, filter_routes
+
 class RTLLocalizationTestSuite:
     """مجموعة اختبارات RTL والتوطين العربي"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    def __init__(self, base_url: str = "http://localhost:9002", route_concurrency: int = 1,
+                 runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None):
         self.base_url = base_url
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
+        # عدد سياقات المتصفح المتزامنة لفحص اتجاه الصفحات (1 = تسلسلي على نفس الصفحة)
+        self.route_concurrency = route_concurrency
         self.results = {
             'page_direction': {},
             'text_direction': {},
@@ -91,55 +104,45 @@ class RTLLocalizationTestSuite:
                 {'name': 'رواتب', 'path': '/payroll'},
                 {'name': 'إعدادات', 'path': '/admin/settings'}
             ]
+            pages_to_test = filter_routes(pages_to_test, self.routes, 'path')
 
             page_directions = {}
+            concurrency = fair_concurrency(self.route_concurrency, len(pages_to_test))
 
-            for page_info in pages_to_test:
-                try:
-                    await page.goto(f"{self.base_url}{page_info['path']}")
-                    await page.wait_for_load_state("networkidle")
-
-                    # التحقق من اتجاه HTML
-                    html_dir = await page.evaluate("() => document.documentElement.dir")
-                    body_dir = await page.evaluate("() => document.body.dir")
-
-                    # التحقق من اللغة
-                    html_lang = await page.evaluate("() => document.documentElement.lang")
-                    meta_charset = await page.evaluate("""
-                        () => {
-                            const meta = document.querySelector('meta[charset]');
-                            return meta ? meta.getAttribute('charset') : '';
-                        }
-                    """)
+            if concurrency > 1:
+                # كل صفحة في سياق معزول
+                browser = page.context.browser
 
-                    # التحقق من CSS direction
-                    css_direction = await page.evaluate("""
-                        () => {
-                            const style = window.getComputedStyle(document.body);
-                            return style.direction;
-                        }
-                    """)
-
-                    page_result = {
-                        'html_dir': html_dir,
-                        'body_dir': body_dir,
-                        'html_lang': html_lang,
-                        'meta_charset': meta_charset,
-                        'css_direction': css_direction,
-                        'rtl_compliant': html_dir == 'rtl' and body_dir in ['rtl', '']
-                    }
+                async def test_route(page_info):
+                    context = await browser.new_context()
+                    try:
+                        return await self._test_route_direction(await context.new_page(), page_info['path'])
+                    finally:
+                        await context.close()
 
-                    page_directions[page_info['name']] = page_result
+                outcomes = await run_routes(pages_to_test, test_route, concurrency)
+                direction_results['concurrency'] = concurrency
+            else:
+                outcomes = []
+                for page_info in pages_to_test:
+                    try:
+                        outcomes.append(await self._test_route_direction(page, page_info['path']))
+                    except Exception as e:
+                        outcomes.append(e)
+
+            for page_info, page_result in zip(pages_to_test, outcomes):
+                if isinstance(page_result, Exception):
+                    direction_results['inconsistencies'].append(
+                        f"خطأ في اختبار صفحة {page_info['name']}: {str(page_result)}"
+                    )
+                    continue
 
-                    # التحقق من التطابق
-                    if not page_result['rtl_compliant']:
-                        direction_results['inconsistencies'].append(
-                            f"صفحة {page_info['name']}: اتجاه غير صحيح"
-                        )
+                page_directions[page_info['name']] = page_result
 
-                except Exception as e:
+                # التحقق من التطابق
+                if not page_result['rtl_compliant']:
                     direction_results['inconsistencies'].append(
-                        f"خطأ في اختبار صفحة {page_info['name']}: {str(e)}"
+                        f"صفحة {page_info['name']}: اتجاه غير صحيح"
                     )
 
             direction_results['page_directions'] = page_directions
@@ -158,6 +161,41 @@ class RTLLocalizationTestSuite:
         self.results['page_direction'] = direction_results
         return direction_results
 
+    async def _test_route_direction(self, page: Page, path: str) -> Dict[str, Any]:
+        """فحص اتجاه ولغة صفحة واحدة"""
+        await page.goto(f"{self.base_url}{path}")
+        await page.wait_for_load_state("networkidle")
+
+        # التحقق من اتجاه HTML
+        html_dir = await page.evaluate("() => document.documentElement.dir")
+        body_dir = await page.evaluate("() => document.body.dir")
+
+        # التحقق من اللغة
+        html_lang = await page.evaluate("() => document.documentElement.lang")
+        meta_charset = await page.evaluate("""
+            () => {
+                const meta = document.querySelector('meta[charset]');
+                return meta ? meta.getAttribute('charset') : '';
+            }
+        """)
+
+        # التحقق من CSS direction
+        css_direction = await page.evaluate("""
+            () => {
+                const style = window.getComputedStyle(document.body);
+                return style.direction;
+            }
+        """)
+
+        return {
+            'html_dir': html_dir,
+            'body_dir': body_dir,
+            'html_lang': html_lang,
+            'meta_charset': meta_charset,
+            'css_direction': css_direction,
+            'rtl_compliant': html_dir == 'rtl' and body_dir in ['rtl', '']
+        }
+
     # ===========================
     # 2. اختبارات اتجاه النصوص
     # ===========================
@@ -951,50 +989,57 @@ class RTLLocalizationTestSuite:
         """حساب درجة RTL والتوطين"""
         score = 100
         penalties = 0
+        # تشغيل جزئي (checks): تُقيَّم الخطوات المنفذة فقط، فلا تُحتسب الخطوات المتخطاة فاشلة
 
         # تقييم اتجاه الصفحة
-        page_dir = self.results.get('page_direction', {})
-        if not page_dir.get('html_direction', False):
-            penalties += 25
+        if is_selected(self.checks, 'test_page_direction'):
+            page_dir = self.results.get('page_direction', {})
+            if not page_dir.get('html_direction', False):
+                penalties += 25
 
         # تقييم اتجاه النصوص
-        text_dir = self.results.get('text_direction', {})
-        text_alignment = text_dir.get('text_alignment', {})
-        for element_type, alignment_data in text_alignment.items():
-            if alignment_data.get('compliant', False) == False:
-                penalties += 5
+        if is_selected(self.checks, 'test_text_direction'):
+            text_dir = self.results.get('text_direction', {})
+            text_alignment = text_dir.get('text_alignment', {})
+            for element_type, alignment_data in text_alignment.items():
+                if alignment_data.get('compliant', False) == False:
+                    penalties += 5
 
         # تقييم الخطوط العربية
-        arabic_fonts = self.results.get('arabic_fonts', {})
-        rendering_quality = arabic_fonts.get('rendering_quality', {})
-        for font, quality in rendering_quality.items():
-            if not quality.get('arabic_support', False):
-                penalties += 8
+        if is_selected(self.checks, 'test_arabic_fonts'):
+            arabic_fonts = self.results.get('arabic_fonts', {})
+            rendering_quality = arabic_fonts.get('rendering_quality', {})
+            for font, quality in rendering_quality.items():
+                if not quality.get('arabic_support', False):
+                    penalties += 8
 
         # تقييم محاذاة التخطيط
-        layout = self.results.get('layout_alignment', {})
-        if not layout.get('navigation_position', False):
-            penalties += 10
-        if not layout.get('table_alignment', False):
-            penalties += 8
-        if not layout.get('form_alignment', False):
-            penalties += 8
+        if is_selected(self.checks, 'test_layout_alignment'):
+            layout = self.results.get('layout_alignment', {})
+            if not layout.get('navigation_position', False):
+                penalties += 10
+            if not layout.get('table_alignment', False):
+                penalties += 8
+            if not layout.get('form_alignment', False):
+                penalties += 8
 
         # تقييم توطين المحتوى
-        content = self.results.get('content_localization', {})
-        if content.get('arabic_content_percentage', 0) < 80:
-            penalties += 15
-        if not content.get('key_terms_localized', False):
-            penalties += 12
-        if not content.get('currency_format_localized', False):
-            penalties += 5
+        if is_selected(self.checks, 'test_content_localization'):
+            content = self.results.get('content_localization', {})
+            if content.get('arabic_content_percentage', 0) < 80:
+                penalties += 15
+            if not content.get('key_terms_localized', False):
+                penalties += 12
+            if not content.get('currency_format_localized', False):
+                penalties += 5
 
         # تقييم إمكانية الوصول
-        accessibility = self.results.get('accessibility', {})
-        if not accessibility.get('aria_attributes', False):
-            penalties += 5
-        if not accessibility.get('keyboard_navigation', False):
-            penalties += 5
+        if is_selected(self.checks, 'test_accessibility'):
+            accessibility = self.results.get('accessibility', {})
+            if not accessibility.get('aria_attributes', False):
+                penalties += 5
+            if not accessibility.get('keyboard_navigation', False):
+                penalties += 5
 
         self.rtl_score = max(0, score - penalties)
         return self.rtl_score
@@ -1007,38 +1052,39 @@ class RTLLocalizationTestSuite:
         """تنفيذ جميع اختبارات RTL والتوطين"""
         print("🚀 بدء اختبارات RTL والتوطين العربي...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            try:
-                # 1. اختبارات اتجاه الصفحة
+        async with browser_page(self.runtime) as page:
+            # 1. اختبارات اتجاه الصفحة
+            if is_selected(self.checks, 'test_page_direction'):
                 await self.test_page_direction(page)
 
-                # 2. اختبارات اتجاه النصوص
+            # 2. اختبارات اتجاه النصوص
+            if is_selected(self.checks, 'test_text_direction'):
                 await self.test_text_direction(page)
 
-                # 3. اختبارات الخطوط العربية
+            # 3. اختبارات الخطوط العربية
+            if is_selected(self.checks, 'test_arabic_fonts'):
                 await self.test_arabic_fonts(page)
 
-                # 4. اختبارات الأرقام العربية
+            # 4. اختبارات الأرقام العربية
+            if is_selected(self.checks, 'test_arabic_numbers'):
                 await self.test_arabic_numbers(page)
 
-                # 5. اختبارات محاذاة التخطيط
+            # 5. اختبارات محاذاة التخطيط
+            if is_selected(self.checks, 'test_layout_alignment'):
                 await self.test_layout_alignment(page)
 
-                # 6. اختبارات توطين المحتوى
+            # 6. اختبارات توطين المحتوى
+            if is_selected(self.checks, 'test_content_localization'):
                 await self.test_content_localization(page)
 
-                # 7. اختبارات إمكانية الوصول
+            # 7. اختبارات إمكانية الوصول
+            if is_selected(self.checks, 'test_accessibility'):
                 await self.test_accessibility(page)
 
-                # 8. اختبارات التكيف الثقافي
+            # 8. اختبارات التكيف الثقافي
+            if is_selected(self.checks, 'test_cultural_adaptation'):
                 await self.test_cultural_adaptation(page)
 
-            finally:
-                await browser.close()
-
         # حساب النتيجة النهائية
         final_score = self.calculate_rtl_score()
 
@@ -3,7 +3,9 @@
 مطور: Full-stack Testing Engineer
 """
 
+import argparse
 import asyncio
+import hashlib
 import json
 import logging
 import time
@@ -11,6 +13,7 @@ from datetime import datetime
 from pathlib import Path
 import sys
 import os
+from typing import Dict, List, Any, Optional, Tuple
 
 # استيراد مجموعات الاختبارات
 from comprehensive_test_suite import BarberTrackTestSuite
@@ -19,6 +22,12 @@ from performance_test_suite import PerformanceTestSuite
 from firebase_ai_test_suite import FirebaseAITestSuite
 from rtl_localization_test_suite import RTLLocalizationTestSuite
 from ux_ui_test_suite import UXUITestSuite
+from suite_scheduler import SuiteScheduler
+from browser_runtime import BrowserRuntime, TEST_ROLES, form_login
+from incremental_selection import SUITES, select_tests
+from result_cache import ResultCache
+from sharding import (EXCLUSIVE_SUITES, ShardPlan, parse_shard, load_durations, static_units, unit_id, run_unit,
+                      shard_path, load_shards, merge_units, rebuild_suite, update_durations, shard_loads)
 
 # إعداد التسجيل
 logging.basicConfig(
@@ -30,11 +39,44 @@ logging.basicConfig(
     ]
 )
 
+# المجموعات التي تتوزع خطواتها (ووحداتها الأدق في SHARDED_STEPS) على الأجزاء؛ البقية وحدة واحدة
+SHARDED_SUITES = {'security': SecurityTestSuite, 'ux_ui': UXUITestSuite}
+
 class BarberTrackTestOrchestrator:
     """منسق تنفيذ اختبارات BarberTrack الشاملة"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    def __init__(self, base_url: str = "http://localhost:9002", route_concurrency: int = 1,
+                 throttling_profiles: str = None, suite_concurrency: int = 1, shared_browser: bool = True,
+                 changed_since: Optional[str] = None, use_cache: bool = True,
+                 invalidate_cache: Optional[List[str]] = None, shard: Optional[Tuple[int, int]] = None):
         self.base_url = base_url
+        # سياقات المتصفح المتزامنة لقياس المسارات في اختبارات الأداء وRTL والواجهة
+        self.route_concurrency = route_concurrency
+        # ملفات محاكاة الشبكة والمعالج لاختبارات الأداء وتدفقات المستخدم
+        self.throttling_profiles = throttling_profiles
+        # عدد مجموعات الاختبارات المتزامنة (الأداء يعمل دائماً وحده)
+        self.suite_concurrency = suite_concurrency
+        # متصفح واحد لكل التشغيل يوزع سياقات جديدة على المجموعات بدلاً من تشغيل متصفح لكل اختبار
+        self.shared_browser = shared_browser
+        # تشغيل الخطوات التي تمس المسارات المعدلة منذ هذه المراجعة فقط (انظر incremental_selection.py)
+        self.changed_since = changed_since
+        self.test_selection = {}
+        # نتائج المجموعات بعنوان المحتوى (انظر result_cache.py)؛ invalidate_cache: [] أو أسماء = حذف قبل التشغيل
+        self.result_cache = ResultCache(base_url=base_url) if use_cache else None
+        self.invalidate_cache = invalidate_cache
+        self.cache_keys = {}
+        self.cached_results = {}
+        # التشغيل المجزأ (--shard i/N): هذا الجزء ينفذ وحداته فقط ويكتب نتائجها للدمج (انظر sharding.py)
+        self.shard_plan = None
+        if shard:
+            sharded_steps = {category: list(suite.SHARDED_STEPS) for category, suite in SHARDED_SUITES.items()}
+            self.shard_plan = ShardPlan(*shard, durations=load_durations(), units=static_units(sharded_steps),
+                                        shared=[unit_id(category, step) for category, steps in sharded_steps.items()
+                                                for step in steps])
+            # نتائج الجزء لا تُحفظ في الذاكرة ولا تُقرأ منها
+            self.result_cache = None
+        self.shard_loads = []
+        self.execution_schedule = {}
         self.execution_start_time = datetime.now()
         self.test_results = {}
         self.summary_report = ""
@@ -62,46 +104,329 @@ class BarberTrackTestOrchestrator:
         print("🚀 بدء تنفيذ اختبارات BarberTrack الشاملة...")
         print("=" * 60)
 
-        try:
-            # 1. اختبار شامل أولي
-            print("\n🔍 المرحلة 1: الاختبار الشامل الأولي")
-            comprehensive_tester = BarberTrackTestSuite()
-            comprehensive_results = await comprehensive_tester.run_comprehensive_tests()
-            self.test_results['comprehensive'] = comprehensive_results
-
-            # 2. اختبارات الأمان المتقدمة
-            print("\n🛡️ المرحلة 2: اختبارات الأمان المتقدمة (OWASP Top 10)")
-            security_tester = SecurityTestSuite()
-            security_results = await security_tester.run_security_tests()
-            self.test_results['security'] = security_results
-
-            # 3. اختبارات الأداء والتحميل
-            print("\n⚡ المرحلة 3: اختبارات الأداء والتحميل")
-            performance_tester = PerformanceTestSuite()
-            performance_results = await performance_tester.run_performance_tests()
-            self.test_results['performance'] = performance_results
-
-            # 4. اختبارات Firebase والذكاء الاصطناعي
-            print("\n🤖 المرحلة 4: اختبارات Firebase والذكاء الاصطناعي")
-            firebase_ai_tester = FirebaseAITestSuite()
-            firebase_ai_results = await firebase_ai_tester.run_firebase_ai_tests()
-            self.test_results['firebase_ai'] = firebase_ai_results
-
-            # 5. اختبارات RTL والتوطين العربي
-            print("\n🌐 المرحلة 5: اختبارات RTL والتوطين العربي")
-            rtl_tester = RTLLocalizationTestSuite()
-            rtl_results = await rtl_tester.run_rtl_localization_tests()
-            self.test_results['rtl_localization'] = rtl_results
-
-            # 6. اختبارات الواجهة والتجربة المستخدم
-            print("\n🎨 المرحلة 6: اختبارات الواجهة والتجربة المستخدم")
-            ux_ui_tester = UXUITestSuite()
-            ux_ui_results = await ux_ui_tester.run_ux_ui_tests()
-            self.test_results['ux_ui'] = ux_ui_results
+        if self.changed_since:
+            self.test_selection = select_tests(self.changed_since)
+            print(self.format_test_selection())
+            if not self.test_selection['suites']:
+                print("✅ لا توجد اختبارات تمس الملفات المعدلة")
+                return
+
+        if self.result_cache:
+            if self.invalidate_cache is not None:
+                removed = self.result_cache.invalidate(self.invalidate_cache or None)
+                print(f"🗑️ تم إبطال النتائج المحفوظة: {', '.join(removed) or 'لا شيء'}")
+            for category in SUITES:
+                if self._suite_selected(category):
+                    self._load_cached(category)
+
+        if self.shard_plan:
+            plan = self.shard_plan
+            expected = plan.expected_loads()
+            print(f"🧩 الجزء {plan.index}/{plan.total}: متوقع {expected[plan.index - 1]:.1f}s "
+                  f"من {sum(expected):.1f}s حسب الأزمنة التاريخية")
+            deferred = [category for category in EXCLUSIVE_SUITES if self._suite_selected(category)]
+            if deferred:
+                print(f"⏭️ {', '.join(deferred)}: تعمل وحدها عند الدمج (--merge-shards) بعد انتهاء كل الأجزاء")
+
+        scheduler = SuiteScheduler(self.suite_concurrency)
+        # يبدأ المتصفح المشترك عند أول طلب ويُغلق بعد انتهاء جميع المراحل
+        runtime = self._create_runtime()
+
+        # الأداء أولاً وحده على الجهاز حتى لا تشوه المجموعات الأخرى قياساته
+        if self._should_run('performance'):
+            scheduler.add('performance', lambda: self._run_phase(
+                'performance', "\n⚡ المرحلة 3: اختبارات الأداء والتحميل", runtime
+            ), exclusive=True)
+
+        # بقية المجموعات تنتظر الشبكة أغلب الوقت فتعمل بالتوازي ضمن الميزانية
+        if self._should_run('comprehensive'):
+            scheduler.add('comprehensive', lambda: self._run_phase(
+                'comprehensive', "\n🔍 المرحلة 1: الاختبار الشامل الأولي", runtime
+            ))
+        if self._should_run('security'):
+            scheduler.add('security', lambda: self._run_phase(
+                'security', "\n🛡️ المرحلة 2: اختبارات الأمان المتقدمة (OWASP Top 10)", runtime
+            ))
+        if self._should_run('firebase_ai'):
+            scheduler.add('firebase_ai', lambda: self._run_phase(
+                'firebase_ai', "\n🤖 المرحلة 4: اختبارات Firebase والذكاء الاصطناعي", runtime
+            ))
+        if self._should_run('rtl_localization'):
+            scheduler.add('rtl_localization', lambda: self._run_phase(
+                'rtl_localization', "\n🌐 المرحلة 5: اختبارات RTL والتوطين العربي", runtime
+            ))
+        if self._should_run('ux_ui'):
+            scheduler.add('ux_ui', lambda: self._run_phase(
+                'ux_ui', "\n🎨 المرحلة 6: اختبارات الواجهة والتجربة المستخدم", runtime
+            ))
 
+        try:
+            self.execution_schedule = await scheduler.run()
         except Exception as e:
             logging.error(f"Error in test execution: {str(e)}")
             print(f"❌ خطأ في تنفيذ الاختبارات: {str(e)}")
+        finally:
+            if runtime:
+                await runtime.stop()
+                if self.execution_schedule:
+                    self.execution_schedule['browser_runtime'] = runtime.stats()
+
+        # نفس ترتيب المراحل في النتائج بغض النظر عن ترتيب انتهائها
+        for category in SUITES:
+            if category in scheduler.results:
+                self.test_results[category] = scheduler.results[category]
+            elif category in self.cached_results:
+                self.test_results[category] = self.cached_results[category]['result']
+
+        # حفظ نتائج المراحل الناجحة لإعادة استخدامها ما دامت مدخلاتها لم تتغير
+        for category, result in scheduler.results.items():
+            phase = self.execution_schedule.get('phases', {}).get(category, {})
+            if self.result_cache and category in self.cache_keys and phase.get('status') == 'completed' \
+                    and isinstance(result, dict) and 'error' not in result:
+                try:
+                    self.result_cache.put(category, self.cache_keys[category], result)
+                except Exception as e:
+                    logging.error(f"Error caching result for {category}: {str(e)}")
+
+        for category, phase in self.execution_schedule.get('phases', {}).items():
+            if phase['status'] != 'completed':
+                print(f"❌ خطأ في تنفيذ {category}: {phase.get('error', '')}")
+
+    def _create_runtime(self) -> Optional[BrowserRuntime]:
+        """المتصفح المشترك مع أدوار الدخول: كل دور يسجل الدخول مرة واحدة عند أول طلب له في التشغيل"""
+        if not self.shared_browser:
+            return None
+        runtime = BrowserRuntime()
+        for role, (email, password) in TEST_ROLES.items():
+            runtime.register_role(role, form_login(self.base_url, email, password))
+        return runtime
+
+    def _suite_selected(self, category: str) -> bool:
+        return not self.test_selection or category in self.test_selection['suites']
+
+    def _should_run(self, category: str) -> bool:
+        """مختارة وليس لها نتيجة محفوظة بنفس المدخلات (ومن نصيب هذا الجزء إن كان التشغيل مجزأً؛
+        المجموعات الحصرية لا تعمل في أي جزء بل عند الدمج)"""
+        if not self._suite_selected(category) or category in self.cached_results:
+            return False
+        if self.shard_plan and category in EXCLUSIVE_SUITES:
+            return False
+        return not self.shard_plan or category in SHARDED_SUITES or self.shard_plan.claim(category)
+
+    def _suite_config(self, category: str) -> Dict[str, Any]:
+        """إعدادات المنسق التي تغير نتيجة المجموعة (جزء من مفتاح الذاكرة)"""
+        return {
+            'route_concurrency': self.route_concurrency,
+            'throttling_profiles': self.throttling_profiles,
+            **self._selection_args(category)
+        }
+
+    def _load_cached(self, category: str):
+        try:
+            self.cache_keys[category] = self.result_cache.key(category, self._suite_config(category))
+        except Exception as e:
+            logging.error(f"Error computing cache key for {category}: {str(e)}")
+            return
+        entry = self.result_cache.get(category, self.cache_keys[category]['key'])
+        if entry:
+            self.cached_results[category] = entry
+            print(f"♻️ {category}: نتيجة محفوظة من {entry['created_at']} (المفتاح {entry['key'][:12]})")
+
+    def _selection_args(self, category: str) -> Dict[str, Any]:
+        """checks/routes للمجموعة من خطة الاختيار التدريجي (لا شيء = تشغيل كامل)"""
+        if not self.test_selection:
+            return {}
+        plan = self.test_selection['suites'][category]
+        return {'checks': plan['checks'], 'routes': plan['routes']}
+
+    def format_test_selection(self) -> str:
+        """الملفات المعدلة والمسارات والخطوات المختارة لكل مجموعة"""
+        selection = self.test_selection
+        if not selection:
+            return ""
+
+        lines = [f"🔎 تغييرات منذ {selection['since']}: {len(selection['changed_files'])} ملف"]
+        if selection['app_wide']:
+            lines.append(f"🌍 ملفات مشتركة تمس جميع المسارات: {', '.join(selection['app_wide'])}")
+        if selection['routes']:
+            lines.append(f"🧭 المسارات المتأثرة: {', '.join(selection['routes'])}")
+        for category, plan in selection['suites'].items():
+            checks = 'كاملة' if plan['checks'] is None else f"{len(plan['checks'])} خطوة: {', '.join(plan['checks'])}"
+            lines.append(f"▶️ {category} ({checks}) — {plan['reason']}")
+        if selection['skipped_suites']:
+            lines.append(f"⏭️ مجموعات متخطاة: {', '.join(selection['skipped_suites'])}")
+        return "\n".join(lines) + "\n"
+
+    def _shard_config(self) -> Dict[str, Any]:
+        """ما يجب أن يتطابق بين الأجزاء ليصح دمجها (الخيارات وخطة التوزيع نفسها)"""
+        plan = json.dumps(self.shard_plan.assignment, sort_keys=True).encode('utf-8')
+        return {
+            'base_url': self.base_url,
+            'route_concurrency': self.route_concurrency,
+            'throttling_profiles': self.throttling_profiles,
+            'changed_since': self.changed_since,
+            'selection': self.test_selection.get('suites'),
+            'plan': hashlib.sha256(plan).hexdigest()
+        }
+
+    def save_shard_results(self) -> Path:
+        """ملف هذا الجزء: وحداته المنفذة وما يلزم الدمج"""
+        plan = self.shard_plan
+        path = shard_path(plan.index, plan.total)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        phases = self.execution_schedule.get('phases', {})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'shard': plan.to_dict(),
+                'config': self._shard_config(),
+                'test_selection': self.test_selection,
+                'failed': [category for category, phase in phases.items() if phase['status'] != 'completed'],
+                'started_at': self.execution_start_time.isoformat(),
+                'wall_time': (datetime.now() - self.execution_start_time).total_seconds(),
+                'execution_schedule': self.execution_schedule
+            }, f, ensure_ascii=False, indent=2, default=str)
+        print(f"✅ تم حفظ نتائج الجزء {plan.index}/{plan.total}: {path}")
+        return path
+
+    async def merge_shards(self, paths: Optional[List[str]] = None):
+        """دمج ملفات الأجزاء في test_results كما لو نُفذ التشغيل كاملاً في عملية واحدة،
+        بعد تشغيل المجموعات الحصرية وحدها على الجهاز (الأجزاء انتهت كلها قبل الدمج)"""
+        print("🧩 دمج نتائج الأجزاء...")
+        shards = load_shards(paths)
+        config = shards[0]['config']
+        self.base_url = config['base_url']
+        self.route_concurrency = config['route_concurrency']
+        self.throttling_profiles = config['throttling_profiles']
+        self.changed_since = config['changed_since']
+        self.test_selection = shards[0]['test_selection']
+        self.execution_start_time = min(datetime.fromisoformat(shard['started_at']) for shard in shards)
+        order, units = merge_units(shards)
+        failed = {category for shard in shards for category in shard['failed']}
+
+        exclusive_results = await self._run_exclusive_suites()
+
+        for category in SUITES:
+            if category in EXCLUSIVE_SUITES:
+                if category in exclusive_results:
+                    self.test_results[category] = exclusive_results[category]
+            elif category in failed:
+                print(f"❌ خطأ في تنفيذ {category} في أحد الأجزاء؛ لم تُدمج نتيجتها")
+                continue
+            if category in SHARDED_SUITES:
+                timestamps = [shard['shard']['timestamps'][category] for shard in shards
+                              if category in shard['shard']['timestamps']]
+                if timestamps:
+                    suite = self._create_suite(category)
+                    rebuild_suite(suite, category, order, units, timestamps)
+                    self.test_results[category] = suite.finalize()
+            elif 'result' in units.get(category, {}):
+                self.test_results[category] = units[category]['result']
+
+        self.shard_loads = shard_loads(shards)
+        update_durations(shards)
+
+    async def _run_exclusive_suites(self) -> Dict[str, Any]:
+        """تشغيل المجموعات الحصرية المختارة بالتتابع وحدها (لا تُوزع على الأجزاء)"""
+        scheduler = SuiteScheduler()
+        runtime = self._create_runtime()
+        for category in EXCLUSIVE_SUITES:
+            if self._suite_selected(category):
+                scheduler.add(category, lambda category=category: self._run_phase(
+                    category, f"\n⚡ {category}: تشغيل حصري بعد انتهاء الأجزاء", runtime
+                ), exclusive=True)
+        if not scheduler.jobs:
+            return {}
+
+        try:
+            self.execution_schedule = await scheduler.run()
+        except Exception as e:
+            logging.error(f"Error running exclusive suites: {str(e)}")
+            print(f"❌ خطأ في تنفيذ المجموعات الحصرية: {str(e)}")
+        finally:
+            if runtime:
+                await runtime.stop()
+                if self.execution_schedule:
+                    self.execution_schedule['browser_runtime'] = runtime.stats()
+
+        results = {}
+        for category, phase in self.execution_schedule.get('phases', {}).items():
+            if phase['status'] == 'completed':
+                results[category] = scheduler.results[category]
+            else:
+                print(f"❌ خطأ في تنفيذ {category}: {phase.get('error', '')}")
+        return results
+
+    def format_shards(self) -> str:
+        """زمن وحدات كل جزء مقابل المتوقع من الأزمنة التاريخية"""
+        if not self.shard_loads:
+            return ""
+
+        lines = [f"🧩 الجزء {load['index']}/{load['total']}: {load['units']} وحدة، {load['seconds']:.1f}s "
+                 f"(متوقع {load['expected_seconds']:.1f}s، الزمن الكلي {load['wall_time']:.1f}s)"
+                 for load in self.shard_loads]
+        wall_times = [load['wall_time'] for load in self.shard_loads]
+        lines.append(f"⚖️ أبطأ جزء {max(wall_times):.1f}s مقابل متوسط {sum(wall_times) / len(wall_times):.1f}s")
+        return "\n".join(lines) + "\n"
+
+    def _create_suite(self, category: str, runtime: Optional[BrowserRuntime] = None):
+        """مجموعة الاختبار بإعدادات المنسق (والدمج يبني بها المجموعات الموزعة من جديد)"""
+        args = {'runtime': runtime, **self._selection_args(category)}
+        if category in SHARDED_SUITES and self.shard_plan:
+            # خطوات هذا الجزء فقط، وكل خطوة تُسجل وحدة في ملف الجزء
+            args['checks'] = self.shard_plan.owned_steps(category, args.get('checks'))
+            args['shard'] = self.shard_plan
+
+        if category == 'comprehensive':
+            suite = BarberTrackTestSuite(**args)
+        elif category == 'security':
+            suite = SecurityTestSuite(**args)
+        elif category == 'performance':
+            suite = PerformanceTestSuite(route_concurrency=self.route_concurrency,
+                                         throttling_profiles=self.throttling_profiles, **args)
+        elif category == 'firebase_ai':
+            suite = FirebaseAITestSuite(**args)
+        elif category == 'rtl_localization':
+            suite = RTLLocalizationTestSuite(route_concurrency=self.route_concurrency, **args)
+        else:
+            suite = UXUITestSuite(route_concurrency=self.route_concurrency,
+                                  throttling_profiles=self.throttling_profiles, **args)
+
+        if category in SHARDED_SUITES and self.shard_plan:
+            self.shard_plan.instrument(suite, category)
+        return suite
+
+    async def _run_phase(self, category: str, title: str, runtime: Optional[BrowserRuntime]) -> Dict[str, Any]:
+        """طباعة عنوان المرحلة ثم تنفيذها"""
+        print(title)
+        run = getattr(self._create_suite(category, runtime), SUITES[category]['run'])
+        if self.shard_plan and category not in SHARDED_SUITES:
+            # المجموعة كاملة وحدة واحدة في هذا الجزء
+            return await run_unit(self.shard_plan, category, run)
+        return await run()
+
+    def format_execution_schedule(self) -> str:
+        """زمن كل مرحلة والمسار الحرج"""
+        schedule = self.execution_schedule
+        if not schedule:
+            return ""
+
+        lines = [f"⏱️ الزمن الكلي: {schedule['wall_time']:.1f}s (تسلسلياً {schedule['sequential_time']:.1f}s، "
+                 f"تسريع ×{schedule['speedup']:.2f}، حتى {schedule['max_concurrency']} مجموعات معاً)"]
+        for category, phase in schedule['phases'].items():
+            status_icon = {'completed': '✅', 'failed': '❌'}.get(phase['status'], '⏭️')
+            exclusive = ' [حصري]' if phase['exclusive'] else ''
+            lines.append(f"{status_icon} {category}{exclusive}: {phase['wall_time']:.1f}s "
+                         f"({phase['start']:.1f}s → {phase['end']:.1f}s، انتظار {phase['queued']:.1f}s)")
+        if schedule['critical_path']:
+            lines.append(f"🧭 المسار الحرج: {' → '.join(schedule['critical_path'])} ({schedule['critical_path_time']:.1f}s)")
+        for category, entry in self.cached_results.items():
+            lines.append(f"♻️ {category}: نتيجة محفوظة من {entry['created_at']} (لم تُشغل)")
+        runtime = schedule.get('browser_runtime')
+        if runtime:
+            lines.append(f"🌐 متصفح مشترك: {runtime['launches']} تشغيل بدلاً من {runtime['launch_requests']} "
+                         f"({runtime['contexts']} سياق)، وفّر {runtime['launches_saved']} تشغيل "
+                         f"≈ {runtime['seconds_saved']:.1f}s (زمن التشغيل {runtime['launch_seconds']:.2f}s)")
+        return "\n".join(lines) + "\n"
 
     def calculate_overall_scores(self):
         """حساب النتائج الإجمالية"""
@@ -126,12 +451,24 @@ class BarberTrackTestOrchestrator:
             'ux_ui': 0.10
         }
 
-        weighted_score = sum(scores[category] * weights[category] for category in scores)
+        if self.test_selection:
+            # تشغيل جزئي: المتوسط المرجح على المجموعات المنفذة فقط
+            scores = {category: score for category, score in scores.items() if category in self.test_results}
+            total_weight = sum(weights[category] for category in scores)
+            weighted_score = sum(scores[category] * weights[category] for category in scores) / total_weight \
+                if total_weight else 0
+        else:
+            weighted_score = sum(scores[category] * weights[category] for category in scores)
 
         return {
             'individual_scores': scores,
             'weighted_score': weighted_score,
-            'weights': weights
+            'weights': weights,
+            # المجموعات التي أعيد استخدام نتيجتها من الذاكرة بدلاً من تشغيلها
+            'cached': {
+                category: {'key': entry['key'], 'created_at': entry['created_at']}
+                for category, entry in self.cached_results.items() if category in self.test_results
+            }
         }
 
     def generate_executive_summary(self):
@@ -279,6 +616,9 @@ IMMEDIATE ACTIONS REQUIRED
 
         summary += f"""
 
+EXECUTION SCHEDULE
+─────────────────────────────────────────────────────────────────────────────
+{self.format_execution_schedule()}{self.format_test_selection()}{self.format_shards()}
 DEPLOYMENT READINESS
 ─────────────────────────────────────────────────────────────────────────────
 """
@@ -385,6 +725,19 @@ NEXT STEPS
             json.dump(scores_data, f, ensure_ascii=False, indent=2, default=str)
         print(f"✅ تم حفظ الدرجات النهائية: {scores_path}")
 
+        # حفظ الجدول الزمني للمراحل
+        schedule_path = 'test_results/execution_schedule.json'
+        with open(schedule_path, 'w', encoding='utf-8') as f:
+            json.dump(self.execution_schedule, f, ensure_ascii=False, indent=2)
+        print(f"✅ تم حفظ الجدول الزمني: {schedule_path}")
+
+        # حفظ خطة الاختيار التدريجي
+        if self.test_selection:
+            selection_path = 'test_results/test_selection.json'
+            with open(selection_path, 'w', encoding='utf-8') as f:
+                json.dump(self.test_selection, f, ensure_ascii=False, indent=2)
+            print(f"✅ تم حفظ خطة الاختيار: {selection_path}")
+
         # إنشاء ملف README للنتائج
         readme_path = 'test_results/README.md'
         with open(readme_path, 'w', encoding='utf-8') as f:
@@ -452,7 +805,19 @@ test_results/
         print(f"   - القضايا المكتشفة: {total_issues}")
         print(f"   - مدة التنفيذ: {(datetime.now() - self.execution_start_time).total_seconds():.1f} ثانية")
 
-async def main():
+        if self.execution_schedule:
+            print(f"\n⏱️ الجدول الزمني للمراحل:")
+            print(self.format_execution_schedule())
+
+        if self.test_selection:
+            print(f"\n🔎 الاختيار التدريجي:")
+            print(self.format_test_selection())
+
+        if self.shard_loads:
+            print(f"\n🧩 الأجزاء:")
+            print(self.format_shards())
+
+async def main(args: argparse.Namespace):
     """نقطة الدخول الرئيسية"""
     print("🚀 BarberTrack Comprehensive Test Suite")
     print("=====================================")
@@ -478,10 +843,33 @@ async def main():
 
     # تنفيذ الاختبارات
     try:
-        orchestrator = BarberTrackTestOrchestrator()
+        if args.merge_shards is not None:
+            # دمج أجزاء تشغيل مجزأ بدلاً من تشغيل الاختبارات
+            orchestrator = BarberTrackTestOrchestrator(shared_browser=not args.no_shared_browser, use_cache=False)
+            await orchestrator.merge_shards(args.merge_shards)
+            orchestrator.generate_executive_summary()
+            orchestrator.save_all_reports()
+            orchestrator.print_final_summary()
+            return
+
+        orchestrator = BarberTrackTestOrchestrator(route_concurrency=args.route_concurrency,
+                                                   throttling_profiles=args.throttling,
+                                                   suite_concurrency=args.suite_concurrency,
+                                                   shared_browser=not args.no_shared_browser,
+                                                   changed_since=args.changed_since,
+                                                   use_cache=not args.no_cache,
+                                                   invalidate_cache=args.invalidate_cache,
+                                                   shard=args.shard)
 
         # تشغيل جميع الاختبارات
         await orchestrator.run_comprehensive_test_suite()
+        if orchestrator.test_selection and not orchestrator.test_selection['suites']:
+            return
+
+        if orchestrator.shard_plan:
+            # التقارير تُكتب عند الدمج (--merge-shards) بعد انتهاء كل الأجزاء
+            orchestrator.save_shard_results()
+            return
 
         # إنشاء الملخص التنفيذي
         orchestrator.generate_executive_summary()
@@ -499,6 +887,35 @@ async def main():
         logging.error(f"Unexpected error: {str(e)}", exc_info=True)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="تشغيل جميع اختبارات BarberTrack")
+    parser.add_argument('--route-concurrency', type=int, default=1,
+                        help="عدد سياقات المتصفح المتزامنة لقياس المسارات (1 = تسلسلي)")
+    parser.add_argument('--throttling', default=None,
+                        help="ملفات محاكاة الشبكة والمعالج: fast-3g,4g,cpu-4x,cpu-6x,midrange-phone أو all")
+    parser.add_argument('--suite-concurrency', type=int, default=1,
+                        help="عدد مجموعات الاختبارات المتزامنة (الأداء يعمل وحده دائماً)")
+    parser.add_argument('--no-shared-browser', action='store_true',
+                        help="تشغيل متصفح خاص لكل اختبار بدلاً من متصفح واحد مشترك للتشغيل كاملاً")
+    parser.add_argument('--changed-since', default=None, metavar='REV',
+                        help="تشغيل الخطوات التي تمس المسارات والمكونات المعدلة منذ مراجعة git فقط")
+    parser.add_argument('--invalidate-cache', nargs='?', const='', default=None, metavar='SUITES',
+                        help="حذف النتائج المحفوظة قبل التشغيل: الكل، أو مجموعات مفصولة بفواصل مثل security,ux_ui")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="تشغيل جميع المجموعات دون قراءة أو حفظ النتائج المحفوظة")
+    parser.add_argument('--shard', default=None, metavar='I/N',
+                        help="تشغيل الجزء I من N فقط (توزيع حتمي حسب الأزمنة التاريخية) وكتابة نتائجه في test_results/shards")
+    parser.add_argument('--merge-shards', nargs='*', default=None, metavar='FILE',
+                        help="دمج ملفات الأجزاء (افتراضياً test_results/shards) في التقارير النهائية")
+    args = parser.parse_args()
+
+    if args.shard:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.invalidate_cache is not None:
+        args.invalidate_cache = [suite.strip() for suite in args.invalidate_cache.split(',') if suite.strip()]
+
     # التحقق من وجود المتطلبات
     try:
         import playwright
@@ -533,4 +950,4 @@ if __name__ == "__main__":
     print("\n" + "=" * 60)
 
     # تشغيل الاختبارات
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(args))
\ No newline at end of file
@@ -2,18 +2,24 @@
 Performance tests for سهل system
 """
 
+import argparse
 import asyncio
 from performance_test_suite import PerformanceTestSuite
+from load_profiles import load_profile
 
-async def run_performance_tests():
+async def run_performance_tests(workers: int = 1, profile: str = None, scenarios: str = None,
+                                request_mix: str = None, route_concurrency: int = 1, throttling: str = None):
     """Run performance tests"""
     print("Starting سهل Performance Tests")
     print("=" * 50)
 
-    performance_tester = PerformanceTestSuite()
+    performance_tester = PerformanceTestSuite(workers=workers, scenarios=scenarios, edge_cache_mix=request_mix,
+                                              route_concurrency=route_concurrency, throttling_profiles=throttling)
 
     try:
-        results = await performance_tester.run_performance_tests()
+        results = await performance_tester.run_performance_tests(
+            load_profile=load_profile(profile) if profile else None
+        )
 
         print(f"\nPerformance Score: {results['score']:.1f}/100")
         print(f"Performance Status: {'Excellent' if results['score'] >= 90 else 'Good' if results['score'] >= 70 else 'Needs Improvement'}")
@@ -28,4 +34,21 @@ async def run_performance_tests():
         return None
 
 if __name__ == "__main__":
-    asyncio.run(run_performance_tests())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run سهل performance tests")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of load-generator processes for the API and concurrent-user phases")
+    parser.add_argument('--profile', default=None,
+                        help="load profile to run after the concurrent-user test: ramp, step, spike, soak or a JSON file")
+    parser.add_argument('--scenarios', default=None,
+                        help="JSON/YAML user scenario file (default: user_scenarios.json)")
+    parser.add_argument('--request-mix', default=None,
+                        help="recorded request mix for the edge cache replay: JSON list of paths or {path: count}")
+    parser.add_argument('--route-concurrency', type=int, default=1,
+                        help="measure page routes in this many isolated browser contexts at once (calibrated first)")
+    parser.add_argument('--throttling', default=None,
+                        help="re-run page loads and API calls under these profiles: fast-3g,4g,cpu-4x,cpu-6x,midrange-phone or all")
+    args = parser.parse_args()
+
+    asyncio.run(run_performance_tests(workers=args.workers, profile=args.profile, scenarios=args.scenarios,
+                                      request_mix=args.request_mix, route_concurrency=args.route_concurrency,
+                                      throttling=args.throttling))
\ No newline at end of file
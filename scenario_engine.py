@@ -0,0 +1,214 @@
+"""
+محرك سيناريوهات المستخدمين التصريحي (JSON/YAML) لاختبارات الحمل في BarberTrack
+مطور: Performance Testing Specialist
+
+ملف السيناريوهات يعرّف:
+  defaults:  زمن التفكير الافتراضي والمهلة وهدف SLO لكل إجراء
+  data:      مجموعات بيانات للمعاملات ({amount}، {employee}...) تُختار عشوائياً لكل تنفيذ
+  setup:     إجراءات تُنفذ في بداية كل جلسة (مثل تسجيل الدخول)
+  actions:   خطوات كل إجراء (goto, wait_for, fill, click, select, press, wait, wait_for_load_state)
+  scenarios: سيناريوهات موزونة، كل عنصر فيها اسم إجراء أو {action, probability} أو {choose: {action: weight}}
+
+تُترجم السيناريوهات مرة واحدة إلى جدول إرسال (اسم الإجراء -> دالة مجمعة) فلا يوجد تحليل
+نصي أو سلسلة if/elif أثناء تشغيل الجلسات.
+"""
+
+import bisect
+import json
+import random
+import string
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Union
+
+DEFAULT_SCENARIO_FILE = Path(__file__).parent / 'user_scenarios.json'
+
+STEP_TYPES = ('goto', 'wait_for', 'fill', 'click', 'select', 'press', 'wait', 'wait_for_load_state')
+
+
+class _Template:
+    """قيمة نصية بمعاملات {name} تُجهز مرة واحدة"""
+
+    def __init__(self, value: Any):
+        self.value = str(value)
+        self.fields = [name for _, name, _, _ in string.Formatter().parse(self.value) if name]
+
+    def render(self, params: Dict[str, Any]) -> str:
+        return self.value.format(**params) if self.fields else self.value
+
+
+def compile_think_time(spec: Union[None, float, Dict[str, Any]]) -> Callable[[], float]:
+    """تحويل توزيع زمن التفكير إلى دالة تعيد ثوانٍ"""
+    if spec is None:
+        return lambda: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+
+    distribution = spec.get('distribution', 'constant')
+    if distribution == 'constant':
+        value = float(spec.get('value', 0))
+        return lambda: value
+    if distribution == 'uniform':
+        low, high = float(spec['min']), float(spec['max'])
+        return lambda: random.uniform(low, high)
+    if distribution == 'exponential':
+        mean = float(spec['mean'])
+        maximum = float(spec.get('max', mean * 10))
+        return lambda: min(random.expovariate(1 / mean), maximum)
+    if distribution == 'normal':
+        mean, std = float(spec['mean']), float(spec['std'])
+        return lambda: max(0.0, random.gauss(mean, std))
+    if distribution == 'lognormal':
+        mu, sigma = float(spec['mu']), float(spec['sigma'])
+        return lambda: random.lognormvariate(mu, sigma)
+
+    raise ValueError(f"Unknown think time distribution: {distribution}")
+
+
+class CompiledAction:
+    """إجراء مجمع: خطوات جاهزة للتنفيذ مع معاملاته وزمن تفكيره وهدف SLO"""
+
+    def __init__(self, name: str, spec: Dict[str, Any], defaults: Dict[str, Any], data: Dict[str, List[Any]]):
+        self.name = name
+        self.timeout = spec.get('timeout', defaults.get('timeout', 10000))
+        self.slo_ms = spec.get('slo_ms', defaults.get('slo_ms'))
+        self.think_time = compile_think_time(spec.get('think_time', defaults.get('think_time')))
+
+        self.params: Dict[str, List[Any]] = {}
+        for param, pool in spec.get('params', {}).items():
+            values = data.get(pool) if isinstance(pool, str) else pool
+            if not values:
+                raise ValueError(f"Action {name}: unknown or empty data pool for {param}")
+            self.params[param] = list(values)
+
+        self.steps = [self._compile_step(step) for step in spec.get('steps', [])]
+
+    def _compile_step(self, step: Dict[str, Any]) -> Callable[[Any, str, Dict[str, Any]], Awaitable[Any]]:
+        kind = next((k for k in STEP_TYPES if k in step), None)
+        if kind is None:
+            raise ValueError(f"Action {self.name}: unknown step {step}")
+        timeout = step.get('timeout', self.timeout)
+
+        if kind == 'goto':
+            path = _Template(step['goto'])
+            return lambda page, base_url, params: page.goto(f"{base_url}{path.render(params)}", timeout=timeout)
+        if kind == 'wait_for':
+            selector = _Template(step['wait_for'])
+            return lambda page, base_url, params: page.wait_for_selector(selector.render(params), timeout=timeout)
+        if kind == 'fill':
+            selector, value = _Template(step['fill']['selector']), _Template(step['fill']['value'])
+            return lambda page, base_url, params: page.fill(selector.render(params), value.render(params),
+                                                            timeout=timeout)
+        if kind == 'click':
+            selector = _Template(step['click'])
+            return lambda page, base_url, params: page.click(selector.render(params), timeout=timeout)
+        if kind == 'select':
+            selector, value = _Template(step['select']['selector']), _Template(step['select']['value'])
+            return lambda page, base_url, params: page.select_option(selector.render(params), value.render(params),
+                                                                     timeout=timeout)
+        if kind == 'press':
+            selector, key = _Template(step['press']['selector']), _Template(step['press']['key'])
+            return lambda page, base_url, params: page.press(selector.render(params), key.render(params),
+                                                             timeout=timeout)
+        if kind == 'wait':
+            milliseconds = float(step['wait'])
+            return lambda page, base_url, params: page.wait_for_timeout(milliseconds)
+
+        state = step['wait_for_load_state']
+        return lambda page, base_url, params: page.wait_for_load_state(state, timeout=timeout)
+
+    def resolve_params(self, user_id: int) -> Dict[str, Any]:
+        params = {name: random.choice(values) for name, values in self.params.items()}
+        params['user_id'] = user_id
+        return params
+
+    async def run(self, page, base_url: str, user_id: int):
+        params = self.resolve_params(user_id)
+        for step in self.steps:
+            await step(page, base_url, params)
+
+
+class CompiledScenario:
+    """سيناريو مجمع: قائمة عناصر ثابتة أو احتمالية أو اختيار موزون بين إجراءات"""
+
+    def __init__(self, name: str, weight: float, items: List[Callable[[], Optional[str]]]):
+        self.name = name
+        self.weight = weight
+        self.items = items
+
+    def plan(self) -> List[str]:
+        """تسلسل الإجراءات لجلسة واحدة"""
+        return [action for action in (item() for item in self.items) if action is not None]
+
+
+class ScenarioEngine:
+    """تحميل ملف السيناريوهات وتجميعه إلى جدول إرسال واختيار السيناريوهات بالأوزان"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        defaults = spec.get('defaults', {})
+        data = spec.get('data', {})
+
+        self.actions: Dict[str, CompiledAction] = {
+            name: CompiledAction(name, action_spec, defaults, data)
+            for name, action_spec in spec.get('actions', {}).items()
+        }
+        self.setup = [self._require_action(name) for name in spec.get('setup', [])]
+
+        self.scenarios = [
+            CompiledScenario(
+                scenario.get('name', f'scenario_{index + 1}'),
+                float(scenario.get('weight', 1)),
+                [self._compile_item(item) for item in scenario['actions']]
+            )
+            for index, scenario in enumerate(spec.get('scenarios', []))
+        ]
+        if not self.scenarios:
+            raise ValueError("Scenario file must define at least one scenario")
+
+        # أوزان تراكمية لاختيار السيناريو بالبحث الثنائي
+        self._cumulative_weights = []
+        total = 0.0
+        for scenario in self.scenarios:
+            total += scenario.weight
+            self._cumulative_weights.append(total)
+
+    @classmethod
+    def load(cls, source: Union[None, str, Path, Dict[str, Any]] = None) -> 'ScenarioEngine':
+        """تحميل السيناريوهات من قاموس أو ملف JSON/YAML (الافتراضي user_scenarios.json)"""
+        if isinstance(source, dict):
+            return cls(source)
+
+        path = Path(source) if source else DEFAULT_SCENARIO_FILE
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.suffix in ('.yaml', '.yml'):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("PyYAML غير مثبت. قم بتثبيته: pip install pyyaml")
+                return cls(yaml.safe_load(f))
+            return cls(json.load(f))
+
+    def _require_action(self, name: str) -> str:
+        if name not in self.actions:
+            raise ValueError(f"Unknown action in scenario file: {name}")
+        return name
+
+    def _compile_item(self, item: Union[str, Dict[str, Any]]) -> Callable[[], Optional[str]]:
+        if isinstance(item, str):
+            name = self._require_action(item)
+            return lambda: name
+
+        if 'choose' in item:
+            names = [self._require_action(name) for name in item['choose']]
+            weights = [float(weight) for weight in item['choose'].values()]
+            return lambda: random.choices(names, weights=weights)[0]
+
+        name = self._require_action(item['action'])
+        probability = float(item.get('probability', 1))
+        return lambda: name if random.random() < probability else None
+
+    def select(self) -> CompiledScenario:
+        """اختيار سيناريو عشوائي حسب الأوزان"""
+        point = random.random() * self._cumulative_weights[-1]
+        index = bisect.bisect_right(self._cumulative_weights, point)
+        return self.scenarios[min(index, len(self.scenarios) - 1)]
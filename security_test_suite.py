@@ -7,18 +7,36 @@ import asyncio
 import json
 import logging
 from typing import Dict, List, Any, Optional
-from playwright.async_api import async_playwright, Page, Browser
+from playwright.async_api import Page, Browser
 import requests
 import re
 from datetime import datetime
 import hashlib
 import base64
 
+from browser_runtime import BrowserRuntime, browser_page, role_page
+from incremental_selection import is_selected
+from sharding import ShardPlan, claim, run_unit, unit_id
+
 class SecurityTestSuite:
     """مجموعة اختبارات الأمان المتقدمة لـ سهل Cloudflare D1 وWorkers"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    # خطوات تتوزع وحداتها على الأجزاء (sharding.py): الخطوة → (مفتاح results، دالة التجميع)
+    SHARDED_STEPS = {
+        'test_injection_attacks': ('injection_tests', '_summarize_injection')
+    }
+
+    def __init__(self, base_url: str = "http://localhost:9002", runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None,
+                 shard: Optional[ShardPlan] = None):
         self.base_url = base_url
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
+        # الجزء المنفذ عند التشغيل المجزأ (--shard i/N): كل حقل × حمولة حقن وحدة؛ None = الكل
+        self.shard = shard
         self.results = {
             'injection_tests': [],
             'xss_tests': [],
@@ -59,14 +77,6 @@ class SecurityTestSuite:
         """اختبار هجمات الحقن (SQLi, NoSQLi, OS Command)"""
         print("🔍 اختبار هجمات الحقن...")
 
-        test_results = {
-            'sql_injection': [],
-            'nosql_injection': [],
-            'command_injection': [],
-            'xss_injection': [],
-            'ldap_injection': []
-        }
-
         # Payloads للاختبار
         injection_payloads = {
             'sql': [
@@ -114,37 +124,69 @@ class SecurityTestSuite:
         # اختبار كل نقطة إدخال محتملة
         input_fields = await self._find_input_fields(page)
 
-        for field_info in input_fields:
+        findings = {}
+        for field_index, field_info in enumerate(input_fields):
             field_name = field_info['name']
             field_type = field_info['type']
             field_placeholder = field_info.get('placeholder', '')
 
             for injection_type, payloads in injection_payloads.items():
-                for payload in payloads:
-                    try:
-                        result = await self._test_single_injection(
-                            page, field_name, payload, injection_type
-                        )
-                        if result['vulnerable']:
-                            test_results[injection_type].append({
-                                'field': field_name,
-                                'payload': payload,
-                                'evidence': result['evidence'],
-                                'severity': self._calculate_severity(result['evidence'])
-                            })
-                            self.vulnerabilities.append({
-                                'type': f'{injection_type}_injection',
-                                'field': field_name,
-                                'payload': payload,
-                                'severity': self._calculate_severity(result['evidence']),
-                                'description': f"ثغرة حقن {injection_type} في حقل {field_name}"
-                            })
-                    except Exception as e:
-                        logging.error(f"Error testing {injection_type} on {field_name}: {str(e)}")
-
+                for payload_index, payload in enumerate(payloads):
+                    unit = unit_id('security', 'test_injection_attacks', f"{field_index}:{field_name}",
+                                   f"{injection_type}#{payload_index}")
+                    if claim(self.shard, unit):
+                        findings[unit] = await run_unit(self.shard, unit, lambda: self._test_injection_payload(
+                            page, field_name, payload, injection_type), self)
+
+        test_results = self._summarize_injection(findings)
         self.results['injection_tests'] = test_results
         return test_results
 
+    async def _test_injection_payload(self, page: Page, field_name: str, payload: str,
+                                      injection_type: str) -> Optional[Dict[str, Any]]:
+        """حمولة واحدة في حقل واحد: الثغرة إن وُجدت (وتُضاف إلى vulnerabilities)، وإلا None"""
+        try:
+            result = await self._test_single_injection(
+                page, field_name, payload, injection_type
+            )
+            if result['vulnerable']:
+                self.vulnerabilities.append({
+                    'type': f'{injection_type}_injection',
+                    'field': field_name,
+                    'payload': payload,
+                    'severity': self._calculate_severity(result['evidence']),
+                    'description': f"ثغرة حقن {injection_type} في حقل {field_name}"
+                })
+                return {
+                    'type': injection_type,
+                    'field': field_name,
+                    'payload': payload,
+                    'evidence': result['evidence'],
+                    'severity': self._calculate_severity(result['evidence'])
+                }
+        except Exception as e:
+            logging.error(f"Error testing {injection_type} on {field_name}: {str(e)}")
+        return None
+
+    def _summarize_injection(self, findings: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """الثغرات المكتشفة حسب نوع الحقن بترتيب (حقل، حمولة)"""
+        test_results = {
+            'sql_injection': [],
+            'nosql_injection': [],
+            'command_injection': [],
+            'xss_injection': [],
+            'ldap_injection': []
+        }
+        for finding in findings.values():
+            if finding:
+                test_results[f"{finding['type']}_injection"].append({
+                    'field': finding['field'],
+                    'payload': finding['payload'],
+                    'evidence': finding['evidence'],
+                    'severity': finding['severity']
+                })
+        return test_results
+
     async def _find_input_fields(self, page: Page) -> List[Dict[str, Any]]:
         """العثور على جميع حقول الإدخال في الصفحة"""
         fields = []
@@ -969,20 +1011,13 @@ class SecurityTestSuite:
     async def _attempt_branch_access(self, page: Page, role: str, from_branch: str, to_branch: str) -> Dict[str, Any]:
         """محاولة الوصول إلى بيانات فرع آخر"""
         try:
-            # تسجيل الدخول بحساب من الفرع الأول
-            await page.goto(f"{self.base_url}/login")
-            await page.fill('input[type="email"]', f"{role}@{from_branch}.com")
-            await page.fill('input[type="password"]', "testpassword")
-            await page.click('button[type="submit"]')
-
-            await page.wait_for_timeout(2000)
+            # تسجيل الدخول بحساب من الفرع الأول، ثم محاولة الوصول إلى بيانات الفرع الآخر
+            async with role_page(self.runtime, f"{role}@{from_branch}", page, self.base_url) as logged_in:
+                await logged_in.goto(f"{self.base_url}/api/branches/{to_branch}/revenue")
 
-            # محاولة الوصول إلى بيانات الفرع الآخر
-            await page.goto(f"{self.base_url}/api/branches/{to_branch}/revenue")
+                await logged_in.wait_for_timeout(2000)
 
-            await page.wait_for_timeout(2000)
-
-            page_content = await page.content()
+                page_content = await logged_in.content()
 
             # التحقق من الوصول إلى البيانات
             if 'revenue' in page_content.lower() or 'إيرادات' in page_content:
@@ -1049,20 +1084,13 @@ class SecurityTestSuite:
     async def _attempt_privilege_escalation(self, page: Page, from_role: str, to_role: str) -> Dict[str, Any]:
         """محاولة تصعيد الصلاحيات"""
         try:
-            # تسجيل الدخول بدور الأقل
-            await page.goto(f"{self.base_url}/login")
-            await page.fill('input[type="email"]', f"{from_role}@example.com")
-            await page.fill('input[type="password"]', "testpassword")
-            await page.click('button[type="submit"]')
+            # تسجيل الدخول بدور الأقل، ثم محاولة الوصول إلى صفحة مخصصة للدور الأعلى
+            async with role_page(self.runtime, from_role, page, self.base_url) as logged_in:
+                await logged_in.goto(f"{self.base_url}/admin/users")
 
-            await page.wait_for_timeout(2000)
+                await logged_in.wait_for_timeout(2000)
 
-            # محاولة الوصول إلى صفحة مخصصة للدور الأعلى
-            await page.goto(f"{self.base_url}/admin/users")
-
-            await page.wait_for_timeout(2000)
-
-            page_content = await page.content()
+                page_content = await logged_in.content()
 
             # التحقق من الوصول إلى صفحة الإدارة
             if 'users' in page_content.lower() or 'المستخدمين' in page_content:
@@ -1101,20 +1129,13 @@ class SecurityTestSuite:
 
         for endpoint in leakage_tests:
             try:
-                # تسجيل الدخول كمستخدم عادي
-                await page.goto(f"{self.base_url}/login")
-                await page.fill('input[type="email"]', "employee@example.com")
-                await page.fill('input[type="password"]', "testpassword")
-                await page.click('button[type="submit"]')
-
-                await page.wait_for_timeout(2000)
+                # تسجيل الدخول كمستخدم عادي، ثم محاولة الوصول إلى نقطة التسريب
+                async with role_page(self.runtime, 'employee', page, self.base_url) as logged_in:
+                    await logged_in.goto(f"{self.base_url}{endpoint}")
 
-                # محاولة الوصول إلى نقطة التسريب
-                await page.goto(f"{self.base_url}{endpoint}")
+                    await logged_in.wait_for_timeout(2000)
 
-                await page.wait_for_timeout(2000)
-
-                page_content = await page.content()
+                    page_content = await logged_in.content()
 
                 # التحقق من كشف البيانات
                 if 'data' in page_content.lower() and len(page_content) > 1000:
@@ -1611,47 +1632,55 @@ class SecurityTestSuite:
         """تنفيذ جميع اختبارات الأمان لـ Cloudflare"""
         print("🚀 بدء اختبارات الأمان المتقدمة لـ Cloudflare...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            try:
-                # 1. اختبارات الحقن
+        async with browser_page(self.runtime) as page:
+            # 1. اختبارات الحقن
+            if is_selected(self.checks, 'test_injection_attacks'):
                 await self.test_injection_attacks(page)
 
-                # 2. اختبارات المصادقة
+            # 2. اختبارات المصادقة
+            if is_selected(self.checks, 'test_authentication_security'):
                 await self.test_authentication_security(page)
 
-                # 3. اختبارات الرؤوس الأمنية
+            # 3. اختبارات الرؤوس الأمنية
+            if is_selected(self.checks, 'test_security_headers'):
                 await self.test_security_headers()
 
-                # 4. اختبارات CSRF
+            # 4. اختبارات CSRF
+            if is_selected(self.checks, 'test_csrf_protection'):
                 await self.test_csrf_protection(page)
 
-                # 5. اختبارات تحديد المعدل
+            # 5. اختبارات تحديد المعدل
+            if is_selected(self.checks, 'test_rate_limiting'):
                 await self.test_rate_limiting()
 
-                # 6. اختبارات البيانات الحساسة
+            # 6. اختبارات البيانات الحساسة
+            if is_selected(self.checks, 'test_sensitive_data_exposure'):
                 await self.test_sensitive_data_exposure(page)
 
-                # 7. اختبارات API أمنية
+            # 7. اختبارات API أمنية
+            if is_selected(self.checks, 'test_api_security'):
                 await self.test_api_security()
 
-                # 8. اختبارات Cloudflare Workers
+            # 8. اختبارات Cloudflare Workers
+            if is_selected(self.checks, 'test_cloudflare_workers_security'):
                 await self.test_cloudflare_workers_security()
 
-                # 9. اختبارات عزل الفروع
+            # 9. اختبارات عزل الفروع
+            if is_selected(self.checks, 'test_branch_isolation_security'):
                 await self.test_branch_isolation_security(page)
 
-                # 10. اختبارات المزامنة الحقيقية
+            # 10. اختبارات المزامنة الحقيقية
+            if is_selected(self.checks, 'test_realtime_sync_security'):
                 await self.test_realtime_sync_security()
 
-                # 11. اختبارات D1 Database
+            # 11. اختبارات D1 Database
+            if is_selected(self.checks, 'test_d1_database_security'):
                 await self.test_d1_database_security()
 
-            finally:
-                await browser.close()
+        return self.finalize()
 
+    def finalize(self) -> Dict[str, Any]:
+        """النتيجة والتقرير من self.results وself.vulnerabilities (يستدعيها الدمج أيضاً بعد التشغيل المجزأ)"""
         # حساب النتيجة النهائية
         final_score = self.calculate_security_score()
 
@@ -1750,8 +1779,9 @@ SECURITY BEST PRACTICES
 5. تدريب الموظفين على الأمان السيبراني
 6. تنفيذ سياسات كلمات مرور قوية
 7. استخدام التشفير للبيانات الحساسة
+"""
 
-      report += f"""
+        report += f"""
 CLOUDFLARE SECURITY RECOMMENDATIONS
 ─────────────────────────────────────────────────────────────────────────────
 
@@ -0,0 +1,338 @@
+"""
+تقسيم اختبارات BarberTrack على عدة عمليات أو أجهزة ثم دمج نتائجها
+مطور: Full-stack Testing Engineer
+
+    python run_all_tests.py --shard 1/3 & python run_all_tests.py --shard 2/3 & python run_all_tests.py --shard 3/3 & wait
+    python run_all_tests.py --merge-shards
+
+كل جزء يكتب test_results/shards/shard-<i>-of-<N>.json، والدمج يعيد بناء المجموعات من وحداتها
+ويكتب complete_test_results.json وfinal_scores.json كما يكتبها التشغيل الكامل.
+
+المجموعات الحصرية (EXCLUSIVE_SUITES: الأداء) لا تدخل خطة التوزيع: قياساتها تحتاج الجهاز وحده
+ولا ضمان لذلك والأجزاء تعمل بالتوازي، فيشغلها الدمج وحدها بعد انتهاء كل الأجزاء.
+
+الوحدات:
+- مجموعة كاملة: الشامل وFirebase وRTL؛
+- خطوة run_* في الأمان والواجهة؛ والخطوات المقسمة (SHARDED_STEPS) تعمل في كل الأجزاء
+  وتوزع وحداتها الأدق: شاشة × مسار، حقل × حمولة حقن، تدفق مستخدم.
+
+التوزيع: الأطول أولاً على الجزء الأقل حملاً حسب الأزمنة التاريخية (shard_durations.json يحدثها
+الدمج)، والوحدة التي لا تاريخ لها ولا تعرف قبل التشغيل (حقل اكتُشف في الصفحة) تُوزع ببصمة crc32
+لاسمها. جميع الأجزاء تحسب نفس الخطة من نفس الملف فلا تنسيق بينها.
+"""
+
+import json
+import logging
+import statistics
+import time
+import zlib
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
+
+from incremental_selection import SUITES, suite_checks
+
+SHARDS_DIR = 'test_results/shards'
+# مجموعات تعمل وحدها على الجهاز: لا تُوزع على الأجزاء ويشغلها الدمج بعد انتهائها
+EXCLUSIVE_SUITES = ['performance']
+DURATIONS_FILE = 'test_results/shard_durations.json'
+# تقدير (ثانية) للوحدة المعروفة مسبقاً بلا تاريخ: مجموعة كاملة أو خطوة (قبل أول دمج)
+DEFAULT_SECONDS = {1: 120.0, 2: 15.0}
+# وزن القياس الجديد عند تحديث الأزمنة التاريخية
+DURATION_SMOOTHING = 0.5
+SEPARATOR = '::'
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """'i/N' → (i, N) مع 1 <= i <= N"""
+    try:
+        index, total = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard {value!r}: expected i/N, e.g. 2/4")
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Invalid shard {value!r}: index must be between 1 and {max(total, 1)}")
+    return index, total
+
+
+def unit_id(*parts: Any) -> str:
+    return SEPARATOR.join(str(part) for part in parts)
+
+
+def unit_parts(unit: str) -> List[str]:
+    return unit.split(SEPARATOR)
+
+
+def shard_path(index: int, total: int, directory: str = SHARDS_DIR) -> Path:
+    return Path(directory, f"shard-{index}-of-{total}.json")
+
+
+def load_durations(path: str = DURATIONS_FILE) -> Dict[str, float]:
+    if not Path(path).exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.error(f"Error reading shard durations {path}: {str(e)}")
+        return {}
+
+
+def static_units(sharded_steps: Dict[str, List[str]], root: str = '.') -> List[str]:
+    """الوحدات المعروفة قبل التشغيل: المجموعات الكاملة، وخطوات المجموعات الموزعة غير المقسمة"""
+    units = []
+    for suite in SUITES:
+        if suite in EXCLUSIVE_SUITES:
+            continue
+        if suite in sharded_steps:
+            units.extend(unit_id(suite, step) for step in suite_checks(suite, root)
+                         if step not in sharded_steps[suite])
+        else:
+            units.append(suite)
+    return units
+
+
+def _estimate(unit: str, history: Dict[str, float]) -> float:
+    """وحدة بلا تاريخ (جديدة أو لم تُنفذ بعد): وسيط الوحدات المقاسة من نفس المستوى"""
+    depth = len(unit_parts(unit))
+    measured = [seconds for known, seconds in history.items() if len(unit_parts(known)) == depth]
+    return statistics.median(measured) if measured else DEFAULT_SECONDS.get(depth, 1.0)
+
+
+def assign_units(units: List[str], durations: Dict[str, float], total: int) -> Dict[str, int]:
+    """الأطول أولاً إلى الجزء الأقل حملاً (حتمي: التعادل بالاسم ثم برقم الجزء)"""
+    loads = [0.0] * total
+    assignment = {}
+    for unit in sorted(units, key=lambda unit: (-durations[unit], unit)):
+        shard = loads.index(min(loads))
+        assignment[unit] = shard
+        loads[shard] += durations[unit]
+    return assignment
+
+
+class ShardPlan:
+    """خطة الجزء index من total، وسجل الوحدات التي نفذها"""
+
+    def __init__(self, index: int, total: int, durations: Optional[Dict[str, float]] = None,
+                 units: Optional[List[str]] = None, shared: Optional[List[str]] = None):
+        self.index = index
+        self.total = total
+        # خطوات مقسمة تعمل في كل الأجزاء (كل جزء ينفذ وحداتها الأدق المخصصة له)
+        self.shared = set(shared or [])
+        # أزمنة قديمة لمجموعة حصرية (من قبل استبعادها) لا تدخل التوزيع
+        history = {unit: seconds for unit, seconds in (durations or {}).items()
+                   if unit not in self.shared and unit_parts(unit)[0] not in EXCLUSIVE_SUITES}
+        self.estimates = {unit: _estimate(unit, history) for unit in units or []}
+        self.estimates.update(history)
+        self.assignment = assign_units(list(self.estimates), self.estimates, total)
+        self.seen: Dict[str, None] = {}
+        self.units: Dict[str, Dict[str, Any]] = {}
+        self.timestamps: Dict[str, str] = {}
+
+    def owner(self, unit: str) -> int:
+        """رقم الجزء (من 0) المسؤول عن الوحدة"""
+        if unit in self.assignment:
+            return self.assignment[unit]
+        return zlib.crc32(unit.encode('utf-8')) % self.total
+
+    def claim(self, unit: str) -> bool:
+        """هل الوحدة لهذا الجزء (ويُسجل ترتيب ظهورها لإعادة الترتيب عند الدمج)"""
+        self.seen.setdefault(unit)
+        return unit in self.shared or self.owner(unit) == self.index - 1
+
+    def expected_loads(self) -> List[float]:
+        loads = [0.0] * self.total
+        for unit, shard in self.assignment.items():
+            loads[shard] += self.estimates[unit]
+        return loads
+
+    def owned_steps(self, suite: str, checks: Optional[List[str]] = None) -> List[str]:
+        """خطوات run_* للمجموعة التي ينفذها هذا الجزء (ضمن الاختيار التدريجي إن وُجد)"""
+        steps = list(suite_checks(suite)) if checks is None else checks
+        return [step for step in steps if self.claim(unit_id(suite, step))]
+
+    async def record(self, unit: str, call: Callable[[], Awaitable[Any]], suite: Any = None,
+                     step: bool = False) -> Any:
+        """تنفيذ الوحدة وتسجيل زمنها وما أضافته إلى vulnerabilities الخاصة بالمجموعة، ثم نتيجتها
+        (أو ما غيرته في results إن كانت خطوة run_* كاملة)"""
+        entry = self.units[unit] = {}
+        results_before = _snapshot(suite.results) if step else None
+        vulnerabilities_before = len(getattr(suite, 'vulnerabilities', []))
+        start = time.perf_counter()
+        try:
+            result = await call()
+            if not step:
+                entry['result'] = result
+            return result
+        except Exception as e:
+            entry['error'] = str(e)
+            raise
+        finally:
+            entry['seconds'] = time.perf_counter() - start
+            if step:
+                entry['results'] = {key: value for key, value in suite.results.items()
+                                    if _encode(value) != results_before.get(key)}
+            if vulnerabilities_before < len(getattr(suite, 'vulnerabilities', [])):
+                entry['vulnerabilities'] = suite.vulnerabilities[vulnerabilities_before:]
+
+    def instrument(self, suite: Any, name: str):
+        """تسجيل كل خطوة run_* للمجموعة كوحدة (الخطوات غير المخصصة لهذا الجزء لا تُستدعى أصلاً)"""
+        self.timestamps.setdefault(name, suite.test_timestamp.isoformat())
+        for step in suite_checks(name):
+            method = getattr(suite, step, None)
+            if method is None:
+                continue
+
+            def timed(method, unit):
+                @wraps(method)
+                async def step_unit(*args, **kwargs):
+                    return await self.record(unit, lambda: method(*args, **kwargs), suite, step=True)
+                return step_unit
+
+            setattr(suite, step, timed(method, unit_id(name, step)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'index': self.index,
+            'total': self.total,
+            'expected_seconds': self.expected_loads(),
+            'shared': sorted(self.shared),
+            'seen': list(self.seen),
+            'units': self.units,
+            'timestamps': self.timestamps
+        }
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _snapshot(results: Dict[str, Any]) -> Dict[str, str]:
+    return {key: _encode(value) for key, value in results.items()}
+
+
+def claim(shard: Optional[ShardPlan], unit: str) -> bool:
+    """بدون تقسيم تُنفذ كل الوحدات"""
+    return shard is None or shard.claim(unit)
+
+
+async def run_unit(shard: Optional[ShardPlan], unit: str, call: Callable[[], Awaitable[Any]], suite: Any = None) -> Any:
+    """تنفيذ وحدة مخصصة لهذا الجزء (بعد claim) وتسجيلها؛ بدون تقسيم تُنفذ كما هي"""
+    if shard is None:
+        return await call()
+    return await shard.record(unit, call, suite)
+
+
+def outcome(entry: Dict[str, Any]) -> Any:
+    """نتيجة الوحدة كما أعادتها في الجزء (الاستثناء يعود استثناءً)"""
+    if 'error' in entry:
+        return Exception(entry['error'])
+    return entry.get('result')
+
+
+def rebuild_suite(suite: Any, name: str, order: List[str], units: Dict[str, Dict[str, Any]],
+                  timestamps: List[str]):
+    """إعادة results وvulnerabilities لمجموعة موزعة من وحداتها في كل الأجزاء، بترتيب التشغيل"""
+    suite.test_timestamp = datetime.fromisoformat(min(timestamps))
+    for step in order:
+        parts = unit_parts(step)
+        if parts[0] != name or len(parts) != 2 or step not in units:
+            continue
+        entry = units[step]
+        if parts[1] in suite.SHARDED_STEPS:
+            key, summarize = suite.SHARDED_STEPS[parts[1]]
+            outcomes = {}
+            for unit in order:
+                if unit.startswith(step + SEPARATOR) and unit in units:
+                    outcomes[unit] = outcome(units[unit])
+                    if units[unit].get('vulnerabilities'):
+                        suite.vulnerabilities.extend(units[unit]['vulnerabilities'])
+            summary = getattr(suite, summarize)(outcomes)
+            # ما تضيفه الخطوة خارج التجميع (مثل concurrency) كما سجله أول جزء
+            for field, value in entry.get('results', {}).get(key, {}).items():
+                summary.setdefault(field, value)
+            suite.results[key] = summary
+        else:
+            suite.results.update(entry.get('results', {}))
+            if entry.get('vulnerabilities'):
+                suite.vulnerabilities.extend(entry['vulnerabilities'])
+
+
+def load_shards(paths: Optional[List[str]] = None, directory: str = SHARDS_DIR) -> List[Dict[str, Any]]:
+    """قراءة ملفات الأجزاء والتأكد من أنها أجزاء تشغيل واحد كاملة"""
+    if not paths:
+        paths = sorted(str(path) for path in Path(directory).glob('shard-*-of-*.json'))
+    if not paths:
+        raise ValueError(f"No shard results found in {directory}")
+
+    shards = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            shards.append(json.load(f))
+
+    totals = {shard['shard']['total'] for shard in shards}
+    if len(totals) != 1:
+        raise ValueError(f"Shards from different runs (totals {sorted(totals)}); pass the shard files explicitly")
+    total = totals.pop()
+    indexes = sorted(shard['shard']['index'] for shard in shards)
+    if indexes != list(range(1, total + 1)):
+        missing = sorted(set(range(1, total + 1)) - set(indexes))
+        raise ValueError(f"Incomplete shard set: got {indexes} of {total}"
+                         + (f", missing {missing}" if missing else ", duplicates present"))
+    configs = {_encode(shard['config']) for shard in shards}
+    if len(configs) != 1:
+        raise ValueError("Shards were run with different options")
+    return sorted(shards, key=lambda shard: shard['shard']['index'])
+
+
+def merge_units(shards: List[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """ترتيب الوحدات كما ظهرت في التشغيل، وسجل كل وحدة من الجزء الذي نفذها"""
+    order = list(dict.fromkeys(unit for shard in shards for unit in shard['shard']['seen']))
+    shared = set().union(*[shard['shard']['shared'] for shard in shards])
+    units = {}
+    for shard in shards:
+        for unit, entry in shard['shard']['units'].items():
+            if unit in shared:
+                # الخطوة المقسمة نفسها: تُجمع من وحداتها، ويُحتفظ بأول سجل لما لا يُجمع (مثل concurrency)
+                units.setdefault(unit, entry)
+            elif unit in units:
+                raise ValueError(f"Unit {unit} was run by more than one shard")
+            else:
+                units[unit] = entry
+    return order, units
+
+
+def update_durations(shards: List[Dict[str, Any]], path: str = DURATIONS_FILE) -> Dict[str, float]:
+    """دمج أزمنة وحدات هذا التشغيل في الأزمنة التاريخية (متوسط متحرك)"""
+    durations = load_durations(path)
+    for shard in shards:
+        shared = set(shard['shard']['shared'])
+        for unit, entry in shard['shard']['units'].items():
+            if unit in shared:
+                continue
+            previous = durations.get(unit)
+            seconds = entry['seconds']
+            durations[unit] = round(seconds if previous is None
+                                    else DURATION_SMOOTHING * seconds + (1 - DURATION_SMOOTHING) * previous, 3)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(durations, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return durations
+
+
+def shard_loads(shards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """الزمن المتوقع مقابل الفعلي (مجموع الوحدات) لكل جزء"""
+    loads = []
+    for shard in shards:
+        plan = shard['shard']
+        shared = set(plan['shared'])
+        owned = [entry for unit, entry in plan['units'].items() if unit not in shared]
+        loads.append({
+            'index': plan['index'],
+            'total': plan['total'],
+            'units': len(owned),
+            'expected_seconds': plan['expected_seconds'][plan['index'] - 1],
+            'seconds': sum(entry['seconds'] for entry in owned),
+            'wall_time': shard.get('wall_time', 0)
+        })
+    return loads
@@ -0,0 +1,157 @@
+"""
+جدولة مجموعات الاختبارات بالتوازي ضمن ميزانية تزامن عامة لاختبارات BarberTrack
+مطور: Full-stack Testing Engineer
+
+- كل مجموعة تستهلك cost من الميزانية (max_concurrency) أثناء تشغيلها.
+- المجموعة الحصرية (exclusive) لا تبدأ إلا والجهاز فارغ، ولا يبدأ معها شيء حتى تنتهي؛
+  وما دامت تنتظر دورها لا تبدأ مجموعات مشتركة بعدها في الترتيب حتى لا تُؤجل بلا نهاية.
+- depends_on: لا تبدأ المجموعة قبل انتهاء ما تعتمد عليه، وتُتخطى إن فشل أحدها.
+- ترتيب الإضافة هو الأولوية؛ مع max_concurrency=1 يكون التنفيذ تسلسلياً بنفس الترتيب.
+
+بعد التشغيل يعيد run() زمن كل مرحلة (بدء، انتهاء، انتظار) والمسار الحرج الفعلي:
+سلسلة المراحل التي بدأت كل منها لحظة انتهاء سابقتها حتى نهاية التشغيل.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+
+# هامش (ثانية) لاعتبار بدء مرحلة ناتجاً عن انتهاء أخرى
+_RELEASE_TOLERANCE = 0.05
+
+
+class SuiteScheduler:
+    """تشغيل مهام async بميزانية تزامن، ومهام حصرية، واعتماديات"""
+
+    def __init__(self, max_concurrency: int = 1):
+        self.max_concurrency = max(1, max_concurrency)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.results: Dict[str, Any] = {}
+
+    def add(self, name: str, factory: Callable[[], Awaitable[Any]], exclusive: bool = False, cost: int = 1,
+            depends_on: Optional[List[str]] = None):
+        """إضافة مرحلة؛ factory تُستدعى عند بدء المرحلة فقط"""
+        self.jobs[name] = {
+            'name': name,
+            'factory': factory,
+            'exclusive': exclusive,
+            'cost': self.max_concurrency if exclusive else max(1, min(cost, self.max_concurrency)),
+            'depends_on': list(depends_on or [])
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        """تشغيل جميع المراحل وإرجاع الجدول الزمني والمسار الحرج"""
+        for job in self.jobs.values():
+            unknown = [dependency for dependency in job['depends_on'] if dependency not in self.jobs]
+            if unknown:
+                raise ValueError(f"Suite {job['name']} depends on unknown suites: {', '.join(unknown)}")
+
+        condition = asyncio.Condition()
+        pending = list(self.jobs)
+        finished: Dict[str, str] = {}
+        phases: Dict[str, Dict[str, Any]] = {}
+        running = {'cost': 0, 'exclusive': False, 'jobs': 0}
+        start = time.perf_counter()
+
+        def ready(job: Dict[str, Any]) -> bool:
+            return all(dependency in finished for dependency in job['depends_on'])
+
+        def fits(job: Dict[str, Any]) -> bool:
+            if job['exclusive']:
+                return running['jobs'] == 0
+            return not running['exclusive'] and running['cost'] + job['cost'] <= self.max_concurrency
+
+        async def execute(job: Dict[str, Any], ready_at: float):
+            phase = phases[job['name']] = {
+                'start': time.perf_counter() - start,
+                'queued': time.perf_counter() - start - ready_at,
+                'exclusive': job['exclusive'],
+                'status': 'running'
+            }
+            try:
+                self.results[job['name']] = await job['factory']()
+                phase['status'] = 'completed'
+            except Exception as e:
+                logging.error(f"Error running suite {job['name']}: {str(e)}")
+                phase.update({'status': 'failed', 'error': str(e)})
+            finally:
+                phase['end'] = time.perf_counter() - start
+                phase['wall_time'] = phase['end'] - phase['start']
+                async with condition:
+                    running['cost'] -= job['cost']
+                    running['jobs'] -= 1
+                    running['exclusive'] = False
+                    finished[job['name']] = phase['status']
+                    condition.notify_all()
+
+        tasks = []
+        async with condition:
+            while pending:
+                started = False
+                for name in list(pending):
+                    job = self.jobs[name]
+                    if not ready(job):
+                        continue
+
+                    failed = [dependency for dependency in job['depends_on'] if finished[dependency] != 'completed']
+                    if failed:
+                        pending.remove(name)
+                        now = time.perf_counter() - start
+                        phases[name] = {'start': now, 'end': now, 'wall_time': 0, 'queued': 0,
+                                        'exclusive': job['exclusive'], 'status': 'skipped',
+                                        'error': f"dependency failed: {', '.join(failed)}"}
+                        finished[name] = 'skipped'
+                        started = True
+                        continue
+
+                    if fits(job):
+                        pending.remove(name)
+                        running['cost'] += job['cost']
+                        running['jobs'] += 1
+                        running['exclusive'] = job['exclusive']
+                        ready_at = max([phases[dependency]['end'] for dependency in job['depends_on']], default=0)
+                        tasks.append(asyncio.create_task(execute(job, ready_at)))
+                        started = True
+                    elif job['exclusive']:
+                        # مرحلة حصرية جاهزة تنتظر فراغ الجهاز: لا تبدأ بعدها مراحل أخرى
+                        break
+
+                if pending and not started:
+                    if running['jobs'] == 0:
+                        raise RuntimeError(f"Suite dependency cycle: {', '.join(pending)}")
+                    await condition.wait()
+
+        await asyncio.gather(*tasks)
+        return self.summary(phases, time.perf_counter() - start)
+
+    def summary(self, phases: Dict[str, Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+        sequential = sum(phase['wall_time'] for phase in phases.values())
+        critical_path = self._critical_path(phases)
+        return {
+            'max_concurrency': self.max_concurrency,
+            'wall_time': wall_time,
+            'sequential_time': sequential,
+            'speedup': sequential / wall_time if wall_time > 0 else 1.0,
+            'phases': {name: phases[name] for name in self.jobs if name in phases},
+            'critical_path': critical_path,
+            'critical_path_time': sum(phases[name]['wall_time'] for name in critical_path)
+        }
+
+    @staticmethod
+    def _critical_path(phases: Dict[str, Dict[str, Any]]) -> List[str]:
+        """من آخر مرحلة انتهت رجوعاً: المرحلة السابقة هي التي حررت مكانها (انتهت لحظة بدئها)"""
+        executed = {name: phase for name, phase in phases.items() if phase['status'] != 'skipped'}
+        if not executed:
+            return []
+
+        current = max(executed, key=lambda name: executed[name]['end'])
+        path = [current]
+        while executed[current]['start'] > _RELEASE_TOLERANCE:
+            releasers = [name for name, phase in executed.items()
+                         if name not in path and phase['end'] <= executed[current]['start'] + _RELEASE_TOLERANCE]
+            if not releasers:
+                break
+            current = max(releasers, key=lambda name: executed[name]['end'])
+            path.append(current)
+        return list(reversed(path))
@@ -0,0 +1,135 @@
+"""
+ملفات محاكاة الشبكة والمعالج (throttling) عبر Chrome DevTools Protocol لاختبارات BarberTrack
+مطور: Performance Testing Specialist
+
+كل ملف يجمع شروط شبكة (Network.emulateNetworkConditions) ومعامل إبطاء المعالج
+(Emulation.setCPUThrottlingRate)، وقد يحدد شاشة جوال لسياق المتصفح. القيم مطابقة لإعدادات
+DevTools المسبقة (Fast 3G وFast 4G تشمل عامل التصحيح 0.9 للسرعة ومضاعف زمن الاستجابة).
+
+المحاكاة تعمل لكل صفحة، فيجب تطبيقها على كل صفحة جديدة قبل أول تنقل:
+    context = await browser.new_context(**throttled_context_options(profile))
+    page = await context.new_page()
+    await apply_throttling(page, profile)
+"""
+
+from typing import Dict, List, Any, Optional, Union
+
+MOBILE_VIEWPORT = {'width': 375, 'height': 812}
+
+# latency بالميلي ثانية، والسرعات بالبايت في الثانية كما يتوقعها CDP
+FAST_3G = {'latency': 562.5, 'download': 1.6 * 1000 * 1000 / 8 * 0.9, 'upload': 750 * 1000 / 8 * 0.9,
+           'connection_type': 'cellular3g'}
+FAST_4G = {'latency': 165, 'download': 9 * 1000 * 1000 / 8 * 0.9, 'upload': 1.5 * 1000 * 1000 / 8 * 0.9,
+           'connection_type': 'cellular4g'}
+
+THROTTLING_PROFILES: Dict[str, Dict[str, Any]] = {
+    'fast-3g': {
+        'label': 'Fast 3G',
+        'network': FAST_3G,
+        'cpu_rate': 1
+    },
+    '4g': {
+        'label': '4G',
+        'network': FAST_4G,
+        'cpu_rate': 1
+    },
+    'cpu-4x': {
+        'label': 'CPU 4×',
+        'network': None,
+        'cpu_rate': 4
+    },
+    'cpu-6x': {
+        'label': 'CPU 6×',
+        'network': None,
+        'cpu_rate': 6
+    },
+    # جوال متوسط على شبكة الصالون: شاشة الجوال في UXUITestSuite.viewports مع 4G ومعالج أبطأ 4 مرات
+    'midrange-phone': {
+        'label': 'جوال متوسط (4G، CPU 4×، 375×812)',
+        'network': FAST_4G,
+        'cpu_rate': 4,
+        'viewport': MOBILE_VIEWPORT,
+        'mobile': True
+    }
+}
+
+# طلبات fetch متتالية من داخل الصفحة حتى تمر عبر شروط الشبكة المحاكاة
+BROWSER_FETCH_SCRIPT = """
+async ({method, path, samples}) => {
+    const results = [];
+    for (let i = 0; i < samples; i++) {
+        const start = performance.now();
+        try {
+            const options = {method, cache: 'no-store', headers: {}};
+            if (method !== 'GET') {
+                options.headers['Content-Type'] = 'application/json';
+                options.body = '{}';
+            }
+            const response = await fetch(path, options);
+            const body = await response.arrayBuffer();
+            results.push({time: performance.now() - start, status: response.status, bytes: body.byteLength});
+        } catch (e) {
+            results.push({time: performance.now() - start, status: null, error: String(e)});
+        }
+    }
+    return results;
+}
+"""
+
+
+def resolve_profiles(names: Union[None, str, List[str]]) -> List[Dict[str, Any]]:
+    """تحويل أسماء الملفات ('fast-3g,cpu-4x' أو 'all' أو قائمة) إلى ملفات كاملة بحقل name"""
+    if not names:
+        return []
+    if isinstance(names, str):
+        names = [name.strip() for name in names.split(',') if name.strip()]
+    if 'all' in names:
+        names = list(THROTTLING_PROFILES)
+
+    profiles = []
+    for name in names:
+        if name not in THROTTLING_PROFILES:
+            raise ValueError(f"Unknown throttling profile: {name} (available: {', '.join(THROTTLING_PROFILES)})")
+        profiles.append({'name': name, **THROTTLING_PROFILES[name]})
+    return profiles
+
+
+def throttled_context_options(profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """خيارات new_context للملف (شاشة الجوال واللمس إن وُجدت)"""
+    if not profile or 'viewport' not in profile:
+        return {}
+    options = {'viewport': profile['viewport']}
+    if profile.get('mobile'):
+        options.update({'is_mobile': True, 'has_touch': True, 'device_scale_factor': 3})
+    return options
+
+
+async def apply_throttling(page, profile: Dict[str, Any]):
+    """تطبيق شروط الشبكة وإبطاء المعالج على صفحة عبر جلسة CDP (تبقى فعالة طوال عمر الصفحة)"""
+    session = await page.context.new_cdp_session(page)
+    network = profile.get('network')
+    if network:
+        await session.send('Network.enable')
+        await session.send('Network.emulateNetworkConditions', {
+            'offline': False,
+            'latency': network['latency'],
+            'downloadThroughput': network['download'],
+            'uploadThroughput': network['upload'],
+            'connectionType': network.get('connection_type', 'other')
+        })
+    if profile.get('cpu_rate', 1) > 1:
+        await session.send('Emulation.setCPUThrottlingRate', {'rate': profile['cpu_rate']})
+    return session
+
+
+def describe_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """وصف مختصر للملف يُحفظ مع النتائج"""
+    network = profile.get('network')
+    return {
+        'label': profile['label'],
+        'latency_ms': network['latency'] if network else 0,
+        'download_kbps': round(network['download'] * 8 / 1000) if network else None,
+        'upload_kbps': round(network['upload'] * 8 / 1000) if network else None,
+        'cpu_rate': profile.get('cpu_rate', 1),
+        'viewport': profile.get('viewport')
+    }
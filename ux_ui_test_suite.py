@@ -7,18 +7,44 @@ import asyncio
 import json
 import logging
 import time
-from typing import Dict, List, Any, Optional, Tuple
-from playwright.async_api import async_playwright, Page, Browser, Keyboard, Mouse
+from typing import Dict, List, Any, Optional, Tuple, Union
+from playwright.async_api import Page, Browser, Keyboard, Mouse
 from datetime import datetime
 import re
 from pathlib import Path
 import statistics
 
+from parallel_routes import fair_concurrency, run_routes
+from throttling import resolve_profiles, apply_throttling, throttled_context_options, describe_profile
+from browser_runtime import BrowserRuntime, browser_page
+from incremental_selection import is_selected, filter_routes
+from sharding import ShardPlan, claim, run_unit, unit_id, unit_parts
+
 class UXUITestSuite:
     """مجموعة اختبارات الواجهة والتجربة المستخدم"""
 
-    def __init__(self, base_url: str = "http://localhost:9002"):
+    # خطوات تتوزع وحداتها على الأجزاء (sharding.py): الخطوة → (مفتاح results، دالة التجميع)
+    SHARDED_STEPS = {
+        'test_responsiveness': ('responsiveness', '_summarize_responsiveness'),
+        'test_user_flows': ('user_flows', '_summarize_user_flows')
+    }
+
+    def __init__(self, base_url: str = "http://localhost:9002", route_concurrency: int = 1,
+                 throttling_profiles: Union[None, str, List[str]] = None, runtime: Optional[BrowserRuntime] = None,
+                 checks: Optional[List[str]] = None, routes: Optional[List[str]] = None,
+                 shard: Optional[ShardPlan] = None):
         self.base_url = base_url
+        # متصفح مشترك للتشغيل كاملاً (BrowserRuntime)؛ None = تشغيل متصفح خاص لكل اختبار كما سبق
+        self.runtime = runtime
+        # اختيار تدريجي (incremental_selection): خطوات run_* المطلوبة والمسارات المعدلة؛ None = الكل
+        self.checks = checks
+        self.routes = routes
+        # الجزء المنفذ عند التشغيل المجزأ (--shard i/N): شاشة × صفحة وتدفقات المستخدم موزعة عليه؛ None = الكل
+        self.shard = shard
+        # عدد سياقات المتصفح المتزامنة لشبكة الشاشات × الصفحات (1 = تسلسلي على نفس الصفحة)
+        self.route_concurrency = route_concurrency
+        # ملفات محاكاة الشبكة والمعالج لإعادة تدفقات المستخدم (انظر throttling.py)
+        self.throttling_profiles = resolve_profiles(throttling_profiles)
         self.results = {
             'responsiveness': {},
             'navigation': {},
@@ -29,6 +55,7 @@ class UXUITestSuite:
             'performance': {},
             'error_handling': {},
             'user_flows': {},
+            'user_flows_by_profile': {},
             'mobile_experience': {}
         }
         self.ux_issues = []
@@ -98,6 +125,59 @@ class UXUITestSuite:
         """اختبار تجاوب التصميم"""
         print("📱 اختبار تجاوب التصميم...")
 
+        responsiveness_results = {}
+
+        try:
+            pages_to_test = filter_routes(['/', '/revenue', '/reports', '/dashboard'], self.routes)
+            grid = [(unit_id('ux_ui', 'test_responsiveness', viewport['name'], page_path), viewport, page_path)
+                    for viewport in self.viewports for page_path in pages_to_test]
+            grid = [cell for cell in grid if claim(self.shard, cell[0])]
+            concurrency = fair_concurrency(self.route_concurrency, len(self.viewports) * len(pages_to_test))
+
+            if concurrency > 1:
+                # كل خلية (شاشة، صفحة) في سياق معزول بحجم الشاشة
+                browser = page.context.browser
+
+                async def test_cell(cell):
+                    unit, viewport, page_path = cell
+
+                    async def run_cell():
+                        context = await browser.new_context(viewport={'width': viewport['width'], 'height': viewport['height']})
+                        try:
+                            return await self._test_viewport_route(await context.new_page(), viewport, page_path,
+                                                                   page_path == pages_to_test[-1])
+                        finally:
+                            await context.close()
+
+                    return await run_unit(self.shard, unit, run_cell)
+
+                cells = dict(zip([cell[0] for cell in grid], await run_routes(grid, test_cell, concurrency)))
+            else:
+                cells = {}
+                for viewport in self.viewports:
+                    viewport_cells = [cell for cell in grid if cell[1] is viewport]
+                    if not viewport_cells:
+                        continue
+                    await page.set_viewport_size({
+                        'width': viewport['width'],
+                        'height': viewport['height']
+                    })
+                    for unit, viewport, page_path in viewport_cells:
+                        cells[unit] = await run_unit(self.shard, unit, lambda: self._test_viewport_route(
+                            page, viewport, page_path, page_path == pages_to_test[-1]))
+
+            responsiveness_results = self._summarize_responsiveness(cells)
+            if concurrency > 1:
+                responsiveness_results['concurrency'] = concurrency
+
+        except Exception as e:
+            logging.error(f"Error testing responsiveness: {str(e)}")
+
+        self.results['responsiveness'] = responsiveness_results
+        return responsiveness_results
+
+    def _summarize_responsiveness(self, cells: Dict[str, Any]) -> Dict[str, Any]:
+        """تجميع خلايا (شاشة، صفحة) بترتيبها حسب الشاشة؛ الخلية استثناء إن فشلت"""
         responsiveness_results = {
             'viewports_tested': 0,
             'responsive_issues': [],
@@ -108,56 +188,59 @@ class UXUITestSuite:
             'touch_targets': {}
         }
 
-        try:
-            pages_to_test = ['/', '/revenue', '/reports', '/dashboard']
-
-            for viewport in self.viewports:
-                viewport_results = {
-                    'name': viewport['name'],
-                    'width': viewport['width'],
-                    'height': viewport['height'],
-                    'pages_tested': 0,
-                    'issues': [],
-                    'successful': 0
-                }
-
-                await page.set_viewport_size({
-                    'width': viewport['width'],
-                    'height': viewport['height']
-                })
+        for viewport in self.viewports:
+            viewport_results = {
+                'name': viewport['name'],
+                'width': viewport['width'],
+                'height': viewport['height'],
+                'pages_tested': 0,
+                'issues': [],
+                'successful': 0
+            }
 
-                for page_path in pages_to_test:
-                    try:
-                        await page.goto(f"{self.base_url}{page_path}")
-                        await page.wait_for_load_state("networkidle")
-                        await page.wait_for_timeout(1000)
+            for unit, cell in cells.items():
+                if unit_parts(unit)[2] != viewport['name']:
+                    continue
+                if isinstance(cell, Exception):
+                    viewport_results['issues'].append(f"Error testing viewport: {str(cell)}")
+                    continue
+                if cell['tested']:
+                    viewport_results['pages_tested'] += 1
+                    if not cell['issues']:
+                        viewport_results['successful'] += 1
+                viewport_results['issues'].extend(cell['issues'])
 
-                        viewport_results['pages_tested'] += 1
+                # اختبار أهداف اللمس للأجهزة المحمولة
+                if 'touch_targets' in cell:
+                    responsiveness_results['touch_targets'] = cell['touch_targets']
 
-                        # اختبار التجاوب للصفحة
-                        page_responsiveness = await self._test_page_responsiveness(page, viewport)
-                        viewport_results['issues'].extend(page_responsiveness['issues'])
+            responsiveness_results['breakpoints_working'][viewport['name']] = viewport_results
+            responsiveness_results['responsive_issues'].extend(viewport_results['issues'])
+            responsiveness_results['viewports_tested'] += 1
 
-                        if not page_responsiveness['issues']:
-                            viewport_results['successful'] += 1
+        return responsiveness_results
 
-                    except Exception as e:
-                        viewport_results['issues'].append(f"Error testing {page_path}: {str(e)}")
+    async def _test_viewport_route(self, page: Page, viewport: Dict, page_path: str,
+                                   last_page: bool = False) -> Dict[str, Any]:
+        """اختبار صفحة واحدة على شاشة واحدة (وأهداف اللمس بعد آخر صفحة على الجوال)"""
+        cell = {'tested': False, 'issues': []}
+        try:
+            await page.goto(f"{self.base_url}{page_path}")
+            await page.wait_for_load_state("networkidle")
+            await page.wait_for_timeout(1000)
 
-                responsiveness_results['breakpoints_working'][viewport['name']] = viewport_results
-                responsiveness_results['responsive_issues'].extend(viewport_results['issues'])
-                responsiveness_results['viewports_tested'] += 1
+            cell['tested'] = True
 
-                # اختبار أهداف اللمس للأجهزة المحمولة
-                if viewport['name'] == 'Mobile':
-                    touch_targets = await self._test_touch_targets(page)
-                    responsiveness_results['touch_targets'] = touch_targets
+            # اختبار التجاوب للصفحة
+            page_responsiveness = await self._test_page_responsiveness(page, viewport)
+            cell['issues'].extend(page_responsiveness['issues'])
 
         except Exception as e:
-            logging.error(f"Error testing responsiveness: {str(e)}")
+            cell['issues'].append(f"Error testing {page_path}: {str(e)}")
 
-        self.results['responsiveness'] = responsiveness_results
-        return responsiveness_results
+        if viewport['name'] == 'Mobile' and last_page:
+            cell['touch_targets'] = await self._test_touch_targets(page)
+        return cell
 
     async def _test_page_responsiveness(self, page: Page, viewport: Dict) -> Dict[str, Any]:
         """اختبار تجاوب صفحة معينة"""
@@ -1141,6 +1224,50 @@ class UXUITestSuite:
         """اختبار تدفقات المستخدم"""
         print("🔄 اختبار تدفقات المستخدم...")
 
+        flows_results = await self._run_user_flows(page, sharded=True)
+        self.results['user_flows'] = flows_results
+        return flows_results
+
+    async def test_user_flows_by_profile(self, page: Page) -> Dict[str, Any]:
+        """إعادة تدفقات المستخدم تحت كل ملف محاكاة للشبكة والمعالج في سياق مستقل"""
+        print("📶 اختبار تدفقات المستخدم تحت محاكاة الشبكة والمعالج...")
+
+        profile_results = {}
+        for profile in self.throttling_profiles:
+            context = await page.context.browser.new_context(**throttled_context_options(profile))
+            try:
+                throttled_page = await context.new_page()
+                await apply_throttling(throttled_page, profile)
+                profile_results[profile['name']] = {
+                    'profile': describe_profile(profile),
+                    **await self._run_user_flows(throttled_page)
+                }
+            except Exception as e:
+                logging.error(f"Error testing user flows under {profile['name']}: {str(e)}")
+                profile_results[profile['name']] = {'error': str(e)}
+            finally:
+                await context.close()
+
+        self.results['user_flows_by_profile'] = profile_results
+        return profile_results
+
+    async def _run_user_flows(self, page: Page, sharded: bool = False) -> Dict[str, Any]:
+        """تنفيذ جميع تدفقات المستخدم على صفحة وإرجاع النتائج (sharded: كل تدفق وحدة في التشغيل المجزأ)"""
+        outcomes = {}
+        for flow in self.user_flows:
+            unit = unit_id('ux_ui', 'test_user_flows', flow['name'])
+            if sharded and not claim(self.shard, unit):
+                continue
+            try:
+                outcomes[unit] = await run_unit(self.shard if sharded else None, unit,
+                                                lambda: self._execute_user_flow(page, flow))
+            except Exception as e:
+                outcomes[unit] = e
+
+        return self._summarize_user_flows(outcomes)
+
+    def _summarize_user_flows(self, outcomes: Dict[str, Any]) -> Dict[str, Any]:
+        """تجميع نتائج التدفقات بترتيبها؛ التدفق استثناء إن فشل تنفيذه"""
         flows_results = {
             'flows_tested': 0,
             'successful_flows': 0,
@@ -1153,23 +1280,21 @@ class UXUITestSuite:
         try:
             completion_times = []
 
-            for flow in self.user_flows:
-                try:
-                    flow_result = await self._execute_user_flow(page, flow)
-                    flows_results['flows_tested'] += 1
-                    flows_results['flow_details'][flow['name']] = flow_result
-
-                    if flow_result['success']:
-                        flows_results['successful_flows'] += 1
-                        completion_times.append(flow_result['completion_time'])
-                    else:
-                        flows_results['failed_flows'] += 1
-                        flows_results['flow_issues'].extend(flow_result['issues'])
+            for unit, flow_result in outcomes.items():
+                flow_name = unit_parts(unit)[2]
+                flows_results['flows_tested'] += 1
+                if isinstance(flow_result, Exception):
+                    flows_results['failed_flows'] += 1
+                    flows_results['flow_issues'].append(f"Error testing flow {flow_name}: {str(flow_result)}")
+                    continue
 
-                except Exception as e:
-                    flows_results['flows_tested'] += 1
+                flows_results['flow_details'][flow_name] = flow_result
+                if flow_result['success']:
+                    flows_results['successful_flows'] += 1
+                    completion_times.append(flow_result['completion_time'])
+                else:
                     flows_results['failed_flows'] += 1
-                    flows_results['flow_issues'].append(f"Error testing flow {flow['name']}: {str(e)}")
+                    flows_results['flow_issues'].extend(flow_result['issues'])
 
             if completion_times:
                 flows_results['average_completion_time'] = statistics.mean(completion_times)
@@ -1178,7 +1303,6 @@ class UXUITestSuite:
             flows_results['flow_issues'].append(f"Error testing user flows: {str(e)}")
             logging.error(f"Error testing user flows: {str(e)}")
 
-        self.results['user_flows'] = flows_results
         return flows_results
 
     async def _execute_user_flow(self, page: Page, flow: Dict) -> Dict[str, Any]:
@@ -1232,35 +1356,41 @@ class UXUITestSuite:
         """حساب درجة تجربة المستخدم"""
         score = 100
         penalties = 0
+        # تشغيل جزئي (checks): تُقيَّم الخطوات المنفذة فقط، فلا تُحتسب الخطوات المتخطاة فاشلة
 
         # تقييم التجاوب
-        responsiveness = self.results.get('responsiveness', {})
-        issues_count = len(responsiveness.get('responsive_issues', []))
-        penalties += issues_count * 2
+        if is_selected(self.checks, 'test_responsiveness'):
+            responsiveness = self.results.get('responsiveness', {})
+            issues_count = len(responsiveness.get('responsive_issues', []))
+            penalties += issues_count * 2
 
         # تقييم التنقل
-        navigation = self.results.get('navigation', {})
-        menu_func = navigation.get('menu_functionality', {})
-        if menu_func.get('broken_links', 0) > 0:
-            penalties += menu_func['broken_links'] * 3
+        if is_selected(self.checks, 'test_navigation'):
+            navigation = self.results.get('navigation', {})
+            menu_func = navigation.get('menu_functionality', {})
+            if menu_func.get('broken_links', 0) > 0:
+                penalties += menu_func['broken_links'] * 3
 
         # تقييم النماذج
-        forms = self.results.get('forms', {})
-        validation = forms.get('validation', {})
-        if validation.get('validation_working', 0) == 0:
-            penalties += 10
+        if is_selected(self.checks, 'test_forms'):
+            forms = self.results.get('forms', {})
+            validation = forms.get('validation', {})
+            if validation.get('validation_working', 0) == 0:
+                penalties += 10
 
         # تقييم التفاعلات
-        interactions = self.results.get('interactions', {})
-        buttons = interactions.get('buttons', {})
-        if buttons.get('buttons_with_labels', 0) < buttons.get('total_buttons', 0) * 0.8:
-            penalties += 8
+        if is_selected(self.checks, 'test_interactions'):
+            interactions = self.results.get('interactions', {})
+            buttons = interactions.get('buttons', {})
+            if buttons.get('buttons_with_labels', 0) < buttons.get('total_buttons', 0) * 0.8:
+                penalties += 8
 
         # تقييم تدفقات المستخدم
-        user_flows = self.results.get('user_flows', {})
-        success_rate = user_flows.get('successful_flows', 0) / max(user_flows.get('flows_tested', 1), 1)
-        if success_rate < 0.8:
-            penalties += (0.8 - success_rate) * 20
+        if is_selected(self.checks, 'test_user_flows'):
+            user_flows = self.results.get('user_flows', {})
+            success_rate = user_flows.get('successful_flows', 0) / max(user_flows.get('flows_tested', 1), 1)
+            if success_rate < 0.8:
+                penalties += (0.8 - success_rate) * 20
 
         self.ux_score = max(0, score - penalties)
         return self.ux_score
@@ -1273,32 +1403,39 @@ class UXUITestSuite:
         """تنفيذ جميع اختبارات الواجهة والتجربة المستخدم"""
         print("🚀 بدء اختبارات الواجهة والتجربة المستخدم...")
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
-
-            try:
-                # 1. اختبارات التجاوب
+        async with browser_page(self.runtime) as page:
+            # 1. اختبارات التجاوب
+            if is_selected(self.checks, 'test_responsiveness'):
                 await self.test_responsiveness(page)
 
-                # 2. اختبارات التنقل
+            # 2. اختبارات التنقل
+            if is_selected(self.checks, 'test_navigation'):
                 await self.test_navigation(page)
 
-                # 3. اختبارات النماذج
+            # 3. اختبارات النماذج
+            if is_selected(self.checks, 'test_forms'):
                 await self.test_forms(page)
 
-                # 4. اختبارات التفاعل
+            # 4. اختبارات التفاعل
+            if is_selected(self.checks, 'test_interactions'):
                 await self.test_interactions(page)
 
-                # 5. اختبارات التصميم البصري
+            # 5. اختبارات التصميم البصري
+            if is_selected(self.checks, 'test_visual_design'):
                 await self.test_visual_design(page)
 
-                # 6. اختبارات تدفقات المستخدم
+            # 6. اختبارات تدفقات المستخدم
+            if is_selected(self.checks, 'test_user_flows'):
                 await self.test_user_flows(page)
 
-            finally:
-                await browser.close()
+            # 7. تدفقات المستخدم تحت محاكاة الشبكة والمعالج
+            if self.throttling_profiles and is_selected(self.checks, 'test_user_flows_by_profile'):
+                await self.test_user_flows_by_profile(page)
+
+        return self.finalize()
 
+    def finalize(self) -> Dict[str, Any]:
+        """النتيجة والقضايا والتقرير من self.results (يستدعيها الدمج أيضاً بعد التشغيل المجزأ)"""
         # حساب النتيجة النهائية
         final_score = self.calculate_ux_score()
 
@@ -1397,6 +1534,13 @@ Average Completion Time: {user_flows.get('average_completion_time', 0):.2f}s
 Success Rate: {(user_flows.get('successful_flows', 0) / max(user_flows.get('flows_tested', 1), 1) * 100):.1f}%
 """
 
+        for profile_name, profile_flows in self.results.get('user_flows_by_profile', {}).items():
+            if 'error' in profile_flows:
+                report += f"{profile_name}: Error - {profile_flows['error']}\n"
+                continue
+            report += (f"{profile_flows['profile']['label']}: {profile_flows['successful_flows']}/{profile_flows['flows_tested']} flows, "
+                       f"Average Completion Time {profile_flows['average_completion_time']:.2f}s\n")
+
         report += f"""
 
 VISUAL DESIGN & ACCESSIBILITY
@@ -0,0 +1,157 @@
+"""
+قياس Core Web Vitals عبر PerformanceObserver لاختبارات أداء BarberTrack
+مطور: Performance Testing Specialist
+
+يُحقن WEB_VITALS_INIT_SCRIPT قبل كل تنقل (page.add_init_script) فيسجل مع buffered:
+  paint (FCP)، largest-contentful-paint (LCP)، layout-shift (CLS بنوافذ الجلسة)،
+  longtask (TBT بعد FCP)، event و first-input (زمن التفاعل على نمط INP).
+بعد التحميل تنفذ collect_web_vitals نقرة حقيقية على عنصر غير تفاعلي ثم تقرأ المقاييس،
+وتصنف كل مقياس حسب حدود web.dev، وتحدد diagnose_page_load هل البطء في العرض أم في
+انتظار سكون الشبكة.
+"""
+
+from typing import Dict, Any, Optional
+
+# حدود (جيد، ضعيف) بالميلي ثانية، وCLS بدون وحدة
+WEB_VITALS_THRESHOLDS = {
+    'ttfb': (800, 1800),
+    'fcp': (1800, 3000),
+    'lcp': (2500, 4000),
+    'cls': (0.1, 0.25),
+    'tbt': (200, 600),
+    'inp': (200, 500)
+}
+
+WEB_VITALS_INIT_SCRIPT = """
+(() => {
+    if (window.__webVitals) return;
+    const vitals = window.__webVitals = {
+        fcp: null, lcp: null, lcpElement: null, cls: 0, longTasks: [], interactions: {}, firstInputDelay: null
+    };
+    const observe = (type, callback, options = {}) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(callback))
+                .observe({type, buffered: true, ...options});
+        } catch (e) {
+            // نوع غير مدعوم في هذا المتصفح
+        }
+    };
+
+    observe('paint', entry => {
+        if (entry.name === 'first-contentful-paint') vitals.fcp = entry.startTime;
+    });
+    observe('largest-contentful-paint', entry => {
+        vitals.lcp = entry.startTime;
+        vitals.lcpElement = entry.element ? entry.element.tagName.toLowerCase() : (entry.url || null);
+    });
+
+    // CLS: أكبر نافذة جلسة (فجوة أقل من ثانية، وطول أقصى 5 ثوانٍ)
+    let sessionValue = 0, sessionStart = 0, lastShift = 0;
+    observe('layout-shift', entry => {
+        if (entry.hadRecentInput) return;
+        if (entry.startTime - lastShift > 1000 || entry.startTime - sessionStart > 5000) {
+            sessionValue = 0;
+            sessionStart = entry.startTime;
+        }
+        sessionValue += entry.value;
+        lastShift = entry.startTime;
+        vitals.cls = Math.max(vitals.cls, sessionValue);
+    });
+
+    observe('longtask', entry => vitals.longTasks.push([entry.startTime, entry.duration]));
+    observe('event', entry => {
+        if (!entry.interactionId) return;
+        const current = vitals.interactions[entry.interactionId] || 0;
+        vitals.interactions[entry.interactionId] = Math.max(current, entry.duration);
+    }, {durationThreshold: 16});
+    observe('first-input', entry => {
+        vitals.firstInputDelay = entry.processingStart - entry.startTime;
+    });
+})();
+"""
+
+_COLLECT_SCRIPT = """
+() => {
+    const vitals = window.__webVitals || {longTasks: [], interactions: {}};
+    const nav = performance.getEntriesByType('navigation')[0];
+    const activation = (nav && nav.activationStart) || 0;
+    const fcp = vitals.fcp;
+    // TBT: مجموع ما يتجاوز 50ms من كل مهمة طويلة بعد FCP
+    const tbt = vitals.longTasks
+        .filter(([start]) => fcp === null || start >= fcp)
+        .reduce((total, [, duration]) => total + Math.max(0, duration - 50), 0);
+    const interactions = Object.values(vitals.interactions);
+    return {
+        ttfb: nav ? Math.max(0, nav.responseStart - activation) : null,
+        fcp: fcp,
+        lcp: vitals.lcp,
+        lcp_element: vitals.lcpElement,
+        cls: vitals.cls,
+        tbt: tbt,
+        inp: interactions.length ? Math.max(...interactions) : null,
+        interactions: interactions.length,
+        first_input_delay: vitals.firstInputDelay,
+        long_tasks: vitals.longTasks.length,
+        dom_content_loaded: nav ? nav.domContentLoadedEventEnd : null,
+        load_event: nav ? nav.loadEventEnd : null
+    };
+}
+"""
+
+# نقطة داخل عنصر ظاهر لا يقع ضمن رابط أو زر أو حقل، حتى لا تغير النقرة حالة الصفحة
+_SAFE_POINT_SCRIPT = """
+() => {
+    const interactive = 'a, button, input, select, textarea, label, summary, [role=button], [role=link], [onclick], [contenteditable]';
+    const candidates = document.querySelectorAll('h1, h2, h3, p, main, section, div');
+    for (const element of candidates) {
+        const rect = element.getBoundingClientRect();
+        if (rect.width < 10 || rect.height < 10 || rect.bottom < 0 || rect.top > window.innerHeight) continue;
+        const x = rect.left + Math.min(rect.width / 2, 20);
+        const y = Math.max(rect.top, 0) + Math.min(rect.height / 2, 10);
+        const target = document.elementFromPoint(x, y);
+        if (target && !target.closest(interactive)) return {x, y};
+    }
+    return null;
+}
+"""
+
+
+def rate_web_vital(metric: str, value: Optional[float]) -> Optional[str]:
+    """تصنيف قيمة مقياس: good / needs_improvement / poor"""
+    if value is None or metric not in WEB_VITALS_THRESHOLDS:
+        return None
+    good, poor = WEB_VITALS_THRESHOLDS[metric]
+    return 'good' if value <= good else 'needs_improvement' if value <= poor else 'poor'
+
+
+async def collect_web_vitals(page, interact: bool = True) -> Dict[str, Any]:
+    """قراءة المقاييس بعد التحميل (مع نقرة اختبارية لقياس زمن التفاعل) وتصنيفها"""
+    if interact:
+        point = await page.evaluate(_SAFE_POINT_SCRIPT)
+        if point:
+            await page.mouse.click(point['x'], point['y'])
+            # إدخالات Event Timing تُسلم بعد الإطار التالي
+            await page.wait_for_timeout(250)
+
+    vitals = await page.evaluate(_COLLECT_SCRIPT)
+    vitals['ratings'] = {
+        metric: rate_web_vital(metric, vitals.get(metric))
+        for metric in WEB_VITALS_THRESHOLDS if vitals.get(metric) is not None
+    }
+    return vitals
+
+
+def diagnose_page_load(vitals: Dict[str, Any], idle_time_ms: float) -> Dict[str, Any]:
+    """هل الصفحة بطيئة في العرض (خادم أو واجهة) أم فقط بطيئة في الوصول إلى سكون الشبكة؟"""
+    ratings = vitals.get('ratings', {})
+    lcp = vitals.get('lcp') or vitals.get('fcp')
+    idle_gap = idle_time_ms - lcp if lcp is not None else None
+
+    if ratings.get('lcp') in ('needs_improvement', 'poor') or ratings.get('fcp') == 'poor':
+        bottleneck = 'server' if ratings.get('ttfb') in ('needs_improvement', 'poor') else 'render'
+    elif idle_gap is not None and idle_gap > 2000:
+        bottleneck = 'idle'
+    else:
+        bottleneck = 'none'
+
+    return {'bottleneck': bottleneck, 'idle_gap_ms': idle_gap}
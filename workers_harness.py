@@ -0,0 +1,324 @@
+"""
+بديل محلي لـ Cloudflare Workers: عملية مستقلة لكل Worker (بمثابة isolate) لقياس البدء البارد والدافئ
+مطور: Performance Testing Specialist
+
+كل Worker من analyze_workers_architecture يُشغَّل كخادم HTTP في عملية Python منفصلة تقرأ من
+قاعدة D1 المحلية (SQLite). البدء البارد = تشغيل عملية جديدة حتى جاهزيتها + أول طلب عليها،
+والبدء الدافئ = سلسلة طلبات على عملية جاهزة مع قياس الإنتاجية المستقرة.
+
+تشغيل Worker منفرد يدوياً:
+  python workers_harness.py serve --worker revenue-worker --db test_results/workers_d1.sqlite
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from cloudflare_d1_workers_analysis import CloudflareArchitectureAnalyzer
+from latency_histogram import LatencyHistogram
+
+PASSWORD_SALT = b'barbertrack-local'
+PASSWORD_ITERATIONS = 10000
+TOKEN_SECRET = b'local-workers-harness'
+
+
+def hash_password(password: str) -> str:
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), PASSWORD_SALT, PASSWORD_ITERATIONS).hex()
+
+
+# طلب تمثيلي لكل Worker: (method, path, body)
+WORKER_PROBES: Dict[str, Tuple[str, str, Optional[Dict[str, Any]]]] = {
+    'auth-worker': ('POST', '/api/auth/login', {'email': 'user1_1@example.com', 'password': 'password123'}),
+    'branch-worker': ('GET', '/api/branches/get-branch-data', None),
+    'revenue-worker': ('GET', '/api/revenue/get-revenue', None),
+    'expenses-worker': ('GET', '/api/expenses/get-expenses', None),
+    'requests-worker': ('GET', '/api/requests/get-requests', None),
+    'sync-worker': ('GET', '/api/sync/get-sync-status', None),
+    'reports-worker': ('GET', '/api/reports/get-branch-summary', None),
+    'realtime-worker': ('POST', '/api/realtime/broadcast-update', {'event': 'revenue_added', 'amount': 150})
+}
+
+
+# ===========================
+# جانب الـ Worker (داخل العملية الفرعية)
+# ===========================
+
+def _rows(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _month_start() -> str:
+    return date.today().replace(day=1).isoformat()
+
+
+def _handlers(db: sqlite3.Connection) -> Dict[str, Any]:
+    """دوال Workers لكل (worker, function)؛ كل دالة تتلقى رقم الفرع وجسم الطلب"""
+    realtime_clients: Dict[int, List[Any]] = {}
+
+    def login(branch_id: int, body: Dict[str, Any]):
+        user = db.execute("SELECT id, branch_id, role, password_hash FROM users WHERE email = ?",
+                          (body.get('email'),)).fetchone()
+        if user is None or not hmac.compare_digest(user[3], hash_password(body.get('password', ''))):
+            return 401, {'error': 'invalid credentials'}
+        payload = f"{user[0]}:{user[1]}:{user[2]}:{int(time.time())}"
+        signature = hmac.new(TOKEN_SECRET, payload.encode('utf-8'), hashlib.sha256).hexdigest()
+        return 200, {'token': f"{payload}:{signature}", 'branch_id': user[1], 'role': user[2]}
+
+    def branch_data(branch_id: int, body):
+        cursor = db.execute("""SELECT b.id, b.name, b.code, COUNT(u.id) AS employees
+                               FROM branches b LEFT JOIN users u ON u.branch_id = b.id
+                               WHERE b.id = ? GROUP BY b.id""", (branch_id,))
+        return 200, {'branch': _rows(cursor)}
+
+    def revenue(branch_id: int, body):
+        cursor = db.execute("""SELECT date, SUM(amount) AS total, COUNT(*) AS transactions FROM revenue
+                               WHERE branch_id = ? AND date >= ? GROUP BY date ORDER BY date""",
+                            (branch_id, _month_start()))
+        return 200, {'revenue': _rows(cursor)}
+
+    def expenses(branch_id: int, body):
+        cursor = db.execute("""SELECT id, amount, description, category, date FROM expenses
+                               WHERE branch_id = ? ORDER BY date DESC LIMIT 50""", (branch_id,))
+        return 200, {'expenses': _rows(cursor)}
+
+    def requests(branch_id: int, body):
+        cursor = db.execute("""SELECT id, type, amount, description, status FROM requests
+                               WHERE branch_id = ? AND status = 'pending' ORDER BY created_at DESC LIMIT 50""",
+                            (branch_id,))
+        return 200, {'requests': _rows(cursor)}
+
+    def sync_status(branch_id: int, body):
+        cursor = db.execute("""SELECT table_name, status, COUNT(*) AS records FROM sync_logs
+                               WHERE branch_id = ? AND synced_at >= ? GROUP BY table_name, status""",
+                            (branch_id, (date.today() - timedelta(days=7)).isoformat()))
+        return 200, {'sync': _rows(cursor)}
+
+    def branch_summary(branch_id: int, body):
+        month = _month_start()
+        income = db.execute("SELECT COALESCE(SUM(amount), 0) FROM revenue WHERE branch_id = ? AND date >= ?",
+                            (branch_id, month)).fetchone()[0]
+        costs = db.execute("SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE branch_id = ? AND date >= ?",
+                           (branch_id, month)).fetchone()[0]
+        return 200, {'revenue': income, 'expenses': costs, 'net': income - costs}
+
+    def broadcast(branch_id: int, body):
+        message = json.dumps({'branch_id': branch_id, **body}, ensure_ascii=False)
+        clients = realtime_clients.get(branch_id, [])
+        for client in clients:
+            client.append(message)
+        return 200, {'delivered': len(clients), 'bytes': len(message.encode('utf-8'))}
+
+    return {
+        ('auth-worker', 'login'): login,
+        ('branch-worker', 'get-branch-data'): branch_data,
+        ('revenue-worker', 'get-revenue'): revenue,
+        ('expenses-worker', 'get-expenses'): expenses,
+        ('requests-worker', 'get-requests'): requests,
+        ('sync-worker', 'get-sync-status'): sync_status,
+        ('reports-worker', 'get-branch-summary'): branch_summary,
+        ('realtime-worker', 'broadcast-update'): broadcast
+    }
+
+
+async def serve_worker(worker_name: str, db_path: str, port: int = 0):
+    """تشغيل Worker واحد وطباعة READY <port> عند الجاهزية"""
+    architecture = CloudflareArchitectureAnalyzer().analyze_workers_architecture()
+    worker = next(w for w in architecture['workers'] if w['name'] == worker_name)
+
+    db = sqlite3.connect(db_path)
+    handlers = _handlers(db)
+
+    @web.middleware
+    async def cors(request, handler):
+        response = await handler(request)
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    @web.middleware
+    async def branch_isolation(request, handler):
+        # كل طلب عدا المصادقة يجب أن يحدد الفرع، ولا يُقرأ إلا من بيانات ذلك الفرع
+        if worker_name != 'auth-worker' and not request.headers.get('X-Branch-Id', '').isdigit():
+            return web.json_response({'error': 'missing branch'}, status=403)
+        return await handler(request)
+
+    async def dispatch(request):
+        function = request.match_info['function']
+        handler = handlers.get((worker_name, function))
+        if handler is None:
+            if function not in worker['functions']:
+                return web.json_response({'error': 'unknown function'}, status=404)
+            return web.json_response({'worker': worker_name, 'function': function})
+
+        body = await request.json() if request.can_read_body else {}
+        status, payload = handler(int(request.headers.get('X-Branch-Id', 0)), body)
+        return web.json_response(payload, status=status)
+
+    app = web.Application(middlewares=[cors, branch_isolation])
+    for route in worker['routes']:
+        app.router.add_route('*', route.replace('*', '{function}'), dispatch)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+
+    bound_port = runner.addresses[0][1]
+    print(f"READY {bound_port}", flush=True)
+    await asyncio.Event().wait()
+
+
+# ===========================
+# جانب أداة القياس
+# ===========================
+
+class WorkersHarness:
+    """تشغيل Workers كعمليات مستقلة وقياس البدء البارد والدافئ والإنتاجية"""
+
+    def __init__(self, architecture: Dict[str, Any], db_path: str, cold_runs: int = 5,
+                 warm_requests: int = 200, concurrency: int = 10, startup_timeout: float = 30):
+        self.architecture = architecture
+        # مسار مطلق لأن عمليات الـ Workers تعمل من مجلد هذا الملف
+        self.db_path = str(Path(db_path).resolve())
+        self.cold_runs = cold_runs
+        self.warm_requests = warm_requests
+        self.concurrency = concurrency
+        self.startup_timeout = startup_timeout
+
+    def prepare_database(self, scale: float = 0.1):
+        """تجهيز قاعدة D1 المحلية التي تقرأ منها الـ Workers"""
+        from d1_benchmark import D1Benchmark
+
+        benchmark = D1Benchmark(CloudflareArchitectureAnalyzer().analyze_d1_database_structure(),
+                                db_path=self.db_path, scale=scale)
+        benchmark.setup()
+        with benchmark.connection:
+            benchmark.connection.execute("UPDATE users SET password_hash = ?", (hash_password('password123'),))
+        benchmark.close()
+
+    async def spawn(self, worker_name: str) -> Tuple[asyncio.subprocess.Process, int, float]:
+        """تشغيل عملية Worker جديدة وإرجاع (العملية، المنفذ، زمن البدء بالميلي ثانية)"""
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(Path(__file__).resolve()), 'serve', '--worker', worker_name, '--db', self.db_path,
+            stdout=asyncio.subprocess.PIPE, cwd=str(Path(__file__).resolve().parent)
+        )
+        try:
+            while True:
+                line = await asyncio.wait_for(process.stdout.readline(), timeout=self.startup_timeout)
+                if not line:
+                    raise RuntimeError(f"{worker_name} exited before becoming ready")
+                if line.startswith(b'READY '):
+                    return process, int(line.split()[1]), (time.perf_counter() - start) * 1000
+        except Exception:
+            await self.stop(process)
+            raise
+
+    async def stop(self, process: asyncio.subprocess.Process):
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+    async def _send(self, session, port: int, worker_name: str) -> Tuple[float, int]:
+        method, path, body = WORKER_PROBES[worker_name]
+        start = time.perf_counter()
+        async with session.request(method, f"http://127.0.0.1:{port}{path}", json=body,
+                                   headers={'X-Branch-Id': '1'}) as response:
+            await response.read()
+            return (time.perf_counter() - start) * 1000, response.status
+
+    async def measure_cold(self, worker_name: str) -> Dict[str, Any]:
+        """عمليات جديدة في كل مرة: زمن البدء وزمن أول طلب على اتصال جديد"""
+        startup = LatencyHistogram()
+        first_request = LatencyHistogram()
+        statuses = []
+        for _ in range(self.cold_runs):
+            process, port, startup_ms = await self.spawn(worker_name)
+            try:
+                async with aiohttp.ClientSession() as session:
+                    latency, status = await self._send(session, port, worker_name)
+                startup.record(startup_ms)
+                first_request.record(latency)
+                statuses.append(status)
+            finally:
+                await self.stop(process)
+
+        return {
+            'startup_ms': startup.summary(),
+            'first_request_ms': first_request.summary(),
+            'cold_start_ms': startup.mean + first_request.mean,
+            'statuses': sorted(set(statuses))
+        }
+
+    async def measure_warm(self, worker_name: str) -> Dict[str, Any]:
+        """عملية واحدة جاهزة: طلبات إحماء ثم سلسلة مستقرة بتزامن ثابت"""
+        # استيراد محلي: load_engine يحمّل Playwright ولا داعي لإبطاء بدء عمليات الـ Workers به
+        from load_engine import HttpLoadEngine
+
+        process, port, _ = await self.spawn(worker_name)
+        try:
+            method, path, body = WORKER_PROBES[worker_name]
+            async with HttpLoadEngine(f"http://127.0.0.1:{port}", limit_per_host=self.concurrency,
+                                      headers={'X-Branch-Id': '1'}) as engine:
+                await engine.run_endpoint(method, path, samples=min(10, self.warm_requests), data=body)
+
+                start = time.perf_counter()
+                samples = await engine.run_endpoint(method, path, samples=self.warm_requests,
+                                                    concurrency=self.concurrency, data=body)
+                elapsed = time.perf_counter() - start
+        finally:
+            await self.stop(process)
+
+        latency = LatencyHistogram()
+        errors = 0
+        for sample in samples:
+            if 'error' in sample or sample['status'] >= 400:
+                errors += 1
+            latency.record(sample['total_time'])
+
+        return {
+            'latency_ms': latency.summary(),
+            'throughput': len(samples) / elapsed if elapsed else 0,
+            'errors': errors,
+            'requests': len(samples),
+            'concurrency': self.concurrency
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        results = {}
+        for worker in self.architecture['workers']:
+            name = worker['name']
+            results[name] = {
+                'purpose': worker['purpose'],
+                'cold': await self.measure_cold(name),
+                'warm': await self.measure_warm(name)
+            }
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="بديل محلي لـ Cloudflare Workers")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--worker', required=True)
+    serve_parser.add_argument('--db', required=True)
+    serve_parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve_worker(args.worker, args.db, args.port))
+
+
+if __name__ == "__main__":
+    main()